@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+AI 链路端到端基准测试（离线，基于本地 OpenAI 兼容替身服务）
+
+测量不同批量大小下：
+- parse:   单次 AICommandService.parse 解析 N 行的延迟与行吞吐
+- execute: execute_operations 在一次批量提交中执行 N 个 ADD 的吞吐（含规则打标）
+- tag:     TaggingService 开启 LLM 打标时逐条打标的吞吐与延迟分位数
+- bulk:    bulk_import 并发导入 N 行的吞吐
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_ai_pipeline --sizes 1 10 50 200 --latency-ms 50
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger.config import Config  # noqa: E402
+from ledger.devtools.fake_openai import FakeOpenAIServer  # noqa: E402
+from ledger.services.metrics import registry  # noqa: E402
+
+
+def _lines(n: int):
+    # 不符合本地快速路径的行，强制走 LLM
+    return [f"和同事第{i}次聚餐AA花了{20 + i % 50}块钱" for i in range(n)]
+
+
+def _fresh_services(tmpdir: str, tag: str):
+    from ledger.services.transaction_service import TransactionService
+    from ledger.services.ai_service import AICommandService
+
+    Config.DATABASE_PATH = os.path.join(tmpdir, f"bench_{tag}.json")
+    if os.path.exists(Config.DATABASE_PATH):
+        os.remove(Config.DATABASE_PATH)
+    return AICommandService(TransactionService())
+
+
+def _pct(name: str, q: float) -> float:
+    hist = registry.histogram(name)
+    return (hist.percentile(q) or 0.0) if hist else 0.0
+
+
+def run(sizes, latency_ms: float, concurrency: int, stream: bool):
+    from ledger.services.tagging_service import TaggingService
+
+    rows = []
+    with FakeOpenAIServer(latency_ms=latency_ms, seed=0) as server, tempfile.TemporaryDirectory() as tmpdir:
+        Config.AI_ENABLED = True
+        Config.OPENAI_BASE_URL = server.base_url
+        Config.OPENAI_API_KEY = "bench"
+        Config.OPENAI_MODEL = "fake"
+        Config.AI_STREAM = stream
+        Config.AI_RATE_LIMIT = 0
+
+        for n in sizes:
+            text = "\n".join(_lines(n))
+
+            # parse
+            registry.reset()
+            ai = _fresh_services(tmpdir, f"parse_{n}")
+            t0 = time.perf_counter()
+            ops = ai.parse(text)
+            parse_s = time.perf_counter() - t0
+            rows.append(("parse", n, n / parse_s, _pct("llm.command.total_ms", 50),
+                         _pct("llm.command.first_token_ms", 50), _pct("llm.command.parse_ms", 50)))
+
+            # execute
+            Config.AI_AUTO_TAG_WITH_LLM = False
+            t0 = time.perf_counter()
+            with ai.ts.batch():
+                ai.execute_operations(ops)
+            exec_s = time.perf_counter() - t0
+            rows.append(("execute", n, len(ops) / exec_s, exec_s * 1000, 0.0, 0.0))
+
+            # tag
+            registry.reset()
+            Config.AI_AUTO_TAG_WITH_LLM = True
+            tagger = TaggingService()
+            t0 = time.perf_counter()
+            for line in _lines(n):
+                tagger.suggest_tags(line, "EXPENSE")
+            tag_s = time.perf_counter() - t0
+            Config.AI_AUTO_TAG_WITH_LLM = False
+            rows.append(("tag", n, n / tag_s, _pct("llm.tag.total_ms", 50),
+                         _pct("llm.tag.first_token_ms", 50), _pct("llm.tag.total_ms", 99)))
+
+            # bulk
+            registry.reset()
+            ai = _fresh_services(tmpdir, f"bulk_{n}")
+            result = ai.bulk_import(text, chunk_size=10, concurrency=concurrency, rate_limit=0)
+            rows.append(("bulk", n, result.lines_per_sec, _pct("llm.command.total_ms", 50),
+                         _pct("llm.command.first_token_ms", 50), _pct("llm.command.total_ms", 99)))
+
+        print(f"fake server: {server.stats}")
+
+    print(f"\nlatency={latency_ms}ms concurrency={concurrency} stream={stream}")
+    print(f"{'stage':<8} {'N':>6} {'items/s':>10} {'p50 ms':>10} {'ttft ms':>10} {'extra ms':>10}")
+    for stage, n, rate, p50, ttft, extra in rows:
+        print(f"{stage:<8} {n:>6} {rate:>10.1f} {p50:>10.1f} {ttft:>10.1f} {extra:>10.2f}")
+    print("extra: parse=JSON 解析 p50，execute=总耗时，tag/bulk=p99")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI 链路端到端基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--no-stream", action="store_true")
+    args = parser.parse_args()
+    Config.METRICS_FILE = ""  # 基准不覆盖用户的指标文件
+    run(args.sizes, args.latency_ms, args.concurrency, not args.no_stream)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+备份基准：连续多次“修改部分历史交易 + 新增交易”后备份，每次的耗时与新写入的字节数，
+与每次完整复制（及完整 gzip 压缩复制）的累计占用对比
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_backup --rows 100000 --runs 7
+"""
+
+import argparse
+import gzip
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_snapshot import write_ledger  # noqa: E402
+from ledger.config.settings import Config  # noqa: E402
+from ledger.models.transaction import Transaction  # noqa: E402
+from ledger.services.backup import BackupStore  # noqa: E402
+from ledger.services.transaction_service import TransactionService  # noqa: E402
+
+
+def edit(service: TransactionService, rng: random.Random, updates: int, adds: int):
+    """模拟一段时间的记账：修改若干历史交易并新增若干交易（一次保存）。"""
+    view = service.get_all_transactions()
+    targets = [view[rng.randrange(len(view))].transaction_id for _ in range(updates)]
+    with service.batch():
+        for tid in targets:
+            service.update_transaction(tid, description=f"改过{rng.random():.6f}")
+        for i in range(adds):
+            service.add_transaction(Transaction(amount=i + 1, transaction_type="EXPENSE", description=f"新增{i}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量去重备份与完整复制的耗时和占用对比")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--updates", type=int, default=20, help="每次备份之间修改的历史交易数")
+    parser.add_argument("--adds", type=int, default=50, help="每次备份之间新增的交易数")
+    args = parser.parse_args()
+
+    Config.SNAPSHOT_CACHE = False
+    rng = random.Random(47)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ledger.json")
+        write_ledger(path, args.rows)
+        Config.DATABASE_PATH = path
+        service = TransactionService()
+        store = BackupStore(root=os.path.join(tmp, "backups"), source=path)
+
+        print(f"{'run':>4} {'ledger MB':>10} {'backup ms':>10} {'new chunks':>11} {'written MB':>11} "
+              f"{'gzip copy MB':>13} {'gzip ms':>8}")
+        copies = gzip_copies = stored = 0
+        for run in range(args.runs):
+            if run:
+                edit(service, rng, args.updates, args.adds)
+            result = store.backup()
+            t0 = time.perf_counter()
+            with open(path, 'rb') as f:
+                gz = len(gzip.compress(f.read(), 6))
+            gzip_ms = (time.perf_counter() - t0) * 1000
+            size = os.path.getsize(path)
+            copies += size
+            gzip_copies += gz
+            stored += result.written_bytes
+            print(f"{run + 1:>4} {size / 1e6:>10.1f} {result.seconds * 1000:>10.1f} "
+                  f"{result.new_chunks:>5}/{result.total_chunks:<5} {result.written_bytes / 1e6:>11.2f} "
+                  f"{gz / 1e6:>13.2f} {gzip_ms:>8.1f}")
+        print(f"累计占用：完整复制 {copies / 1e6:.1f} MB，gzip 完整复制 {gzip_copies / 1e6:.1f} MB，"
+              f"去重备份 {stored / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
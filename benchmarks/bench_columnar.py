@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+列式格式基准：与 JSON 相比的加载、整体保存、追加保存耗时、文件大小，以及直接扫描列的统计耗时
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_columnar --sizes 100000 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_snapshot import write_ledger  # noqa: E402
+from ledger.config.settings import Config  # noqa: E402
+from ledger.models.transaction import Transaction  # noqa: E402
+from ledger.services import columnar  # noqa: E402
+from ledger.services.analytics_service import AnalyticsService  # noqa: E402
+from ledger.services.transaction_service import TransactionService  # noqa: E402
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - t0) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 与列式格式的加载、保存与统计耗时对比")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000])
+    args = parser.parse_args()
+
+    Config.SNAPSHOT_CACHE = False
+    print(f"numpy={'yes' if columnar._numpy() else 'no'}")
+    print(f"{'rows':>9} {'format':>9} {'MB':>7} {'load ms':>9} {'save ms':>9} {'append ms':>10} {'totals ms':>10}")
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ledger.json")
+            write_ledger(path, n)
+            target = columnar.data_path(path)
+            Config.DATABASE_PATH = path
+            for fmt in ("json", "columnar"):
+                Config.DATA_FORMAT = fmt
+                if fmt == "columnar":
+                    columnar.import_json(path, target)
+                load_ms, transactions = timed(lambda: TransactionService.read_transactions(path))
+                service = TransactionService(load=False)
+                service.set_loaded_transactions(transactions)
+                service._dirty = True
+                service._persisted = None
+                save_ms, _ = timed(service.flush)
+                service.transactions.append(Transaction(amount=1.0, transaction_type="EXPENSE",
+                                                        description="追加", date=transactions[-1].date))
+                service._dirty = True
+                append_ms, _ = timed(service.flush)  # 列式格式只追加一段，JSON 仍整体重写
+                if fmt == "json":
+                    analytics = AnalyticsService(service)
+                    totals_ms, _ = timed(lambda: analytics.compute_totals(service.get_all_transactions()))
+                    size = os.path.getsize(path)
+                else:
+                    def scan():
+                        with columnar.ColumnarFile(target) as f:
+                            return f.totals()
+                    totals_ms, _ = timed(scan)
+                    size = os.path.getsize(target)
+                print(f"{n:>9} {fmt:>9} {size / 1e6:>7.1f} {load_ms:>9.1f} {save_ms:>9.1f} {append_ms:>10.1f} {totals_ms:>10.1f}")
+                del transactions, service
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+压缩存储基准：明文 JSON、gzip 与 zstd（安装了 zstandard 时）账本的文件大小、保存与加载耗时
+
+保存为 durable.save（含 fsync 与清单），加载为服务的完整加载路径（流式解析并构建交易对象，
+不使用快照缓存）。--read-mbps 按给定的磁盘读取速度估算冷启动的读盘时间，便于比较慢速磁盘上的收益。
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_compress --sizes 10000 100000 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_snapshot import write_ledger  # noqa: E402
+from ledger.config.settings import Config  # noqa: E402
+from ledger.services import compress, durable  # noqa: E402
+from ledger.services.transaction_service import TransactionService  # noqa: E402
+
+
+def best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="明文与压缩账本的大小、保存与加载耗时对比")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--read-mbps", type=float, default=100, help="估算读盘时间所用的磁盘读取速度（MB/s）")
+    args = parser.parse_args()
+
+    Config.SNAPSHOT_CACHE = False
+    codecs = [None, compress.GZIP] + ([compress.ZSTD] if compress.available(compress.ZSTD) else [])
+    if compress.ZSTD not in codecs:
+        print("（未安装 zstandard，跳过 zstd）")
+    print(f"{'rows':>9} {'format':>6} {'size MB':>8} {'ratio':>6} {'save ms':>8} {'load ms':>8} {'disk ms':>8}")
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "source.json")
+            write_ledger(source, n)
+            with open(source, encoding='utf-8') as f:
+                data = json.load(f)
+            plain_size = None
+            for codec in codecs:
+                path = os.path.join(tmp, f"ledger-{codec or 'json'}.json")
+                save = best_ms(lambda: durable.save(
+                    path, lambda f: json.dump(data, f, indent=2, ensure_ascii=False), codec), args.repeat)
+                size = os.path.getsize(path)
+                plain_size = plain_size or size
+                Config.DATABASE_PATH = path
+                load = best_ms(lambda: TransactionService().get_all_transactions(), args.repeat)
+                disk = size / (args.read_mbps * 1e6) * 1000
+                print(f"{n:>9} {codec or 'json':>6} {size / 1e6:>8.2f} {plain_size / size:>5.1f}x "
+                      f"{save:>8.1f} {load:>8.1f} {disk:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
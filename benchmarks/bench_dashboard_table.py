@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+仪表盘交易表格基准：不同行数下的填充耗时与内存增量
+
+在 offscreen 平台上创建 TransactionTableView，填充 N 条合成交易并完成一次绘制，
+报告耗时与进程常驻内存（RSS）的增量。
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_dashboard_table --sizes 1000 20000 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="仪表盘交易表格基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 20000, 100000])
+    args = parser.parse_args()
+
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+
+    from ledger.models.transaction import Transaction
+    from ledger.ui.transaction_table import TransactionTableView
+
+    print(f"{'rows':>8} {'populate ms':>12} {'rss +MB':>9}")
+    for n in args.sizes:
+        rows = [Transaction(amount=i % 500 + 0.5, transaction_type="EXPENSE" if i % 3 else "INCOME",
+                            description=f"合成交易 {i}", tags=["餐饮", "测试"]) for i in range(n)]
+        view = TransactionTableView()
+        view.resize(1400, 900)
+        view.show()
+        app.processEvents()
+        before = _rss_mb()
+        t0 = time.perf_counter()
+        view.set_transactions(rows)
+        view.viewport().repaint()
+        app.processEvents()
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(f"{n:>8} {elapsed:>12.1f} {_rss_mb() - before:>9.1f}")
+        view.close()
+        view.deleteLater()
+        app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
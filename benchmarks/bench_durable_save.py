@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+崩溃安全保存基准：直接覆盖写入与 durable.save（临时文件 + fsync + 清单 + 改名）的保存耗时对比，
+以及加载前校验（recover）的耗时
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_durable_save --sizes 10000 100000 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_snapshot import write_ledger  # noqa: E402
+from ledger.services import durable, snapshot  # noqa: E402
+
+
+def plain_save(path: str, data: list):
+    """原来的保存方式：直接以 'w' 打开并写入，再计算快照标识。"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    snapshot.source_key(path)
+
+
+def durable_save(path: str, data: list):
+    durable.save(path, lambda f: json.dump(data, f, indent=2, ensure_ascii=False))
+
+
+def best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="直接写入与崩溃安全保存的耗时对比")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'plain ms':>10} {'durable ms':>11} {'overhead':>9} {'recover ms':>11}")
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "source.json")
+            write_ledger(source, n)
+            with open(source, encoding='utf-8') as f:
+                data = json.load(f)
+            path = os.path.join(tmp, "ledger.json")
+            plain = best_ms(lambda: plain_save(path, data), args.repeat)
+            os.remove(path)
+            safe = best_ms(lambda: durable_save(path, data), args.repeat)
+            recover = best_ms(lambda: durable.recover(path), args.repeat)
+            print(f"{n:>9} {plain:>10.1f} {safe:>11.1f} {(safe / plain - 1) * 100:>8.1f}% {recover:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+变更事件基准：修改一条交易后刷新仪表盘与统计的耗时——重新拉取全部交易并重算，
+与按事件增量更新（IncrementalFilter.apply + 复用结果、按日汇总）对比
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_events --rows 10000 100000 --edits 50
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, time as dtime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_snapshot import write_ledger  # noqa: E402
+from ledger.config.settings import Config  # noqa: E402
+from ledger.services import events  # noqa: E402
+from ledger.services.analytics_service import AnalyticsService  # noqa: E402
+from ledger.services.search import IncrementalFilter, TransactionQuery  # noqa: E402
+from ledger.services.transaction_service import TransactionService  # noqa: E402
+
+
+def run(path: str, edits: int):
+    """返回 (全量刷新 ms/次, 增量刷新 ms/次)，每次刷新包括仪表盘筛选与一个月区间的统计报表。"""
+    Config.DATABASE_PATH = path
+    service = TransactionService()
+    transactions = service.get_all_transactions()
+    days = sorted(t.date.date() for t in transactions)
+    start, end = days[len(days) // 2], days[-1]
+    query = TransactionQuery(start=start, end=end)
+    report_range = (datetime.combine(start, dtime.min), datetime.combine(end, dtime.max), None)
+    ids = [t.transaction_id for t in transactions[:edits]]
+
+    analytics = AnalyticsService(service)
+    search = IncrementalFilter(service.get_all_transactions())
+    search.run(query)
+    analytics.build_report(*report_range)
+    changes = []
+    service.events.subscribe(changes.append, *events.CHANGE_EVENTS)
+
+    full = incremental = 0.0
+    for i, transaction_id in enumerate(ids):
+        service.update_transaction(transaction_id, amount=float(i + 1), description=f"修改{i}")
+
+        t0 = time.perf_counter()
+        for change in changes:
+            search.apply(change)
+        changes.clear()
+        search.run(query)
+        analytics.build_report(*report_range)
+        incremental += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        IncrementalFilter(service.get_all_transactions()).run(query)
+        items = analytics.filter_transactions(*report_range)
+        analytics.compute_totals(items)
+        analytics.compute_monthly_summary(items)
+        analytics.compute_tag_summary(items)
+        full += time.perf_counter() - t0
+    analytics.close()
+    return full / len(ids) * 1000, incremental / len(ids) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="全量重算与按事件增量更新的刷新耗时对比")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--edits", type=int, default=50)
+    args = parser.parse_args()
+
+    Config.SNAPSHOT_CACHE = False
+    print(f"{'rows':>9} {'full ms':>9} {'events ms':>10} {'speedup':>8}")
+    for n in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ledger.json")
+            write_ledger(path, n)
+            full, incremental = run(path, args.edits)
+            print(f"{n:>9} {full:>9.2f} {incremental:>10.2f} {full / incremental:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+多进程共享账本基准：空闲检查（只 stat）的开销、加锁保存与不加锁保存的耗时，
+以及另一个进程修改一条交易后增量合并（sync_external）与整体重新加载的耗时
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_file_lock --rows 10000 100000 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_snapshot import write_ledger  # noqa: E402
+from ledger.config.settings import Config  # noqa: E402
+from ledger.services.transaction_service import TransactionService  # noqa: E402
+
+
+def _save_ms(service: TransactionService, locking: bool, repeat: int) -> float:
+    Config.FILE_LOCKING = locking
+    service._tracks_external = locking
+    transaction_id = service.transactions[0].transaction_id
+    total = 0.0
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        service.update_transaction(transaction_id, amount=float(i + 1))
+        total += time.perf_counter() - t0
+    Config.FILE_LOCKING = True
+    return total / repeat * 1000
+
+
+def run(path: str, repeat: int):
+    """返回 (空闲检查 µs, 不加锁保存 ms, 加锁保存 ms, 整体重新加载 ms, 增量合并 ms)。"""
+    Config.DATABASE_PATH = path
+    local, other = TransactionService(), TransactionService()
+
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        local.sync_external()
+    idle = (time.perf_counter() - t0) / 1000 * 1e6
+
+    unlocked = _save_ms(other, False, repeat)
+    locked = _save_ms(other, True, repeat)
+    local.sync_external()
+
+    reload = merge = 0.0
+    for i in range(repeat):
+        other.update_transaction(other.transactions[i + 1].transaction_id, description=f"外部修改{i}")
+        t0 = time.perf_counter()
+        local.set_loaded_transactions(TransactionService.read_transactions(path))
+        reload += time.perf_counter() - t0
+        other.update_transaction(other.transactions[i + 1].transaction_id, description=f"再次修改{i}")
+        t0 = time.perf_counter()
+        assert local.sync_external() == 1
+        merge += time.perf_counter() - t0
+    return idle, unlocked, locked, reload / repeat * 1000, merge / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文件锁与外部修改增量合并的开销")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Config.SNAPSHOT_CACHE = False
+    Config.WRITE_BEHIND_MS = 0
+    print(f"{'rows':>9} {'idle µs':>8} {'save ms':>8} {'+lock ms':>9} {'reload ms':>10} {'merge ms':>9}")
+    for n in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ledger.json")
+            write_ledger(path, n)
+            idle, unlocked, locked, reload, merge = run(path, args.repeat)
+            print(f"{n:>9} {idle:>8.1f} {unlocked:>8.1f} {locked:>9.1f} {reload:>10.1f} {merge:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
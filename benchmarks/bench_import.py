@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+导入耗时基准：基于 `python -X importtime` 统计导入各入口模块的累计耗时与最重的依赖
+
+每次测量在新的子进程中进行，取多次运行的中位数。指定 --budget-ms 时，任一入口超出预算、
+或导入了 --forbid 中的模块（默认 openai、PyQt5 对无界面入口而言不应出现）即以非零状态退出，
+可作为 CI 中的启动耗时守卫。
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --modules ledger.services.transaction_service --budget-ms 150
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ["ledger.services", "ledger.services.transaction_service", "ledger.cli"]
+DEFAULT_FORBID = ["openai", "PyQt5"]
+
+
+def import_times(module: str) -> Tuple[Dict[str, int], float]:
+    """在子进程中导入 module，返回 ({模块: 累计微秒}, 目标模块累计毫秒)。"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    cumulative: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cum_us, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cum_us)
+    # 导入 a.b.c 时父包嵌套在其下，目标模块的累计耗时即总耗时
+    total = cumulative.get(module, 0) / 1000
+    return cumulative, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导入耗时基准（-X importtime）")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="列出累计耗时最高的依赖数")
+    parser.add_argument("--budget-ms", type=float, default=0, help="每个入口的导入预算，0 表示不检查")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBID, help="不允许被导入的模块")
+    args = parser.parse_args()
+
+    # 解释器启动时已导入的模块（site、encodings 等）不计入依赖排行
+    baseline = set(import_times("sys")[0])
+    failures: List[str] = []
+    for module in args.modules:
+        totals, last = [], {}
+        for _ in range(args.runs):
+            last, total = import_times(module)
+            totals.append(total)
+        median = statistics.median(totals)
+        print(f"{module:<40} median={median:8.1f} ms  modules={len(last)}")
+        heaviest = sorted(((us, name) for name, us in last.items()
+                           if name not in baseline and name != module
+                           and not module.startswith(name + ".")), reverse=True)
+        for us, name in heaviest[:args.top]:
+            print(f"    {name:<36} {us / 1000:8.1f} ms")
+        forbidden = sorted(name for name in last if name.split(".")[0] in args.forbid)
+        if forbidden:
+            failures.append(f"{module} 导入了 {', '.join(forbidden[:5])}")
+        if args.budget_ms and median > args.budget_ms:
+            failures.append(f"{module} 导入耗时 {median:.1f} ms 超出预算 {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
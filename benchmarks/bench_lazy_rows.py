@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+惰性行基准：加载后的常驻内存、get_all_transactions 与汇总耗时（全部构建对象 vs LAZY_ROWS）
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_lazy_rows --rows 100000 500000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_snapshot import write_ledger  # noqa: E402
+from ledger.config.settings import Config  # noqa: E402
+from ledger.services.transaction_service import TransactionService  # noqa: E402
+
+
+def measure(path: str, lazy: bool):
+    """返回 (加载 ms, 常驻 MB, get_all_transactions µs, 汇总 ms)。"""
+    Config.DATABASE_PATH, Config.LAZY_ROWS = path, lazy
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    service = TransactionService()
+    len(service.get_all_transactions())
+    load_ms = (time.perf_counter() - t0) * 1000
+    resident = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    for _ in range(100):
+        service.get_all_transactions()
+    view_us = (time.perf_counter() - t0) / 100 * 1e6
+
+    t0 = time.perf_counter()
+    service.get_transaction_summary()
+    summary_ms = (time.perf_counter() - t0) * 1000
+    return load_ms, resident, view_us, summary_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="惰性行与全部构建对象的内存和耗时对比")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000])
+    args = parser.parse_args()
+
+    Config.SNAPSHOT_CACHE = False
+    print(f"{'rows':>9} {'mode':>6} {'load ms':>9} {'resident MB':>12} {'get_all µs':>11} {'summary ms':>11}")
+    for n in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ledger.json")
+            write_ledger(path, n)
+            for lazy in (False, True):
+                load_ms, resident, view_us, summary_ms = measure(path, lazy)
+                print(f"{n:>9} {'lazy' if lazy else 'eager':>6} {load_ms:>9.1f} {resident:>12.1f} "
+                      f"{view_us:>11.1f} {summary_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+加载内存基准：json.load 与流式解析读取交易文件的耗时、稳态内存与峰值内存（tracemalloc）
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_load_memory --rows 100000 500000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_snapshot import write_ledger  # noqa: E402
+from ledger.config.settings import Config  # noqa: E402
+from ledger.models.transaction import Transaction  # noqa: E402
+from ledger.services.transaction_service import TransactionService  # noqa: E402
+
+
+def load_with_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [Transaction.from_dict(item) for item in json.load(f)]
+
+
+def measure(fn, path: str):
+    t0 = time.perf_counter()
+    fn(path)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    tracemalloc.start()
+    result = fn(path)
+    steady, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed_ms, steady / 1e6, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="json.load 与流式解析的内存对比")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000])
+    args = parser.parse_args()
+
+    Config.SNAPSHOT_CACHE = False  # 只比较解析本身
+    print(f"{'rows':>9} {'loader':<8} {'ms':>8} {'steady MB':>10} {'peak MB':>9} {'peak/steady':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            path = os.path.join(tmp, f"ledger_{n}.json")
+            write_ledger(path, n)
+            for name, fn in (("json", load_with_json), ("stream", TransactionService.read_transactions)):
+                ms, steady, peak = measure(fn, path)
+                print(f"{n:>9} {name:<8} {ms:>8.0f} {steady:>10.1f} {peak:>9.1f} {peak / steady:>11.2f}x")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+并行加载基准：不同进程数下解析并校验大交易文件（不使用快照缓存）的耗时
+
+进程池只并行 JSON 解析、日期解析与字段校验；交易对象在主进程中构建，
+因此加速比受主进程的构建与结果回传开销限制，且需要多核机器才能体现。
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_parallel_load --rows 1000000 --workers 1 2 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_snapshot import write_ledger  # noqa: E402
+from ledger.config.settings import Config  # noqa: E402
+from ledger.services import parallel_load  # noqa: E402
+from ledger.services.transaction_service import TransactionService  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="不同进程数下的大文件加载耗时")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    Config.SNAPSHOT_CACHE = False
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ledger.json")
+        write_ledger(path, args.rows)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"rows={args.rows} size={size_mb:.1f}MB cpus={os.cpu_count()} "
+              f"parallel_min={parallel_load.PARALLEL_MIN_BYTES >> 20}MB")
+        print(f"{'workers':>8} {'load ms':>10} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            Config.LOAD_WORKERS = workers
+            t0 = time.perf_counter()
+            loaded = TransactionService.read_transactions(path)
+            ms = (time.perf_counter() - t0) * 1000
+            assert len(loaded) == args.rows
+            del loaded
+            baseline = baseline or ms
+            print(f"{workers:>8} {ms:>10.1f} {baseline / ms:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+分区存储基准：修改一条历史交易后保存的耗时与写入量（单文件布局 vs 按月分区）
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_partition_save --rows 100000 500000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_snapshot import write_ledger  # noqa: E402
+from ledger.config.settings import Config  # noqa: E402
+from ledger.services.transaction_service import TransactionService  # noqa: E402
+
+FIRST_DAY = datetime(2015, 1, 1, 23, 59)  # write_ledger 生成的第一天
+
+
+def written_bytes(directory: str, since_ns: int) -> int:
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            st = os.stat(os.path.join(root, name))
+            if st.st_mtime_ns >= since_ns:
+                total += st.st_size
+    return total
+
+
+def edit_oldest(path: str, layout: str):
+    """打开账本、修改最早的一条交易并保存，返回 (保存耗时 ms, 写入字节数)。"""
+    Config.DATABASE_PATH = path
+    Config.PARTITION_BY = layout
+    service = TransactionService()
+    # 分区布局下按日期范围查询只加载第一个月的分区
+    oldest = service.search_transactions(end_date=FIRST_DAY)[0]
+    start_ns = time.time_ns()
+    t0 = time.perf_counter()
+    service.update_transaction(oldest.transaction_id, description="改过")
+    ms = (time.perf_counter() - t0) * 1000
+    return ms, written_bytes(os.path.dirname(path), start_ns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="修改一条历史交易后的保存耗时与写入量")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000])
+    args = parser.parse_args()
+
+    Config.SNAPSHOT_CACHE = False
+    print(f"{'rows':>9} {'layout':>8} {'save ms':>9} {'written MB':>11}")
+    for n in args.rows:
+        for layout in ("", "month"):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "ledger.json")
+                write_ledger(path, n)
+                if layout:
+                    Config.DATABASE_PATH, Config.PARTITION_BY = path, layout
+                    TransactionService.open_store(path).open()  # 迁移不计入保存耗时
+                ms, written = edit_oldest(path, layout)
+                print(f"{n:>9} {layout or 'single':>8} {ms:>9.1f} {written / 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+全账本重新打标基准：不同进程数下的行吞吐与加速比
+
+在合成账本上训练本地模型（使多数行走模型预测而非关键词规则），然后分别以
+不同 --workers 运行 retag_ledger（dry-run，不计写回）。
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_retag --rows 200000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_tag_classifier import synthetic  # noqa: E402
+from ledger.config import Config  # noqa: E402
+from ledger.services.tag_classifier import TagClassifier  # noqa: E402
+from ledger.services.tagging_service import TaggingService  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="全账本重新打标基准")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    from ledger.services.retag import retag_ledger
+    from ledger.services.transaction_service import TransactionService
+
+    rows = synthetic(args.rows)
+    for t in rows:
+        t.auto_labeled = True
+    model = TagClassifier()
+    model.fit(rows[: len(rows) // 5])
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Config.DATABASE_PATH = os.path.join(tmpdir, "bench_retag.json")
+        service = TransactionService()
+        with service.batch():
+            for t in rows:
+                service.add_transaction(t)
+        tagger = TaggingService(classifier=model)
+
+        print(f"rows={args.rows} chunk={args.chunk_size} cpus={os.cpu_count()}")
+        print(f"{'workers':>7} {'seconds':>9} {'rows/s':>10} {'speedup':>8} {'changes':>8}")
+        base = None
+        for n in args.workers:
+            result = retag_ledger(service, workers=n, chunk_size=args.chunk_size, dry_run=True, tagger=tagger)
+            base = base or result.elapsed
+            print(f"{n:>7} {result.elapsed:>9.2f} {result.rows_per_sec:>10.0f} "
+                  f"{base / result.elapsed:>8.2f} {len(result.changes):>8}")
+
+
+if __name__ == "__main__":
+    main()
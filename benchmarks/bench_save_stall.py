@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+保存卡顿基准：界面线程上每次修改的阻塞时间（同步保存 vs 后台 IO 线程）
+
+对 N 条交易的账本连续执行若干次 add_transaction，统计调用方线程上的耗时分位数，
+以及后台模式下合并后的实际写盘次数。
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_save_stall --rows 20000 --edits 50
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from ledger.config import Config  # noqa: E402
+from ledger.models.transaction import Transaction  # noqa: E402
+from ledger.services.metrics import Histogram  # noqa: E402
+
+
+def _edits(service, n: int) -> Histogram:
+    hist = Histogram()
+    for i in range(n):
+        t0 = time.perf_counter()
+        service.add_transaction(Transaction(amount=i + 1, transaction_type="EXPENSE", description=f"编辑{i}"))
+        hist.observe((time.perf_counter() - t0) * 1000)
+    return hist
+
+
+def main():
+    parser = argparse.ArgumentParser(description="保存卡顿基准")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--edits", type=int, default=50)
+    args = parser.parse_args()
+
+    from PyQt5.QtCore import QCoreApplication
+    from ledger.services.transaction_service import TransactionService
+    from ledger.ui.io_worker import PersistenceWorker
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Config.DATABASE_PATH = os.path.join(tmpdir, "bench_save.json")
+        seed = TransactionService()
+        with seed.batch():
+            for i in range(args.rows):
+                seed.add_transaction(Transaction(amount=i % 300 + 1, transaction_type="EXPENSE",
+                                                 description=f"历史交易{i}", tags=["餐饮"]))
+
+        sync = _edits(TransactionService(), args.edits).summary()
+
+        service = TransactionService()
+        worker = PersistenceWorker(service).attach()
+        background = _edits(service, args.edits).summary()
+        t0 = time.perf_counter()
+        worker.wait()
+        app.processEvents()
+        settle = (time.perf_counter() - t0) * 1000
+        assert len(TransactionService().get_all_transactions()) == args.rows + 2 * args.edits
+
+    print(f"rows={args.rows} edits={args.edits}")
+    print(f"{'mode':<11} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'writes':>7}")
+    print(f"{'sync':<11} {sync['p50']:>9.2f} {sync['p99']:>9.2f} {sync['max']:>9.2f} {args.edits:>7}")
+    print(f"{'background':<11} {background['p50']:>9.3f} {background['p99']:>9.3f} {background['max']:>9.3f} "
+          f"{worker.saves:>7}")
+    print(f"后台写盘在最后一次修改后 {settle:.0f}ms 内完成")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+边输入边搜索基准：逐字输入关键字时每次筛选的耗时（全量扫描 vs 复用上次结果）
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_search --rows 100000 --keyword 午饭12
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger.models.transaction import Transaction  # noqa: E402
+from ledger.services.search import IncrementalFilter, TransactionQuery  # noqa: E402
+
+WORDS = ["午饭", "晚饭", "地铁", "打车", "淘宝", "电影", "房租", "咖啡", "超市", "工资"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="边输入边搜索基准")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--keyword", default="午饭12")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    base = datetime(2020, 1, 1)
+    rows = [Transaction(amount=rng.uniform(1, 500), transaction_type=rng.choice(["INCOME", "EXPENSE"]),
+                        description=f"{rng.choice(WORDS)}{i}", date=base + timedelta(days=i % 2000),
+                        tags=[rng.choice(WORDS)]) for i in range(args.rows)]
+    start, end = base.date(), (base + timedelta(days=2000)).date()
+    prefixes = [args.keyword[:n] for n in range(1, len(args.keyword) + 1)]
+
+    print(f"rows={args.rows}")
+    print(f"{'keyword':<10} {'full ms':>9} {'incr ms':>9} {'scanned':>9} {'hits':>7}")
+    full = IncrementalFilter(rows)
+    incremental = IncrementalFilter(rows)
+    # 预热小写文本缓存（首次输入时建立）
+    incremental.run(TransactionQuery(keyword="\0", start=start, end=end))
+    full.run(TransactionQuery(keyword="\0", start=start, end=end))
+    for prefix in prefixes:
+        q = TransactionQuery(keyword=prefix, start=start, end=end)
+        full._last = None  # 强制全量扫描作为对照
+        t0 = time.perf_counter()
+        full.run(q)
+        full_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        hits = incremental.run(q)
+        incr_ms = (time.perf_counter() - t0) * 1000
+        print(f"{prefix:<10} {full_ms:>9.2f} {incr_ms:>9.2f} {incremental.last_scanned:>9} {len(hits):>7}")
+
+
+if __name__ == "__main__":
+    main()
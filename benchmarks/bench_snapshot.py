@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+启动加载基准：解析 JSON（冷启动）与加载二进制快照（热启动）的耗时对比
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_snapshot --sizes 10000 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger.config.settings import Config  # noqa: E402
+from ledger.services import snapshot  # noqa: E402
+from ledger.services.transaction_service import TransactionService  # noqa: E402
+
+WORDS = ["午饭", "晚饭", "地铁", "打车", "淘宝", "电影", "房租", "咖啡", "超市", "工资"]
+
+
+def write_ledger(path: str, rows: int):
+    base = datetime(2015, 1, 1)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{
+            "transaction_id": f"{i:032x}",
+            "amount": round(i % 997 + 0.5, 2),
+            "transaction_type": "INCOME" if i % 10 == 0 else "EXPENSE",
+            "date": (base + timedelta(minutes=7 * i)).isoformat(),
+            "description": f"{WORDS[i % len(WORDS)]}{i}",
+            "is_recurring": False,
+            "auto_labeled": bool(i % 2),
+            "tags": [WORDS[i % len(WORDS)]],
+        } for i in range(rows)], f, indent=2, ensure_ascii=False)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - t0) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 冷启动与快照热启动加载耗时对比")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'json MB':>8} {'snap MB':>8} {'cold ms':>9} {'warm ms':>9} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = os.path.join(tmp, f"ledger_{n}.json")
+            write_ledger(path, n)
+            Config.SNAPSHOT_CACHE = False
+            cold_ms, cold = timed(lambda: TransactionService.read_transactions(path))
+            Config.SNAPSHOT_CACHE = True
+            TransactionService.read_transactions(path)  # 解析并在后台重建快照
+            snapshot.wait_rebuild()
+            warm_ms, warm = timed(lambda: TransactionService.read_transactions(path))
+            assert len(cold) == len(warm) == n
+            json_mb = os.path.getsize(path) / 1e6
+            snap_mb = os.path.getsize(snapshot.snapshot_path(path)) / 1e6
+            print(f"{n:>9} {json_mb:>8.1f} {snap_mb:>8.1f} {cold_ms:>9.1f} {warm_ms:>9.1f} {cold_ms / warm_ms:>7.1f}x")
+            del cold, warm
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+启动基准：离屏平台下测量主窗口从导入到首帧绘制、首批数据显示、到数据加载完成的耗时
+
+每次测量在独立子进程中进行，避免模块缓存影响导入耗时；取多次运行的中位数。
+--eager-analytics 在构建窗口时立即创建统计页（模拟延迟构建之前的行为）作为对照。
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_startup --rows 20000 --runs 5
+    python -m benchmarks.bench_startup --rows 20000 --runs 5 --eager-analytics
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PHASES = ("import_ms", "window_ms", "first_paint_ms", "first_rows_ms", "loaded_ms")
+
+
+def child(data_path: str, eager_analytics: bool):
+    """子进程：启动窗口并输出各阶段距进程开始的毫秒数（JSON）。"""
+    t0 = time.perf_counter()
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from PyQt5.QtCore import QEvent, QObject, QTimer
+    from PyQt5.QtWidgets import QApplication
+
+    from ledger.config import Config
+    Config.DATABASE_PATH = data_path
+    from ledger.ui.main_window import MainWindow
+    marks = {"import_ms": (time.perf_counter() - t0) * 1000}
+
+    app = QApplication([])
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):  # noqa: N802
+            if event.type() == QEvent.Type.Paint and "first_paint_ms" not in marks:
+                marks["first_paint_ms"] = (time.perf_counter() - t0) * 1000
+            return False
+
+    paint_filter = FirstPaint()
+    app.installEventFilter(paint_filter)
+
+    window = MainWindow()
+    if eager_analytics:
+        window.analytics_page.ensure_page()
+    marks["window_ms"] = (time.perf_counter() - t0) * 1000
+
+    def on_loaded(_rows):
+        marks["loaded_ms"] = (time.perf_counter() - t0) * 1000
+
+    def on_chunk(_rows):
+        marks.setdefault("first_rows_ms", (time.perf_counter() - t0) * 1000)
+
+    window.io.chunk_loaded.connect(on_chunk)
+    window.io.loaded.connect(on_loaded)
+    window.show()
+
+    def poll():
+        if "first_paint_ms" in marks and "loaded_ms" in marks:
+            app.quit()
+
+    timer = QTimer()
+    timer.timeout.connect(poll)
+    timer.start(5)
+    QTimer.singleShot(30000, app.quit)
+    app.exec_()
+    window.io.shutdown()
+    print(json.dumps(marks))
+
+
+def make_ledger(path: str, rows: int):
+    from datetime import datetime, timedelta
+    from ledger.models.transaction import Transaction
+    base = datetime(2020, 1, 1)
+    data = [Transaction(amount=i % 500 + 0.5, transaction_type="EXPENSE" if i % 4 else "INCOME",
+                        description=f"交易{i}", date=base + timedelta(hours=i), tags=["餐饮"]).to_dict()
+            for i in range(rows)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离屏启动耗时基准")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--eager-analytics", action="store_true", help="立即构建统计页作为对照")
+    parser.add_argument("--child", metavar="DATA", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.eager_analytics)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, "ledger.json")
+        make_ledger(data_path, args.rows)
+        cmd = [sys.executable, "-m", "benchmarks.bench_startup", "--child", data_path]
+        if args.eager_analytics:
+            cmd.append("--eager-analytics")
+        results = []
+        for _ in range(args.runs):
+            out = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"rows={args.rows} runs={args.runs} eager_analytics={args.eager_analytics}")
+    for phase in PHASES:
+        values = [r[phase] for r in results if phase in r]
+        if values:
+            print(f"{phase:<16} median={statistics.median(values):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+本地标签模型基准：训练耗时、单条预测延迟与留出准确率
+
+默认用合成的带标签历史；指定 --ledger 时改用真实账本（DATABASE_PATH）。
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_tag_classifier --sizes 1000 10000 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger.models.transaction import Transaction  # noqa: E402
+from ledger.services.tag_classifier import evaluate  # noqa: E402
+
+VOCAB = {
+    "餐饮": ["午饭", "晚饭", "早餐", "外卖", "奶茶", "火锅", "咖啡", "食堂"],
+    "出行": ["地铁", "打车", "公交卡充值", "高铁票", "加油", "停车费"],
+    "购物": ["淘宝", "京东", "超市", "衣服", "鞋子", "日用品"],
+    "娱乐": ["电影", "游戏充值", "KTV", "演唱会", "剧本杀"],
+    "宠物": ["猫粮", "狗粮", "猫砂", "宠物医院"],
+    "学习": ["网课", "买书", "考试报名", "打印"],
+    "医疗": ["挂号", "买药", "体检", "牙科"],
+    "住房": ["房租", "物业费", "水电费", "宽带"],
+}
+SUFFIXES = ["", "一次", "（周末）", "和朋友", "-补记", "AA", "月卡"]
+
+
+def synthetic(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    tags = list(VOCAB)
+    rows = []
+    for _ in range(n):
+        tag = rng.choice(tags)
+        desc = rng.choice(SUFFIXES[:3]) + rng.choice(VOCAB[tag]) + rng.choice(SUFFIXES)
+        rows.append(Transaction(amount=rng.uniform(1, 500), transaction_type="EXPENSE",
+                                description=desc, tags=[tag]))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地标签模型基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--ledger", action="store_true", help="使用 DATABASE_PATH 中的真实交易")
+    parser.add_argument("--holdout", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.ledger:
+        from ledger.services.transaction_service import TransactionService
+        datasets = [("ledger", TransactionService().get_all_transactions())]
+    else:
+        datasets = [(str(n), synthetic(n)) for n in args.sizes]
+
+    print(f"{'rows':>8} {'train ms':>10} {'features':>9} {'accuracy':>9} {'coverage':>9} {'p50 µs':>8} {'p99 µs':>8}")
+    for name, rows in datasets:
+        r = evaluate(rows, holdout=args.holdout)
+        print(f"{name:>8} {r['train_ms']:>10.1f} {r['features']:>9} {r['accuracy']:>9.1%} "
+              f"{r['coverage']:>9.1%} {r['latency_us_p50']:>8.0f} {r['latency_us_p99']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+写后合并基准：连续修改多条交易（含原样提交的无变化更新）的总耗时与实际写盘次数
+（每次修改同步保存 vs WRITE_BEHIND_MS）
+
+用法（在仓库根目录）：
+    python -m benchmarks.bench_write_behind --rows 100000 --edits 50 --delay-ms 500
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_snapshot import write_ledger  # noqa: E402
+from ledger.config.settings import Config  # noqa: E402
+from ledger.services.transaction_service import TransactionService  # noqa: E402
+
+
+def run(path: str, edits: int, delay_ms: int):
+    """返回 (修改耗时 ms, 含最终写盘的耗时 ms, 写盘次数, 跳过的无变化更新)。"""
+    Config.DATABASE_PATH, Config.WRITE_BEHIND_MS = path, delay_ms
+    service = TransactionService()
+    scheduler = service.save_handler.__self__ if delay_ms else None
+    targets = list(service.get_all_transactions()[:edits])
+    writes = 0
+    t0 = time.perf_counter()
+    for i, t in enumerate(targets):
+        # 一半为编辑对话框原样提交（值未变化）
+        description = t.description if i % 2 else f"改过{i}"
+        service.update_transaction(t.transaction_id, description=description, amount=t.amount)
+        writes += 0 if scheduler or i % 2 else 1
+    edit_ms = (time.perf_counter() - t0) * 1000
+    if scheduler:
+        scheduler.close()
+        writes = scheduler.flushes
+    total_ms = (time.perf_counter() - t0) * 1000
+    return edit_ms, total_ms, writes, service.skipped_updates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="写后合并与同步保存的耗时和写盘次数对比")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--edits", type=int, default=50)
+    parser.add_argument("--delay-ms", type=int, default=500)
+    args = parser.parse_args()
+
+    Config.SNAPSHOT_CACHE = False
+    print(f"{'mode':>12} {'edit ms':>10} {'total ms':>10} {'writes':>7} {'skipped':>8}")
+    for delay in (0, args.delay_ms):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ledger.json")
+            write_ledger(path, args.rows)
+            edit_ms, total_ms, writes, skipped = run(path, args.edits, delay)
+            mode = f"behind {delay}ms" if delay else "sync"
+            print(f"{mode:>12} {edit_ms:>10.1f} {total_ms:>10.1f} {writes:>7} {skipped:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 """
 个人记账本系统 - 模块入口
-允许通过 `python -m ledger` 运行应用。
+允许通过 `python -m ledger` 运行应用；第一个参数是子命令时进入命令行工具，
+例如 `python -m ledger import-text notes.txt`，其余参数（如 `-style fusion`）交给 Qt。
 """
 
 import sys
-from .app import main
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    from .cli import is_cli_invocation
+    if is_cli_invocation(sys.argv[1:]):
+        from .cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+    from .app import main
+    sys.exit(main())
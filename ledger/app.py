@@ -62,6 +62,8 @@ except ImportError as e:
 def main():
     """主函数"""
     try:
+        from ledger.config.settings import Config
+        Config.ensure_directories()
         _configure_logging()
         logger.info("启动个人记账本系统 (Fluent Design)...")
 
@@ -0,0 +1,264 @@
+"""
+个人记账本系统 - 命令行工具
+
+不启动 GUI 的维护与批处理命令，通过 `python -m ledger <命令>` 调用。
+"""
+
+import argparse
+import logging
+import sys
+from typing import List, Optional
+
+from ledger.config.settings import Config
+
+# build_parser 中注册的子命令；python -m ledger 只在第一个参数是其中之一时进入命令行工具
+COMMANDS = ("import-text", "metrics", "tag-model", "retag", "tag-backfill", "columnar", "backup")
+
+
+def _cmd_import_text(args) -> int:
+    """批量导入自然语言记账文本。"""
+    from ledger.services.transaction_service import TransactionService
+    from ledger.services.ai_service import AICommandService
+
+    with open(args.file, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    def report(done: int, total: int):
+        print(f"\r解析进度: {done}/{total}", end='', file=sys.stderr, flush=True)
+
+    service = AICommandService(TransactionService())
+    result = service.bulk_import(
+        text,
+        chunk_size=args.chunk_size,
+        concurrency=args.concurrency,
+        rate_limit=args.rate_limit,
+        checkpoint_path=args.checkpoint,
+        progress=report,
+    )
+    print(file=sys.stderr)
+    if result.already_applied:
+        print("该文件已全部导入（根据断点文件），无需重复执行")
+        return 0
+    print(f"共 {result.total_lines} 行：本地解析 {result.local_lines}，LLM 解析 {result.llm_lines}"
+          f"（{result.llm_calls} 次调用），跳过 {result.skipped_lines}")
+    print(f"新增 {len(result.added)}，更新 {len(result.updated)}，删除 {len(result.deleted)}")
+    print(f"耗时 {result.elapsed:.2f}s，吞吐 {result.lines_per_sec:.1f} 行/秒")
+    if result.failed_lines:
+        print(f"解析失败的行: {', '.join(map(str, result.failed_lines))}（可重跑以重试）")
+        return 1
+    return 0
+
+
+def _cmd_metrics(args) -> int:
+    """查看最近一次运行写出的 LLM 指标汇总。"""
+    import json
+    import os
+    from ledger.services.metrics import format_snapshot
+
+    path = args.file or Config.METRICS_FILE
+    if not path or not os.path.exists(path):
+        print(f"未找到指标文件: {path or '(METRICS_FILE 未配置)'}")
+        return 1
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if args.json:
+        print(json.dumps(data, indent=2, ensure_ascii=False))
+    else:
+        print(format_snapshot(data))
+    return 0
+
+
+def _cmd_tag_model(args) -> int:
+    """训练或评估本地标签模型。"""
+    from ledger.services.transaction_service import TransactionService
+    from ledger.services import file_lock
+    from ledger.services.tag_classifier import TagClassifier, default_model_path, evaluate
+
+    transactions = TransactionService().get_all_transactions()
+    if args.action == "train":
+        # 读取到写回之间持独占锁；正在运行的界面保存时会合并这里写入的内容
+        with file_lock.locked(default_model_path(), exclusive=True):
+            model = (None if args.full else TagClassifier.load()) or TagClassifier()
+            learned = model.partial_fit(transactions)
+            model.save()
+        print(f"新学习 {learned} 条，模型共 {model.docs} 条样本、{len(model.tag_docs)} 个标签、"
+              f"{len(model.features)} 个特征，已保存到 {default_model_path()}")
+        return 0
+
+    report = evaluate(transactions, holdout=args.holdout, min_confidence=Config.AI_LOCAL_MODEL_MIN_CONFIDENCE)
+    if not report["test_rows"]:
+        print("已标注的交易太少，无法评估")
+        return 1
+    print(f"训练 {report['train_rows']} 条 / 测试 {report['test_rows']} 条，"
+          f"{report['tags']} 个标签，{report['features']} 个特征，训练耗时 {report['train_ms']:.1f}ms")
+    print(f"准确率 {report['accuracy']:.1%}（覆盖率 {report['coverage']:.1%}，总命中率 {report['hit_rate']:.1%}）")
+    print(f"单条预测延迟 p50 {report['latency_us_p50']:.0f}µs，p99 {report['latency_us_p99']:.0f}µs")
+    return 0
+
+
+def _cmd_retag(args) -> int:
+    """用规则 + 本地模型重新为全账本打标。"""
+    from ledger.services.transaction_service import TransactionService
+    from ledger.services.retag import format_diff, retag_ledger
+
+    def report(done: int, total: int):
+        print(f"\r打标进度: {done}/{total}", end='', file=sys.stderr, flush=True)
+
+    result = retag_ledger(
+        TransactionService(),
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        include_manual=args.all,
+        dry_run=args.dry_run,
+        progress=report,
+    )
+    print(file=sys.stderr)
+    if args.dry_run and result.changes:
+        print(format_diff(result.changes))
+    print(f"处理 {result.total} 条（跳过手动标签 {result.skipped} 条），{result.workers} 个进程，"
+          f"{result.rows_per_sec:.0f} 行/秒")
+    action = "将变更" if args.dry_run else "已更新"
+    print(f"{action} {len(result.changes)} 条")
+    return 0
+
+
+def _cmd_tag_backfill(args) -> int:
+    """查看或处理后台标签回填队列。"""
+    from ledger.services.transaction_service import TransactionService
+    from ledger.services.tag_backfill import TagBackfillWorker
+
+    worker = TagBackfillWorker(TransactionService())
+    if args.action == "drain":
+        if not worker.tagger.llm_enabled:
+            print("LLM 打标未启用（AI_ENABLED / AI_AUTO_TAG_WITH_LLM），无法处理队列")
+            return 1
+        worker.start()
+        drained = worker.drain(timeout=args.timeout)
+        worker.stop()
+        if not drained:
+            print(f"超时，队列中仍有 {worker.stats()['depth']} 条待处理")
+            return 1
+    stats = worker.stats()
+    print(f"待处理 {stats['depth']} 条，最早等待 {stats['lag_seconds']:.1f}s；"
+          f"本次处理 {stats['processed']} 条，放弃 {stats['failed']} 条")
+    return 0
+
+
+def _cmd_columnar(args) -> int:
+    """列式账本文件与 JSON 之间的导入导出。"""
+    import os
+    from ledger.services import columnar
+
+    target = columnar.data_path(Config.DATABASE_PATH)
+    if args.action == "import":
+        count = columnar.import_json(args.file, target)
+        print(f"已从 {args.file} 导入 {count} 条交易到 {target}")
+        return 0
+    if not os.path.exists(target):
+        print(f"未找到列式账本文件: {target}")
+        return 1
+    count = columnar.export_json(target, args.file)
+    print(f"已将 {target} 中的 {count} 条交易导出到 {args.file}")
+    return 0
+
+
+def _cmd_backup(args) -> int:
+    """手动备份、查看备份列表或按时间点恢复。"""
+    from datetime import datetime
+    from ledger.services.backup import BackupStore
+
+    store = BackupStore()
+    if args.action == "run":
+        result = store.backup()
+        store.prune(Config.BACKUP_KEEP)
+        print(f"备份 {result.snapshot.id}：{result.snapshot.files} 个文件，{result.snapshot.size / 1e6:.1f} MB"
+              f"（沿用 {result.reused_files} 个未变化的文件），新增 {result.new_chunks}/{result.total_chunks} 个数据块，"
+              f"写入 {result.written_bytes / 1e6:.2f} MB，耗时 {result.seconds:.2f}s")
+        return 0
+    if args.action == "list":
+        snapshots = store.snapshots()
+        if not snapshots:
+            print(f"{store.root} 中没有备份")
+        for info in snapshots:
+            print(f"{info.id}  {info.created.isoformat(sep=' ', timespec='seconds')}  "
+                  f"{info.files} 个文件  {info.size / 1e6:.1f} MB")
+        return 0
+    try:
+        at = datetime.fromisoformat(args.at) if args.at else None
+        info = store.restore(at=at, snapshot_id=args.id, target_dir=args.to)
+    except ValueError as e:
+        print(f"恢复失败: {e}")
+        return 1
+    print(f"已恢复备份 {info.id}（{info.created.isoformat(sep=' ', timespec='seconds')}）"
+          f"到 {args.to or '原位置'}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m ledger", description="个人记账本命令行工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import-text", help="批量导入自然语言记账文本（每行一笔）")
+    p.add_argument("file", help="UTF-8 文本文件路径")
+    p.add_argument("--chunk-size", type=int, default=20, help="每次 LLM 调用包含的最大行数")
+    p.add_argument("--concurrency", type=int, default=None, help="并发 LLM 请求数，默认 AI_CONCURRENCY")
+    p.add_argument("--rate-limit", type=float, default=None, help="每秒请求上限，默认 AI_RATE_LIMIT")
+    p.add_argument("--checkpoint", default=None, help="断点文件路径，用于中断后续传")
+    p.set_defaults(func=_cmd_import_text)
+
+    p = sub.add_parser("metrics", help="查看 LLM 调用指标（耗时分位数、token 用量、错误率）")
+    p.add_argument("--file", default=None, help="指标文件路径，默认 METRICS_FILE")
+    p.add_argument("--json", action="store_true", help="输出原始 JSON")
+    p.set_defaults(func=_cmd_metrics)
+
+    p = sub.add_parser("tag-model", help="训练/评估本地标签模型（保存在 AI_MODEL_PATH）")
+    p.add_argument("action", choices=["train", "report"], help="train: 从历史交易训练；report: 留出法评估")
+    p.add_argument("--full", action="store_true", help="train 时丢弃已有模型全量重训")
+    p.add_argument("--holdout", type=float, default=0.2, help="report 时的测试集比例")
+    p.set_defaults(func=_cmd_tag_model)
+
+    p = sub.add_parser("retag", help="修改规则或重训模型后，用规则 + 本地模型重新为历史交易打标")
+    p.add_argument("--workers", type=int, default=None, help="并行进程数，默认 CPU 核数；1 表示单进程")
+    p.add_argument("--chunk-size", type=int, default=2000, help="每个分片的交易数")
+    p.add_argument("--all", action="store_true", help="连同手动填写的标签一起重算")
+    p.add_argument("--dry-run", action="store_true", help="只输出差异，不写回")
+    p.set_defaults(func=_cmd_retag)
+
+    p = sub.add_parser("tag-backfill", help="查看/处理后台 LLM 补充标签的待办队列")
+    p.add_argument("action", choices=["status", "drain"], help="status: 查看队列；drain: 处理完队列后退出")
+    p.add_argument("--timeout", type=float, default=300.0, help="drain 的最长等待秒数")
+    p.set_defaults(func=_cmd_tag_backfill)
+
+    p = sub.add_parser("columnar", help="列式账本文件（DATA_FORMAT=columnar）与 JSON 之间导入导出")
+    p.add_argument("action", choices=["import", "export"], help="import: 从 JSON 生成（覆盖）；export: 导出为 JSON")
+    p.add_argument("file", help="JSON 文件路径")
+    p.set_defaults(func=_cmd_columnar)
+
+    p = sub.add_parser("backup", help="增量去重备份（保存在 BACKUP_PATH）：备份、列出与按时间点恢复")
+    p.add_argument("action", choices=["run", "list", "restore"],
+                   help="run: 立即备份；list: 列出备份；restore: 恢复（默认原位，需先关闭应用）")
+    p.add_argument("--at", default=None, help="restore 时恢复到该时间点之前最近的备份（ISO 格式，如 2024-05-01T12:00）")
+    p.add_argument("--id", default=None, help="restore 时按备份 ID 选择")
+    p.add_argument("--to", default=None, help="restore 时写到该目录而不是原位置")
+    p.set_defaults(func=_cmd_backup)
+
+    return parser
+
+
+def is_cli_invocation(argv: List[str]) -> bool:
+    """argv（不含程序名）是否调用命令行工具；其他参数（如 Qt 的 -style fusion）留给图形界面。"""
+    return bool(argv) and argv[0] in COMMANDS + ("-h", "--help")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    logging.basicConfig(
+        level=getattr(logging, Config.LOG_LEVEL, logging.INFO),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    )
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,25 @@ class Config:
 
     # 数据库配置
     DATABASE_PATH = os.getenv('DATABASE_PATH', 'ledger/data/transactions.json')
+    # json / gzip / zstd（压缩的 JSON，读取时自动识别）/ columnar
     DATA_FORMAT = os.getenv('DATA_FORMAT', 'json')
+    # 在数据文件旁缓存解析结果（<DATABASE_PATH>.snapshot），源文件未变化时启动直接加载
+    SNAPSHOT_CACHE = os.getenv('SNAPSHOT_CACHE', 'true').lower() == 'true'
+    # 解析大交易文件的进程数（0 表示使用 CPU 核数，1 表示不并行）
+    LOAD_WORKERS = int(os.getenv('LOAD_WORKERS', '0'))
+    # 按时间分区存储交易（month/year，留空为单文件）；启用后旧单文件自动迁移
+    PARTITION_BY = os.getenv('PARTITION_BY', '').strip().lower()
+    # 惰性模式：内存中只保存紧凑的行，访问时才构建交易对象，最近访问的对象保留在定长 LRU 中
+    LAZY_ROWS = os.getenv('LAZY_ROWS', 'false').lower() == 'true'
+    LAZY_CACHE_SIZE = int(os.getenv('LAZY_CACHE_SIZE', '10000'))
+    # 写后合并：修改后等待的毫秒数，期间的修改合并为一次写盘（0 表示每次修改同步保存）
+    WRITE_BEHIND_MS = int(os.getenv('WRITE_BEHIND_MS', '0'))
+    # 未保存的交易条数达到该值时不再等待，立即写盘
+    WRITE_BEHIND_MAX_DIRTY = int(os.getenv('WRITE_BEHIND_MAX_DIRTY', '100'))
+    # 多个进程共用同一账本：读写时在 <DATABASE_PATH>.lock 上加建议锁，保存前先合并其他进程写入的修改
+    FILE_LOCKING = os.getenv('FILE_LOCKING', 'true').lower() == 'true'
+    # 图形界面检查账本是否被其他进程修改的间隔（毫秒，0 表示不检查）
+    WATCH_INTERVAL_MS = int(os.getenv('WATCH_INTERVAL_MS', '1000'))
 
     # 默认设置
     DEFAULT_CURRENCY = os.getenv('DEFAULT_CURRENCY', 'CNY')
@@ -19,6 +37,8 @@ class Config:
     BACKUP_ENABLED = os.getenv('BACKUP_ENABLED', 'true').lower() == 'true'
     BACKUP_INTERVAL_DAYS = int(os.getenv('BACKUP_INTERVAL_DAYS', '7'))
     BACKUP_PATH = os.getenv('BACKUP_PATH', 'ledger/backups/')
+    # 保留最近多少次备份（更早的备份及其独有的数据块被清理）
+    BACKUP_KEEP = int(os.getenv('BACKUP_KEEP', '8'))
 
     # 日志配置
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -30,9 +50,24 @@ class Config:
     # AI 自动打标签开关（默认开启规则标签，LLM 参与可选）
     AI_AUTO_TAG = os.getenv('AI_AUTO_TAG', 'true').lower() == 'true'
     AI_AUTO_TAG_WITH_LLM = os.getenv('AI_AUTO_TAG_WITH_LLM', 'false').lower() == 'true'
+    # 本地标签模型（保存在 AI_MODEL_PATH 下），置信度达到阈值时不再调用 LLM
+    AI_LOCAL_MODEL = os.getenv('AI_LOCAL_MODEL', 'true').lower() == 'true'
+    AI_LOCAL_MODEL_MIN_CONFIDENCE = float(os.getenv('AI_LOCAL_MODEL_MIN_CONFIDENCE', '0.6'))
     OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', '')
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
     OPENAI_MODEL = os.getenv('OPENAI_MODEL', '')
+    # 批量导入：并发 LLM 请求数与每秒请求上限（0 表示不限速）
+    AI_CONCURRENCY = int(os.getenv('AI_CONCURRENCY', '4'))
+    AI_RATE_LIMIT = float(os.getenv('AI_RATE_LIMIT', '2'))
+    # LLM 调用：可重试错误的最大重试次数，是否流式接收（用于测量首 token 延迟）
+    AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', '2'))
+    AI_STREAM = os.getenv('AI_STREAM', 'false').lower() == 'true'
+    # 后台标签回填：每次批量 LLM 调用的最大条数与合并等待时间（毫秒）
+    TAG_BACKFILL_BATCH = int(os.getenv('TAG_BACKFILL_BATCH', '20'))
+    TAG_BACKFILL_WAIT_MS = int(os.getenv('TAG_BACKFILL_WAIT_MS', '500'))
+
+    # 指标：进程退出时写入的 LLM 调用指标汇总文件（默认留空，不写）
+    METRICS_FILE = os.getenv('METRICS_FILE', '')
 
     @classmethod
     def ensure_directories(cls):
@@ -0,0 +1,6 @@
+"""开发与性能测试工具（不参与 GUI 运行）。
+
+- fake_openai: 本地 OpenAI 兼容替身服务，用于离线测试与基准测试 AI 链路
+"""
+
+__all__ = ["fake_openai"]
@@ -0,0 +1,320 @@
+"""本地 OpenAI 兼容替身服务。
+
+实现 ``POST /v1/chat/completions``（含 SSE 流式）、``GET /v1/models`` 与 ``GET /v1/stats``，
+不依赖网络即可驱动 AICommandService / TaggingService 的完整调用链路：
+
+    python -m ledger.devtools.fake_openai --port 8765 --latency-ms 200
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=x OPENAI_MODEL=fake AI_ENABLED=true python -m ledger
+
+响应默认按规则生成：记账指令按行解析为 ADD 操作，标签请求（含批量打标）按 TaggingService.RULES 匹配；
+也可以通过脚本文件（JSON 列表，按顺序循环返回）指定固定回复。支持固定/抖动延迟、
+流式分片间隔、按比例注入 429/500 错误，以及近似的 token 计数。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+_AMOUNT_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+def count_tokens(text: str) -> int:
+    """粗略估算 token 数（中文约 1 字 1 token，英文约 4 字符 1 token）。"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (len(text) - ascii_chars) + (ascii_chars + 3) // 4
+
+
+def _command_reply(text: str) -> str:
+    """把记账指令按行转换为 ADD 操作 JSON。"""
+    from ledger.services.bulk_import import parse_line_locally
+
+    ops: List[Dict[str, Any]] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        op = parse_line_locally(line)
+        if op is not None:
+            ops.append({
+                "type": "ADD", "amount": op.amount, "transaction_type": op.transaction_type,
+                "date": op.date, "description": op.description, "tags": [],
+            })
+            continue
+        m = _AMOUNT_RE.search(line)
+        ops.append({
+            "type": "ADD",
+            "amount": float(m.group(0)) if m else 10.0,
+            "transaction_type": "EXPENSE",
+            "description": line[:40],
+            "tags": [],
+        })
+    return json.dumps({"operations": ops}, ensure_ascii=False)
+
+
+def _tag_reply(prompt: str) -> str:
+    """按关键词规则为提示词中的描述生成标签。"""
+    from ledger.services.tagging_service import TaggingService
+
+    m = re.search(r"描述：(.*)", prompt)
+    desc = (m.group(1) if m else prompt).lower()
+    tags = [tag for tag, kws in TaggingService.RULES.items() if any(k.lower() in desc for k in kws)]
+    return "，".join(tags[:3] or ["其他"])
+
+
+def _tag_batch_reply(prompt: str) -> str:
+    """批量打标：按“序号. [类型] 描述”逐行生成 {序号: 标签数组}。"""
+    from ledger.services.tagging_service import TaggingService
+
+    result: Dict[str, List[str]] = {}
+    for m in re.finditer(r"^(\d+)\. (?:\[[^\]]*\] )?(.*)$", prompt, re.MULTILINE):
+        desc = m.group(2).lower()
+        tags = [tag for tag, kws in TaggingService.RULES.items() if any(k.lower() in desc for k in kws)]
+        result[m.group(1)] = tags[:3] or ["其他"]
+    return json.dumps(result, ensure_ascii=False)
+
+
+def rule_reply(messages: List[Dict[str, Any]]) -> str:
+    """根据请求内容生成回复文本。"""
+    system = " ".join(str(m.get("content", "")) for m in messages if m.get("role") == "system")
+    user = next((str(m.get("content", "")) for m in reversed(messages) if m.get("role") == "user"), "")
+    if "财务助手" in system:
+        return _command_reply(user)
+    if "批量" in user and "标签" in user:
+        return _tag_batch_reply(user)
+    if "标签" in user:
+        return _tag_reply(user)
+    return "{}"
+
+
+class FakeOpenAIServer:
+    """可嵌入测试/基准的替身服务；port=0 时自动分配端口。"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        chunk_ms: float = 0.0,
+        chunk_size: int = 8,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        script: Optional[List[str]] = None,
+        seed: Optional[int] = None,
+        reject_stream_options: bool = False,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.chunk_ms = chunk_ms
+        self.chunk_size = max(1, chunk_size)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.reject_stream_options = reject_stream_options  # 模拟不支持 stream_options 的兼容接口（返回 400）
+        self.script = list(script or [])
+        self._script_pos = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "requests": 0, "errors": 0, "streams": 0, "prompt_tokens": 0, "completion_tokens": 0,
+        }
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------- 内部 ----------
+    def _bump(self, key: str, value: int = 1):
+        with self._lock:
+            self.stats[key] += value
+
+    def _next_reply(self, messages: List[Dict[str, Any]]) -> str:
+        with self._lock:
+            if self.script:
+                reply = self.script[self._script_pos % len(self.script)]
+                self._script_pos += 1
+                return reply
+        return rule_reply(messages)
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    def _delay(self):
+        delay = self.latency_ms
+        if self.jitter_ms:
+            with self._lock:
+                delay += self._rng.uniform(0, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                pass  # 保持测试与基准输出整洁
+
+            def _send_json(self, status: int, payload: Dict[str, Any]):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):  # noqa: N802
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": [{"id": "fake", "object": "model"}]})
+                elif self.path.rstrip("/").endswith("/stats"):
+                    with server._lock:
+                        self._send_json(200, dict(server.stats))
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):  # noqa: N802
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    req = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._send_json(400, {"error": {"message": "invalid json"}})
+                    return
+                server._bump("requests")
+                if server.reject_stream_options and "stream_options" in req:
+                    server._bump("errors")
+                    self._send_json(400, {"error": {
+                        "message": "Unrecognized request argument supplied: stream_options",
+                        "type": "invalid_request_error",
+                    }})
+                    return
+                server._delay()
+                if server._should_fail():
+                    server._bump("errors")
+                    self._send_json(server.error_status, {
+                        "error": {"message": "injected failure", "type": "server_error"}
+                    })
+                    return
+
+                messages = req.get("messages") or []
+                content = server._next_reply(messages)
+                prompt_tokens = sum(count_tokens(str(m.get("content", ""))) for m in messages)
+                completion_tokens = count_tokens(content)
+                server._bump("prompt_tokens", prompt_tokens)
+                server._bump("completion_tokens", completion_tokens)
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                }
+                model = req.get("model") or "fake"
+                cid = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+                created = int(time.time())
+
+                if not req.get("stream"):
+                    self._send_json(200, {
+                        "id": cid, "object": "chat.completion", "created": created, "model": model,
+                        "choices": [{
+                            "index": 0, "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": content},
+                        }],
+                        "usage": usage,
+                    })
+                    return
+
+                server._bump("streams")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                def emit(payload: Dict[str, Any]):
+                    self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                base = {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model}
+                pieces = [content[i:i + server.chunk_size] for i in range(0, len(content), server.chunk_size)]
+                emit({**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""},
+                                            "finish_reason": None}]})
+                for piece in pieces:
+                    if server.chunk_ms > 0:
+                        time.sleep(server.chunk_ms / 1000)
+                    emit({**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+                emit({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+                if (req.get("stream_options") or {}).get("include_usage"):
+                    emit({**base, "choices": [], "usage": usage})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每个请求的固定延迟")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="额外的随机延迟上限")
+    parser.add_argument("--chunk-ms", type=float, default=0.0, help="流式分片之间的间隔")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入错误的比例 0~1")
+    parser.add_argument("--error-status", type=int, default=500, help="注入错误的 HTTP 状态码（如 429/500）")
+    parser.add_argument("--script", default=None, help="JSON 文件：按顺序循环返回的回复文本列表")
+    args = parser.parse_args(argv)
+
+    script = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+    server = FakeOpenAIServer(
+        host=args.host, port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        chunk_ms=args.chunk_ms, error_rate=args.error_rate, error_status=args.error_status, script=script,
+    )
+    print(f"Fake OpenAI server listening on {server.base_url}（设置 OPENAI_BASE_URL 为此地址）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
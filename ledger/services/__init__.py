@@ -2,16 +2,31 @@
 
 暴露常用服务：
 	from ledger.services import TransactionService, AnalyticsService, AICommandService, TaggingService
+
+各服务在首次访问时才导入对应模块（PEP 562），只用到 TransactionService 的脚本
+不会连带加载 AI / 标签等模块。
 """
 
-from .transaction_service import TransactionService
-from .analytics_service import AnalyticsService
-from .ai_service import AICommandService
-from .tagging_service import TaggingService
-
-__all__ = [
-	"TransactionService",
-	"AnalyticsService",
-	"AICommandService",
-	"TaggingService",
-]
\ No newline at end of file
+from importlib import import_module
+
+_EXPORTS = {
+	"TransactionService": ".transaction_service",
+	"AnalyticsService": ".analytics_service",
+	"AICommandService": ".ai_service",
+	"TaggingService": ".tagging_service",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+	module = _EXPORTS.get(name)
+	if module is None:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	value = getattr(import_module(module, __name__), name)
+	globals()[name] = value
+	return value
+
+
+def __dir__():
+	return sorted(set(globals()) | set(__all__))
@@ -7,15 +7,22 @@ from __future__ import annotations
 
 import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 import re
 
 from ledger.config import Config
 from ledger.models import Transaction
 from .transaction_service import TransactionService
 from .tagging_service import TaggingService
+from .llm_client import chat_completion, create_client, timed_parse
+
+if TYPE_CHECKING:
+    from .tag_backfill import TagBackfillWorker
 
 logger = logging.getLogger(__name__)
 
@@ -73,24 +80,24 @@ class AICommandService:
         "}\n"
     )
 
-    def __init__(self, ts: TransactionService):
+    def __init__(self, ts: TransactionService, backfill: Optional["TagBackfillWorker"] = None):
         self.ts = ts
-        self.tagger = TaggingService()
+        self.tagger = backfill.tagger if backfill else TaggingService()
+        # 提供后台回填工作线程时，LLM 打标移出执行路径，交由后台批量补充
+        self.backfill = backfill
+        self._client = None
+        self._client_lock = threading.Lock()
 
     def _ensure_client(self):
         if not Config.AI_ENABLED:
             raise RuntimeError("AI 功能未启用，请在 .env 中设置 AI_ENABLED=true")
         if not (Config.OPENAI_API_KEY and Config.OPENAI_MODEL):
             raise RuntimeError("缺少 OPENAI_API_KEY 或 OPENAI_MODEL 配置")
-        try:
-            # 延迟导入，避免未配置也报错
-            from openai import OpenAI  # type: ignore
-        except Exception as exc:  # pylint: disable=broad-except
-            raise RuntimeError("openai 依赖未安装，请在 requirements 中安装 openai") from exc
-
-        base_url = Config.OPENAI_BASE_URL or None
-        client = OpenAI(api_key=Config.OPENAI_API_KEY, base_url=base_url)
-        return client
+        # 客户端内部维护连接池，缓存复用以便并发调用共享连接
+        with self._client_lock:
+            if self._client is None:
+                self._client = create_client()
+            return self._client
 
     def _build_context(self) -> str:
         """构建日期上下文，提供今天的日期与星期，帮助模型解析相对日期。"""
@@ -106,8 +113,9 @@ class AICommandService:
         client = self._ensure_client()
 
         try:
-            resp = client.chat.completions.create(
-                model=Config.OPENAI_MODEL,
+            resp = chat_completion(
+                client,
+                "command",
                 messages=[
                     {"role": "system", "content": self.SYSTEM_PROMPT},
                     {"role": "system", "content": self.FEW_SHOT},
@@ -116,22 +124,23 @@ class AICommandService:
                 ],
                 temperature=0.0,
             )
-            content = resp.choices[0].message.content or "{}"
+            content = resp.content or "{}"
         except Exception as e:  # pylint: disable=broad-except
             logger.error("调用 AI 失败: %s", e)
             raise
 
         # 解析 JSON（容错：截取首尾大括号）
-        try:
-            return json.loads(content)
-        except Exception:  # pylint: disable=broad-except
+        with timed_parse("command"):
             try:
-                start = content.find("{")
-                end = content.rfind("}") + 1
-                return json.loads(content[start:end])
-            except Exception as e:  # pylint: disable=broad-except
-                logger.error("解析 AI 返回失败: %s", e)
-                raise
+                return json.loads(content)
+            except Exception:  # pylint: disable=broad-except
+                try:
+                    start = content.find("{")
+                    end = content.rfind("}") + 1
+                    return json.loads(content[start:end])
+                except Exception as e:  # pylint: disable=broad-except
+                    logger.error("解析 AI 返回失败: %s", e)
+                    raise
 
     # ---------------- 执行逻辑 ----------------
     @staticmethod
@@ -175,31 +184,46 @@ class AICommandService:
             results = [t for t in results if set(tags).issubset(set(t.tags))]
         return results
 
-    def execute_operations(self, operations: List[AIOperation]) -> Dict[str, Any]:
-        """执行解析得到的操作，返回统计结果。"""
+    def execute_operations(
+        self,
+        operations: List[AIOperation],
+        suggest: Optional[Callable[[str, str], List[str]]] = None,
+    ) -> Dict[str, Any]:
+        """执行解析得到的操作，返回统计结果。
+
+        suggest 替换默认的自动打标函数（批量导入传入预先算好的结果，避免持锁期间调用 LLM）。
+        """
+        suggest = suggest or self._auto_tags
         added: List[str] = []
         updated: List[str] = []
         deleted: List[str] = []
+        learn: List[Transaction] = []  # 用户显式给出标签的交易，用于训练本地标签模型
+        enrich: List[str] = []  # 需要后台 LLM 补充标签的交易
 
         for op in operations:
             t = op.op_type.upper()
             if t == "ADD":
                 # 若未显式提供标签且开启自动打标，则基于描述/类型建议标签
-                auto_tags: List[str] = []
-                if Config.AI_AUTO_TAG and not (op.tags or []):
-                    auto_tags = self.tagger.suggest_tags(
-                        op.description or "",
-                        self._normalize_type(op.transaction_type),
-                    )
+                auto = Config.AI_AUTO_TAG and not (op.tags or [])
+                tx_type = self._normalize_type(op.transaction_type)
+                auto_tags = suggest(op.description or "", tx_type) if auto else []
+                pending = auto and self._wants_enrichment(op.description or "", tx_type)
                 trans = Transaction(
                     amount=self._coerce_amount(op.amount),
-                    transaction_type=self._normalize_type(op.transaction_type),
+                    transaction_type=tx_type,
                     description=op.description or "",
                     date=self._parse_date(op.date),
                     tags=(op.tags or auto_tags),
+                    # 只有确实打上了自动标签、或将由后台补充的交易才标记为自动打标
+                    auto_labeled=bool(auto_tags) or pending,
+                    transaction_id=op.transaction_id,
                 )
                 self.ts.add_transaction(trans)
                 added.append(trans.transaction_id)
+                if op.tags:
+                    learn.append(trans)
+                elif pending:
+                    enrich.append(trans.transaction_id)
 
             elif t == "UPDATE":
                 targets: List[Transaction] = []
@@ -220,22 +244,32 @@ class AICommandService:
                         kwargs["description"] = op.description
                     if op.tags is not None:
                         kwargs["tags"] = op.tags
+                        kwargs["auto_labeled"] = False
                     if op.date is not None:
                         kwargs["date"] = self._parse_date(op.date)
                     # 若未显式提供 tags，且描述发生变化且原先无标签，可尝试自动打标签
-                    if (
+                    retag = (
                         Config.AI_AUTO_TAG
                         and op.tags is None
                         and op.description is not None
                         and not trg.tags
-                    ):
+                    )
+                    pending = False
+                    if retag:
                         tx_type = kwargs.get("transaction_type", trg.transaction_type)
-                        auto_tags = self.tagger.suggest_tags(op.description or "", tx_type)
+                        auto_tags = suggest(op.description or "", tx_type)
+                        pending = self._wants_enrichment(op.description or "", tx_type)
                         if auto_tags:
                             kwargs["tags"] = auto_tags
+                        if auto_tags or pending:
+                            kwargs["auto_labeled"] = True
                     if kwargs:
                         self.ts.update_transaction(trg.transaction_id, **kwargs)
                         updated.append(trg.transaction_id)
+                        if op.tags:
+                            learn.append(trg)
+                        elif pending:
+                            enrich.append(trg.transaction_id)
 
             elif t == "DELETE":
                 targets: List[Transaction] = []
@@ -249,10 +283,25 @@ class AICommandService:
                     if self.ts.delete_transaction(trg.transaction_id):
                         deleted.append(trg.transaction_id)
 
+        if learn:
+            self.tagger.learn(learn)
+        if enrich:
+            self.backfill.enqueue(enrich)
         return {"added": added, "updated": updated, "deleted": deleted}
 
+    def _auto_tags(self, description: str, transaction_type: str) -> List[str]:
+        """第一阶段打标：有后台回填时只用规则/本地模型，否则同步调用完整链路。"""
+        if self.backfill is not None:
+            return self.tagger.suggest_tags_fast(description, transaction_type)
+        return self.tagger.suggest_tags(description, transaction_type)
+
+    def _wants_enrichment(self, description: str, transaction_type: str) -> bool:
+        return self.backfill is not None and self.tagger.needs_llm(description, transaction_type)
+
     def parse(self, text: str) -> List[AIOperation]:
-        data = self.call_llm(text)
+        return self._ops_from_data(self.call_llm(text))
+
+    def _ops_from_data(self, data: Dict[str, Any]) -> List[AIOperation]:
         ops = []
         for item in data.get("operations", []):
             # 兼容不同键名：type/op/action
@@ -267,7 +316,8 @@ class AICommandService:
                     date=item.get("date"),
                     description=item.get("description"),
                     tags=item.get("tags"),
-                    transaction_id=item.get("transaction_id"),
+                    # 新增交易的 ID 由本地生成，不采用模型给出的值
+                    transaction_id=None if str(raw_type).upper() == "ADD" else item.get("transaction_id"),
                     filter=item.get("filter"),
                 )
             )
@@ -278,6 +328,148 @@ class AICommandService:
         result = self.execute_operations(ops)
         return ops, result
 
+    # ---------------- 批量导入 ----------------
+    def bulk_import(
+        self,
+        text: str,
+        chunk_size: int = 20,
+        concurrency: Optional[int] = None,
+        rate_limit: Optional[float] = None,
+        checkpoint_path: Optional[str] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ):
+        """批量导入多行自然语言记账文本，返回 BulkImportResult。
+
+        本地规则可识别的行直接解析；其余连续行按 chunk_size 成块，在限速下并发调用 LLM。
+        全部解析完成后按源顺序在一次批量提交中执行。progress(已处理行数, 总行数)
+        在调用线程中回调；checkpoint_path 指定断点文件，重跑时跳过已应用的行、
+        复用已解析的块。解析失败的块记入 failed_lines，不影响其余行的导入。
+        """
+        from .bulk_import import BulkImportResult, ImportCheckpoint, RateLimiter, split_segments
+
+        started = time.perf_counter()
+        # 切块结果依赖 chunk_size，一并计入断点键
+        checkpoint = ImportCheckpoint(checkpoint_path, f"{chunk_size}:{text}")
+        result = BulkImportResult()
+        segments = []
+        for seg in split_segments(text, chunk_size):
+            if seg.index in checkpoint.applied:
+                result.skipped_lines += len(seg.lines)
+            else:
+                segments.append(seg)
+                result.total_lines += len(seg.lines)
+        if not segments and checkpoint.applied:
+            result.already_applied = True
+
+        done = 0
+        pending = []
+        for seg in segments:
+            if seg.local:
+                result.local_lines += 1
+                done += 1
+            elif seg.index in checkpoint.segments:
+                seg.ops = checkpoint.segments[seg.index]
+                result.resumed_segments += 1
+                result.llm_lines += len(seg.lines)
+                done += len(seg.lines)
+            else:
+                pending.append(seg)
+        if progress:
+            progress(done, result.total_lines)
+
+        if pending:
+            limiter = RateLimiter(Config.AI_RATE_LIMIT if rate_limit is None else rate_limit)
+            workers = max(1, concurrency or Config.AI_CONCURRENCY)
+
+            def parse_segment(seg):
+                limiter.acquire()
+                return self.parse("\n".join(seg.lines))
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(parse_segment, seg): seg for seg in pending}
+                for fut in as_completed(futures):
+                    seg = futures[fut]
+                    result.llm_calls += 1
+                    try:
+                        seg.ops = fut.result()
+                        checkpoint.record(seg.index, seg.ops)
+                        result.llm_lines += len(seg.lines)
+                    except Exception as e:  # pylint: disable=broad-except
+                        logger.error("批量导入第 %s 行起的块解析失败: %s", seg.line_numbers[0], e)
+                        result.failed_lines.extend(seg.line_numbers)
+                    done += len(seg.lines)
+                    if progress:
+                        progress(done, result.total_lines)
+
+        ready = [seg for seg in segments if seg.ops is not None]
+        ordered: List[AIOperation] = []
+        for seg in ready:
+            for position, op in enumerate(seg.ops):
+                if checkpoint.path and op.op_type.upper() == "ADD":
+                    op.transaction_id = checkpoint.transaction_id(seg.index, position)
+                    if self.ts.get_transaction(op.transaction_id) is not None:
+                        continue  # 上次已写入账本、尚未记为已应用
+                ordered.append(op)
+        if ordered:
+            # 同步打标可能逐行调用 LLM：在进入批量提交（持有服务锁）之前并发算好
+            suggest = self._prefetch_tags(ordered, concurrency, rate_limit)
+            with self.ts.batch():
+                applied = self.execute_operations(ordered, suggest)
+            result.added = applied["added"]
+            result.updated = applied["updated"]
+            result.deleted = applied["deleted"]
+        checkpoint.mark_applied(seg.index for seg in ready)
+
+        result.failed_lines.sort()
+        result.elapsed = time.perf_counter() - started
+        logger.info(
+            "批量导入完成: %s 行（本地 %s，LLM %s，失败 %s），%.1f 行/秒",
+            result.total_lines, result.local_lines, result.llm_lines,
+            len(result.failed_lines), result.lines_per_sec,
+        )
+        return result
+
+    def _prefetch_tags(
+        self,
+        operations: List[AIOperation],
+        concurrency: Optional[int],
+        rate_limit: Optional[float],
+    ) -> Callable[[str, str], List[str]]:
+        """在锁外预先计算批量操作需要的自动标签，返回供 execute_operations 使用的查表函数。
+
+        有后台回填时第一阶段只用本地标签，无需预取；未预取到的组合（如类型取决于原交易的
+        UPDATE）退回本地标签，保证批量提交期间不访问网络。
+        """
+        if self.backfill is not None or not Config.AI_AUTO_TAG:
+            return self._auto_tags
+        from .bulk_import import RateLimiter
+
+        keys = set()
+        for op in operations:
+            t = op.op_type.upper()
+            if t == "ADD" and not op.tags:
+                keys.add((op.description or "", self._normalize_type(op.transaction_type)))
+            elif t == "UPDATE" and op.tags is None and op.description is not None and op.transaction_type:
+                keys.add((op.description, self._normalize_type(op.transaction_type)))
+        limiter = RateLimiter(Config.AI_RATE_LIMIT if rate_limit is None else rate_limit)
+
+        def suggest(key: Tuple[str, str]) -> List[str]:
+            if self.tagger.needs_llm(*key):
+                limiter.acquire()
+            return self.tagger.suggest_tags(*key)
+
+        workers = max(1, concurrency or Config.AI_CONCURRENCY)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            cache = dict(zip(keys, pool.map(suggest, keys)))
+
+        def lookup(description: str, transaction_type: str) -> List[str]:
+            tags = cache.get((description, transaction_type))
+            if tags is None:
+                return self.tagger.suggest_tags_fast(description, transaction_type)
+            return tags
+
+        return lookup
+
     # ---------------- 规范化辅助 ----------------
     @staticmethod
     def _normalize_type(val: Optional[str]) -> str:
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import threading
 from collections import defaultdict
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import date, datetime, time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from ledger.models.transaction import Transaction
+from ledger.services import events
 from ledger.services.transaction_service import TransactionService
 
 
@@ -25,11 +27,121 @@ class TagSummary:
     count: int
 
 
+@dataclass(frozen=True)
+class AnalyticsReport:
+    """一次筛选对应的全部统计结果。"""
+    totals: Dict[str, float]
+    monthly: List[MonthlySummary]
+    tags: List[TagSummary]
+
+
+class DailyAggregates:
+    """按日累计的金额与笔数，随交易变更事件增量更新。
+
+    cells[(日期, 类型)] 与 tags[(日期, 类型, 标签)] 为 [金额, 笔数]（没有标签的交易记为 “-”）；
+    按整日区间统计时只需遍历这些单元，与交易条数无关。
+    """
+
+    def __init__(self, transactions: Iterable[Transaction] = ()):
+        self.cells: Dict[Tuple[date, str], List] = {}
+        self.tags: Dict[Tuple[date, str, str], List] = {}
+        # 事件在修改线程中应用，报表在后台线程读取
+        self._lock = threading.Lock()
+        for t in transactions:
+            self._add(t, 1)
+
+    @staticmethod
+    def _bump(table: dict, key: tuple, amount: float, sign: int):
+        cell = table.get(key)
+        if cell is None:
+            cell = table[key] = [0.0, 0]
+        cell[0] += sign * amount
+        cell[1] += sign
+        if cell[1] == 0:
+            del table[key]  # 同时消除反复增减累积的浮点误差
+
+    def _add(self, t: Transaction, sign: int):
+        day, amount, ttype = t.date.date(), float(t.amount), t.transaction_type
+        self._bump(self.cells, (day, ttype), amount, sign)
+        for label in t.tags or ["-"]:
+            self._bump(self.tags, (day, ttype, label), amount, sign)
+
+    def apply(self, event: events.ChangeEvent):
+        with self._lock:
+            if isinstance(event, events.TransactionAdded):
+                self._add(event.transaction, 1)
+            elif isinstance(event, events.TransactionDeleted):
+                self._add(event.transaction, -1)
+            elif isinstance(event, events.TransactionUpdated):
+                self._add(event.old, -1)
+                self._add(event.new, 1)
+
+    def report(self, start: Optional[date], end: Optional[date], transaction_type: Optional[str]) -> AnalyticsReport:
+        """[start, end] 整日区间内的统计，结果与逐条计算（compute_*）相同。"""
+        def selected(day: date, ttype: str) -> bool:
+            return ((start is None or day >= start) and (end is None or day <= end)
+                    and (not transaction_type or ttype == transaction_type))
+
+        with self._lock:
+            cells = sorted((key, tuple(cell)) for key, cell in self.cells.items() if selected(*key))
+            tags = sorted((key, tuple(cell)) for key, cell in self.tags.items() if selected(key[0], key[1]))
+
+        income = sum(amount for (_, ttype), (amount, _) in cells if ttype == "INCOME")
+        expense = sum(amount for (_, ttype), (amount, _) in cells if ttype == "EXPENSE")
+        monthly: Dict[str, List] = {}
+        for (day, ttype), (amount, count) in cells:
+            month = monthly.setdefault(day.strftime("%Y-%m"), [0.0, 0.0, 0])
+            month[0 if ttype == "INCOME" else 1] += amount
+            month[2] += count
+        tag_amount: Dict[str, float] = defaultdict(float)
+        tag_count: Dict[str, int] = defaultdict(int)
+        for (_, ttype, label), (amount, count) in tags:
+            if ttype == "EXPENSE":
+                tag_amount[label] += amount
+            tag_count[label] += count
+        return AnalyticsReport(
+            totals={"income": income, "expense": expense, "net": income - expense,
+                    "count": sum(count for _, (_, count) in cells)},
+            monthly=[MonthlySummary(month=m, income=i, expense=e, net=i - e, count=c)
+                     for m, (i, e, c) in sorted(monthly.items())],
+            tags=[TagSummary(label=k, amount=v, count=tag_count[k])
+                  for k, v in sorted(tag_amount.items(), key=lambda kv: kv[1], reverse=True)],
+        )
+
+
 class AnalyticsService:
     """统计分析服务：只做纯业务计算，不涉及 UI。"""
 
     def __init__(self, transaction_service: TransactionService):
         self.ts = transaction_service
+        # 首次按整日区间出报表时构建，之后随交易事件增量更新
+        self._daily: Optional[DailyAggregates] = None
+        self._unsubscribe: Optional[Callable[[], None]] = None
+        self._daily_lock = threading.Lock()
+
+    def daily_aggregates(self) -> DailyAggregates:
+        """按日汇总（首次调用时在服务锁内扫描一次全部交易并订阅后续变更）。"""
+        with self._daily_lock:
+            if self._daily is None:
+                with self.ts.locked():
+                    self._daily = DailyAggregates(self.ts.get_all_transactions())
+                    self._unsubscribe = self.ts.events.subscribe(self._on_event)
+            return self._daily
+
+    def _on_event(self, event: events.Event):
+        if isinstance(event, events.TransactionsReloaded):
+            self.close()  # 交易被整体替换，下次出报表时重建
+        elif isinstance(event, events.CHANGE_EVENTS):
+            daily = self._daily
+            if daily is not None:
+                daily.apply(event)
+
+    def close(self):
+        """取消订阅并丢弃按日汇总。"""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+        self._unsubscribe = None
+        self._daily = None
 
     def filter_transactions(
         self,
@@ -47,6 +159,28 @@ class AnalyticsService:
             transaction_type=transaction_type,
         )
 
+    def build_report(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        transaction_type: Optional[str] = None,
+    ) -> AnalyticsReport:
+        """筛选并计算总览、月度与标签汇总。
+
+        基于交易列表快照计算，不修改服务状态，可在后台线程调用。
+        区间为整日（或不限）时由增量维护的按日汇总直接得出；否则逐条筛选计算，
+        惰性模式下服务直接按行筛选，只为区间内的交易构建对象。分区布局下逐条计算，只加载区间涉及的分区。
+        """
+        whole_days = (start is None or start.time() == time.min) and (end is None or end.time() == time.max)
+        if whole_days and not self.ts.partitioned:
+            return self.daily_aggregates().report(start and start.date(), end and end.date(), transaction_type)
+        items = self.filter_transactions(start, end, transaction_type)
+        return AnalyticsReport(
+            totals=self.compute_totals(items),
+            monthly=self.compute_monthly_summary(items),
+            tags=self.compute_tag_summary(items),
+        )
+
     def compute_monthly_summary(self, items: List[Transaction]) -> List[MonthlySummary]:
         """生成按月汇总（收入/支出/净额/笔数）。"""
         agg: Dict[str, Dict[str, float]] = defaultdict(lambda: {
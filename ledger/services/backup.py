@@ -0,0 +1,343 @@
+"""
+增量、去重、压缩的账本备份
+
+每次备份是 BACKUP_PATH/snapshots/ 下的一个清单，记录构成账本的各个文件（JSON 账本、分区目录、
+列式文件与隔离文件）由哪些数据块组成；数据块按内容的 SHA-256 命名，zlib 压缩后保存在
+BACKUP_PATH/chunks/ 下，多次备份之间相同的数据块只存一份：
+
+- 分块按内容切分（在交易记录之间依据前一条记录的校验和决定是否切开），插入或修改一条交易
+  只影响附近的一个数据块，其余数据块与上次备份相同（不含记录分隔的二进制文件按定长切分）；
+- 大小与修改时间都与上一次备份相同的文件直接沿用上次的块列表，不读取文件；
+- 保留最近 BACKUP_KEEP 次备份，删除的备份不再引用的数据块随之清理；
+- 恢复时按时间点选择最近一次备份，逐块校验摘要后写回（原位恢复 JSON 账本时经过 durable.save，
+  恢复前的文件保留为上一代）。
+
+BackupScheduler 在后台线程中按 BACKUP_INTERVAL_DAYS 定期备份；也可通过
+`python -m ledger backup run|list|restore` 手动执行。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from ledger.config.settings import Config
+from ledger.services import columnar, compress, durable, file_lock, parallel_load, partition_store
+from ledger.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+CHUNK_MIN = 16 << 10
+CHUNK_MAX = 1 << 20
+# 候选切点为 JSON 账本中记录之间的 “},\n”，每个被选中的概率为 1/256，平均块大小约 16KB + 70KB
+SEPARATOR = b"},\n"
+CHUNK_MASK = (1 << 8) - 1
+READ_BLOCK = 4 << 20
+
+
+@dataclass
+class SnapshotInfo:
+    """一次备份：ID（创建时间）、创建时间、文件数与原始大小。"""
+
+    id: str
+    created: datetime
+    files: int
+    size: int
+
+
+@dataclass
+class BackupResult:
+    """一次备份的统计：扫描与沿用的文件、新写入的数据块与压缩后字节数、耗时。"""
+
+    snapshot: SnapshotInfo
+    scanned_bytes: int
+    reused_files: int
+    new_chunks: int
+    total_chunks: int
+    written_bytes: int
+    seconds: float
+
+
+def _cut(buf: bytes, start: int) -> int:
+    """从 start 开始的下一个切点（buf 中 start 之后不足 CHUNK_MAX 时即为文件末尾）。"""
+    limit = min(start + CHUNK_MAX, len(buf))
+    pos = start + CHUNK_MIN
+    while pos < limit:
+        found = buf.find(SEPARATOR, pos, limit)
+        if found < 0:
+            break
+        end = found + len(SEPARATOR)
+        # 只看记录本身的内容（记录末尾的标签等字段重复度高，不能只取固定长度的窗口）
+        if zlib.crc32(buf[pos:found]) & CHUNK_MASK == 0:
+            return end
+        pos = end
+    return limit
+
+
+def iter_chunks(f: BinaryIO) -> Iterator[bytes]:
+    """按内容切分文件，逐块产出（内存中最多保留 READ_BLOCK + CHUNK_MAX 字节）。"""
+    buf, pos, eof = b'', 0, False
+    while True:
+        if not eof and len(buf) - pos < CHUNK_MAX:
+            data = f.read(READ_BLOCK)
+            eof = not data
+            buf, pos = buf[pos:] + data, 0
+            continue
+        if pos >= len(buf):
+            return
+        end = _cut(buf, pos)
+        yield buf[pos:end]
+        pos = end
+
+
+def ledger_files(source: str) -> List[str]:
+    """构成账本的现有文件（相对 source 所在目录的路径）。"""
+    base = os.path.dirname(source)
+    paths = [source, columnar.data_path(source), parallel_load.quarantine_path(source)]
+    directory = partition_store.partition_dir(source)
+    if os.path.isdir(directory):
+        paths += [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                  if name.endswith(".json")]
+    return [os.path.relpath(path, base or ".") for path in paths if os.path.isfile(path)]
+
+
+def _write_file(path: str, data: bytes):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        durable.sync(f)
+    durable.replace(tmp, path)
+
+
+class BackupStore:
+    """BACKUP_PATH 下的备份仓库。"""
+
+    def __init__(self, root: Optional[str] = None, source: Optional[str] = None):
+        self.root = root or Config.BACKUP_PATH
+        self.source = source or Config.DATABASE_PATH
+        self.snapshot_dir = os.path.join(self.root, "snapshots")
+        self.chunk_dir = os.path.join(self.root, "chunks")
+        # 定时备份与手动备份/清理不能同时进行
+        self._lock = threading.Lock()
+
+    def chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def _snapshot_path(self, snapshot_id: str) -> str:
+        return os.path.join(self.snapshot_dir, f"{snapshot_id}.json")
+
+    def _read_snapshot(self, snapshot_id: str) -> dict:
+        with open(self._snapshot_path(snapshot_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def snapshots(self) -> List[SnapshotInfo]:
+        """全部备份，按时间从旧到新。"""
+        result = []
+        try:
+            names = sorted(os.listdir(self.snapshot_dir))
+        except FileNotFoundError:
+            return []
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                data = self._read_snapshot(name[:-5])
+            except (OSError, ValueError) as e:
+                logger.warning("跳过无法读取的备份清单 %s: %s", name, e)
+                continue
+            result.append(SnapshotInfo(data["id"], datetime.fromisoformat(data["created"]),
+                                       len(data["files"]), sum(f["size"] for f in data["files"].values())))
+        return result
+
+    def latest(self) -> Optional[SnapshotInfo]:
+        snapshots = self.snapshots()
+        return snapshots[-1] if snapshots else None
+
+    def next_due(self, interval_days: float) -> datetime:
+        latest = self.latest()
+        return datetime.min if latest is None else latest.created + timedelta(days=interval_days)
+
+    def _store_chunk(self, chunk: bytes) -> Tuple[str, int]:
+        """保存数据块，返回 (摘要, 新写入的压缩字节数；已存在时为 0)。"""
+        digest = hashlib.sha256(chunk).hexdigest()
+        path = self.chunk_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        data = zlib.compress(chunk, 6)
+        _write_file(path, data)
+        return digest, len(data)
+
+    def backup(self) -> BackupResult:
+        """备份当前账本文件。"""
+        with self._lock:
+            t0 = time.perf_counter()
+            latest = self.latest()
+            previous = self._read_snapshot(latest.id)["files"] if latest else {}
+            base = os.path.dirname(self.source) or "."
+            files: Dict[str, dict] = {}
+            scanned = reused = new_chunks = written = 0
+            # 扫描期间持共享锁：本进程或其他进程的保存等待扫描结束，快照中的分区属于同一次保存
+            with file_lock.locked(self.source):
+                for name in ledger_files(self.source):
+                    path = os.path.join(base, name)
+                    with open(path, 'rb') as f:
+                        st = os.fstat(f.fileno())
+                        old = previous.get(name)
+                        if old and (old["size"], old["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+                            files[name] = old
+                            reused += 1
+                            continue
+                        chunks = []
+                        for chunk in iter_chunks(f):
+                            digest, size = self._store_chunk(chunk)
+                            chunks.append(digest)
+                            new_chunks += bool(size)
+                            written += size
+                        scanned += st.st_size
+                    files[name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "chunks": chunks}
+
+            created = datetime.now()
+            snapshot_id = created.strftime("%Y%m%dT%H%M%S%f")
+            _write_file(self._snapshot_path(snapshot_id), json.dumps({
+                "version": SNAPSHOT_VERSION,
+                "id": snapshot_id,
+                "created": created.isoformat(),
+                "source": os.path.abspath(self.source),
+                "files": files,
+            }, indent=2).encode('utf-8'))
+            seconds = time.perf_counter() - t0
+        result = BackupResult(
+            SnapshotInfo(snapshot_id, created, len(files), sum(f["size"] for f in files.values())),
+            scanned, reused, new_chunks, sum(len(f["chunks"]) for f in files.values()), written, seconds)
+        registry.observe("backup.seconds", seconds)
+        registry.observe("backup.written_bytes", written)
+        logger.info("备份 %s 完成：%s 个文件（%.1f MB，沿用 %s 个），新增 %s 个数据块（压缩后 %.2f MB），耗时 %.2fs",
+                    snapshot_id, len(files), result.snapshot.size / 1e6, reused, new_chunks, written / 1e6, seconds)
+        return result
+
+    def prune(self, keep: int) -> Tuple[int, int]:
+        """只保留最近 keep 次备份并清理不再引用的数据块，返回 (删除的备份数, 删除的数据块数)。"""
+        with self._lock:
+            snapshots = self.snapshots()
+            expired = snapshots[:-keep] if keep > 0 else []
+            for info in expired:
+                os.remove(self._snapshot_path(info.id))
+            if not expired:
+                return 0, 0
+            referenced = set()
+            for info in snapshots[len(expired):]:
+                for entry in self._read_snapshot(info.id)["files"].values():
+                    referenced.update(entry["chunks"])
+            removed = 0
+            for prefix in os.listdir(self.chunk_dir) if os.path.isdir(self.chunk_dir) else ():
+                directory = os.path.join(self.chunk_dir, prefix)
+                for name in os.listdir(directory):
+                    if name not in referenced:
+                        os.remove(os.path.join(directory, name))
+                        removed += 1
+        logger.info("清理了 %s 次过期备份与 %s 个不再引用的数据块", len(expired), removed)
+        return len(expired), removed
+
+    def find(self, at: Optional[datetime] = None, snapshot_id: Optional[str] = None) -> SnapshotInfo:
+        """按 ID 或时间点（该时间之前最近的一次）查找备份，找不到时抛出 ValueError。"""
+        snapshots = self.snapshots()
+        if snapshot_id is not None:
+            matches = [info for info in snapshots if info.id == snapshot_id]
+        else:
+            matches = [info for info in snapshots if at is None or info.created <= at]
+        if not matches:
+            raise ValueError(f"没有符合条件的备份（{snapshot_id or at or '最新'}）")
+        return matches[-1]
+
+    def read_file(self, entry: dict) -> bytes:
+        """按块列表还原文件内容，逐块校验摘要。"""
+        parts = []
+        for digest in entry["chunks"]:
+            with open(self.chunk_path(digest), 'rb') as f:
+                chunk = zlib.decompress(f.read())
+            if hashlib.sha256(chunk).hexdigest() != digest:
+                raise ValueError(f"备份数据块已损坏: {digest}")
+            parts.append(chunk)
+        data = b''.join(parts)
+        if len(data) != entry["size"]:
+            raise ValueError("备份文件大小与清单不符")
+        return data
+
+    def restore(self, at: Optional[datetime] = None, snapshot_id: Optional[str] = None,
+                target_dir: Optional[str] = None) -> SnapshotInfo:
+        """把备份写回 target_dir（默认原位，应用需处于关闭状态），返回使用的备份。"""
+        info = self.find(at, snapshot_id)
+        files = self._read_snapshot(info.id)["files"]
+        base = os.path.dirname(self.source) or "."
+        target = target_dir or base
+        # 先读出并校验全部文件，任何数据块损坏都不会写回半份账本
+        contents = {name: self.read_file(entry) for name, entry in files.items()}
+        in_place = os.path.abspath(target) == os.path.abspath(base)
+        with file_lock.locked(self.source, exclusive=True) if in_place else nullcontext():
+            for name, data in contents.items():
+                path = os.path.join(target, name)
+                if os.path.abspath(path) == os.path.abspath(self.source):
+                    text = compress.decode(data)
+                    durable.save(path, lambda f: f.write(text), compress.sniff(data[:4]))
+                else:
+                    _write_file(path, data)
+        logger.info("已从备份 %s（%s）恢复 %s 个文件到 %s", info.id, info.created.isoformat(timespec='seconds'),
+                    len(contents), target)
+        return info
+
+
+class BackupScheduler:
+    """按间隔定期备份的后台线程（启动时若已到期立即备份）。"""
+
+    def __init__(self, store: Optional[BackupStore] = None, interval_days: Optional[float] = None,
+                 keep: Optional[int] = None):
+        self.store = store or BackupStore()
+        self.interval_days = Config.BACKUP_INTERVAL_DAYS if interval_days is None else interval_days
+        self.keep = Config.BACKUP_KEEP if keep is None else keep
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_result: Optional[BackupResult] = None
+
+    def start(self) -> "BackupScheduler":
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ledger-backup", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def run_once(self) -> Optional[BackupResult]:
+        """已到期且账本存在时备份并清理，否则返回 None。"""
+        if datetime.now() < self.store.next_due(self.interval_days) or not ledger_files(self.store.source):
+            return None
+        self.last_result = self.store.backup()
+        self.store.prune(self.keep)
+        return self.last_result
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("定期备份失败: %s", e)
+            # 到期前醒来一次即可；账本尚不存在或备份失败时一小时后再试
+            wait = (self.store.next_due(self.interval_days) - datetime.now()).total_seconds()
+            self._stop.wait(max(wait, 0) or 3600)
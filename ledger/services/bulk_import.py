@@ -0,0 +1,218 @@
+"""批量自然语言导入的辅助组件。
+
+把多行记账文本（如“3月2日 午饭 28元”）拆成有序的片段：能被本地规则直接识别的行
+走快速路径，其余连续行合并成块交给 LLM 并发解析；最终由
+``AICommandService.bulk_import`` 按源顺序在一次批量提交中应用。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from ledger.services.ai_service import AIOperation
+
+
+# 日期：2024-03-02 / 2024年3月2日 / 3月2日 / 3/2 / 今天 / 昨天 / 前天
+_DATE_RE = re.compile(
+    r"^(?:(?P<y>\d{4})[-/.年])?(?P<m>\d{1,2})[-/.月](?P<d>\d{1,2})[日号]?"
+    r"|^(?P<rel>今天|昨天|前天)"
+)
+# 末尾金额：28元 / 28.5块 / ¥28 / 28
+_AMOUNT_RE = re.compile(r"(?:[¥￥])?\s*(?P<amount>\d+(?:\.\d+)?)\s*(?:元|块|rmb|RMB)?\s*$")
+# 含有这些词的行可能是修改/删除指令，交给 LLM 处理
+_COMMAND_WORDS = ("改", "删", "修改", "更新", "撤销")
+_INCOME_WORDS = ("收入", "工资", "薪", "兼职", "奖金", "报销", "退款", "红包收")
+_RELATIVE_DAYS = {"今天": 0, "昨天": 1, "前天": 2}
+
+
+def parse_line_locally(line: str, today: Optional[datetime] = None) -> Optional[AIOperation]:
+    """尝试用规则把单行文本解析为 ADD 操作；无法确定时返回 None。"""
+    text = line.strip()
+    if not text or any(w in text for w in _COMMAND_WORDS):
+        return None
+    today = today or datetime.now()
+
+    date: Optional[datetime] = None
+    m = _DATE_RE.match(text)
+    if m:
+        if m.group("rel"):
+            date = today - timedelta(days=_RELATIVE_DAYS[m.group("rel")])
+        else:
+            year = int(m.group("y")) if m.group("y") else today.year
+            try:
+                date = datetime(year, int(m.group("m")), int(m.group("d")))
+            except ValueError:
+                return None
+            # 未写年份且日期落在未来，视为去年
+            if not m.group("y") and date.date() > today.date():
+                date = date.replace(year=year - 1)
+        text = text[m.end():].strip()
+
+    a = _AMOUNT_RE.search(text)
+    if not a:
+        return None
+    description = text[:a.start()].strip(" ，,:：-")
+    if not description:
+        return None
+
+    is_income = any(w in description for w in _INCOME_WORDS)
+    return AIOperation(
+        op_type="ADD",
+        amount=float(a.group("amount")),
+        transaction_type="INCOME" if is_income else "EXPENSE",
+        date=(date or today).strftime("%Y-%m-%d"),
+        description=description,
+    )
+
+
+@dataclass
+class ImportSegment:
+    """源文本中一段连续的行：本地已解析的单行，或待 LLM 解析的行块。"""
+
+    index: int
+    line_numbers: List[int]
+    lines: List[str]
+    ops: Optional[List[AIOperation]] = None  # 本地段在切分时即有结果
+    local: bool = False
+
+
+def split_segments(text: str, chunk_size: int = 20,
+                   today: Optional[datetime] = None) -> List[ImportSegment]:
+    """按行切分：本地可识别的行单独成段，其余连续行按 chunk_size 合并成 LLM 段。"""
+    segments: List[ImportSegment] = []
+    pending: Optional[ImportSegment] = None
+    for lineno, raw in enumerate(text.splitlines(), start=1):
+        line = raw.strip()
+        if not line:
+            continue
+        op = parse_line_locally(line, today)
+        if op is not None:
+            pending = None
+            segments.append(ImportSegment(len(segments), [lineno], [line], [op], local=True))
+            continue
+        if pending is None or len(pending.lines) >= max(1, chunk_size):
+            pending = ImportSegment(len(segments), [], [])
+            segments.append(pending)
+        pending.line_numbers.append(lineno)
+        pending.lines.append(line)
+    return segments
+
+
+class RateLimiter:
+    """线程安全的令牌桶限速器；rate<=0 时不限速。"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ImportCheckpoint:
+    """断点文件：记录源文本摘要、已解析的 LLM 段结果以及已应用的段。
+
+    每完成一段即原子写入（临时文件 + os.replace）。中断后重跑会复用已解析的段、
+    跳过已应用的段，因此只会补做失败或未完成的部分，不会重复入账：新增的交易使用
+    由源文本摘要、段号与段内位置决定的 ID（transaction_id），上次应用到一半（已写入账本、
+    尚未记为已应用）的段重跑时，已存在的交易不会再次新增。
+    """
+
+    def __init__(self, path: Optional[str], source_text: str):
+        self.path = path
+        self.source = hashlib.sha256(source_text.encode("utf-8")).hexdigest()
+        self.segments: Dict[int, List[AIOperation]] = {}
+        self.applied: Set[int] = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if data.get("source") != self.source:
+            return  # 源文本已变化，断点作废
+        self.applied = set(data.get("applied", []))
+        for key, ops in data.get("segments", {}).items():
+            self.segments[int(key)] = [AIOperation(**op) for op in ops]
+
+    def transaction_id(self, index: int, position: int) -> str:
+        """第 index 段第 position 个操作新增交易的稳定 ID。"""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"ledger-import:{self.source}:{index}:{position}"))
+
+    def record(self, index: int, ops: List[AIOperation]):
+        with self._lock:
+            self.segments[index] = ops
+            self._flush()
+
+    def mark_applied(self, indexes: Iterable[int]):
+        with self._lock:
+            self.applied.update(indexes)
+            self._flush()
+
+    def _flush(self):
+        if not self.path:
+            return
+        data = {
+            "source": self.source,
+            "applied": sorted(self.applied),
+            "segments": {str(k): [asdict(op) for op in v] for k, v in self.segments.items()},
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+@dataclass
+class BulkImportResult:
+    """批量导入统计。"""
+
+    total_lines: int = 0
+    local_lines: int = 0
+    llm_lines: int = 0
+    llm_calls: int = 0
+    resumed_segments: int = 0
+    skipped_lines: int = 0  # 之前的运行已应用、本次跳过的行
+    failed_lines: List[int] = field(default_factory=list)
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    already_applied: bool = False
+    elapsed: float = 0.0
+
+    @property
+    def lines_per_sec(self) -> float:
+        return self.total_lines / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["lines_per_sec"] = self.lines_per_sec
+        return data
@@ -0,0 +1,394 @@
+"""
+列式二进制账本格式（DATA_FORMAT=columnar）
+
+JSON 的读写都是逐字符的文本处理，连金额、日期这样的数值列也不例外。列式文件以 mmap 打开，
+数值列直接以 memoryview（或 numpy.frombuffer）引用文件内容，无需解析；统计可以直接扫描列。
+
+文件由文件头和若干段组成，保存新增交易时只追加一段，修改或删除时整体重写（段数过多时也会合并）：
+
+    文件头  b"LEDGCOL\\0" | 版本 u32 | 字节序 u32（1 = 小端）
+    段头    b"LSEG" | 行数 n u32 | 标签总数 u32 | 保留 u32 | id 堆长度 u64 | 描述堆长度 u64 | 字典长度 u64
+    各列（每列按 8 字节对齐）：
+        amount f8[n]、date i8[n]（1970-01-01 起的微秒数）、type u1[n]、flags u1[n]（1 周期，2 自动标签）、
+        id_offsets u4[n+1]、desc_offsets u4[n+1]、tag_offsets u4[n+1]、tag_codes u4[标签总数]、
+        id 堆、描述堆（UTF-8，以 \\0 分隔）、字典（JSON：{"types": [...], "tags": [...]}）
+
+类型与标签按段做字典编码。日期只支持不带时区的 datetime。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ledger.models.transaction import Transaction
+from ledger.services import durable, parallel_load, snapshot
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"LEDGCOL\0"
+SEGMENT_MAGIC = b"LSEG"
+VERSION = 1
+SUFFIX = ".ledger"
+# 每段最多的行数（偏移量为 u32，同时限制编码时的内存）；段数超过 MAX_SEGMENTS 时保存会整体重写
+SEGMENT_ROWS = 1 << 20
+MAX_SEGMENTS = 32
+
+_FILE_HEADER = struct.Struct("<8sII")
+_SEGMENT_HEADER = struct.Struct("<4sIIIQQQ")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_FLAG_RECURRING = 1
+_FLAG_AUTO = 2
+
+# 定长列的 memoryview 格式
+_FORMATS = {
+    "amount": "d", "date": "q", "type": "B", "flags": "B",
+    "id_offsets": "I", "desc_offsets": "I", "tag_offsets": "I", "tag_codes": "I",
+}
+
+
+def data_path(source: str) -> str:
+    """DATABASE_PATH 对应的列式文件路径（扩展名换为 .ledger）。"""
+    return os.path.splitext(source)[0] + SUFFIX
+
+
+def _numpy():
+    """numpy 为可选依赖，只在扫描列时导入。"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def _layout(n: int, tag_count: int, id_len: int, desc_len: int, dict_len: int) -> Tuple[Dict[str, Tuple[int, int]], int]:
+    """各列在段内的 (偏移, 字节数) 与段的总长度。"""
+    sizes = (
+        ("amount", 8 * n), ("date", 8 * n), ("type", n), ("flags", n),
+        ("id_offsets", 4 * (n + 1)), ("desc_offsets", 4 * (n + 1)), ("tag_offsets", 4 * (n + 1)),
+        ("tag_codes", 4 * tag_count), ("ids", id_len), ("descriptions", desc_len), ("dictionary", dict_len),
+    )
+    layout = {}
+    pos = _SEGMENT_HEADER.size
+    for name, size in sizes:
+        layout[name] = (pos, size)
+        pos = _align(pos + size)
+    return layout, pos
+
+
+def _to_micros(date: datetime) -> int:
+    if date.tzinfo is not None:
+        raise ValueError(f"列式格式只支持不带时区的日期: {date.isoformat()}")
+    return (date - _EPOCH) // _MICROSECOND
+
+
+def _heap(strings: Iterable[str]) -> Tuple[bytes, array]:
+    """以 \\0 连接的 UTF-8 字符串堆与各字符串的起始偏移（第 i 个为 heap[o[i]:o[i+1]-1]）。"""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = array("I", [0])
+    pos = 0
+    for item in encoded:
+        pos += len(item) + 1
+        offsets.append(pos)
+    heap = b"\0".join(encoded)
+    if len(heap) >= 1 << 32:
+        raise ValueError("单段字符串数据超过 4GB")
+    return heap, offsets
+
+
+def _encode_segment(rows: Sequence[tuple]) -> bytes:
+    """把快照行（见 snapshot.to_rows）编码为一段。"""
+    types: Dict[str, int] = {}
+    tags: Dict[str, int] = {}
+    amounts, dates = array("d"), array("q")
+    type_codes, flags = array("B"), array("B")
+    tag_offsets, tag_codes = array("I", [0]), array("I")
+    for _, amount, ttype, date, _, recurring, auto, row_tags in rows:
+        amounts.append(amount)
+        dates.append(_to_micros(date))
+        type_codes.append(types.setdefault(ttype, len(types)))
+        flags.append((_FLAG_RECURRING if recurring else 0) | (_FLAG_AUTO if auto else 0))
+        for tag in row_tags:
+            tag_codes.append(tags.setdefault(tag, len(tags)))
+        tag_offsets.append(len(tag_codes))
+    if len(types) > 256:
+        raise ValueError("单段交易类型超过 256 种")
+    ids, id_offsets = _heap(row[0] for row in rows)
+    descriptions, desc_offsets = _heap(row[4] for row in rows)
+    dictionary = json.dumps({"types": list(types), "tags": list(tags)}, ensure_ascii=False).encode("utf-8")
+
+    n = len(rows)
+    layout, total = _layout(n, len(tag_codes), len(ids), len(descriptions), len(dictionary))
+    buf = bytearray(total)
+    _SEGMENT_HEADER.pack_into(buf, 0, SEGMENT_MAGIC, n, len(tag_codes), 0, len(ids), len(descriptions), len(dictionary))
+    columns = {
+        "amount": amounts, "date": dates, "type": type_codes, "flags": flags,
+        "id_offsets": id_offsets, "desc_offsets": desc_offsets, "tag_offsets": tag_offsets, "tag_codes": tag_codes,
+        "ids": ids, "descriptions": descriptions, "dictionary": dictionary,
+    }
+    for name, (pos, size) in layout.items():
+        data = columns[name]
+        buf[pos:pos + size] = data.tobytes() if isinstance(data, array) else data
+    return bytes(buf)
+
+
+def _encode(rows: Sequence[tuple]) -> Iterable[bytes]:
+    for start in range(0, len(rows), SEGMENT_ROWS):
+        yield _encode_segment(rows[start:start + SEGMENT_ROWS])
+
+
+class Segment:
+    """文件中的一段；各列以 memoryview 引用 mmap，不复制数据。"""
+
+    def __init__(self, buf: memoryview, offset: int):
+        magic, self.n, tag_count, _, id_len, desc_len, dict_len = _SEGMENT_HEADER.unpack_from(buf, offset)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"偏移 {offset} 处不是列式数据段")
+        self._buf = buf
+        self.offset = offset
+        self._layout, self.size = _layout(self.n, tag_count, id_len, desc_len, dict_len)
+        if offset + self.size > len(buf):
+            raise EOFError(f"偏移 {offset} 处的数据段不完整")
+        self.dictionary = json.loads(bytes(self.view("dictionary")).decode("utf-8"))
+
+    def view(self, name: str) -> memoryview:
+        """列的只读视图；定长列已转换为对应类型（可直接传给 numpy.frombuffer）。"""
+        pos, size = self._layout[name]
+        view = self._buf[self.offset + pos:self.offset + pos + size]
+        fmt = _FORMATS.get(name)
+        return view.cast(fmt) if fmt else view
+
+    def _list(self, name: str) -> list:
+        with self.view(name) as view:
+            return view.tolist()
+
+    def _strings(self, heap: str, offsets: str) -> List[str]:
+        if self.n == 0:
+            return []
+        with self.view(heap) as view:
+            data = bytes(view)
+        parts = data.decode("utf-8").split("\0")
+        if len(parts) == self.n:
+            return parts
+        # 字符串本身含有 \0：按偏移逐个切分
+        bounds = self._list(offsets)
+        return [data[bounds[i]:bounds[i + 1] - 1].decode("utf-8") for i in range(self.n)]
+
+    def rows(self) -> List[tuple]:
+        """解码为快照行。"""
+        ids = self._strings("ids", "id_offsets")
+        descriptions = self._strings("descriptions", "desc_offsets")
+        amounts, dates = self._list("amount"), self._list("date")
+        type_codes, flags = self._list("type"), self._list("flags")
+        tag_offsets, tag_codes = self._list("tag_offsets"), self._list("tag_codes")
+        types, tags = self.dictionary["types"], self.dictionary["tags"]
+        epoch, micro = _EPOCH, _MICROSECOND
+        return [
+            (ids[i], amounts[i], types[type_codes[i]], epoch + dates[i] * micro, descriptions[i],
+             bool(flags[i] & _FLAG_RECURRING), bool(flags[i] & _FLAG_AUTO),
+             tuple(tags[c] for c in tag_codes[tag_offsets[i]:tag_offsets[i + 1]]))
+            for i in range(self.n)
+        ]
+
+
+class ColumnarFile:
+    """以 mmap 只读打开的列式文件。
+
+    用完需 close()（或用 with）；之前取得的列视图与 numpy 数组需先释放，否则映射会保留到它们被回收。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.segments: List[Segment] = []
+        self._file = open(path, "rb")
+        self._mmap: Optional[mmap.mmap] = None
+        self._buf: Optional[memoryview] = None
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            header = self._file.read(_FILE_HEADER.size)
+            _check_header(header, path)
+            if size > _FILE_HEADER.size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._buf = memoryview(self._mmap)
+                self.segments, self.valid_size = _scan(self._buf, path)
+            else:
+                self.valid_size = _FILE_HEADER.size
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        return sum(segment.n for segment in self.segments)
+
+    def __enter__(self) -> "ColumnarFile":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.segments = []
+        if self._buf is not None:
+            self._buf.release()
+            self._buf = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # 调用方仍持有列视图：映射随其回收
+                pass
+            self._mmap = None
+        self._file.close()
+
+    def rows(self) -> List[tuple]:
+        rows: List[tuple] = []
+        for segment in self.segments:
+            rows.extend(segment.rows())
+        return rows
+
+    def totals(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, float]:
+        """直接扫描金额、日期与类型列，返回与 AnalyticsService.compute_totals 相同结构的汇总。"""
+        low = _to_micros(start) if start else None
+        high = _to_micros(end) if end else None
+        np = _numpy()
+        sums = {"INCOME": 0.0, "EXPENSE": 0.0}
+        count = 0
+        for segment in self.segments:
+            types = segment.dictionary["types"]
+            if np is not None:
+                amount = np.frombuffer(segment.view("amount"), dtype=np.float64)
+                date = np.frombuffer(segment.view("date"), dtype=np.int64)
+                codes = np.frombuffer(segment.view("type"), dtype=np.uint8)
+                mask = np.ones(segment.n, dtype=bool)
+                if low is not None:
+                    mask &= date >= low
+                if high is not None:
+                    mask &= date <= high
+                per_type = np.bincount(codes[mask], weights=amount[mask], minlength=len(types))
+                for code, ttype in enumerate(types):
+                    if ttype in sums:
+                        sums[ttype] += float(per_type[code])
+                count += int(mask.sum())
+                del amount, date, codes, mask
+                continue
+            for amount, date, code in zip(segment.view("amount"), segment.view("date"), segment.view("type")):
+                if (low is None or date >= low) and (high is None or date <= high):
+                    count += 1
+                    ttype = types[code]
+                    if ttype in sums:
+                        sums[ttype] += amount
+        return {"income": sums["INCOME"], "expense": sums["EXPENSE"],
+                "net": sums["INCOME"] - sums["EXPENSE"], "count": count}
+
+
+def _check_header(header: bytes, path: str):
+    if len(header) < _FILE_HEADER.size:
+        raise ValueError(f"{path} 不是列式账本文件")
+    magic, version, little = _FILE_HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} 不是列式账本文件")
+    if version != VERSION:
+        raise ValueError(f"不支持的列式文件版本: {version}")
+    if bool(little) != (sys.byteorder == "little"):
+        raise ValueError("列式文件的字节序与本机不同")
+
+
+def _scan(buf: memoryview, path: str) -> Tuple[List[Segment], int]:
+    """依次解析各段；末尾写到一半的段（追加时中断）被忽略，返回 (段列表, 有效数据的长度)。"""
+    segments = []
+    offset = _FILE_HEADER.size
+    while offset < len(buf):
+        try:
+            segment = Segment(buf, offset)
+        except (EOFError, ValueError, struct.error) as e:
+            logger.warning("%s 末尾的数据不完整，已忽略 %s 字节: %s", path, len(buf) - offset, e)
+            break
+        segments.append(segment)
+        offset += segment.size
+    return segments, offset
+
+
+def _file_header() -> bytes:
+    return _FILE_HEADER.pack(MAGIC, VERSION, 1 if sys.byteorder == "little" else 0)
+
+
+def read_rows(path: str) -> List[tuple]:
+    with ColumnarFile(path) as f:
+        return f.rows()
+
+
+def read(path: str) -> List[Transaction]:
+    return snapshot.from_rows(read_rows(path))
+
+
+def segment_count(path: str) -> int:
+    try:
+        with ColumnarFile(path) as f:
+            return len(f.segments)
+    except FileNotFoundError:
+        return 0
+
+
+def write(path: str, rows: Sequence[tuple]):
+    """整体重写（临时文件 + fsync + os.replace）。"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_file_header())
+        for segment in _encode(rows):
+            f.write(segment)
+        durable.sync(f)
+    durable.replace(tmp, path)
+
+
+def append(path: str, rows: Sequence[tuple]):
+    """把 rows 作为新段追加到文件末尾；文件不存在时新建。
+
+    先截掉上次中断留下的不完整段，再追加，已有段的内容不会被改写。
+    """
+    if not os.path.exists(path):
+        write(path, rows)
+        return
+    if not rows:
+        return
+    with ColumnarFile(path) as existing:
+        valid_size = existing.valid_size
+    with open(path, "r+b") as f:
+        f.truncate(valid_size)
+        f.seek(valid_size)
+        for segment in _encode(rows):
+            f.write(segment)
+        durable.sync(f)
+
+
+def import_json(json_path: str, path: str) -> int:
+    """把 JSON 账本转换为列式文件，返回条数；无法解析的记录移入隔离文件。"""
+    rows, bad = parallel_load.load_rows(json_path)
+    if bad:
+        parallel_load.quarantine(json_path, bad)
+    write(path, rows)
+    return len(rows)
+
+
+def export_json(path: str, json_path: str) -> int:
+    """把列式文件导出为现有的 JSON 格式，返回条数。"""
+    data = [transaction.to_dict() for transaction in read(path)]
+    tmp = f"{json_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, json_path)
+    return len(data)
@@ -0,0 +1,143 @@
+"""
+账本文件的透明压缩
+
+DATA_FORMAT=gzip 或 zstd 时，JSON 账本（以及分区文件）以压缩流写入，文件名不变。读取时按文件头的
+魔数自动识别压缩格式，因此切换 DATA_FORMAT 后现有文件照常加载，下次保存时改用新的格式。
+压缩与解压都是流式的：写入时 json.dump 直接写进压缩流，读取时 json_stream 从解压流中逐段解析，
+不需要在内存中保留压缩前的整个文件。
+
+zstd 需要可选依赖 zstandard（pip install zstandard）；未安装时读取 zstd 文件会报错，
+配置为 zstd 时退回 gzip 并记录警告。
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import logging
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, TextIO
+
+from ledger.config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+GZIP = "gzip"
+ZSTD = "zstd"
+MAGIC = {GZIP: b"\x1f\x8b", ZSTD: b"\x28\xb5\x2f\xfd"}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+_warned = False
+
+
+def _zstd():
+    """zstandard 为可选依赖，只在读写 zstd 文件时导入。"""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def available(codec: str) -> bool:
+    return codec == GZIP or (codec == ZSTD and _zstd() is not None)
+
+
+def configured(data_format: Optional[str] = None) -> Optional[str]:
+    """保存时使用的压缩格式（DATA_FORMAT 为 gzip/zstd 时），不压缩返回 None。"""
+    global _warned
+    data_format = (data_format or Config.DATA_FORMAT).lower()
+    if data_format not in MAGIC:
+        return None
+    if not available(data_format):
+        if not _warned:
+            logger.warning("未安装 zstandard，账本改用 gzip 压缩（pip install zstandard 后生效）")
+            _warned = True
+        return GZIP
+    return data_format
+
+
+def sniff(head: bytes) -> Optional[str]:
+    """按开头的字节识别压缩格式；未压缩返回 None。"""
+    for codec, magic in MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def detect(path: str) -> Optional[str]:
+    """按文件头识别压缩格式；未压缩（或文件为空）返回 None。"""
+    with open(path, 'rb') as f:
+        return sniff(f.read(4))
+
+
+def _reader(raw: BinaryIO, codec: str) -> BinaryIO:
+    if codec == GZIP:
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    zstandard = _zstd()
+    if zstandard is None:
+        raise ValueError("账本文件为 zstd 压缩，需要安装 zstandard（pip install zstandard）")
+    return zstandard.ZstdDecompressor().stream_reader(raw)
+
+
+@contextmanager
+def open_text(path: str) -> Iterator[TextIO]:
+    """以文本方式读取账本文件，自动解压。"""
+    codec = detect(path)
+    if codec is None:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield f
+        return
+    with open(path, 'rb') as raw, io.TextIOWrapper(_reader(raw, codec), encoding='utf-8') as f:
+        yield f
+
+
+def read_text(path: str, partial: bool = False) -> str:
+    """读取并解压整个文件；partial 时压缩流被截断也返回已解压的部分（其余记录由调用方隔离）。"""
+    codec = detect(path)
+    if not partial or codec is None:
+        with open_text(path) as f:
+            return f.read()
+    parts = []
+    with open(path, 'rb') as raw:
+        reader = _reader(raw, codec)
+        try:
+            while True:
+                chunk = reader.read(1 << 16)
+                if not chunk:
+                    break
+                parts.append(chunk)
+        except (EOFError, OSError) as e:
+            logger.warning("压缩账本 %s 不完整（%s），只读取可解压的部分", path, e)
+    # 截断处可能落在多字节字符中间
+    return b"".join(parts).decode('utf-8', errors='ignore')
+
+
+def decode(data: bytes) -> str:
+    """把（可能压缩的）文件内容解压并解码为文本。"""
+    codec = sniff(data[:4])
+    if codec is None:
+        return data.decode('utf-8')
+    with io.TextIOWrapper(_reader(io.BytesIO(data), codec), encoding='utf-8') as f:
+        return f.read()
+
+
+@contextmanager
+def text_writer(raw: BinaryIO, codec: Optional[str]) -> Iterator[TextIO]:
+    """在已打开的二进制文件上写文本（codec 为 None 时不压缩）；退出时结束压缩流，但不关闭 raw。"""
+    if codec is None:
+        f = io.TextIOWrapper(raw, encoding='utf-8')
+        try:
+            yield f
+        finally:
+            f.flush()
+            f.detach()
+        return
+    if codec == GZIP:
+        # mtime=0：内容相同时压缩结果相同
+        stream = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=GZIP_LEVEL, mtime=0)
+    else:
+        stream = _zstd().ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False)
+    with io.TextIOWrapper(stream, encoding='utf-8') as f:
+        yield f
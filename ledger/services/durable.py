@@ -0,0 +1,197 @@
+"""
+崩溃安全的账本写入
+
+直接以 'w' 模式打开 DATABASE_PATH 写入时，写到一半崩溃或断电会留下被截断的文件。
+这里的保存流程保证磁盘上始终有一份完整的账本：
+
+1. 写入 <DATABASE_PATH>.tmp 并 fsync；
+2. 把当前文件硬链接为 <DATABASE_PATH>.prev，保留上一代；
+3. 原子更新清单 <DATABASE_PATH>.manifest.json（改名后同样 fsync 目录），记录当前与上一代的大小、修改时间与摘要；
+4. os.replace 把临时文件换到正式位置，再 fsync 所在目录，使改名本身落盘。
+
+加载前调用 recover()：大小与修改时间与清单一致时直接通过（不读文件）；否则计算摘要，
+与当前或上一代都不符即视为损坏，损坏文件移到 .corrupt，从 .prev 恢复上一代
+（文件不存在时不恢复，视为有意删除）。
+步骤 3、4 之间中断时临时文件即为清单中的当前代，recover() 会把它换到正式位置（前滚）。
+没有清单的旧账本不做校验，按原方式解析。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+from typing import Callable, IO, Optional
+
+from ledger.services import compress, snapshot
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = ".manifest.json"
+PREVIOUS_SUFFIX = ".prev"
+CORRUPT_SUFFIX = ".corrupt"
+
+
+def manifest_path(path: str) -> str:
+    return path + MANIFEST_SUFFIX
+
+
+def sync(f: IO):
+    """把已写入文件对象的内容刷到磁盘。"""
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def fsync_dir(directory: str):
+    """fsync 目录，使其中的新建与改名落盘（Windows 不支持打开目录，跳过）。"""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replace(tmp: str, path: str):
+    """os.replace 并 fsync 所在目录。"""
+    os.replace(tmp, path)
+    fsync_dir(os.path.dirname(path))
+
+
+def _entry(key: snapshot.SourceKey) -> dict:
+    return {"size": key.size, "mtime_ns": key.mtime_ns, "sha1": key.digest}
+
+
+def read_manifest(path: str) -> Optional[dict]:
+    try:
+        with open(manifest_path(path), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        # 清单本身原子写入，解析失败只可能是外部修改；当作没有清单
+        logger.warning("账本清单无法解析（%s），跳过校验", e)
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        logger.warning("不支持的账本清单版本: %s，跳过校验", manifest.get("version"))
+        return None
+    return manifest
+
+
+def _write_manifest(path: str, manifest: dict):
+    target = manifest_path(path)
+    tmp = f"{target}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(manifest, indent=2))
+        sync(f)
+    replace(tmp, target)
+
+
+def _matches(path: str, entry: Optional[dict]) -> bool:
+    """文件大小与修改时间是否与清单记录一致（不读取内容）。"""
+    if not entry:
+        return False
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return (st.st_size, st.st_mtime_ns) == (entry["size"], entry["mtime_ns"])
+
+
+def _digest(path: str) -> Optional[str]:
+    try:
+        return snapshot.source_key(path).digest
+    except OSError:
+        return None
+
+
+def _keep_previous(path: str, previous: str):
+    """把当前文件保留为上一代（优先硬链接，不复制数据）。"""
+    try:
+        os.remove(previous)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(path, previous)
+    except OSError:
+        shutil.copy2(path, previous)
+
+
+def save(path: str, write: Callable[[IO], None], codec: Optional[str] = None) -> snapshot.SourceKey:
+    """崩溃安全地保存文本文件：write(f) 写入内容，返回新文件的 SourceKey（可直接用于快照）。
+
+    codec 为 gzip/zstd 时以压缩流写入（见 compress），摘要针对压缩后的文件。
+    """
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, 'wb') as raw:
+            with compress.text_writer(raw, codec) as f:
+                write(f)
+            sync(raw)
+        # 改名不改变大小、修改时间与内容，临时文件的标识即为保存后文件的标识
+        key = snapshot.source_key(tmp)
+        manifest = read_manifest(path) or {}
+        current = manifest.get("current")
+        previous = None
+        # 只有经过清单确认完整的当前文件才作为上一代保留
+        if current and _matches(path, current):
+            _keep_previous(path, path + PREVIOUS_SUFFIX)
+            previous = current
+        _write_manifest(path, {
+            "version": MANIFEST_VERSION,
+            "generation": manifest.get("generation", 0) + 1,
+            "current": _entry(key),
+            "previous": previous,
+        })
+        replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return key
+
+
+def recover(path: str) -> bool:
+    """加载前校验账本，必要时前滚未完成的保存或恢复上一代；返回文件是否经过修复。"""
+    manifest = read_manifest(path)
+    if manifest is None:
+        return False
+    current, previous = manifest.get("current"), manifest.get("previous")
+    if _matches(path, current):
+        return False
+
+    tmp = f"{path}.tmp"
+    if _matches(tmp, current) and _digest(tmp) == current["sha1"]:
+        replace(tmp, path)
+        logger.warning("上次保存在改名前中断，已完成保存: %s", path)
+        return True
+    digest = _digest(path)
+    if digest is None:
+        return False  # 文件不存在（例如被手动删除），按空账本处理
+    if digest in (current["sha1"], previous and previous["sha1"]):
+        return False  # 内容完整（例如被复制过，修改时间变化）
+
+    backup = path + PREVIOUS_SUFFIX
+    if previous is None or _digest(backup) != previous["sha1"]:
+        logger.error("账本 %s 与清单不符，且没有可用的上一代，按原样加载", path)
+        return False
+    replace(path, path + CORRUPT_SUFFIX)
+    restored = f"{path}.tmp"
+    shutil.copy2(backup, restored)
+    with open(restored, 'rb') as f:
+        os.fsync(f.fileno())
+    key = snapshot.source_key(restored)
+    _write_manifest(path, {
+        "version": MANIFEST_VERSION,
+        "generation": manifest.get("generation", 0) + 1,
+        "current": _entry(key),
+        "previous": None,
+    })
+    replace(restored, path)
+    logger.error("账本 %s 已损坏（移至 %s），已恢复上一代", path, path + CORRUPT_SUFFIX)
+    return True
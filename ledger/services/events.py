@@ -0,0 +1,99 @@
+"""
+交易变更事件
+
+TransactionService 在每次增删改后通过 EventBus 发布类型化事件，订阅者据此增量更新自己的
+索引、汇总与界面，不必重新拉取全部交易：
+
+- TransactionAdded / TransactionDeleted：新增或删除的交易；
+- TransactionUpdated：old 为修改前的副本，new 为修改后的交易，changes 为变化的字段；
+- BatchCommitted：批量操作（batch）提交，events 为期间发布过的全部事件，便于只在提交时统一处理；
+- TransactionsReloaded：内存中的交易被整体替换（例如后台加载完成），订阅者应重新构建。
+
+事件在修改线程、服务锁内同步发布，保证各订阅者看到的顺序与修改顺序一致。
+因此回调应尽快返回：界面需经信号转到界面线程（见 ui/change_relay.py），耗时的计算交给后台。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Tuple, Type, Union
+
+from ledger.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TransactionAdded:
+    transaction: Transaction
+
+
+@dataclass(frozen=True)
+class TransactionUpdated:
+    old: Transaction
+    new: Transaction
+    changes: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class TransactionDeleted:
+    transaction: Transaction
+
+
+@dataclass(frozen=True)
+class BatchCommitted:
+    events: Tuple["ChangeEvent", ...]
+
+
+@dataclass(frozen=True)
+class TransactionsReloaded:
+    count: int
+
+
+ChangeEvent = Union[TransactionAdded, TransactionUpdated, TransactionDeleted]
+Event = Union[ChangeEvent, BatchCommitted, TransactionsReloaded]
+Handler = Callable[[Event], None]
+
+CHANGE_EVENTS = (TransactionAdded, TransactionUpdated, TransactionDeleted)
+
+
+def expand(event: Event) -> Iterator[ChangeEvent]:
+    """逐条展开事件（BatchCommitted 展开为其中的各条变更）。"""
+    if isinstance(event, BatchCommitted):
+        yield from event.events
+    elif isinstance(event, CHANGE_EVENTS):
+        yield event
+
+
+class EventBus:
+    """同步发布的订阅表；某个订阅者抛出的异常只记录日志，不影响其他订阅者与修改操作。"""
+
+    def __init__(self):
+        self._handlers: List[Tuple[Handler, Tuple[Type, ...]]] = []
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        """是否有订阅者（没有时服务不构建事件对象）。"""
+        return bool(self._handlers)
+
+    def subscribe(self, handler: Handler, *event_types: Type) -> Callable[[], None]:
+        """订阅指定类型的事件（不指定时接收全部），返回取消订阅的函数。"""
+        with self._lock:
+            self._handlers = self._handlers + [(handler, event_types)]
+        return lambda: self.unsubscribe(handler)
+
+    def unsubscribe(self, handler: Handler):
+        with self._lock:
+            self._handlers = [(h, types) for h, types in self._handlers if h != handler]
+
+    def publish(self, event: Event):
+        # 订阅表按写时复制替换，发布时无需加锁，回调中也可以订阅或取消订阅
+        for handler, event_types in self._handlers:
+            if event_types and not isinstance(event, event_types):
+                continue
+            try:
+                handler(event)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("交易事件处理失败（%s）: %s", type(event).__name__, e)
@@ -0,0 +1,117 @@
+"""
+多进程共享账本的建议锁
+
+图形界面与脚本（main.py、命令行）同时打开同一个 DATABASE_PATH 时，各自在内存中保存交易并整体写回，
+后写入的进程会覆盖前者的修改。locked() 在 <DATABASE_PATH>.lock 上加建议锁（POSIX 为 flock，
+Windows 为 msvcrt.locking，只支持独占）：读取持共享锁，“检查外部修改 → 合并 → 写入”持独占锁，
+因此多个进程的保存串行进行，且每次写入前都能看到其他进程已写入的内容（见 TransactionService.flush）。
+
+同一进程内按路径共用一个锁，可重入：持有独占锁时的读取直接通过；不同线程之间互斥。
+FILE_LOCKING=false 时不加锁。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from ledger.config.settings import Config
+
+LOCK_SUFFIX = ".lock"
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _acquire(fd: int, exclusive: bool):
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)  # 阻塞约 10 秒后抛出 OSError，继续等待
+                return
+            except OSError:
+                continue
+
+    def _release(fd: int):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _acquire(fd: int, exclusive: bool):
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _release(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class _PathLock:
+    """一个锁文件在本进程中的持有状态。"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.fd: Optional[int] = None
+        self.depth = 0
+        self.exclusive = False
+
+
+_locks: Dict[str, _PathLock] = {}
+_locks_guard = threading.Lock()
+
+
+def lock_path(path: str) -> str:
+    return path + LOCK_SUFFIX
+
+
+def _path_lock(path: str) -> _PathLock:
+    key = os.path.abspath(path)
+    with _locks_guard:
+        state = _locks.get(key)
+        if state is None:
+            state = _locks[key] = _PathLock(lock_path(key))
+        return state
+
+
+@contextmanager
+def locked(path: str, exclusive: bool = False) -> Iterator[None]:
+    """持有 path 对应的进程间锁（exclusive 为 False 时为共享锁）。"""
+    directory = os.path.dirname(os.path.abspath(path))
+    if not Config.FILE_LOCKING or (not exclusive and not os.path.isdir(directory)):
+        # 目录都不存在时没有可读的内容；读取不应创建目录
+        yield
+        return
+    state = _path_lock(path)
+    with state.thread_lock:
+        if state.depth == 0:
+            os.makedirs(directory, exist_ok=True)
+            fd = os.open(state.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                _acquire(fd, exclusive)
+            except BaseException:
+                os.close(fd)
+                raise
+            state.fd, state.exclusive = fd, exclusive
+        elif exclusive and not state.exclusive:
+            # 先释放再加独占锁会让其他进程插入写入，调用方应一开始就申请独占锁
+            raise RuntimeError("持有共享锁时不能升级为独占锁")
+        state.depth += 1
+        try:
+            yield
+        finally:
+            state.depth -= 1
+            if state.depth == 0:
+                fd, state.fd = state.fd, None
+                try:
+                    _release(fd)
+                finally:
+                    os.close(fd)
+
+
+def stat_key(path: str) -> Optional[Tuple[int, int]]:
+    """文件的 (大小, 修改时间 ns)，用于判断是否被其他进程改写；文件不存在返回 None。"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
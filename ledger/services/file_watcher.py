@@ -0,0 +1,54 @@
+"""
+外部修改检查 - 定期发现其他进程对账本的写入并增量合并
+
+图形界面长时间打开时，main.py 或另一个进程可能改写同一个数据文件。ExternalChangeWatcher 在后台线程
+按间隔调用 TransactionService.sync_external：文件的 (大小, 修改时间) 未变化时只需一次 stat；
+变化时重新读取文件，只替换内容不同的交易并发布变更事件，界面经 ChangeRelay 局部刷新。
+"""
+
+import logging
+import threading
+from typing import Optional
+
+from ledger.config.settings import Config
+from ledger.services.transaction_service import TransactionService
+
+logger = logging.getLogger(__name__)
+
+
+class ExternalChangeWatcher:
+    """按间隔检查数据文件是否被其他进程修改的后台线程。"""
+
+    def __init__(self, service: TransactionService, interval_ms: Optional[int] = None):
+        self.service = service
+        self.interval_ms = Config.WATCH_INTERVAL_MS if interval_ms is None else interval_ms
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.merged = 0  # 累计合并的变更条数
+
+    def start(self) -> "ExternalChangeWatcher":
+        if self.interval_ms <= 0 or (self._thread and self._thread.is_alive()):
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ledger-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def poll(self) -> int:
+        """检查一次，返回合并的变更条数。"""
+        count = self.service.sync_external()
+        self.merged += count
+        return count
+
+    def _run(self):
+        while not self._stop.wait(self.interval_ms / 1000):
+            try:
+                self.poll()
+            except Exception as e:  # pylint: disable=broad-except
+                # 其他进程正在写入时可能读到不完整的文件（未加锁的旧版本），下次再试
+                logger.warning("检查账本外部修改失败: %s", e)
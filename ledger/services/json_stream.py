@@ -0,0 +1,88 @@
+"""
+流式读取 JSON 数组
+
+json.load 会先把整个文件解析成字典列表，再由调用方逐个转换，峰值内存约为最终数据的两倍以上。
+iter_array 按块读取文本，只对数组的顶层元素逐个调用 JSONDecoder.raw_decode，
+每次只在内存中保留读缓冲区与当前元素，适用于现有的交易文件格式（顶层为对象数组）。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Iterator, TextIO
+
+BUFFER_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER_CHARS = re.compile(r'[-+0-9.eE]*')
+
+
+class _Reader:
+    """带游标的文本缓冲区：按需从文件补充数据，并丢弃已消费的部分。"""
+
+    def __init__(self, fp: TextIO, buffer_size: int):
+        self.fp = fp
+        self.buffer_size = buffer_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """再读入一块，返回是否读到了新数据。"""
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.buffer_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """跳过空白后返回下一个字符（文件结束时返回空串）。"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self.buf, self.pos)
+        self.pos += 1
+
+
+def iter_array(fp: TextIO, buffer_size: int = BUFFER_SIZE) -> Iterator[Any]:
+    """逐个产出顶层 JSON 数组中的元素。"""
+    decoder = json.JSONDecoder()
+    reader = _Reader(fp, buffer_size)
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.pos += 1
+    else:
+        while True:
+            reader.peek()
+            while True:
+                # 数字没有结束符：一直读到数字之后的字符，避免把被截断的数字当作完整值
+                if _NUMBER_CHARS.match(reader.buf, reader.pos).end() == len(reader.buf) and reader.fill():
+                    continue
+                try:
+                    value, end = decoder.raw_decode(reader.buf, reader.pos)
+                except json.JSONDecodeError:
+                    # 元素被缓冲区截断：补充数据后重试，已到文件末尾则是真正的语法错误
+                    if reader.fill():
+                        continue
+                    raise
+                break
+            reader.pos = end
+            yield value
+            separator = reader.peek()
+            reader.pos += 1
+            if separator == ']':
+                break
+            if separator != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", reader.buf, reader.pos - 1)
+    if reader.peek():
+        raise json.JSONDecodeError("Extra data", reader.buf, reader.pos)
@@ -0,0 +1,201 @@
+"""
+惰性交易行与只读视图
+
+惰性模式（LAZY_ROWS）下服务只保存紧凑的快照行（见 snapshot.to_rows），访问某一行时才构建
+Transaction 对象，构建出的对象放在容量有限的 LRU 中复用；按条件查询、汇总与保存直接处理行，
+不构建对象。行是不可变的元组，修改交易时由服务把对象写回对应的行。
+
+get_all_transactions 返回 TransactionView：对当前行列表（或交易列表）的只读引用，不复制数据。
+列表被视图引用后，下一次增删前会先复制一份（写时复制），因此已返回的视图内容不会随之变化，
+可以在后台线程中遍历。
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterator, List, Optional, Sequence, overload
+
+from ledger.models.transaction import Transaction
+from ledger.services import snapshot
+
+
+class TransactionView(Sequence):
+    """交易的只读序列；hydrate 不为 None 时 items 为快照行，访问时才构建对象。"""
+
+    __slots__ = ("_items", "_hydrate")
+
+    def __init__(self, items: Sequence, hydrate: Optional[Callable[[tuple], Transaction]] = None):
+        self._items = items
+        self._hydrate = hydrate
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def rows(self) -> Optional[Sequence[tuple]]:
+        """惰性视图底层的快照行（只读；按行筛选、汇总时不构建对象）；普通视图为 None。"""
+        return self._items if self._hydrate is not None else None
+
+    @property
+    def hydrator(self) -> Optional[Callable[[tuple], Transaction]]:
+        """惰性视图把快照行构建为交易对象的函数（用于包装筛选出的部分行）；普通视图为 None。"""
+        return self._hydrate
+
+    @overload
+    def __getitem__(self, index: int) -> Transaction: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Transaction]: ...
+
+    def __getitem__(self, index):
+        item = self._items[index]
+        if self._hydrate is None:
+            return list(item) if isinstance(index, slice) else item
+        if isinstance(index, slice):
+            return [self._hydrate(row) for row in item]
+        return self._hydrate(item)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        if self._hydrate is None:
+            return iter(self._items)
+        return map(self._hydrate, self._items)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (TransactionView, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"TransactionView({len(self)} 条)"
+
+
+class LRUCache:
+    """线程安全的定长 LRU（视图可能在后台线程中构建对象）。"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(capacity, 0)
+        self._items: "OrderedDict[str, Transaction]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str) -> Optional[Transaction]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Transaction):
+        if not self.capacity:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def discard(self, key: str):
+        with self._lock:
+            self._items.pop(key, None)
+
+
+class LazyTransactions:
+    """以快照行保存的交易列表，按需构建对象（由服务在其锁内修改）。"""
+
+    def __init__(self, rows: Sequence[tuple] = (), cache_size: int = 10000):
+        self._rows: List[tuple] = list(rows)
+        self._shared = False
+        self.cache = LRUCache(cache_size)
+        # 每次增删改递增；视图只在创建后没有修改时才把构建的对象放入 LRU，避免旧行的对象被复用
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+
+    def hydrate(self, row: tuple) -> Transaction:
+        """返回（当前）行对应的交易对象；LRU 中已有时复用（对象可能已被修改，以对象为准）。"""
+        transaction = self.cache.get(row[0])
+        if transaction is None:
+            transaction = snapshot.row_to_transaction(row)
+            self.cache.put(row[0], transaction)
+        return transaction
+
+    def _view_hydrator(self, generation: int) -> Callable[[tuple], Transaction]:
+        def hydrate(row: tuple) -> Transaction:
+            transaction = self.cache.get(row[0])
+            if transaction is None:
+                transaction = snapshot.row_to_transaction(row)
+                with self._generation_lock:
+                    if self._generation == generation:
+                        self.cache.put(row[0], transaction)
+            return transaction
+        return hydrate
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.hydrate(row) for row in self._rows[index]]
+        return self.hydrate(self._rows[index])
+
+    def __iter__(self) -> Iterator[Transaction]:
+        return iter(self.view())
+
+    def _writable(self) -> List[tuple]:
+        with self._generation_lock:
+            self._generation += 1
+        if self._shared:
+            self._rows = list(self._rows)
+            self._shared = False
+        return self._rows
+
+    def rows(self) -> List[tuple]:
+        """当前全部行（调用方不得修改；之后的增删改不会影响它）。"""
+        self._shared = True
+        return self._rows
+
+    def view(self) -> TransactionView:
+        return TransactionView(self.rows(), self._view_hydrator(self._generation))
+
+    def find(self, transaction_id: str) -> int:
+        """按交易ID查找行号（只比较行，不构建对象），找不到返回 -1。"""
+        for index, row in enumerate(self._rows):
+            if row[0] == transaction_id:
+                return index
+        return -1
+
+    def select(self, predicate: Callable[[tuple], bool]) -> List[Transaction]:
+        """按行筛选，只为匹配的行构建对象。"""
+        return [self.hydrate(row) for row in self._rows if predicate(row)]
+
+    def append(self, transaction: Transaction):
+        self._writable().append(snapshot.to_rows([transaction])[0])
+        self.cache.put(transaction.transaction_id, transaction)
+
+    def extend(self, transactions: Sequence[Transaction]):
+        for transaction in transactions:
+            self.append(transaction)
+
+    def pop(self, index: int) -> Transaction:
+        row = self._writable().pop(index)
+        transaction = self.cache.get(row[0]) or snapshot.row_to_transaction(row)
+        self.cache.discard(row[0])
+        return transaction
+
+    def store(self, transaction: Transaction) -> bool:
+        """把（已修改的）交易对象写回对应的行。"""
+        index = self.find(transaction.transaction_id)
+        if index < 0:
+            return False
+        self._writable()[index] = snapshot.to_rows([transaction])[0]
+        self.cache.put(transaction.transaction_id, transaction)
+        return True
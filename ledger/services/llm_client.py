@@ -0,0 +1,178 @@
+"""OpenAI 兼容接口的统一调用封装与埋点。
+
+所有 LLM 调用都经过 chat_completion：负责重试、流式接收，并把以下指标写入
+ledger.services.metrics.registry（名称前缀 llm.<kind>.）：
+
+- connect_ms：发出请求到收到响应头（含建连、排队；仅流式，非流式调用返回时响应已全部收到，只计入 total_ms）
+- first_token_ms：发出请求到收到第一个内容分片（仅流式）
+- total_ms：整次调用耗时（含重试）
+- prompt_tokens / completion_tokens：来自 usage
+- calls / errors / retries / parse_failures 计数，以及 parse_ms 解析耗时
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from ledger.config import Config
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LLMResponse:
+    content: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    retries: int = 0
+    total_ms: float = 0.0
+
+
+def create_client():
+    """创建 OpenAI 客户端（延迟导入 openai；重试由 chat_completion 负责以便计数）。"""
+    try:
+        from openai import OpenAI  # type: ignore
+    except Exception as exc:  # pylint: disable=broad-except
+        raise RuntimeError("openai 依赖未安装，请在 requirements 中安装 openai") from exc
+    return OpenAI(
+        api_key=Config.OPENAI_API_KEY,
+        base_url=(Config.OPENAI_BASE_URL or None),
+        max_retries=0,
+    )
+
+
+def _is_retryable(exc: Exception) -> bool:
+    try:
+        import openai  # type: ignore
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return isinstance(exc, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError))
+
+
+def _is_bad_request(exc: Exception) -> bool:
+    try:
+        import openai  # type: ignore
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return isinstance(exc, openai.BadRequestError)
+
+
+# 部分 OpenAI 兼容接口不接受 stream_options：第一次被拒绝后本进程不再发送（流式调用拿不到 usage）
+_stream_options_supported = True
+
+
+def _int_or_none(val: Any) -> Optional[int]:
+    return val if isinstance(val, int) and not isinstance(val, bool) else None
+
+
+def chat_completion(
+    client,
+    kind: str,
+    messages: List[Dict[str, str]],
+    temperature: float = 0.0,
+    max_retries: Optional[int] = None,
+    stream: Optional[bool] = None,
+) -> LLMResponse:
+    """调用 chat.completions 并记录埋点；可重试错误按指数退避重试。"""
+    prefix = f"llm.{kind}"
+    retries_left = Config.AI_MAX_RETRIES if max_retries is None else max_retries
+    use_stream = Config.AI_STREAM if stream is None else stream
+    registry.incr(f"{prefix}.calls")
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        try:
+            result = _request_once(client, prefix, messages, temperature, use_stream)
+            break
+        except Exception as e:  # pylint: disable=broad-except
+            registry.incr(f"{prefix}.errors")
+            registry.incr(f"{prefix}.error.{type(e).__name__}")
+            if attempt >= retries_left or not _is_retryable(e):
+                registry.observe(f"{prefix}.total_ms", (time.perf_counter() - started) * 1000)
+                raise
+            attempt += 1
+            registry.incr(f"{prefix}.retries")
+            delay = min(8.0, 0.5 * (2 ** (attempt - 1)))
+            logger.warning("LLM 调用失败（%s），%.1fs 后第 %s 次重试: %s", kind, delay, attempt, e)
+            time.sleep(delay)
+
+    result.retries = attempt
+    result.total_ms = (time.perf_counter() - started) * 1000
+    registry.observe(f"{prefix}.total_ms", result.total_ms)
+    if result.prompt_tokens is not None:
+        registry.observe(f"{prefix}.prompt_tokens", result.prompt_tokens)
+    if result.completion_tokens is not None:
+        registry.observe(f"{prefix}.completion_tokens", result.completion_tokens)
+    return result
+
+
+def _request_once(client, prefix: str, messages, temperature: float, use_stream: bool) -> LLMResponse:
+    t0 = time.perf_counter()
+    kwargs: Dict[str, Any] = {
+        "model": Config.OPENAI_MODEL,
+        "messages": messages,
+        "temperature": temperature,
+    }
+    global _stream_options_supported
+    if use_stream:
+        kwargs["stream"] = True
+        if _stream_options_supported:
+            kwargs["stream_options"] = {"include_usage": True}
+    try:
+        resp = client.chat.completions.create(**kwargs)
+    except Exception as e:  # pylint: disable=broad-except
+        if "stream_options" not in kwargs or not _is_bad_request(e):
+            raise
+        logger.info("LLM 接口不支持 stream_options，改为不请求流式 usage: %s", e)
+        _stream_options_supported = False
+        del kwargs["stream_options"]
+        t0 = time.perf_counter()
+        resp = client.chat.completions.create(**kwargs)
+
+    from openai import Stream  # type: ignore
+
+    if not isinstance(resp, Stream):
+        usage = getattr(resp, "usage", None)
+        return LLMResponse(
+            content=resp.choices[0].message.content or "",
+            prompt_tokens=_int_or_none(getattr(usage, "prompt_tokens", None)),
+            completion_tokens=_int_or_none(getattr(usage, "completion_tokens", None)),
+        )
+
+    registry.observe(f"{prefix}.connect_ms", (time.perf_counter() - t0) * 1000)
+    parts: List[str] = []
+    usage = None
+    first = True
+    for chunk in resp:
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+        for choice in chunk.choices or []:
+            delta = getattr(choice.delta, "content", None)
+            if delta:
+                if first:
+                    registry.observe(f"{prefix}.first_token_ms", (time.perf_counter() - t0) * 1000)
+                    first = False
+                parts.append(delta)
+    return LLMResponse(
+        content="".join(parts),
+        prompt_tokens=_int_or_none(getattr(usage, "prompt_tokens", None)),
+        completion_tokens=_int_or_none(getattr(usage, "completion_tokens", None)),
+    )
+
+
+@contextmanager
+def timed_parse(kind: str):
+    """记录 LLM 结果解析耗时；块内抛出异常时计入 parse_failures。"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        registry.incr(f"llm.{kind}.parse_failures")
+        raise
+    finally:
+        registry.observe(f"llm.{kind}.parse_ms", (time.perf_counter() - started) * 1000)
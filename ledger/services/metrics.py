@@ -0,0 +1,173 @@
+"""进程内指标注册表。
+
+提供线程安全的计数器与直方图（保留有界样本以计算分位数），用于记录 LLM 调用耗时、
+token 用量与错误率等。进程退出时可将汇总结果写入 Config.METRICS_FILE，
+再通过 `python -m ledger metrics` 查看。
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """数值分布：精确的计数/总和/极值 + 蓄水池采样的分位数。"""
+
+    MAX_SAMPLES = 4096
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._samples: List[float] = []
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        value = float(value)
+        with self._lock:
+            self.count += 1
+            self.total += value
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+            if len(self._samples) < self.MAX_SAMPLES:
+                self._samples.append(value)
+            else:
+                # 蓄水池采样，保证样本对整体分布无偏
+                j = random.randrange(self.count)
+                if j < self.MAX_SAMPLES:
+                    self._samples[j] = value
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        rank = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+        return ordered[rank]
+
+    def summary(self) -> Dict[str, float]:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class MetricsRegistry:
+    """按名称管理计数器与直方图。"""
+
+    def __init__(self):
+        self._counters: Dict[str, int] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self._dump_registered = False
+
+    def incr(self, name: str, value: int = 1):
+        self._register_dump()
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        self._register_dump()
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = Histogram()
+        hist.observe(value)
+
+    def counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def histogram(self, name: str) -> Optional[Histogram]:
+        with self._lock:
+            return self._histograms.get(name)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, object]:
+        """导出可 JSON 序列化的汇总。"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = dict(self._histograms)
+        return {
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "counters": counters,
+            "histograms": {name: h.summary() for name, h in sorted(histograms.items())},
+        }
+
+    def dump(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+
+    def _register_dump(self):
+        """首次记录指标时注册退出转储，未产生指标的进程不会写文件。"""
+        if self._dump_registered:
+            return
+        self._dump_registered = True
+        atexit.register(self._dump_on_exit)
+
+    def _dump_on_exit(self):
+        from ledger.config.settings import Config  # 延迟导入，避免循环依赖
+
+        with self._lock:
+            empty = not (self._counters or self._histograms)
+        if empty or not Config.METRICS_FILE:
+            return
+        try:
+            self.dump(Config.METRICS_FILE)
+        except OSError as e:
+            logger.warning("写入指标文件失败: %s", e)
+
+
+# 全局注册表
+registry = MetricsRegistry()
+
+
+def format_snapshot(data: Dict[str, object]) -> str:
+    """把 snapshot() 结果渲染为便于阅读的文本表格。"""
+    lines = [f"生成时间: {data.get('generated_at', '-')}", "", "计数器:"]
+    counters = data.get("counters") or {}
+    if not counters:
+        lines.append("  (无)")
+    for name, value in sorted(counters.items()):
+        lines.append(f"  {name:<40} {value:>10}")
+    lines += ["", "分布:"]
+    histograms = data.get("histograms") or {}
+    if not histograms:
+        lines.append("  (无)")
+    else:
+        lines.append(f"  {'name':<40} {'count':>8} {'mean':>10} {'p50':>10} {'p90':>10} {'p99':>10} {'max':>10}")
+
+    def fmt(v):
+        return f"{v:>10.1f}" if isinstance(v, (int, float)) else f"{'-':>10}"
+
+    for name, s in histograms.items():
+        lines.append(
+            f"  {name:<40} {s.get('count', 0):>8} "
+            f"{fmt(s.get('mean'))} {fmt(s.get('p50'))} {fmt(s.get('p90'))} {fmt(s.get('p99'))} {fmt(s.get('max'))}"
+        )
+    return "\n".join(lines)
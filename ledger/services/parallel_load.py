@@ -0,0 +1,215 @@
+"""
+并行分段加载与逐条校验
+
+大文件按记录边界切分为若干字节区间，交给进程池分别解析与校验（含 datetime.fromisoformat），
+结果按区间顺序合并为快照行（见 snapshot.to_rows）。格式错误或字段无效的记录不会让整个账本
+加载失败：它们被跳过并追加到数据文件旁的隔离文件（<DATABASE_PATH>.quarantine.jsonl），
+其余记录照常加载。
+
+文件中原样出现的换行只可能位于记录之间（字符串内的换行会被转义），但紧凑格式没有换行，
+因此切分点取 “, {” 之后能完整解析出一条交易记录、且其后紧跟 “,” 或 “]” 的位置。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from ledger.services import compress
+
+logger = logging.getLogger(__name__)
+
+# 小于该大小的文件由单进程解析（进程池的启动与结果回传开销更大）
+PARALLEL_MIN_BYTES = 32 << 20
+QUARANTINE_SUFFIX = ".quarantine.jsonl"
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NEXT_RECORD = re.compile(r',\s*\{')
+_NEXT_RECORD_BYTES = re.compile(rb',\s*\{')
+_decoder = json.JSONDecoder()
+
+
+@dataclass
+class BadRecord:
+    """无法加载的记录：所在字节偏移（未知时为 -1）、原因与原始文本。"""
+
+    offset: int
+    error: str
+    raw: str
+
+
+def record_to_row(item: Any) -> tuple:
+    """校验一条记录并转换为快照行；字段缺失或类型不符时抛出 KeyError/TypeError/ValueError。"""
+    if not isinstance(item, dict):
+        raise TypeError("记录不是对象")
+    tid, amount, ttype = item['transaction_id'], item['amount'], item['transaction_type']
+    description, tags = item['description'], item.get('tags') or []
+    if not isinstance(tid, str) or not isinstance(ttype, str) or not isinstance(description, str):
+        raise TypeError("transaction_id/transaction_type/description 必须是字符串")
+    if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+        raise TypeError("amount 必须是数字")
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise TypeError("tags 必须是字符串列表")
+    return (tid, amount, ttype, datetime.fromisoformat(item['date']), description,
+            bool(item.get('is_recurring', False)), bool(item.get('auto_labeled', False)), tuple(tags))
+
+
+def parse_text(text: str, base: int = 0, first: bool = True, last: bool = True) -> Tuple[List[tuple], List[BadRecord]]:
+    """解析 JSON 数组的一段文本。
+
+    first 表示文本以 “[” 开头（整个数组的开头），last 表示文本以 “]” 结尾；
+    中间的区间从某条记录的 “{” 开始，到下一区间第一条记录之前结束。
+    base 为文本在文件中的字节偏移，仅用于记录损坏位置。
+    """
+    rows: List[tuple] = []
+    bad: List[BadRecord] = []
+    n = len(text)
+    pos = _WHITESPACE.match(text, 0).end()
+    if first:
+        if text[pos:pos + 1] != '[':
+            raise ValueError("交易文件的顶层不是数组")
+        pos += 1
+
+    def offset(at: int) -> int:
+        return base + len(text[:at].encode('utf-8'))
+
+    while True:
+        pos = _WHITESPACE.match(text, pos).end()
+        if pos >= n:
+            break
+        if last and text[pos] == ']':
+            if text[pos + 1:].strip():
+                bad.append(BadRecord(offset(pos + 1), "数组结束后的多余内容", text[pos + 1:].strip()))
+            break
+        try:
+            item, end = _decoder.raw_decode(text, pos)
+        except json.JSONDecodeError as e:
+            # 跳到下一条记录的开头继续解析，中间的文本整体隔离
+            found = _NEXT_RECORD.search(text, pos + 1)
+            if found:
+                raw, stop = text[pos:found.start()], found.end() - 1
+            else:
+                raw, stop = text[pos:].rstrip(), n
+                if last:
+                    raw = raw.removesuffix(']')
+            bad.append(BadRecord(offset(pos), f"JSON 格式错误: {e.msg}", raw.strip()))
+            pos = stop
+            continue
+        try:
+            rows.append(record_to_row(item))
+        except (KeyError, TypeError, ValueError) as e:
+            bad.append(BadRecord(offset(pos), f"字段无效: {e!r}", text[pos:end]))
+        pos = _WHITESPACE.match(text, end).end()
+        if pos < n and text[pos] == ',':
+            pos += 1
+    return rows, bad
+
+
+def _parse_range(path: str, start: int, end: int, first: bool, last: bool) -> Tuple[List[tuple], List[BadRecord]]:
+    """工作进程：读取并解析文件的 [start, end) 字节区间。"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return parse_text(data.decode('utf-8'), start, first, last)
+
+
+def _is_record_start(tail: bytes) -> bool:
+    text = tail.decode('utf-8', 'replace')
+    try:
+        item, end = _decoder.raw_decode(text)
+    except json.JSONDecodeError:
+        return False
+    rest = text[end:].lstrip()
+    return isinstance(item, dict) and 'transaction_id' in item and rest[:1] in (',', ']')
+
+
+def _find_boundary(f, offset: int, size: int, window: int = 1 << 16) -> int:
+    """返回 offset 之后第一条记录的 “{” 的字节位置；找不到时返回 size。"""
+    while offset < size:
+        f.seek(offset)
+        data = f.read(window * 2)  # 相邻窗口重叠一半，跨窗口的记录也能完整校验
+        for match in _NEXT_RECORD_BYTES.finditer(data, 0, window + 1):
+            if _is_record_start(data[match.end() - 1:]):
+                return offset + match.end() - 1
+        offset += window
+    return size
+
+
+def split_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    """把文件切分为最多 parts 个按记录边界对齐的字节区间。"""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as f:
+        for k in range(1, parts):
+            boundary = _find_boundary(f, max(size * k // parts, bounds[-1] + 1), size)
+            if boundary >= size:
+                break
+            if boundary > bounds[-1]:
+                bounds.append(boundary)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def load_rows(path: str, workers: int = 1) -> Tuple[List[tuple], List[BadRecord]]:
+    """解析并校验整个文件，返回 (按文件顺序的快照行, 损坏记录)。
+
+    压缩文件无法按字节区间切分，解压后在当前进程中解析。
+    """
+    if workers <= 1 or os.path.getsize(path) < PARALLEL_MIN_BYTES or compress.detect(path):
+        return parse_text(compress.read_text(path, partial=True))
+
+    from concurrent.futures import ProcessPoolExecutor  # 只在加载大文件时才需要进程池
+
+    ranges = split_ranges(path, workers * 2)  # 每个进程两段，缓解区间大小不均
+    last = len(ranges) - 1
+    rows: List[tuple] = []
+    bad: List[BadRecord] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part_rows, part_bad in pool.map(_parse_range, [path] * len(ranges),
+                                            [s for s, _ in ranges], [e for _, e in ranges],
+                                            [i == 0 for i in range(len(ranges))],
+                                            [i == last for i in range(len(ranges))]):
+            rows.extend(part_rows)
+            bad.extend(part_bad)
+    return rows, bad
+
+
+def quarantine_path(source: str) -> str:
+    return source + QUARANTINE_SUFFIX
+
+
+def quarantine(source: str, records: Sequence[BadRecord]) -> int:
+    """把损坏记录追加到隔离文件（已隔离过的相同内容不重复写入），返回新写入的条数。
+
+    隔离文件只追加不清空：保存后源文件中不再包含这些记录，隔离文件是它们唯一的副本。
+    """
+    path = quarantine_path(source)
+    known = set()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    known.add(json.loads(line)['raw'])
+                except (ValueError, KeyError, TypeError):
+                    continue
+    except FileNotFoundError:
+        pass
+    fresh = [r for r in records if r.raw not in known]
+    if not fresh:
+        return 0
+    now = datetime.now().isoformat(timespec='seconds')
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in fresh:
+            f.write(json.dumps({"quarantined_at": now, **asdict(record)}, ensure_ascii=False) + "\n")
+    logger.warning("%s 条交易记录无法加载，已移入隔离文件 %s", len(fresh), path)
+    return len(fresh)
+
+
+def default_workers(configured: Optional[int] = None) -> int:
+    """配置为 0（或未配置）时使用 CPU 核数。"""
+    return configured if configured and configured > 0 else (os.cpu_count() or 1)
@@ -0,0 +1,270 @@
+"""
+按时间分区的交易存储
+
+单文件布局下修改任何一条历史记录都要重写整个账本。分区布局把交易按月（或按年）存放在
+<DATABASE_PATH 去掉扩展名>.partitions/ 目录下，每个分区一个 JSON 数组文件（格式与单文件相同，同样按 DATA_FORMAT 压缩），
+并用 manifest.json 记录分区列表：
+
+    {"version": 1, "granularity": "month",
+     "partitions": {"2024-01": {"file": "2024-01.json", "count": 31}}}
+
+保存时只重写内容发生变化的分区（按加载/上次保存时的行指纹比较，因此服务之外直接修改交易对象
+也能被发现）；读取时按查询的日期范围只加载需要的分区。保存前重新读取 manifest（调用方持有独占文件锁），
+保留其他写入者新增的分区，它们重写过的已加载分区以磁盘内容为比较基准。目录中没有 manifest 而旧的单文件存在时，
+首次打开会自动迁移，迁移完成后旧文件改名为 <DATABASE_PATH>.migrated 保留。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from ledger.models.transaction import Transaction
+from ledger.services import compress, durable, file_lock, parallel_load, snapshot
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+MIGRATED_SUFFIX = ".migrated"
+GRANULARITIES = ("month", "year")
+
+# 同一进程内的多个存储实例（例如界面服务与后台加载）不能同时迁移同一个账本
+_migrate_lock = threading.Lock()
+
+
+def partition_dir(source: str) -> str:
+    return os.path.splitext(source)[0] + ".partitions"
+
+
+def _write_json(path: str, data, codec: Optional[str] = None):
+    """原子写入 JSON（临时文件 + fsync + os.replace），写到一半中断不会留下残缺文件。"""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as raw:
+        with compress.text_writer(raw, codec) as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        durable.sync(raw)
+    durable.replace(tmp, path)
+
+
+class PartitionStore:
+    """一个账本的分区目录：分区的读取、按需加载与增量保存。"""
+
+    def __init__(self, source: str, granularity: str = "month",
+                 read_legacy: Optional[Callable[[str], List[Transaction]]] = None):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"不支持的分区粒度: {granularity}（可选 {', '.join(GRANULARITIES)}）")
+        self.source = source
+        self.directory = partition_dir(source)
+        self.granularity = granularity
+        # 解析旧单文件的函数（迁移时使用），为 None 时不迁移
+        self._read_legacy = read_legacy
+        self._partitions: Optional[Dict[str, dict]] = None
+        # 已加载分区的行指纹；未加载的分区不在内存中，保存时不会触及
+        self._fingerprints: Dict[str, int] = {}
+        # 已加载分区文件读取或写入时的 file_lock.stat_key，据此发现其他写入者重写过的分区
+        self._disk_keys: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    def key_of(self, date: datetime) -> str:
+        if self.granularity == "year":
+            return f"{date.year:04d}"
+        return f"{date.year:04d}-{date.month:02d}"
+
+    def open(self):
+        """读取 manifest；首次使用且旧单文件存在时先迁移。可重复调用。"""
+        with self._lock:
+            if self._partitions is not None:
+                return
+            with _migrate_lock:
+                manifest = self._read_manifest()
+                if manifest is None and self._read_legacy is not None and os.path.exists(self.source):
+                    self._migrate(self._read_legacy(self.source))
+                    return
+            self._apply_manifest(manifest)
+
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"不支持的分区清单版本: {manifest.get('version')}")
+        return manifest
+
+    def _apply_manifest(self, manifest: Optional[dict]):
+        if manifest is None:
+            self._partitions = {}
+            return
+        if manifest.get("granularity", self.granularity) != self.granularity:
+            # 已有分区以清单为准，修改配置不会自动重新分区
+            logger.warning("分区粒度配置为 %s，但已有分区按 %s 存放，继续使用后者",
+                           self.granularity, manifest["granularity"])
+            self.granularity = manifest["granularity"]
+        self._partitions = dict(manifest.get("partitions", {}))
+
+    def _file_key(self, key: str) -> Optional[Tuple[int, int]]:
+        entry = self._partitions.get(key)
+        return file_lock.stat_key(os.path.join(self.directory, entry["file"])) if entry else None
+
+    def refresh(self) -> Dict[str, List[tuple]]:
+        """重新读取磁盘上的清单（在独占文件锁内调用），采纳其他写入者新增、重写或删除的分区。
+
+        返回已加载、但在磁盘上已被其他写入者修改的分区及其当前内容；这些分区的指纹改为磁盘内容的指纹。
+        """
+        with self._lock:
+            self.open()
+            self._apply_manifest(self._read_manifest())
+            changed: Dict[str, List[tuple]] = {}
+            for key in sorted(self._fingerprints):
+                disk_key = self._file_key(key)
+                if disk_key == self._disk_keys.get(key):
+                    continue
+                rows = self._read_partition(key) if key in self._partitions else []
+                self._fingerprints[key] = hash(tuple(rows))
+                self._disk_keys[key] = disk_key
+                changed[key] = rows
+            return changed
+
+    def _write_manifest(self):
+        _write_json(self.manifest_path, {
+            "version": MANIFEST_VERSION,
+            "granularity": self.granularity,
+            "partitions": dict(sorted(self._partitions.items())),
+        })
+
+    def _migrate(self, transactions: Sequence[Transaction]):
+        """把旧单文件中的交易写为分区，完成后旧文件改名保留。"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._partitions = {}
+        groups = self.group(snapshot.to_rows(transactions))
+        for key, rows in groups.items():
+            self._write_partition(key, rows)
+        # 清单最后写入：清单存在即表示迁移完整，中途失败下次启动会重新迁移
+        self._write_manifest()
+        os.replace(self.source, self.source + MIGRATED_SUFFIX)
+        logger.info("已将 %s 条交易迁移为 %s 个分区（%s），原文件保留为 %s",
+                    len(transactions), len(groups), self.directory, self.source + MIGRATED_SUFFIX)
+
+    @property
+    def keys(self) -> List[str]:
+        self.open()
+        return sorted(self._partitions)
+
+    @property
+    def loaded_keys(self) -> Set[str]:
+        return set(self._fingerprints)
+
+    def keys_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+        """与 [start, end] 有交集的分区（分区键按时间顺序排列，可直接比较字符串）。"""
+        low = self.key_of(start) if start else None
+        high = self.key_of(end) if end else None
+        return [key for key in self.keys if (low is None or key >= low) and (high is None or key <= high)]
+
+    def group(self, rows: Sequence[tuple]) -> Dict[str, List[tuple]]:
+        """按分区键分组快照行（保持原顺序）。"""
+        groups: Dict[str, List[tuple]] = {}
+        for row in rows:
+            groups.setdefault(self.key_of(row[3]), []).append(row)
+        return groups
+
+    def _read_partition(self, key: str) -> List[tuple]:
+        path = os.path.join(self.directory, self._partitions[key]["file"])
+        try:
+            rows, bad = parallel_load.load_rows(path)
+        except FileNotFoundError:
+            logger.error("分区文件缺失: %s", path)
+            return []
+        except ValueError as e:
+            # 整个文件无法解析：移到一旁保留，避免之后保存该分区时覆盖
+            logger.error("分区文件损坏（%s），已移至 %s.corrupt", e, path)
+            os.replace(path, path + ".corrupt")
+            return []
+        if bad:
+            parallel_load.quarantine(path, bad)
+        return rows
+
+    def load(self, keys: Sequence[str]) -> List[Transaction]:
+        """加载尚未加载的分区，返回新加载的交易（按分区顺序）。"""
+        with self._lock:
+            self.open()
+            transactions: List[Transaction] = []
+            for key in sorted(keys):
+                if key in self._fingerprints:
+                    continue
+                # 先记录再读取：读取期间被改写时，下次 refresh 会再读一次
+                self._disk_keys[key] = self._file_key(key)
+                rows = self._read_partition(key) if key in self._partitions else []
+                self._fingerprints[key] = hash(tuple(rows))
+                transactions.extend(snapshot.from_rows(rows))
+            return transactions
+
+    def load_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Transaction]:
+        return self.load(self.keys_between(start, end))
+
+    def iter_partitions(self, newest_first: bool = False) -> Iterator[Tuple[str, List[Transaction]]]:
+        """逐个加载全部分区，产出 (分区键, 交易列表)。"""
+        for key in sorted(self.keys, reverse=newest_first):
+            yield key, self.load([key])
+
+    def mark_loaded(self, transactions: Sequence[Transaction]):
+        """登记由外部一次性读入的全部分区内容（例如界面的后台加载），作为之后增量保存的基准。"""
+        with self._lock:
+            self.open()
+            groups = self.group(snapshot.to_rows(transactions))
+            self._fingerprints = {key: hash(tuple(groups.get(key, ()))) for key in self._partitions}
+            self._disk_keys = {key: self._file_key(key) for key in self._partitions}
+
+    def _write_partition(self, key: str, rows: List[tuple]):
+        filename = f"{key}.json"
+        # 分区文件按 DATA_FORMAT 压缩，清单始终为明文
+        _write_json(os.path.join(self.directory, filename),
+                    [snapshot.row_to_transaction(row).to_dict() for row in rows], compress.configured())
+        self._partitions[key] = {"file": filename, "count": len(rows)}
+        self._disk_keys[key] = self._file_key(key)
+
+    def save(self, rows: Sequence[tuple]) -> List[str]:
+        """保存已加载分区的当前内容（rows 为全部已加载交易的快照行），只重写变化的分区。
+
+        调用方持有独占文件锁：先按磁盘上的清单刷新（见 refresh），清单在其基础上更新，
+        不会丢掉其他写入者新增的分区；只删除清单中仍存在、且被本次保存清空的分区文件。
+        返回重写（或删除）的分区键。
+        """
+        with self._lock:
+            self.open()
+            groups = self.group(rows)
+            for key in groups:
+                # 新出现的分区（例如新月份的第一笔交易）视为已加载的空分区
+                if key not in self._fingerprints:
+                    self._fingerprints[key] = hash(())
+                    self._disk_keys[key] = None
+            self.refresh()
+            changed = []
+            try:
+                for key in sorted(self._fingerprints):
+                    part = groups.get(key, [])
+                    fingerprint = hash(tuple(part))
+                    if fingerprint == self._fingerprints[key]:
+                        continue
+                    os.makedirs(self.directory, exist_ok=True)
+                    if part:
+                        self._write_partition(key, part)
+                    elif key in self._partitions:
+                        os.remove(os.path.join(self.directory, self._partitions.pop(key)["file"]))
+                        self._disk_keys[key] = None
+                    self._fingerprints[key] = fingerprint
+                    changed.append(key)
+            finally:
+                # 中途失败时也记录已写完的分区，未写的分区保持脏状态，下次保存重试
+                if changed:
+                    self._write_manifest()
+            return changed
@@ -0,0 +1,154 @@
+"""全账本批量重新打标。
+
+修改标签规则或重训本地模型后，用规则 + 本地模型为历史交易重新生成标签（不调用 LLM）。
+账本按分片分发到 ProcessPoolExecutor，各进程在初始化时载入一份标签模型，结果按完成顺序
+流式收回；最终在一次批量提交中写回，也可以只输出差异（dry-run）。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from ledger.config import Config
+from .tag_classifier import TagClassifier
+from .tagging_service import TaggingService
+from .transaction_service import TransactionService
+
+logger = logging.getLogger(__name__)
+
+Row = Tuple[str, str, str]  # (transaction_id, description, transaction_type)
+
+# 工作进程内的标签服务，由 _init_worker 创建
+_worker_tagger: Optional[TaggingService] = None
+
+
+def _make_tagger(model: Optional[dict], min_confidence: float) -> TaggingService:
+    Config.AI_LOCAL_MODEL_MIN_CONFIDENCE = min_confidence
+    classifier = TagClassifier.from_dict(model) if model else None
+    # 不再从磁盘加载，避免与父进程看到不同的模型
+    return TaggingService(classifier=classifier, load_model=False)
+
+
+def _init_worker(model: Optional[dict], min_confidence: float):
+    global _worker_tagger
+    _worker_tagger = _make_tagger(model, min_confidence)
+
+
+def _tag_rows(tagger: TaggingService, rows: Sequence[Row]) -> List[Tuple[str, List[str]]]:
+    return [(tid, tagger.suggest_tags_fast(desc, tx_type)) for tid, desc, tx_type in rows]
+
+
+def _tag_shard(rows: Sequence[Row]) -> List[Tuple[str, List[str]]]:
+    return _tag_rows(_worker_tagger, rows)
+
+
+@dataclass
+class RetagChange:
+    transaction_id: str
+    description: str
+    old_tags: List[str]
+    new_tags: List[str]
+
+
+@dataclass
+class RetagResult:
+    total: int = 0          # 参与重新打标的交易数
+    skipped: int = 0        # 因手动标签被跳过的交易数
+    workers: int = 1
+    elapsed: float = 0.0    # 打标耗时（不含写回）
+    changes: List[RetagChange] = field(default_factory=list)
+    applied: bool = False
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def retag_ledger(
+    service: TransactionService,
+    workers: Optional[int] = None,
+    chunk_size: int = 2000,
+    include_manual: bool = False,
+    dry_run: bool = False,
+    tagger: Optional[TaggingService] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> RetagResult:
+    """用规则 + 本地模型重新为账本打标。
+
+    默认只处理自动标签（auto_labeled）或无标签的交易，include_manual=True 时连同手动标签一起重算。
+    workers<=1 时在当前进程内执行；progress(done, total) 在调用线程回调。
+    """
+    workers = workers or os.cpu_count() or 1
+    tagger = tagger or TaggingService()
+    rows: List[Row] = []
+    current = {}
+    skipped = 0
+    for t in service.get_all_transactions():
+        if not include_manual and t.tags and not t.auto_labeled:
+            skipped += 1
+            continue
+        rows.append((t.transaction_id, t.description, t.transaction_type))
+        current[t.transaction_id] = t
+    result = RetagResult(total=len(rows), skipped=skipped, workers=workers)
+
+    shards = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    start = time.perf_counter()
+    new_tags = {}
+    done = 0
+    if workers <= 1 or len(shards) <= 1:
+        result.workers = 1
+        for shard in shards:
+            new_tags.update(_tag_rows(tagger, shard))
+            done += len(shard)
+            if progress:
+                progress(done, len(rows))
+    else:
+        store = tagger.model_store
+        if store is not None:
+            model = store.to_dict()
+        else:
+            model = tagger.classifier.to_dict() if tagger.classifier is not None else None
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(model, Config.AI_LOCAL_MODEL_MIN_CONFIDENCE),
+        ) as pool:
+            futures = [pool.submit(_tag_shard, shard) for shard in shards]
+            for fut in as_completed(futures):
+                tagged = fut.result()
+                new_tags.update(tagged)
+                done += len(tagged)
+                if progress:
+                    progress(done, len(rows))
+    result.elapsed = time.perf_counter() - start
+
+    # 按账本原顺序生成差异，保证输出稳定
+    for tid, _desc, _tx in rows:
+        t = current[tid]
+        tags = new_tags[tid]
+        if tags != t.tags:
+            result.changes.append(RetagChange(tid, t.description, list(t.tags), tags))
+
+    if not dry_run and result.changes:
+        with service.batch():
+            for change in result.changes:
+                service.update_transaction(change.transaction_id, tags=change.new_tags, auto_labeled=True)
+        result.applied = True
+    logger.info("重新打标 %s 条（%s 进程，%.0f 行/秒），变更 %s 条%s", result.total, result.workers,
+                result.rows_per_sec, len(result.changes), "（dry-run）" if dry_run else "")
+    return result
+
+
+def format_diff(changes: Sequence[RetagChange]) -> str:
+    """把变更格式化为类 diff 文本。"""
+    lines = []
+    for c in changes:
+        lines.append(f"@ {c.transaction_id} {c.description}")
+        lines.append(f"- {', '.join(c.old_tags) or '(无)'}")
+        lines.append(f"+ {', '.join(c.new_tags) or '(无)'}")
+    return "\n".join(lines)
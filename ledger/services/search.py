@@ -0,0 +1,190 @@
+"""交易筛选：可增量复用上次结果、可分片执行的过滤管线。
+
+仪表盘边输入边搜索时，新查询往往只是上一次查询的收窄（关键字变长、日期范围缩小、
+类型从“全部”变为具体类型），此时只需在上次的结果集中再过滤。iter_run 以分片方式执行，
+调用方可在分片之间处理事件或放弃已过时的查询；只有完整执行的查询才会被记为可复用结果。
+数据变化时 apply 按变更事件（见 events）就地更新数据源与上次结果，无需重新复制整个列表。
+数据源为惰性视图（LAZY_ROWS）时直接筛选快照行，结果也是惰性视图，只有实际显示的行才构建交易对象。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from operator import attrgetter, itemgetter
+from typing import Callable, Dict, Generator, Iterable, List, Optional, Sequence, Tuple
+
+from ledger.models.transaction import Transaction
+from ledger.services import events, snapshot
+from ledger.services.lazy_rows import TransactionView
+
+
+@dataclass(frozen=True)
+class TransactionQuery:
+    """仪表盘的筛选条件；keyword 为已转小写的关键字。"""
+
+    keyword: str = ""
+    transaction_type: Optional[str] = None  # INCOME / EXPENSE / None 表示全部
+    start: Optional[date] = None
+    end: Optional[date] = None
+
+    def narrows(self, other: "TransactionQuery") -> bool:
+        """本查询的结果是否一定是 other 结果的子集。"""
+        if other.keyword and other.keyword not in self.keyword:
+            return False
+        if other.transaction_type and other.transaction_type != self.transaction_type:
+            return False
+        if other.start and (self.start is None or self.start < other.start):
+            return False
+        if other.end and (self.end is None or self.end > other.end):
+            return False
+        return True
+
+
+class IncrementalFilter:
+    """在一份交易列表上执行查询，并在查询收窄时复用上次结果。"""
+
+    def __init__(self, transactions: Iterable[Transaction] = ()):
+        self.set_source(transactions)
+
+    def set_source(self, transactions: Iterable[Transaction]):
+        """替换数据源（数据变化后调用），清空可复用结果与小写文本缓存。
+
+        惰性视图只复制其快照行的引用，source 与上次结果中保存的都是行。
+        """
+        rows = transactions.rows if isinstance(transactions, TransactionView) else None
+        self._hydrate: Optional[Callable[[tuple], Transaction]] = None
+        if rows is not None:
+            self._hydrate = transactions.hydrator
+            transactions = rows
+        self.source: List = list(transactions)
+        self._haystacks: Dict[str, str] = {}
+        self._last: Optional[Tuple[TransactionQuery, List[Transaction]]] = None
+        self.last_scanned = 0  # 最近一次完整查询实际检查的行数
+
+    def _haystack(self, t: Transaction) -> str:
+        text = self._haystacks.get(t.transaction_id)
+        if text is None:
+            # 描述与各标签用 \0 分隔，避免关键字跨字段误匹配
+            text = "\0".join([t.description, *t.tags]).lower()
+            self._haystacks[t.transaction_id] = text
+        return text
+
+    def _row_haystack(self, row: tuple) -> str:
+        text = self._haystacks.get(row[0])
+        if text is None:
+            text = "\0".join([row[4], *row[7]]).lower()
+            self._haystacks[row[0]] = text
+        return text
+
+    def _item(self, t: Transaction):
+        """事件中的交易对象转换为数据源中的元素（惰性数据源为快照行）。"""
+        return snapshot.to_rows([t])[0] if self._hydrate else t
+
+    def _result(self, items: List) -> Sequence[Transaction]:
+        return TransactionView(items, self._hydrate) if self._hydrate else items
+
+    def matches(self, query: TransactionQuery, t) -> bool:
+        """单条交易（惰性数据源为快照行）是否满足查询。"""
+        hit: List = []
+        self._scan(query, [t], hit)
+        return bool(hit)
+
+    def _index(self, items: List, transaction_id: str) -> int:
+        key = itemgetter(0) if self._hydrate else attrgetter('transaction_id')
+        for index, t in enumerate(items):
+            if key(t) == transaction_id:
+                return index
+        return -1
+
+    def apply(self, event: events.ChangeEvent):
+        """按一条变更事件更新数据源；上次结果仍可复用时同步更新（新增的交易排在末尾，与数据源一致）。"""
+        if isinstance(event, events.TransactionAdded):
+            item = self._item(event.transaction)
+            self.source.append(item)
+            if self._last is not None and self.matches(self._last[0], item):
+                self._last[1].append(item)
+            return
+        t = event.transaction if isinstance(event, events.TransactionDeleted) else event.new
+        self._haystacks.pop(t.transaction_id, None)
+        index = self._index(self.source, t.transaction_id)
+        if index < 0:
+            return
+        item = self._item(t)
+        if isinstance(event, events.TransactionDeleted):
+            del self.source[index]
+        else:
+            self.source[index] = item
+        if self._last is None:
+            return
+        query, result = self._last
+        position = self._index(result, t.transaction_id)
+        keep = isinstance(event, events.TransactionUpdated) and self.matches(query, item)
+        if position >= 0:
+            if keep:
+                result[position] = item
+            else:
+                del result[position]
+        elif keep:
+            self._last = None  # 修改后新进入结果：位置未知，下次完整查询
+
+    def _candidates(self, query: TransactionQuery) -> List:
+        if self._last is not None and query.narrows(self._last[0]):
+            return self._last[1]
+        return self.source
+
+    def iter_run(self, query: TransactionQuery,
+                 chunk_size: int = 5000) -> Generator[int, None, Sequence[Transaction]]:
+        """分片执行查询：每处理完一片 yield 已检查行数，最终通过 StopIteration.value 返回结果。"""
+        candidates = self._candidates(query)
+        scan = self._scan
+        result: List = []
+        for offset in range(0, len(candidates), chunk_size):
+            scan(query, candidates[offset:offset + chunk_size], result)
+            if offset + chunk_size < len(candidates):
+                yield offset + chunk_size
+        self._last = (query, result)
+        self.last_scanned = len(candidates)
+        return self._result(result)
+
+    @property
+    def _scan(self) -> Callable[[TransactionQuery, List, List], None]:
+        """把一片数据中满足查询的元素追加到结果：惰性数据源按快照行，否则按交易对象。"""
+        return self._scan_rows if self._hydrate else self._scan_transactions
+
+    def _scan_transactions(self, query: TransactionQuery, items: List[Transaction], result: List[Transaction]):
+        # 与 matches 相同的条件，内联以免每行一次方法调用
+        keyword, ttype, start, end = query.keyword, query.transaction_type, query.start, query.end
+        for t in items:
+            if ttype and t.transaction_type != ttype:
+                continue
+            if start or end:
+                d = t.date.date()
+                if (start and d < start) or (end and d > end):
+                    continue
+            if keyword and keyword not in self._haystack(t):
+                continue
+            result.append(t)
+
+    def _scan_rows(self, query: TransactionQuery, rows: List[tuple], result: List[tuple]):
+        # 同上，按快照行的位置取字段：(id, 金额, 类型, 时间, 描述, 周期, 自动标签, 标签)
+        keyword, ttype, start, end = query.keyword, query.transaction_type, query.start, query.end
+        for row in rows:
+            if ttype and row[2] != ttype:
+                continue
+            if start or end:
+                d = row[3].date()
+                if (start and d < start) or (end and d > end):
+                    continue
+            if keyword and keyword not in self._row_haystack(row):
+                continue
+            result.append(row)
+
+    def run(self, query: TransactionQuery) -> Sequence[Transaction]:
+        """一次性执行查询。"""
+        gen = self.iter_run(query, chunk_size=max(1, len(self.source)))
+        while True:
+            try:
+                next(gen)
+            except StopIteration as stop:
+                return stop.value
@@ -0,0 +1,211 @@
+"""后台标签回填：把 LLM 打标移出用户操作的关键路径。
+
+第一阶段由调用方同步写入规则/本地模型标签并标记 auto_labeled；需要 LLM 补充的交易
+通过 enqueue 放入队列。工作线程把一段时间内积累的待办合并成一次批量 LLM 调用，
+再在一次批量提交中写回。队列持久化到数据目录下的 JSON 文件，重启后继续处理；
+队列深度与延迟通过 stats() 和指标注册表（tag_backfill.*）观察。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ledger.config import Config
+from .metrics import registry
+from .tagging_service import TaggingService, merge_tags
+from .transaction_service import TransactionService
+
+logger = logging.getLogger(__name__)
+
+QUEUE_FILENAME = "tag_backfill_queue.json"
+
+
+class TagBackfillWorker:
+    """合并待办、批量调用 LLM 并批量写回的后台工作线程。"""
+
+    def __init__(
+        self,
+        service: TransactionService,
+        tagger: Optional[TaggingService] = None,
+        queue_path: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        max_attempts: int = 3,
+        on_applied: Optional[Callable[[List[str]], None]] = None,
+    ):
+        self.ts = service
+        self.tagger = tagger or TaggingService()
+        self.queue_path = queue_path or os.path.join(
+            os.path.dirname(service.data_file) or ".", QUEUE_FILENAME
+        )
+        self.batch_size = batch_size or Config.TAG_BACKFILL_BATCH
+        self.max_wait = Config.TAG_BACKFILL_WAIT_MS / 1000 if max_wait is None else max_wait
+        self.max_attempts = max_attempts
+        self.on_applied = on_applied
+        # transaction_id -> {"enqueued_at": 时间戳, "attempts": 失败次数}
+        self._pending: Dict[str, Dict[str, float]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._busy = False
+        self.processed = 0
+        self.failed = 0
+        self._load_queue()
+
+    # ---------------- 队列 ----------------
+    def enqueue(self, transaction_ids: Iterable[str]):
+        now = time.time()
+        with self._cond:
+            added = False
+            for tid in transaction_ids:
+                if tid not in self._pending:
+                    self._pending[tid] = {"enqueued_at": now, "attempts": 0}
+                    added = True
+            if added:
+                self._persist()
+                registry.observe("tag_backfill.queue_depth", len(self._pending))
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, float]:
+        """队列深度、最早待办的等待时长（秒）与累计处理/失败数。"""
+        with self._cond:
+            oldest = min((item["enqueued_at"] for item in self._pending.values()), default=None)
+            return {
+                "depth": len(self._pending),
+                "lag_seconds": (time.time() - oldest) if oldest else 0.0,
+                "processed": self.processed,
+                "failed": self.failed,
+                "running": bool(self._thread and self._thread.is_alive()),
+            }
+
+    def _load_queue(self):
+        if not os.path.exists(self.queue_path):
+            return
+        try:
+            with open(self.queue_path, 'r', encoding='utf-8') as f:
+                self._pending = {k: dict(v) for k, v in json.load(f).items()}
+            if self._pending:
+                logger.info("恢复 %s 条待回填标签的交易", len(self._pending))
+        except (OSError, ValueError) as e:
+            logger.warning("读取标签回填队列失败: %s", e)
+
+    def _persist(self):
+        tmp = f"{self.queue_path}.tmp"
+        try:
+            directory = os.path.dirname(self.queue_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._pending, f)
+            os.replace(tmp, self.queue_path)
+        except OSError as e:
+            logger.warning("写入标签回填队列失败: %s", e)
+
+    # ---------------- 线程 ----------------
+    def start(self) -> "TagBackfillWorker":
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="tag-backfill", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """阻塞直到队列清空（或超时），返回是否已清空。"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while (self._pending or self._busy) and time.time() < deadline:
+                self._cond.wait(0.05)
+            return not self._pending
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                # 合并窗口：等待更多待办直到凑满一批或超时
+                deadline = time.time() + self.max_wait
+                while len(self._pending) < self.batch_size and not self._stopping:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = list(self._pending)[:self.batch_size]
+                self._busy = True
+            try:
+                self.process_batch(batch)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def process_batch(self, ids: List[str]) -> List[str]:
+        """处理一批待办；返回实际写回标签的交易 ID。"""
+        targets = []
+        for tid in ids:
+            t = self.ts.get_transaction(tid)
+            # 已删除或用户已手动改过标签（auto_labeled 被清除）的交易不再回填
+            if t is not None and t.auto_labeled:
+                targets.append(t)
+        items = [(t.description, t.transaction_type) for t in targets]
+
+        try:
+            results = self.tagger.suggest_tags_llm_batch(items) if items else []
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("批量 LLM 打标失败（%s 条）: %s", len(items), e)
+            self._retry_or_drop(ids)
+            return []
+
+        now = time.time()
+        applied: List[str] = []
+        with self.ts.batch():
+            for t, llm_tags in zip(targets, results):
+                # LLM 调用期间用户可能已手动修改或删除：按批量锁内的最新状态重新检查并合并
+                current = self.ts.get_transaction(t.transaction_id)
+                if current is None or not current.auto_labeled:
+                    continue
+                merged = merge_tags(current.tags, llm_tags)
+                if merged != current.tags:
+                    self.ts.update_transaction(t.transaction_id, tags=merged)
+                    applied.append(t.transaction_id)
+        with self._cond:
+            for tid in ids:
+                item = self._pending.pop(tid, None)
+                if item:
+                    registry.observe("tag_backfill.lag_ms", (now - item["enqueued_at"]) * 1000)
+            self.processed += len(ids)
+            registry.incr("tag_backfill.processed", len(ids))
+            registry.observe("tag_backfill.batch_size", len(ids))
+            self._persist()
+        if applied and self.on_applied:
+            self.on_applied(applied)
+        return applied
+
+    def _retry_or_drop(self, ids: List[str]):
+        with self._cond:
+            for tid in ids:
+                item = self._pending.get(tid)
+                if item is None:
+                    continue
+                item["attempts"] += 1
+                if item["attempts"] >= self.max_attempts:
+                    self._pending.pop(tid)
+                    self.failed += 1
+                    registry.incr("tag_backfill.failed")
+            self._persist()
+        # 失败后退避，避免在服务不可用时空转
+        time.sleep(min(10.0, 0.5 * self.max_attempts))
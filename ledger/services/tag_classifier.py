@@ -0,0 +1,404 @@
+"""本地标签分类器：基于字符 n-gram 的多项式朴素贝叶斯。
+
+纯 Python、仅用 CPU，从用户自己的已标注交易中学习“描述 → 标签”。模型以 JSON
+保存在 Config.AI_MODEL_PATH 下，支持增量训练：每笔交易记录学习时的（描述, 类型, 标签），
+内容未变时跳过，修改过的交易先撤销旧样本再学习新样本，用户的更正因此会被学到。
+预测只遍历输入特征的倒排计数，单条耗时通常在百微秒量级。
+
+同一模型文件在进程内只有一份（shared() 返回的 ModelStore），各标签服务学到的样本汇总到一起；
+保存时若文件已被其他进程改写，先读入再重放本进程尚未保存的样本，互不覆盖。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from ledger.models.transaction import Transaction
+from . import file_lock
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILENAME = "tag_classifier.json"
+
+Sample = Tuple[str, str, Tuple[str, ...]]  # (描述, 类型, 标签)
+
+
+def default_model_path() -> str:
+    from ledger.config import Config
+
+    return os.path.join(Config.AI_MODEL_PATH, MODEL_FILENAME)
+
+
+class TagClassifier:
+    """多标签场景下按“每个标签一个类别”训练的朴素贝叶斯分类器。"""
+
+    VERSION = 2
+
+    def __init__(self, ngram_range: Tuple[int, int] = (1, 3), alpha: float = 0.1):
+        self.ngram_range = ngram_range
+        self.alpha = alpha
+        self.tag_docs: Dict[str, int] = {}      # 标签出现的样本数（先验）
+        self.tag_totals: Dict[str, int] = {}    # 标签下特征总数（似然分母）
+        self.features: Dict[str, Dict[str, int]] = {}  # 特征 -> {标签: 计数}
+        # transaction_id -> 学习时的样本；旧版模型只记录了 ID，样本为 None
+        self.learned: Dict[str, Optional[Sample]] = {}
+        self.docs = 0
+
+    @property
+    def seen_ids(self) -> Set[str]:
+        return set(self.learned)
+
+    # ---------------- 特征 ----------------
+    def _features(self, description: str, transaction_type: Optional[str]) -> List[str]:
+        text = "".join((description or "").lower().split())
+        lo, hi = self.ngram_range
+        feats = [text[i:i + n] for n in range(lo, hi + 1) for i in range(len(text) - n + 1)]
+        if transaction_type:
+            feats.append(f"__type:{transaction_type.upper()}")
+        return feats
+
+    # ---------------- 训练 ----------------
+    def partial_fit(self, transactions: Iterable[Transaction]) -> int:
+        """增量学习新的或内容变化过的已标注交易，返回变化的条数。"""
+        changed = 0
+        for t in transactions:
+            if self.learn_sample(t.transaction_id, sample_of(t)):
+                changed += 1
+        return changed
+
+    def learn_sample(self, transaction_id: str, sample: Sample) -> bool:
+        """学习一笔交易的当前样本（替换此前学过的旧样本），返回模型是否变化。"""
+        previous = self.learned.get(transaction_id, _MISSING)
+        if previous == sample:
+            return False
+        if previous is None:
+            # 旧版模型不知道学过的内容，只能视为与当前一致
+            self.learned[transaction_id] = sample
+            return False
+        if previous is _MISSING and not sample[2]:
+            return False
+        if previous is not _MISSING:
+            self._count(previous, -1)
+        if sample[2]:
+            self._count(sample, 1)
+            self.learned[transaction_id] = sample
+        else:
+            del self.learned[transaction_id]  # 标签被清空：撤销后不再参与训练
+        return True
+
+    def _count(self, sample: Sample, sign: int):
+        description, transaction_type, tags = sample
+        feats = self._features(description, transaction_type)
+        self.docs += sign
+        for tag in tags:
+            _bump(self.tag_docs, tag, sign)
+            _bump(self.tag_totals, tag, sign * len(feats))
+            for f in feats:
+                posting = self.features.get(f)
+                if posting is None:
+                    posting = self.features[f] = {}
+                _bump(posting, tag, sign)
+                if not posting:
+                    del self.features[f]
+
+    def fit(self, transactions: Iterable[Transaction]) -> int:
+        """清空后全量训练。"""
+        self.tag_docs.clear()
+        self.tag_totals.clear()
+        self.features.clear()
+        self.learned.clear()
+        self.docs = 0
+        return self.partial_fit(transactions)
+
+    @property
+    def is_trained(self) -> bool:
+        return bool(self.tag_docs)
+
+    # ---------------- 预测 ----------------
+    def predict_proba(self, description: str, transaction_type: Optional[str] = None) -> List[Tuple[str, float]]:
+        """返回按概率降序的 (标签, 概率) 列表。"""
+        if not self.tag_docs:
+            return []
+        feats = self._features(description, transaction_type)
+        if not feats:
+            return []
+        vocab = len(self.features) + 1
+        log_alpha = math.log(self.alpha)
+        n = len(feats)
+        total_docs = sum(self.tag_docs.values())
+        # 未出现的特征统一贡献 log(alpha)，只需对命中的倒排计数做修正
+        scores = {
+            tag: math.log(docs / total_docs) + n * (log_alpha - math.log(self.tag_totals[tag] + self.alpha * vocab))
+            for tag, docs in self.tag_docs.items()
+        }
+        matched = False
+        for f in feats:
+            posting = self.features.get(f)
+            if not posting:
+                continue
+            matched = True
+            for tag, count in posting.items():
+                scores[tag] += math.log(count + self.alpha) - log_alpha
+        if not matched:
+            return []
+        top = max(scores.values())
+        exp = {tag: math.exp(s - top) for tag, s in scores.items()}
+        norm = sum(exp.values())
+        return sorted(((tag, v / norm) for tag, v in exp.items()), key=lambda kv: kv[1], reverse=True)
+
+    def predict(self, description: str, transaction_type: Optional[str] = None,
+                min_confidence: float = 0.6, secondary: float = 0.25, limit: int = 3) -> List[str]:
+        """首选标签置信度不低于 min_confidence 时返回，并附带概率不低于 secondary 的其他标签。"""
+        proba = self.predict_proba(description, transaction_type)
+        if not proba or proba[0][1] < min_confidence:
+            return []
+        tags = [proba[0][0]]
+        tags += [tag for tag, p in proba[1:limit] if p >= secondary]
+        return tags
+
+    # ---------------- 持久化 ----------------
+    def to_dict(self) -> dict:
+        return {
+            "version": self.VERSION,
+            "ngram_range": list(self.ngram_range),
+            "alpha": self.alpha,
+            "docs": self.docs,
+            "tag_docs": self.tag_docs,
+            "tag_totals": self.tag_totals,
+            "features": self.features,
+            "learned": {tid: list(sample) if sample else None for tid, sample in sorted(self.learned.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TagClassifier":
+        model = cls(tuple(data.get("ngram_range", (1, 3))), data.get("alpha", 0.1))
+        model.docs = data.get("docs", 0)
+        model.tag_docs = dict(data.get("tag_docs", {}))
+        model.tag_totals = dict(data.get("tag_totals", {}))
+        model.features = {f: dict(p) for f, p in data.get("features", {}).items()}
+        if "learned" in data:
+            model.learned = {tid: (s[0], s[1], tuple(s[2])) if s else None for tid, s in data["learned"].items()}
+        else:
+            model.learned = dict.fromkeys(data.get("seen_ids", []))
+        return model
+
+    def dumps(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    def save(self, path: Optional[str] = None):
+        _write_text(path or default_model_path(), self.dumps())
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> Optional["TagClassifier"]:
+        """加载模型；文件不存在或损坏时返回 None。"""
+        path = path or default_model_path()
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning("加载标签模型失败: %s", e)
+            return None
+
+
+SAVE_DELAY = 2.0  # save_later 的合并等待秒数
+
+
+class ModelStore:
+    """一个模型文件在本进程内共享的模型。
+
+    learn/predict 在锁内进行，可从界面线程与后台线程同时调用；save 持有模型文件的独占锁，
+    文件自上次读取或保存后被其他进程改写时，先读入文件再重放本进程尚未保存的样本。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.RLock()
+        self._model: Optional[TagClassifier] = None
+        self._loaded = False
+        self._disk_key: Optional[Tuple[int, int]] = None
+        self._unsaved: Dict[str, Sample] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()  # flush 等待进行中的后台保存写完
+
+    def get(self) -> Optional[TagClassifier]:
+        """当前模型（首次调用时从文件加载；从未训练过则为 None）。"""
+        with self.lock:
+            if not self._loaded:
+                self._loaded = True
+                self._disk_key = file_lock.stat_key(self.path)
+                self._model = TagClassifier.load(self.path)
+            return self._model
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._unsaved)
+
+    def learn(self, transactions: Iterable[Transaction]) -> int:
+        """增量学习（不写盘），返回变化的条数。"""
+        with self.lock:
+            model = self.get()
+            if model is None:
+                model = self._model = TagClassifier()
+            changed = 0
+            for t in transactions:
+                sample = sample_of(t)
+                if model.learn_sample(t.transaction_id, sample):
+                    self._unsaved[t.transaction_id] = sample
+                    changed += 1
+            return changed
+
+    def predict(self, description: str, transaction_type: Optional[str], min_confidence: float) -> List[str]:
+        with self.lock:
+            model = self.get()
+            return model.predict(description, transaction_type, min_confidence=min_confidence) if model else []
+
+    def to_dict(self) -> Optional[dict]:
+        """模型内容的独立副本（可交给其他进程）。"""
+        with self.lock:
+            model = self.get()
+            return json.loads(model.dumps()) if model else None
+
+    def save(self) -> bool:
+        """写入尚未保存的样本，返回是否写入了文件。"""
+        with self._save_lock, file_lock.locked(self.path, exclusive=True):
+            with self.lock:
+                if not self._unsaved:
+                    return False
+                key = file_lock.stat_key(self.path)
+                if key is not None and key != self._disk_key:
+                    merged = TagClassifier.load(self.path) or TagClassifier()
+                    for transaction_id, sample in self._unsaved.items():
+                        merged.learn_sample(transaction_id, sample)
+                    self._model = merged
+                # 锁内序列化为文本，锁外写盘：写入期间的预测与学习不必等待
+                text = self._model.dumps()
+                pending, self._unsaved = self._unsaved, {}
+            try:
+                _write_text(self.path, text)
+            except OSError:
+                with self.lock:
+                    self._unsaved = {**pending, **self._unsaved}
+                raise
+            with self.lock:
+                self._disk_key = file_lock.stat_key(self.path)
+            return True
+
+    def save_later(self, delay: Optional[float] = None):
+        """delay（默认 SAVE_DELAY）秒后在后台线程保存；期间的学习合并为一次写盘。"""
+        with self.lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(SAVE_DELAY if delay is None else delay, self._save_scheduled)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _save_scheduled(self):
+        with self.lock:
+            self._timer = None
+        try:
+            self.save()
+        except OSError as e:
+            logger.warning("保存标签模型失败: %s", e)
+
+    def flush(self) -> bool:
+        """取消等待中的后台保存并立即写入（退出前调用）。"""
+        with self.lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        return self.save()
+
+
+_stores: Dict[str, ModelStore] = {}
+_stores_guard = threading.Lock()
+
+
+def shared(path: Optional[str] = None) -> ModelStore:
+    """path（默认 AI_MODEL_PATH 下的模型文件）在本进程内共享的 ModelStore。"""
+    path = os.path.abspath(path or default_model_path())
+    with _stores_guard:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = ModelStore(path)
+        return store
+
+
+def _write_text(path: str, text: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+_MISSING = object()
+
+
+def sample_of(t: Transaction) -> Sample:
+    return t.description or "", (t.transaction_type or "").upper(), tuple(sorted(set(t.tags)))
+
+
+def _bump(counts: Dict[str, int], key: str, delta: int):
+    value = counts.get(key, 0) + delta
+    if value > 0:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+def evaluate(transactions: Sequence[Transaction], holdout: float = 0.2, seed: int = 0,
+             min_confidence: float = 0.6) -> Dict[str, float]:
+    """离线评估：按比例留出测试集，报告准确率、覆盖率与单条预测延迟。
+
+    - accuracy：有预测的样本中，首选标签命中真实标签的比例
+    - coverage：置信度达到阈值、给出预测的样本比例
+    - hit_rate：全部测试样本中首选标签命中的比例（= accuracy × coverage）
+    """
+    from .metrics import Histogram
+
+    labeled = [t for t in transactions if t.tags]
+    rng = random.Random(seed)
+    rng.shuffle(labeled)
+    cut = int(len(labeled) * (1 - holdout))
+    train, test = labeled[:cut], labeled[cut:]
+
+    model = TagClassifier()
+    t0 = time.perf_counter()
+    model.fit(train)
+    train_ms = (time.perf_counter() - t0) * 1000
+
+    latency = Histogram()
+    predicted = correct = 0
+    for t in test:
+        start = time.perf_counter()
+        tags = model.predict(t.description, t.transaction_type, min_confidence=min_confidence)
+        latency.observe((time.perf_counter() - start) * 1e6)
+        if tags:
+            predicted += 1
+            if tags[0] in t.tags:
+                correct += 1
+
+    lat = latency.summary()
+    return {
+        "train_rows": len(train),
+        "test_rows": len(test),
+        "tags": len(model.tag_docs),
+        "features": len(model.features),
+        "train_ms": train_ms,
+        "accuracy": correct / predicted if predicted else 0.0,
+        "coverage": predicted / len(test) if test else 0.0,
+        "hit_rate": correct / len(test) if test else 0.0,
+        "latency_us_p50": lat.get("p50") or 0.0,
+        "latency_us_p99": lat.get("p99") or 0.0,
+    }
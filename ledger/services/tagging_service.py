@@ -1,12 +1,22 @@
-"""规则与可选 LLM 的标签建议服务。
+"""规则、本地模型与可选 LLM 的标签建议服务。
 
-优先使用简单的关键词规则；当配置允许时可调用 LLM 进行补充（默认关闭）。
+优先使用简单的关键词规则；未命中时查询 AI_MODEL_PATH 下的本地分类器；
+仅当本地模型没有把握且配置允许时才调用 LLM 进行补充（默认关闭）。
 """
 
 from __future__ import annotations
 
-from typing import List
+import json
+import logging
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
 from ledger.config import Config
+from ledger.models.transaction import Transaction
+from .llm_client import chat_completion, create_client, timed_parse
+from . import tag_classifier
+from .tag_classifier import ModelStore, TagClassifier
+
+logger = logging.getLogger(__name__)
 
 
 class TaggingService:
@@ -25,7 +35,65 @@ class TaggingService:
         "兼职": ["兼职", "外快"],
     }
 
-    def suggest_tags(self, description: str, transaction_type: str | None = None) -> List[str]:
+    def __init__(self, classifier: Optional[TagClassifier] = None, model_path: Optional[str] = None,
+                 load_model: bool = True):
+        self._client = None  # 延迟创建并复用 LLM 客户端
+        self.model_path = model_path
+        # 传入 classifier 或 load_model=False 时只使用传入的模型（可为 None），不读写模型文件；
+        # 否则使用模型文件在进程内共享的 ModelStore
+        self._classifier = classifier
+        self._use_store = classifier is None and load_model
+
+    @property
+    def model_store(self) -> Optional[ModelStore]:
+        """共享的本地模型；直接传入模型或关闭本地模型时为 None。"""
+        if not self._use_store or not Config.AI_LOCAL_MODEL:
+            return None
+        return tag_classifier.shared(self.model_path)
+
+    @property
+    def classifier(self) -> Optional[TagClassifier]:
+        """本地标签模型（首次访问时从 AI_MODEL_PATH 加载；未训练过则为 None）。"""
+        store = self.model_store
+        return self._classifier if store is None else store.get()
+
+    def learn(self, transactions: Iterable[Transaction], deferred: bool = False) -> int:
+        """用新的或修改过的已标注交易增量训练本地模型并保存，返回变化的条数。
+
+        deferred=True 时只更新内存中的模型，稍后在后台线程合并写盘（界面线程使用，见 flush_model）。
+        """
+        if not Config.AI_LOCAL_MODEL:
+            return 0
+        store = self.model_store
+        if store is None:
+            if self._classifier is None:
+                self._classifier = TagClassifier()
+            return self._classifier.partial_fit(transactions)
+        learned = store.learn(transactions)
+        if learned and deferred:
+            store.save_later()
+        elif learned:
+            try:
+                store.save()
+            except OSError as e:
+                logger.warning("保存标签模型失败: %s", e)
+        return learned
+
+    def flush_model(self):
+        """立即写入延迟保存的模型样本。"""
+        store = self.model_store
+        if store is not None:
+            try:
+                store.flush()
+            except OSError as e:
+                logger.warning("保存标签模型失败: %s", e)
+
+    @property
+    def llm_enabled(self) -> bool:
+        return Config.AI_ENABLED and Config.AI_AUTO_TAG_WITH_LLM
+
+    def _suggest_local(self, description: str, transaction_type: str | None) -> Tuple[List[str], bool]:
+        """规则 + 本地模型 + 类型兜底；返回 (标签, 本地模型是否给出了有把握的结果)。"""
         desc = (description or "").lower()
         tags: List[str] = []
         for tag, keywords in self.RULES.items():
@@ -33,35 +101,104 @@ class TaggingService:
                 if kw.lower() in desc:
                     tags.append(tag)
                     break
+        # 未命中规则时查询本地模型，有把握则无需再调用 LLM
+        local_hit = False
+        if not tags:
+            store = self.model_store
+            if store is not None:
+                tags = store.predict(description or "", transaction_type, Config.AI_LOCAL_MODEL_MIN_CONFIDENCE)
+            elif self._classifier is not None:
+                tags = self._classifier.predict(
+                    description or "", transaction_type,
+                    min_confidence=Config.AI_LOCAL_MODEL_MIN_CONFIDENCE,
+                )
+            local_hit = bool(tags)
         # 类型导向的标签（仅在未命中规则时补充）
         if not tags and transaction_type:
             if transaction_type.upper() == "INCOME":
                 tags = ["收入"]
             else:
                 tags = []
+        return tags, local_hit
+
+    def suggest_tags_fast(self, description: str, transaction_type: str | None = None) -> List[str]:
+        """只用规则与本地模型的即时标签（不访问网络）。"""
+        return self._suggest_local(description, transaction_type)[0][:3]
+
+    def needs_llm(self, description: str, transaction_type: str | None = None) -> bool:
+        """该描述是否还需要 LLM 补充（LLM 已开启且本地模型没有把握）。"""
+        return self.llm_enabled and not self._suggest_local(description, transaction_type)[1]
+
+    def suggest_tags(self, description: str, transaction_type: str | None = None) -> List[str]:
+        tags, local_hit = self._suggest_local(description, transaction_type)
         # 可选：调用 LLM 做补充（默认关闭）
-        if Config.AI_ENABLED and Config.AI_AUTO_TAG_WITH_LLM:
+        if self.llm_enabled and not local_hit:
             try:
-                from openai import OpenAI  # type: ignore
-                client = OpenAI(api_key=Config.OPENAI_API_KEY, base_url=(Config.OPENAI_BASE_URL or None))
+                if self._client is None:
+                    self._client = create_client()
                 prompt = (
                     "请基于中文描述为一笔账单生成不超过3个简短标签，只返回以逗号分隔的标签，不要解释。\n"
                     f"描述：{description}\n"
                 )
-                resp = client.chat.completions.create(
-                    model=Config.OPENAI_MODEL,
+                resp = chat_completion(
+                    self._client,
+                    "tag",
                     messages=[{"role": "user", "content": prompt}],
                     temperature=0.2,
                 )
-                content = (resp.choices[0].message.content or "").strip()
-                llm_tags = [t.strip() for t in content.split("，") if t.strip()]
-                # 兼容英文逗号
-                if len(llm_tags) <= 1:
-                    llm_tags = [t.strip() for t in content.split(",") if t.strip()]
-                for t in llm_tags:
-                    if t and t not in tags:
-                        tags.append(t)
+                content = resp.content.strip()
+                with timed_parse("tag"):
+                    llm_tags = [t.strip() for t in content.split("，") if t.strip()]
+                    # 兼容英文逗号
+                    if len(llm_tags) <= 1:
+                        llm_tags = [t.strip() for t in content.split(",") if t.strip()]
+                tags = merge_tags(tags, llm_tags)
             except Exception:  # pylint: disable=broad-except
-                # LLM 失败忽略，保留规则标签
+                # LLM 失败忽略，保留规则标签（失败已计入 llm.tag.errors）
                 pass
         return tags[:3]
+
+    def suggest_tags_llm_batch(self, items: Sequence[Tuple[str, str | None]]) -> List[List[str]]:
+        """一次 LLM 调用为多条描述生成标签，返回与 items 等长的列表（不含规则标签）。
+
+        失败时抛出异常，由调用方决定是否重试。
+        """
+        if not items:
+            return []
+        if self._client is None:
+            self._client = create_client()
+        listing = "\n".join(
+            f"{i}. [{'收入' if (tx or '').upper() == 'INCOME' else '支出'}] {desc}"
+            for i, (desc, tx) in enumerate(items, start=1)
+        )
+        prompt = (
+            "请为下面每一笔账单批量生成不超过3个简短中文标签。"
+            "只输出 JSON 对象，键为序号字符串，值为标签数组，不要解释。\n"
+            f"{listing}\n"
+        )
+        resp = chat_completion(
+            self._client,
+            "tag_batch",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,
+        )
+        content = resp.content.strip()
+        with timed_parse("tag_batch"):
+            start, end = content.find("{"), content.rfind("}") + 1
+            data = json.loads(content[start:end])
+            results: List[List[str]] = []
+            for i in range(1, len(items) + 1):
+                raw = data.get(str(i)) or []
+                if isinstance(raw, str):
+                    raw = re.split(r"[，,]", raw)
+                results.append([str(t).strip() for t in raw if str(t).strip()][:3])
+        return results
+
+
+def merge_tags(base: List[str], extra: Iterable[str], limit: int = 3) -> List[str]:
+    """合并标签并去重，保留顺序。"""
+    merged = list(base)
+    for t in extra:
+        if t and t not in merged:
+            merged.append(t)
+    return merged[:limit]
@@ -1,87 +1,749 @@
+import copy
 import json
 import os
 import logging
-from typing import List, Optional
+import threading
+from contextlib import contextmanager
+from operator import attrgetter, itemgetter
+from typing import Callable, Generator, List, Optional, Sequence, Set, Tuple, Union
 from datetime import datetime
 from ledger.models.transaction import Transaction
 from ledger.config.settings import Config
-
-# 确保目录存在
-Config.ensure_directories()
+from ledger.services import columnar, compress, durable, events, file_lock, json_stream, parallel_load, partition_store, snapshot, write_behind
+from ledger.services.lazy_rows import LazyTransactions, TransactionView
 
 logger = logging.getLogger(__name__)
 
 class TransactionService:
     """交易管理服务类"""
 
-    def __init__(self):
+    # 交易中可修改的字段（合并外部修改时逐项比较）
+    _FIELDS = ('amount', 'transaction_type', 'date', 'description', 'is_recurring', 'auto_labeled', 'tags')
+
+    def __init__(self, load: bool = True):
         self.data_file = Config.DATABASE_PATH
-        self.transactions = self._load_transactions()
+        # 分区布局下交易按时间分区存放，查询按日期范围按需加载分区（此时 transactions 只含已加载的分区）
+        self._store = self.open_store(self.data_file)
+        # load=False 时由调用方（如界面的后台 IO 线程）读取文件后调用 set_loaded_transactions
+        self._loaded = load
+        # 惰性模式只用于单文件布局（分区按需加载已限制了内存中的交易数）
+        self._lazy = Config.LAZY_ROWS and self._store is None
+        # 记录被监视文件（见 _watched_file）的 (大小, 修改时间)，据此发现其他进程的写入（见 sync_external）；
+        # 在读取前记录，读取期间文件若被改写，下次检查时再合并一次
+        self._tracks_external = Config.FILE_LOCKING
+        if load and self._store is None:
+            self._migrate_columnar(self.data_file)  # 转换写出的文件不算外部修改
+        self._disk_key = self.disk_key() if load else None
+        self.transactions: Union[List[Transaction], LazyTransactions] = (
+            self._load_transactions() if load and self._store is None else self._new_list([]))
+        # get_all_transactions 返回的视图仍引用当前列表时，增删前先复制（写时复制）
+        self._shared = False
+        # 列式格式：文件中已有的前缀条数（只有新增时保存为追加一段），为 None 表示需要整体重写
+        self._columnar = self._store is None and Config.DATA_FORMAT == 'columnar'
+        self._persisted: Optional[int] = len(self.transactions) if load else 0
+        # 批量模式：嵌套深度与是否存在未保存的修改
+        self._batch_depth = 0
+        self._dirty = False
+        # 上次保存后增删改过的交易ID（写后合并按条数决定是否提前写盘）
+        self._dirty_ids: Set[str] = set()
+        # 值未变化而跳过的更新次数
+        self.skipped_updates = 0
+        # 后台任务（如标签回填）与界面线程共享同一服务，修改操作需串行化
+        self._lock = threading.RLock()
+        # 串行化文件写入（同步保存与后台保存可能同时发生）
+        self._io_lock = threading.Lock()
+        # 设置后保存只通知处理器（例如后台 IO 线程），由其稍后调用 flush()
+        self._save_handler: Optional[Callable[[bool], None]] = None
+        # 变更事件（见 events）；批量期间发布的事件在提交时再汇总为一个 BatchCommitted
+        self.events = events.EventBus()
+        self._batch_events: List[events.ChangeEvent] = []
+        # 构造时按 WRITE_BEHIND_MS 挂接的写后合并调度；被其他保存处理器取代时停止
+        self._write_behind: Optional[write_behind.WriteBehindScheduler] = None
+        if Config.WRITE_BEHIND_MS > 0:
+            self._write_behind = write_behind.WriteBehindScheduler(
+                self, Config.WRITE_BEHIND_MS, Config.WRITE_BEHIND_MAX_DIRTY)
+            self._write_behind.attach()
 
-    def _load_transactions(self) -> List[Transaction]:
+    def _load_transactions(self) -> Union[List[Transaction], LazyTransactions]:
         """从文件加载交易数据"""
-        if not os.path.exists(self.data_file):
+        if self._lazy:
+            return LazyTransactions(self.read_rows(self.data_file), Config.LAZY_CACHE_SIZE)
+        return self.read_transactions(self.data_file)
+
+    def _new_list(self, transactions: Sequence[Transaction]) -> Union[List[Transaction], LazyTransactions]:
+        if self._lazy:
+            return LazyTransactions(snapshot.to_rows(transactions), Config.LAZY_CACHE_SIZE)
+        return list(transactions)
+
+    def _writable(self) -> Union[List[Transaction], LazyTransactions]:
+        """修改交易列表前调用（惰性列表自行处理写时复制）。"""
+        if self._shared:
+            self.transactions = list(self.transactions)
+            self._shared = False
+        return self.transactions
+
+    def _current_rows(self, start: int = 0) -> List[tuple]:
+        """从第 start 条起的快照行（在服务锁内调用）。"""
+        if self._lazy:
+            return self.transactions.rows()[start:]
+        return snapshot.to_rows(self.transactions[start:])
+
+    @staticmethod
+    def open_store(path: str) -> Optional[partition_store.PartitionStore]:
+        """按配置返回分区存储（单文件布局返回 None）；旧单文件在首次访问分区时迁移。"""
+        if not Config.PARTITION_BY:
+            return None
+        return partition_store.PartitionStore(path, Config.PARTITION_BY, read_legacy=TransactionService._parse_file)
+
+    @property
+    def _watched_file(self) -> str:
+        """其他进程保存时必定改写的文件：分区布局为清单，列式格式为列式文件，否则为数据文件。"""
+        if self._store is not None:
+            return self._store.manifest_path
+        if Config.DATA_FORMAT == 'columnar':
+            return columnar.data_path(self.data_file)
+        return self.data_file
+
+    def disk_key(self) -> Optional[Tuple[int, int]]:
+        """被监视文件当前的 file_lock.stat_key（后台加载在读取前取得，交给 set_loaded_transactions）。"""
+        return file_lock.stat_key(self._watched_file)
+
+    @property
+    def lazy(self) -> bool:
+        """是否为惰性模式（内存中保存快照行，见 lazy_rows）。"""
+        return self._lazy
+
+    @property
+    def partitioned(self) -> bool:
+        """是否为分区布局（内存中可能只有部分交易）。"""
+        return self._store is not None
+
+    def _ensure_loaded(self, start: Optional[datetime] = None, end: Optional[datetime] = None):
+        """分区布局下加载与 [start, end] 有交集、尚未加载的分区（不指定范围时加载全部）。"""
+        if self._store is None or not self._loaded:
+            return
+        with self._lock:
+            fresh = self._store.load_between(start, end)
+            if fresh:
+                # 内存中按分区顺序排列，分区内保持文件顺序
+                transactions = self._writable()
+                transactions.extend(fresh)
+                transactions.sort(key=lambda t: self._store.key_of(t.date))
+
+    def _ensure_loaded_id(self, transaction_id: str):
+        """交易ID不含日期：已加载的分区中找不到该交易时才加载全部分区。"""
+        if self._store is not None and self._find(transaction_id) < 0:
+            self._ensure_loaded()
+
+    @staticmethod
+    def _stream_records(path: str, as_rows: bool = False) -> Tuple[list, List[parallel_load.BadRecord]]:
+        """逐条解析交易文件，不在内存中保留整个文件或中间的字典列表；字段无效的记录单独返回。"""
+        records = []
+        bad: List[parallel_load.BadRecord] = []
+        build = None if as_rows else snapshot.row_to_transaction
+        with compress.open_text(path) as f:
+            for item in json_stream.iter_array(f):
+                try:
+                    row = parallel_load.record_to_row(item)
+                except (KeyError, TypeError, ValueError) as e:
+                    bad.append(parallel_load.BadRecord(-1, f"字段无效: {e!r}", json.dumps(item, ensure_ascii=False)))
+                    continue
+                records.append(row if build is None else build(row))
+        return records, bad
+
+    @staticmethod
+    def _parse_file(path: str, as_rows: bool = False) -> list:
+        """解析交易文件（as_rows 时返回快照行）；格式错误或字段无效的记录移入隔离文件，其余记录照常加载。
+
+        大文件由进程池分段并行解析；小文件流式解析，遇到格式错误时改为可跳过损坏记录的逐条解析。
+        """
+        workers = parallel_load.default_workers(Config.LOAD_WORKERS)
+        if workers > 1 and os.path.getsize(path) >= parallel_load.PARALLEL_MIN_BYTES:
+            rows, bad = parallel_load.load_rows(path, workers)
+            records = rows if as_rows else snapshot.from_rows(rows)
+        else:
+            try:
+                records, bad = TransactionService._stream_records(path, as_rows)
+            except (json.JSONDecodeError, EOFError) as e:
+                logger.warning("交易文件存在格式错误（%s），跳过损坏的记录继续加载", e)
+                rows, bad = parallel_load.load_rows(path, workers=1)
+                records = rows if as_rows else snapshot.from_rows(rows)
+        if bad:
+            parallel_load.quarantine(path, bad)
+        return records
+
+    @staticmethod
+    def _migrate_columnar(path: str):
+        """首次启用列式格式时把现有 JSON 账本转换过去，原文件保留为 .migrated。
+
+        转换会改写文件，因此在读取（共享锁）之前单独持独占文件锁进行。
+        """
+        if Config.DATA_FORMAT != 'columnar' or Config.PARTITION_BY:
+            return
+        target = columnar.data_path(path)
+        if os.path.exists(target) or not os.path.exists(path):
+            return
+        with file_lock.locked(path, exclusive=True):
+            # 等锁期间其他进程可能已完成转换
+            if os.path.exists(target) or not os.path.exists(path):
+                return
+            try:
+                rows = TransactionService._parse_file(path, as_rows=True)
+            except ValueError as e:
+                logger.error("转换为列式文件失败: %s", e)
+                return
+            columnar.write(target, rows)
+            os.replace(path, path + partition_store.MIGRATED_SUFFIX)
+            logger.info("已将 %s 条交易转换为列式文件 %s", len(rows), target)
+
+    @staticmethod
+    def _read_columnar_rows(path: str) -> List[tuple]:
+        """读取 path 对应的列式文件；尚未转换（见 _migrate_columnar）时只读地解析原 JSON 账本。"""
+        target = columnar.data_path(path)
+        if not os.path.exists(target):
+            if not os.path.exists(path):
+                return []
+            return TransactionService._parse_file(path, as_rows=True)
+        return columnar.read_rows(target)
+
+    @staticmethod
+    def read_transactions(path: str) -> List[Transaction]:
+        """读取交易文件（不修改服务状态，可在任意线程调用）
+
+        启用快照缓存时，快照与源文件一致则直接加载快照；否则流式解析 JSON 并在后台重建快照。
+        读取期间持有共享文件锁，不会读到其他进程保存到一半的分区或列式文件。
+        """
+        TransactionService._migrate_columnar(path)
+        with file_lock.locked(path):
+            return TransactionService._read_transactions(path)
+
+    @staticmethod
+    def _read_transactions(path: str) -> List[Transaction]:
+        store = TransactionService.open_store(path)
+        if store is not None:
+            return [t for _, part in store.iter_partitions() for t in part]
+        if Config.DATA_FORMAT == 'columnar':
+            try:
+                return snapshot.from_rows(TransactionService._read_columnar_rows(path))
+            except (ValueError, FileNotFoundError) as e:
+                logger.error("加载交易数据失败: %s", e)
+                return []
+        durable.recover(path)
+        if not os.path.exists(path):
             return []
 
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [Transaction.from_dict(item) for item in data]
-        except (json.JSONDecodeError, FileNotFoundError) as e:
+            key = snapshot.source_key(path) if Config.SNAPSHOT_CACHE else None
+            if key is not None:
+                cached = snapshot.load(path, key)
+                if cached is not None:
+                    return cached
+            transactions = TransactionService._parse_file(path)
+        except (ValueError, FileNotFoundError) as e:
             logger.error("加载交易数据失败: %s", e)
             return []
+        if key is not None and snapshot.unchanged(path, key):
+            snapshot.rebuild_in_background(path, key, transactions)
+        return transactions
+
+    @staticmethod
+    def read_rows(path: str) -> List[tuple]:
+        """读取交易文件为快照行，不构建交易对象（惰性模式使用，快照缓存与文件锁规则与 read_transactions 相同）"""
+        TransactionService._migrate_columnar(path)
+        with file_lock.locked(path):
+            return TransactionService._read_rows(path)
+
+    @staticmethod
+    def _read_rows(path: str) -> List[tuple]:
+        if Config.DATA_FORMAT == 'columnar':
+            try:
+                return TransactionService._read_columnar_rows(path)
+            except (ValueError, FileNotFoundError) as e:
+                logger.error("加载交易数据失败: %s", e)
+                return []
+        durable.recover(path)
+        if not os.path.exists(path):
+            return []
+
+        try:
+            key = snapshot.source_key(path) if Config.SNAPSHOT_CACHE else None
+            if key is not None:
+                cached = snapshot.load_rows(path, key)
+                if cached is not None:
+                    return cached
+            rows = TransactionService._parse_file(path, as_rows=True)
+        except (ValueError, FileNotFoundError) as e:
+            logger.error("加载交易数据失败: %s", e)
+            return []
+        if key is not None and snapshot.unchanged(path, key):
+            snapshot.write_in_background(path, key, rows)
+        return rows
+
+    @staticmethod
+    def iter_read_transactions(path: str, chunk_size: int = 5000) -> Generator[List[Transaction], None, List[Transaction]]:
+        """按日期从新到旧分块读取交易文件（用于渐进式启动）
+
+        每构建一块交易即 yield 该块（块内同样从新到旧），最终通过 StopIteration.value
+        返回按文件原顺序排列的完整列表，与 read_transactions 的结果一致。
+        分区布局下从最新的分区开始逐个读取，首块只需读取最近的分区。读取期间持有共享文件锁。
+        """
+        TransactionService._migrate_columnar(path)
+        with file_lock.locked(path):
+            return (yield from TransactionService._iter_read_transactions(path, chunk_size))
+
+    @staticmethod
+    def _iter_read_transactions(path: str, chunk_size: int) -> Generator[List[Transaction], None, List[Transaction]]:
+        store = TransactionService.open_store(path)
+        if store is not None:
+            parts = []
+            for _, part in store.iter_partitions(newest_first=True):
+                parts.append(part)
+                order = sorted(range(len(part)), key=lambda i: (part[i].date, i), reverse=True)
+                for offset in range(0, len(order), chunk_size):
+                    yield [part[i] for i in order[offset:offset + chunk_size]]
+            return [t for part in reversed(parts) for t in part]
+        if Config.DATA_FORMAT != 'columnar':
+            durable.recover(path)
+            if not os.path.exists(path):
+                return []
 
-    def _save_transactions(self):
-        """保存交易数据到文件"""
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
+            if Config.DATA_FORMAT == 'columnar':
+                key, rows = None, TransactionService._read_columnar_rows(path)
+            else:
+                key = snapshot.source_key(path) if Config.SNAPSHOT_CACHE else None
+                rows = snapshot.load_rows(path, key) if key is not None else None
+            if rows is not None:
+                records, date_of, build = rows, itemgetter(3), snapshot.row_to_transaction
+            else:
+                # 直接解析为交易对象，再按日期分块交付
+                records, date_of, build = TransactionService._parse_file(path), attrgetter('date'), None
+        except (ValueError, FileNotFoundError) as e:
+            logger.error("加载交易数据失败: %s", e)
+            return []
+
+        # 以 (日期, 文件位置) 倒序：按块逆序拼接即恢复时间正序，同一时间的记录保持文件顺序
+        order = sorted(range(len(records)), key=lambda i: (date_of(records[i]), i), reverse=True)
+        if build is None:
+            result = records
+            for offset in range(0, len(order), chunk_size):
+                yield [records[i] for i in order[offset:offset + chunk_size]]
+        else:
+            result = [None] * len(records)
+            for offset in range(0, len(order), chunk_size):
+                chunk = []
+                for i in order[offset:offset + chunk_size]:
+                    transaction = build(records[i])
+                    result[i] = transaction
+                    chunk.append(transaction)
+                yield chunk
+        if rows is None and key is not None and snapshot.unchanged(path, key):
+            snapshot.rebuild_in_background(path, key, result)
+        return result
+
+    def set_loaded_transactions(self, transactions: List[Transaction],
+                                disk_key: Optional[Tuple[int, int]] = None):
+        """接收后台加载的数据；加载完成前已做的修改保留在内存中并随后保存。
+
+        disk_key 为读取前的 file_lock.stat_key；不提供时下次检查外部修改会重新读取一次文件。
+        """
+        with self._lock:
+            if self._store is not None:
+                self._store.mark_loaded(transactions)
+            self._replace_loaded(self._new_list(transactions), {t.transaction_id for t in transactions}, disk_key)
+
+    def set_loaded_rows(self, rows: List[tuple], disk_key: Optional[Tuple[int, int]] = None):
+        """接收后台读取的快照行（见 read_rows）：惰性模式下直接作为数据，不构建交易对象。"""
+        if not self._lazy:
+            self.set_loaded_transactions(snapshot.from_rows(rows), disk_key)
+            return
+        with self._lock:
+            self._replace_loaded(LazyTransactions(rows, Config.LAZY_CACHE_SIZE), {row[0] for row in rows}, disk_key)
+
+    def _replace_loaded(self, loaded: Union[List[Transaction], LazyTransactions], loaded_ids: Set[str],
+                        disk_key: Optional[Tuple[int, int]]):
+        """以加载结果替换内存数据（在服务锁内调用）；加载完成前新增的交易追加在后。"""
+        self._disk_key = disk_key
+        self._persisted = len(loaded)
+        pending = [t for t in self.transactions if t.transaction_id not in loaded_ids]
+        self.transactions = loaded
+        self.transactions.extend(pending)
+        self._shared = False
+        self._loaded = True
+        if self.events:
+            self.events.publish(events.TransactionsReloaded(len(self.transactions)))
+        if self._dirty:
+            self._save_transactions()
+
+    def set_save_handler(self, handler: Optional[Callable[[bool], None]]):
+        """设置异步保存处理器；为 None 时恢复同步保存。
+
+        处理器接收 urgent 参数：批量提交时为 True（此时已释放服务锁，可以同步写盘）。
+        取代构造时挂接的写后合并调度时，先停止其调度线程并写入其名下的未保存修改。
+        """
+        self._save_handler = handler
+        scheduler = self._write_behind
+        if scheduler is not None and handler != scheduler.request_save:
+            self._write_behind = None
+            scheduler.close()
+
+    @property
+    def save_handler(self) -> Optional[Callable[[bool], None]]:
+        return self._save_handler
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    @property
+    def dirty_count(self) -> int:
+        """上次保存后增删改过的交易条数。"""
+        return len(self._dirty_ids)
+
+    def _publish(self, event: events.ChangeEvent):
+        """发布变更事件（在服务锁内调用）；批量期间同时记下，提交时汇总发布。"""
+        if self._batch_depth:
+            self._batch_events.append(event)
+        self.events.publish(event)
+
+    def _save_transactions(self, *changed_ids: str, urgent: bool = False):
+        """保存交易数据到文件（批量模式下延迟到提交时统一保存）"""
+        self._dirty = True
+        self._dirty_ids.update(changed_ids)
+        if self._batch_depth:
+            return
+        if self._save_handler is not None:
+            # 内存状态为准：只标记脏并通知处理器，写文件交给后台
+            self._save_handler(urgent)
+            return
+        self.flush()
+
+    def flush(self) -> int:
+        """把当前内存状态写入文件，返回写入条数；没有未保存修改（或尚未加载）时返回 -1。
+
+        在服务锁内生成快照，锁外序列化写盘，因此可在后台线程调用而不阻塞修改操作；
+        连续多次保存请求在前一次写入期间合并为一次。
+        """
+        with self._io_lock:
+            with self._lock:
+                if not self._dirty or not self._loaded:
+                    return -1
+            # 独占文件锁内完成“合并其他进程的修改 → 写入”，多个进程的保存依次进行，不会互相覆盖
+            with file_lock.locked(self.data_file, exclusive=True):
+                if self._tracks_external:
+                    self._merge_external()
+                count = self._flush_locked()
+                if self._tracks_external and count >= 0:
+                    with self._lock:
+                        self._disk_key = self.disk_key()
+                return count
+
+    def _flush_locked(self) -> int:
+        with self._lock:
+            # 尚未读取原文件时写入会覆盖历史数据，留待加载完成后保存
+            if not self._dirty or not self._loaded:
+                return -1
+            dirty_ids, self._dirty_ids = self._dirty_ids, set()
+            if self._store is not None:
+                rows = snapshot.to_rows(self.transactions)
+                self._dirty = False
+            elif self._columnar:
+                append_from = self._persisted
+                if append_from is not None and columnar.segment_count(self._columnar_file) >= columnar.MAX_SEGMENTS:
+                    append_from = None  # 段数过多：整体重写合并为少量大段
+                rows = self._current_rows(append_from or 0)
+                total = len(self.transactions)
+                self._persisted = total
+                self._dirty = False
+            elif self._lazy:
+                # 行不可变，锁内只取引用，锁外再转换为字典
+                rows, data = self.transactions.rows(), None
+                self._dirty = False
+            else:
                 data = [transaction.to_dict() for transaction in self.transactions]
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            logger.info("保存了 %s 条交易记录", len(self.transactions))
+                rows = snapshot.to_rows(self.transactions) if Config.SNAPSHOT_CACHE else None
+                self._dirty = False
+        try:
+            if self._store is not None:
+                return self._flush_partitions(rows)
+            if self._columnar:
+                return self._flush_columnar(rows, append_from, total)
+            return self._flush_json(rows, data)
+        except Exception:
+            # 未写入的修改仍计入待保存条数
+            with self._lock:
+                self._dirty_ids |= dirty_ids
+            raise
+
+    def _merge_external(self):
+        """保存前（持有独占文件锁）合并上次读取或保存之后其他进程写入的内容。"""
+        key = self.disk_key()
+        if key is None or key == self._disk_key:
+            return
+        if self._store is not None:
+            self._merge_partitions(key)
+            return
+        rows = self.read_rows(self.data_file)
+        with self._lock:
+            self._apply_external(rows)
+            self._disk_key = key
+
+    def _merge_partitions(self, key: Tuple[int, int]) -> List[events.ChangeEvent]:
+        """分区布局的外部合并（持有文件锁）：重新读取清单，合并其他进程改写过的已加载分区；
+        本地交易落入其他进程新建的分区时先加载该分区，保存时不会覆盖其中已有的交易。"""
+        changed = self._store.refresh()
+        with self._lock:
+            groups = self._store.group(self._current_rows())
+            created = [k for k in groups if k not in self._store.loaded_keys and k in self._store.keys]
+            for k in created:
+                changed[k] = snapshot.to_rows(self._store.load([k]))
+            changes: List[events.ChangeEvent] = []
+            if changed:
+                # 未变化的分区以内存内容代替文件内容，合并时视为相同
+                rows = [row for k in sorted(set(groups) | set(changed))
+                        for row in changed.get(k, groups.get(k, []))]
+                changes = self._apply_external(rows)
+                if changes:
+                    self.transactions.sort(key=lambda t: self._store.key_of(t.date))
+            self._disk_key = key
+            return changes
+
+    def sync_external(self) -> int:
+        """合并其他进程写入数据文件的修改，返回新增、更新与删除的条数。
+
+        只替换内容不同的交易并发布相应的变更事件；本进程尚未保存的修改优先保留（下次保存时写入）。
+        由后台线程定期调用（见 file_watcher），未变化时只需一次 stat。
+        """
+        if not self._tracks_external or not self._loaded:
+            return 0
+        start = self._disk_key
+        key = self.disk_key()
+        if key is None or key == start:
+            return 0
+        if self._store is not None:
+            # 分区的指纹在读取时即更新，读取与合并需一次完成；加锁顺序与保存（flush）相同
+            with self._io_lock, file_lock.locked(self.data_file):
+                return len(self._merge_partitions(self.disk_key()))
+        # 在文件锁内读取、释放后再进服务锁合并：解析文件期间不阻塞修改操作，也不与保存形成锁顺序倒置
+        with file_lock.locked(self.data_file):
+            key = self.disk_key()
+            rows = self.read_rows(self.data_file)
+        with self._lock:
+            if self._disk_key != start:
+                return 0  # 期间本进程保存过（保存前已合并）
+            changes = self._apply_external(rows)
+            self._disk_key = key
+        return len(changes)
+
+    def _apply_external(self, rows: List[tuple]) -> List[events.ChangeEvent]:
+        """把文件中的交易行合并进内存（在服务锁内调用）：文件与内存相同的交易保持原对象不变，
+        其余以文件为准，上次保存后本进程修改过的交易（_dirty_ids）保留本地版本。"""
+        local = {row[0]: (index, row) for index, row in enumerate(self._current_rows())}
+        dirty = self._dirty_ids
+        merged: list = []  # 惰性模式为行，否则为交易对象
+        changes: List[events.ChangeEvent] = []
+
+        def keep(index: int, row: tuple):
+            merged.append(row if self._lazy else self.transactions[index])
+
+        for row in rows:
+            entry = local.pop(row[0], None)
+            if row[0] in dirty or (entry is not None and entry[1] == row):
+                if entry is not None:
+                    keep(*entry)  # 本地删除的交易保持删除
+                continue
+            new = snapshot.row_to_transaction(row)
+            if entry is None:
+                changes.append(events.TransactionAdded(new))
+            else:
+                current = self.transactions[entry[0]]
+                old = copy.copy(current)
+                old.tags = list(old.tags)
+                fields = tuple(name for name in self._FIELDS if getattr(old, name) != getattr(new, name))
+                if not self._lazy:
+                    # 就地修改，界面与视图持有的对象随之更新（与 update_transaction 一致）
+                    for name in fields:
+                        setattr(current, name, getattr(new, name))
+                    new = current
+                changes.append(events.TransactionUpdated(old, new, fields))
+            merged.append(row if self._lazy else new)
+        for transaction_id, (index, row) in local.items():
+            if transaction_id in dirty:
+                keep(index, row)  # 本地新增，尚未保存
+            else:
+                changes.append(events.TransactionDeleted(self.transactions[index]))
+        if changes:
+            self.transactions = LazyTransactions(merged, Config.LAZY_CACHE_SIZE) if self._lazy else merged
+            self._shared = False
+            for change in changes:
+                self.events.publish(change)
+            self.events.publish(events.BatchCommitted(tuple(changes)))
+            logger.info("已合并其他进程写入的 %s 处修改", len(changes))
+        if self._columnar:
+            # 文件内容仍是内存的前缀时保存可继续追加，否则（如保留了本地修改）下次整体重写
+            self._persisted = len(rows) if self._current_rows()[:len(rows)] == rows else None
+        return changes
+
+    def _flush_json(self, rows: Optional[List[tuple]], data: Optional[list]) -> int:
+        """JSON 单文件的保存：data 为 None 时由快照行生成。"""
+        try:
+            # 目录在首次写入时创建，导入模块不产生文件系统副作用
+            directory = os.path.dirname(self.data_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if data is None:
+                data = [snapshot.row_to_dict(row) for row in rows]
+                rows = rows if Config.SNAPSHOT_CACHE else None
+            # 临时文件 + fsync + 改名，崩溃时磁盘上总有一份完整的账本（见 durable）
+            key = durable.save(self.data_file, lambda f: json.dump(data, f, indent=2, ensure_ascii=False),
+                               compress.configured())
+            if rows is not None:
+                # 同步更新快照，下次启动无需重新解析刚写入的文件
+                snapshot.write(self.data_file, key, rows)
+            logger.info("保存了 %s 条交易记录", len(data))
+            return len(data)
+        except Exception as e:
+            self._dirty = True
+            logger.error("保存交易数据失败: %s", e)
+            raise
+
+    def _flush_partitions(self, rows: List[tuple]) -> int:
+        """分区布局的保存：只重写内容变化的分区。"""
+        try:
+            changed = self._store.save(rows)
+        except Exception as e:
+            self._dirty = True
+            logger.error("保存交易数据失败: %s", e)
+            raise
+        logger.info("保存了 %s 条交易记录（重写分区: %s）", len(rows), ", ".join(changed) or "无")
+        return len(rows)
+
+    @property
+    def _columnar_file(self) -> str:
+        return columnar.data_path(self.data_file)
+
+    def _flush_columnar(self, rows: List[tuple], append_from: Optional[int], total: int) -> int:
+        """列式格式的保存：只有新增时追加一段，否则整体重写。"""
+        try:
+            if append_from is None:
+                columnar.write(self._columnar_file, rows)
+            else:
+                columnar.append(self._columnar_file, rows)
         except Exception as e:
+            self._dirty = True
+            self._persisted = None
             logger.error("保存交易数据失败: %s", e)
             raise
+        logger.info("保存了 %s 条交易记录（%s %s 条）", total, "整体写入" if append_from is None else "追加", len(rows))
+        return total
+
+    @contextmanager
+    def locked(self):
+        """持有服务锁：期间其他线程的修改（及其事件）等待。
+
+        订阅者在其中读取当前交易并构建初始状态，之后收到的事件恰好是此后的变更，不会遗漏或重复。
+        """
+        with self._lock:
+            yield self
+
+    @contextmanager
+    def batch(self):
+        """批量操作上下文：期间的增删改只在最外层退出时统一保存一次。
+
+        即使块内抛出异常也会保存已生效的修改，保证内存与文件一致。
+        批量期间持有服务锁，其他线程的修改会等待提交完成；提交在释放锁后进行，
+        写后合并模式下提交时立即写盘，不等待合并窗口。
+        """
+        self._lock.acquire()
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            commit = self._batch_depth == 0 and self._dirty
+            if self._batch_depth == 0 and self._batch_events:
+                committed, self._batch_events = tuple(self._batch_events), []
+                self.events.publish(events.BatchCommitted(committed))
+            self._lock.release()
+            if commit:
+                self._save_transactions(urgent=True)
 
     def add_transaction(self, transaction: Transaction) -> str:
         """添加新交易"""
-        self.transactions.append(transaction)
-        self._save_transactions()
+        with self._lock:
+            self._ensure_loaded(transaction.date, transaction.date)
+            self._writable().append(transaction)
+            if self.events:
+                self._publish(events.TransactionAdded(transaction))
+            self._save_transactions(transaction.transaction_id)
         logger.info("添加交易: %s", transaction)
         return transaction.transaction_id
 
     def get_transaction(self, transaction_id: str) -> Optional[Transaction]:
         """根据ID获取交易"""
-        for transaction in self.transactions:
+        self._ensure_loaded_id(transaction_id)
+        index = self._find(transaction_id)
+        return self.transactions[index] if index >= 0 else None
+
+    def _find(self, transaction_id: str) -> int:
+        if self._lazy:
+            return self.transactions.find(transaction_id)
+        for index, transaction in enumerate(self.transactions):
             if transaction.transaction_id == transaction_id:
-                return transaction
-        return None
+                return index
+        return -1
 
-    def get_all_transactions(self) -> List[Transaction]:
-        """获取所有交易"""
-        return self.transactions.copy()
+    def get_all_transactions(self) -> TransactionView:
+        """获取所有交易（只读视图，不复制列表；之后的增删不会反映到已返回的视图中）"""
+        with self._lock:
+            self._ensure_loaded()
+            if self._lazy:
+                return self.transactions.view()
+            self._shared = True
+            return TransactionView(self.transactions)
 
     def update_transaction(self, transaction_id: str, **kwargs) -> bool:
         """更新交易信息"""
-        transaction = self.get_transaction(transaction_id)
-        if not transaction:
-            logger.warning("未找到交易: %s", transaction_id)
-            return False
-
-        # 更新属性
-        for key, value in kwargs.items():
-            if hasattr(transaction, key):
+        with self._lock:
+            transaction = self.get_transaction(transaction_id)
+            if not transaction:
+                logger.warning("未找到交易: %s", transaction_id)
+                return False
+
+            # 只修改值确实不同的属性；全部相同（例如编辑对话框原样提交）时不写文件
+            changes = {key: value for key, value in kwargs.items()
+                       if hasattr(transaction, key) and getattr(transaction, key) != value}
+            if not changes:
+                self.skipped_updates += 1
+                logger.debug("交易未变化，跳过保存: %s", transaction_id)
+                return True
+            old = None
+            if self.events:
+                old = copy.copy(transaction)
+                old.tags = list(old.tags)
+            for key, value in changes.items():
                 setattr(transaction, key, value)
+            if self._lazy:
+                self.transactions.store(transaction)
+            self._persisted = None
+            if old is not None:
+                self._publish(events.TransactionUpdated(old, transaction, tuple(changes)))
 
-        self._save_transactions()
-        logger.info("更新交易: %s", transaction_id)
+            self._save_transactions(transaction_id)
+        logger.info("更新交易: %s（%s）", transaction_id, ", ".join(changes))
         return True
 
     def delete_transaction(self, transaction_id: str) -> bool:
         """删除交易"""
-        for i, transaction in enumerate(self.transactions):
-            if transaction.transaction_id == transaction_id:
-                deleted_transaction = self.transactions.pop(i)
-                self._save_transactions()
+        with self._lock:
+            self._ensure_loaded_id(transaction_id)
+            index = self._find(transaction_id)
+            if index >= 0:
+                deleted_transaction = self._writable().pop(index)
+                self._persisted = None
+                if self.events:
+                    self._publish(events.TransactionDeleted(deleted_transaction))
+                self._save_transactions(transaction_id)
                 logger.info("删除交易: %s", deleted_transaction)
                 return True
 
@@ -95,7 +757,22 @@ class TransactionService:
                           min_amount: Optional[float] = None,
                           max_amount: Optional[float] = None,
                           description: Optional[str] = None) -> List[Transaction]:
-        """搜索交易"""
+        """搜索交易（分区布局下只加载日期范围涉及的分区）"""
+        self._ensure_loaded(start_date, end_date)
+        if self._lazy:
+            keyword = description.lower() if description else None
+
+            def match(row: tuple) -> bool:
+                _, amount, ttype, date, text = row[:5]
+                return ((not start_date or date >= start_date) and (not end_date or date <= end_date)
+                        and (not transaction_type or ttype == transaction_type)
+                        and (min_amount is None or amount >= min_amount)
+                        and (max_amount is None or amount <= max_amount)
+                        and (not keyword or keyword in text.lower()))
+            # 直接筛选行，只为匹配的交易构建对象
+            with self._lock:
+                return self.transactions.select(match)
+
         results = self.transactions.copy()
 
         if start_date:
@@ -115,8 +792,14 @@ class TransactionService:
 
     def get_transaction_summary(self) -> dict:
         """获取交易汇总信息"""
-        total_income = sum(t.amount for t in self.transactions if t.transaction_type == 'INCOME')
-        total_expense = sum(t.amount for t in self.transactions if t.transaction_type == 'EXPENSE')
+        self._ensure_loaded()
+        if self._lazy:
+            # 惰性模式直接汇总行，不构建交易对象
+            amounts = [(row[1], row[2]) for row in self.transactions.rows()]
+        else:
+            amounts = [(t.amount, t.transaction_type) for t in self.transactions]
+        total_income = sum(amount for amount, ttype in amounts if ttype == 'INCOME')
+        total_expense = sum(amount for amount, ttype in amounts if ttype == 'EXPENSE')
         net_amount = total_income - total_expense
 
         return {
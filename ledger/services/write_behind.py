@@ -0,0 +1,104 @@
+"""
+写后合并（write-behind）保存调度
+
+默认每次增删改都同步重写账本文件，连续的快速修改会触发同样多次完整保存。
+WriteBehindScheduler 注册为 TransactionService 的保存处理器后，修改只在内存中生效并记下
+“有未保存修改”，由调度线程在窗口期（WRITE_BEHIND_MS）结束后合并为一次写盘；
+未保存的交易条数达到 WRITE_BEHIND_MAX_DIRTY 时立即写盘。批量操作（batch）提交、
+调用 close() 以及进程退出时同步写入剩余修改，返回后数据已落盘。
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindScheduler:
+    """把一段时间内的多次保存请求合并为一次 flush。"""
+
+    def __init__(self, service, delay_ms: int = 1000, max_dirty: int = 100):
+        self.service = service
+        self.delay = max(delay_ms, 0) / 1000
+        self.max_dirty = max_dirty
+        self._cond = threading.Condition()
+        # 首个未保存请求的截止时间；为 None 表示没有待写入的修改
+        self._deadline: Optional[float] = None
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.requests = 0  # 收到的保存请求数
+        self.flushes = 0   # 实际写盘次数
+
+    @property
+    def saved_writes(self) -> int:
+        """合并掉的写盘次数。"""
+        return max(self.requests - self.flushes, 0)
+
+    def attach(self) -> "WriteBehindScheduler":
+        """接管服务的保存操作，并在进程退出时写入剩余修改。"""
+        self._thread = threading.Thread(target=self._run, name="ledger-write-behind", daemon=True)
+        self._thread.start()
+        self.service.set_save_handler(self.request_save)
+        atexit.register(self.close)
+        return self
+
+    def request_save(self, urgent: bool = False):
+        """保存请求（由服务在其锁内调用，因此这里不写盘，只唤醒调度线程）。
+
+        urgent 为 True 时（批量提交）调用方已释放服务锁，直接同步写盘。
+        """
+        with self._cond:
+            self.requests += 1
+            if urgent or self._closed:
+                self._deadline = None
+            else:
+                if self._deadline is None:
+                    self._deadline = time.monotonic() + self.delay
+                if self.service.dirty_count >= self.max_dirty:
+                    self._deadline = time.monotonic()
+                self._cond.notify()
+                return
+        self._flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and (self._deadline is None or self._deadline > time.monotonic()):
+                    timeout = None if self._deadline is None else self._deadline - time.monotonic()
+                    self._cond.wait(timeout)
+                if self._closed:
+                    return
+                self._deadline = None
+            self._flush()
+
+    def _flush(self):
+        try:
+            if self.service.flush() >= 0:
+                with self._cond:
+                    self.flushes += 1
+        except Exception as e:  # pylint: disable=broad-except
+            # 服务已保留脏标记，下次请求或退出时重试
+            logger.error("后台保存失败: %s", e)
+
+    def close(self):
+        """停止调度线程并同步写入剩余修改（可重复调用）。"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._deadline = None
+            self._cond.notify()
+        atexit.unregister(self.close)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        if self.service.save_handler == self.request_save:
+            self.service.set_save_handler(None)
+        if self.service.dirty:
+            self._flush()
+        logger.info("写后合并：%s 次保存请求，实际写盘 %s 次，节省 %s 次",
+                    self.requests, self.flushes, self.saved_writes)
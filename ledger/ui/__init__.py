@@ -2,16 +2,30 @@
 
 常用组件便捷导入：
 	from ledger.ui import MainWindow, AddTransactionDialog, AnalyticsInterface, Theme
+
+组件在首次访问时才导入（PEP 562），导入 ledger.ui.xxx 子模块不会加载其他页面。
 """
 
-from .main_window import MainWindow
-from .dialogs import AddTransactionDialog
-from .analytics_view import AnalyticsInterface
-from .theme import Theme
-
-__all__ = [
-	"MainWindow",
-	"AddTransactionDialog",
-	"AnalyticsInterface",
-	"Theme",
-]
\ No newline at end of file
+from importlib import import_module
+
+_EXPORTS = {
+	"MainWindow": ".main_window",
+	"AddTransactionDialog": ".dialogs",
+	"AnalyticsInterface": ".analytics_view",
+	"Theme": ".theme",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+	module = _EXPORTS.get(name)
+	if module is None:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	value = getattr(import_module(module, __name__), name)
+	globals()[name] = value
+	return value
+
+
+def __dir__():
+	return sorted(set(globals()) | set(__all__))
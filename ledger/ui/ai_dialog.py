@@ -11,6 +11,7 @@ from qfluentwidgets import (
 from ledger.ui.theme import Theme
 from ledger.services.transaction_service import TransactionService
 from ledger.services.ai_service import AICommandService
+from ledger.services.tag_backfill import TagBackfillWorker
 
 
 class AICommandDialog(MessageBoxBase):
@@ -18,10 +19,10 @@ class AICommandDialog(MessageBoxBase):
 
     executed = pyqtSignal(dict)  # 执行完成后发出结果统计
 
-    def __init__(self, service: TransactionService, parent=None):
+    def __init__(self, service: TransactionService, parent=None, backfill: TagBackfillWorker | None = None):
         super().__init__(parent)
         self.ts = service
-        self.ai = AICommandService(self.ts)
+        self.ai = AICommandService(self.ts, backfill=backfill)
         self._init_ui()
 
     def _init_ui(self):
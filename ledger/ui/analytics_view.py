@@ -16,38 +16,48 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QPainter
-try:
-    from PyQt5.QtChart import (
-        QChart, QChartView, QPieSeries, QBarSeries, QBarSet,
-        QBarCategoryAxis, QValueAxis
-    )
-    HAS_QT_CHARTS = True
-except Exception:
-    # 尝试动态加入 Qt5/bin 到 DLL 搜索路径后再次导入（兼容某些 Windows 环境）
-    try:
-        import PyQt5  # type: ignore
-        qt_bin = pathlib.Path(PyQt5.__file__).parent / 'Qt5' / 'bin'
-        if qt_bin.exists():
-            try:
-                os.add_dll_directory(str(qt_bin))  # Python 3.8+
-            except Exception:
-                os.environ['PATH'] = str(qt_bin) + os.pathsep + os.environ.get('PATH', '')
-        from PyQt5.QtChart import (
-            QChart, QChartView, QPieSeries, QBarSeries, QBarSet,
-            QBarCategoryAxis, QValueAxis
-        )
-        HAS_QT_CHARTS = True
-    except Exception:
-        HAS_QT_CHARTS = False
 from qfluentwidgets import (
     CardWidget, TableWidget, PrimaryPushButton, PushButton,
     ComboBox, DateEdit, InfoBar, InfoBarPosition, FluentIcon
 )
 
-from ledger.models.transaction import Transaction
 from ledger.services.transaction_service import TransactionService
-from ledger.services.analytics_service import AnalyticsService, MonthlySummary, TagSummary
+from ledger.services.analytics_service import AnalyticsReport, AnalyticsService, MonthlySummary, TagSummary
 from ledger.ui.theme import Theme
+from ledger.ui.change_relay import ChangeRelay
+from ledger.ui.refresh_scheduler import RefreshScheduler
+
+# 图表模块（QtChart）较重，首次构建统计页时才导入；None 表示尚未尝试
+HAS_QT_CHARTS = None
+QChart = QChartView = QPieSeries = QBarSeries = QBarSet = QBarCategoryAxis = QValueAxis = None
+
+
+def load_qt_charts() -> bool:
+    """导入 PyQt5.QtChart 并填充本模块的图表类名，返回是否可用（结果缓存）。"""
+    global HAS_QT_CHARTS, QChart, QChartView, QPieSeries, QBarSeries, QBarSet, QBarCategoryAxis, QValueAxis
+    if HAS_QT_CHARTS is not None:
+        return HAS_QT_CHARTS
+    try:
+        from PyQt5 import QtChart
+    except Exception:
+        # 尝试动态加入 Qt5/bin 到 DLL 搜索路径后再次导入（兼容某些 Windows 环境）
+        try:
+            import PyQt5  # type: ignore
+            qt_bin = pathlib.Path(PyQt5.__file__).parent / 'Qt5' / 'bin'
+            if qt_bin.exists():
+                try:
+                    os.add_dll_directory(str(qt_bin))  # Python 3.8+
+                except Exception:
+                    os.environ['PATH'] = str(qt_bin) + os.pathsep + os.environ.get('PATH', '')
+            from PyQt5 import QtChart
+        except Exception:
+            HAS_QT_CHARTS = False
+            return False
+    QChart, QChartView, QPieSeries = QtChart.QChart, QtChart.QChartView, QtChart.QPieSeries
+    QBarSeries, QBarSet = QtChart.QBarSeries, QtChart.QBarSet
+    QBarCategoryAxis, QValueAxis = QtChart.QBarCategoryAxis, QtChart.QValueAxis
+    HAS_QT_CHARTS = True
+    return True
 
 
 class AnalyticsInterface(QWidget):
@@ -57,7 +67,14 @@ class AnalyticsInterface(QWidget):
         super().__init__(parent)
         self.service = service
         self.analytics = AnalyticsService(service)
-        self.transactions: List[Transaction] = []
+        # 筛选变化时合并刷新请求，统计在后台线程计算，只应用最新结果
+        self.scheduler = RefreshScheduler(self.current_filters, self.compute_report, parent=self)
+        self.scheduler.ready.connect(self.apply_report)
+        self.scheduler.failed.connect(self._on_refresh_failed)
+        # 任何页面或后台任务修改交易后自动刷新（按日汇总已随事件增量更新，刷新只需汇总区间）
+        self.relay = ChangeRelay(service, self)
+        self.relay.changed.connect(lambda _changes: self.refresh())
+        self.relay.reloaded.connect(self.refresh)
         self.init_ui()
         self.refresh()
 
@@ -119,7 +136,7 @@ class AnalyticsInterface(QWidget):
 
         refresh_btn = PushButton(FluentIcon.SYNC, "刷新")
         refresh_btn.setFixedSize(96, 40)
-        refresh_btn.clicked.connect(self.refresh)
+        refresh_btn.clicked.connect(self.scheduler.request_now)
 
         filter_row.addWidget(type_label)
         filter_row.addWidget(self.type_filter)
@@ -183,7 +200,7 @@ class AnalyticsInterface(QWidget):
         layout.addWidget(self.summary_card)
 
         # 图表卡片（若支持 Qt Charts）
-        if HAS_QT_CHARTS:
+        if load_qt_charts():
             # 两图并排：放到同一张卡片的水平布局里
             self.charts_row_card = CardWidget()
             charts_layout = QHBoxLayout(self.charts_row_card)
@@ -226,6 +243,7 @@ class AnalyticsInterface(QWidget):
             charts_layout.addWidget(month_wrap, 1)
             charts_layout.addWidget(tag_wrap, 1)
             layout.addWidget(self.charts_row_card)
+            self.init_charts()
         else:
             # 提示缺少图表依赖
             self.chart_placeholder = CardWidget()
@@ -278,8 +296,11 @@ class AnalyticsInterface(QWidget):
 
     # -------------------- Data --------------------
     def refresh(self):
-        # 拉取数据并筛选
-        self.transactions = self.service.get_all_transactions()
+        """请求刷新（防抖合并，后台计算）"""
+        self.scheduler.request()
+
+    def current_filters(self):
+        """读取筛选控件（界面线程）"""
         start = datetime.combine(self.start_date.date().toPyDate(), datetime.min.time())
         end = datetime.combine(self.end_date.date().toPyDate(), datetime.max.time())
         text = self.type_filter.currentText()
@@ -288,26 +309,40 @@ class AnalyticsInterface(QWidget):
             ttype = 'INCOME'
         elif text == '支出':
             ttype = 'EXPENSE'
+        return start, end, ttype
 
-        filtered: List[Transaction] = self.analytics.filter_transactions(start, end, ttype)
+    def compute_report(self, filters) -> AnalyticsReport:
+        """筛选并汇总（后台线程）"""
+        return self.analytics.build_report(*filters)
 
+    def apply_report(self, report: AnalyticsReport):
+        """把最新的统计结果应用到界面"""
         # 顶部总览
-        totals = self.analytics.compute_totals(filtered)
+        totals = report.totals
         self.lbl_income.setText(f"¥{totals['income']:,.2f}")
         self.lbl_expense.setText(f"¥{totals['expense']:,.2f}")
         self.lbl_net.setText(f"¥{totals['net']:,.2f}")
         self.lbl_count.setText(f"{int(totals['count'])}")
 
         # 明细表
-        month_rows = self.analytics.compute_monthly_summary(filtered)
-        self.populate_month_table(month_rows)
-        tag_rows = self.analytics.compute_tag_summary(filtered)
-        self.populate_tag_table(tag_rows)
+        self.populate_month_table(report.monthly)
+        self.populate_tag_table(report.tags)
 
         # 图表
         if HAS_QT_CHARTS:
-            self.update_month_bar_chart(month_rows)
-            self.update_tag_pie_chart(tag_rows)
+            self.update_month_bar_chart(report.monthly)
+            self.update_tag_pie_chart(report.tags)
+
+    def _on_refresh_failed(self, message: str):
+        InfoBar.error(
+            title="统计失败",
+            content=message,
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=3000,
+            parent=self
+        )
 
     def populate_month_table(self, rows: List[MonthlySummary]):
         self.month_table.setSortingEnabled(False)
@@ -338,36 +373,49 @@ class AnalyticsInterface(QWidget):
         self.tag_table.setSortingEnabled(True)
 
     # -------------------- Charts --------------------
+    def init_charts(self):
+        """创建一次图表与序列，刷新时只替换数据"""
+        self.income_set = QBarSet("收入")
+        self.expense_set = QBarSet("支出")
+        self.month_series = QBarSeries()
+        self.month_series.append(self.income_set)
+        self.month_series.append(self.expense_set)
+        self.month_chart = QChart()
+        self.month_chart.addSeries(self.month_series)
+        self.month_chart.setTitle("月度收入/支出")
+        self.month_axis_x = QBarCategoryAxis()
+        self.month_axis_y = QValueAxis()
+        self.month_axis_y.setLabelFormat("%.0f")
+        self.month_chart.addAxis(self.month_axis_x, Qt.AlignBottom)
+        self.month_chart.addAxis(self.month_axis_y, Qt.AlignLeft)
+        self.month_series.attachAxis(self.month_axis_x)
+        self.month_series.attachAxis(self.month_axis_y)
+        self.month_chart.legend().setVisible(True)
+        self.month_chart.legend().setAlignment(Qt.AlignBottom)
+        # 频繁刷新时动画会反复重放，关闭
+        self.month_chart.setAnimationOptions(QChart.NoAnimation)
+        self.month_chart_view.setChart(self.month_chart)
+
+        self.tag_series = QPieSeries()
+        self.tag_chart = QChart()
+        self.tag_chart.addSeries(self.tag_series)
+        self.tag_chart.setTitle("标签支出占比")
+        self.tag_chart.legend().setAlignment(Qt.AlignBottom)
+        self.tag_chart.setAnimationOptions(QChart.NoAnimation)
+        self.tag_chart_view.setChart(self.tag_chart)
+
     def update_month_bar_chart(self, rows: List[MonthlySummary]):
         if not HAS_QT_CHARTS:
             return
-        categories = [r.month for r in rows]
-        income_set = QBarSet("收入")
-        expense_set = QBarSet("支出")
-        for r in rows:
-            income_set.append(float(r.income))
-            expense_set.append(float(r.expense))
-        series = QBarSeries()
-        series.append(income_set)
-        series.append(expense_set)
-
-        chart = QChart()
-        chart.addSeries(series)
-        chart.setTitle("月度收入/支出")
-        chart.createDefaultAxes()
-
-        axisX = QBarCategoryAxis()
-        axisX.append(categories)
-        chart.setAxisX(axisX, series)
-        axisY = QValueAxis()
-        axisY.setLabelFormat("%.0f")
-        chart.setAxisY(axisY, series)
-
-        chart.legend().setVisible(True)
-        chart.legend().setAlignment(Qt.AlignBottom)
-        chart.setAnimationOptions(QChart.SeriesAnimations)
-
-        self.month_chart_view.setChart(chart)
+        self.income_set.remove(0, self.income_set.count())
+        self.expense_set.remove(0, self.expense_set.count())
+        self.income_set.append([float(r.income) for r in rows])
+        self.expense_set.append([float(r.expense) for r in rows])
+        self.month_axis_x.clear()
+        self.month_axis_x.append([r.month for r in rows])
+        peak = max([max(r.income, r.expense) for r in rows], default=0.0)
+        self.month_axis_y.setRange(0, peak * 1.05 if peak > 0 else 1)
+        self.month_axis_y.applyNiceNumbers()
 
     def update_tag_pie_chart(self, rows: List[TagSummary]):
         if not HAS_QT_CHARTS:
@@ -375,22 +423,15 @@ class AnalyticsInterface(QWidget):
         # 仅显示前8个，其他合并为“其他”
         top = rows[:8]
         other_sum = sum(r.amount for r in rows[8:])
-        series = QPieSeries()
+        self.tag_series.clear()
         for r in top:
-            series.append(f"{r.label} ({r.amount:,.0f})", float(r.amount))
+            self.tag_series.append(f"{r.label} ({r.amount:,.0f})", float(r.amount))
         if other_sum > 0:
-            series.append(f"其他 ({other_sum:,.0f})", float(other_sum))
+            self.tag_series.append(f"其他 ({other_sum:,.0f})", float(other_sum))
 
-        for sl in series.slices():
+        for sl in self.tag_series.slices():
             sl.setLabelVisible(True)
 
-        chart = QChart()
-        chart.addSeries(series)
-        chart.setTitle("标签支出占比")
-        chart.legend().setAlignment(Qt.AlignBottom)
-        chart.setAnimationOptions(QChart.SeriesAnimations)
-        self.tag_chart_view.setChart(chart)
-
     # -------------------- Export --------------------
     def export_csv(self):
         directory = QFileDialog.getExistingDirectory(self, "选择导出目录")
@@ -0,0 +1,62 @@
+"""
+交易变更事件转发 - 把服务在任意线程发布的事件合并后交给界面线程
+
+TransactionService 在修改线程中同步发布事件（见 services/events.py），界面不能在其他线程更新。
+ChangeRelay 订阅服务事件，在锁内暂存，并只投递一次排队信号；界面线程处理时一次取出
+期间积累的全部事件，通过 changed 信号发出。批量操作产生的大量事件因此只触发一次界面更新。
+"""
+
+import threading
+from typing import List
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+
+from ledger.services import events
+from ledger.services.transaction_service import TransactionService
+
+
+class ChangeRelay(QObject):
+    """服务事件 → 界面线程的合并信号。"""
+
+    changed = pyqtSignal(list)  # 按发生顺序的变更事件（TransactionAdded/Updated/Deleted）
+    reloaded = pyqtSignal()     # 交易被整体替换，应重新读取
+    _wake = pyqtSignal()
+
+    def __init__(self, service: TransactionService, parent=None):
+        super().__init__(parent)
+        self.service = service
+        self._lock = threading.Lock()
+        self._pending: List[events.Event] = []
+        self._queued = False
+        # 即使在界面线程发布也排队处理：同一轮事件循环中的多次修改合并为一次
+        self._wake.connect(self._deliver, Qt.ConnectionType.QueuedConnection)
+        self._unsubscribe = service.events.subscribe(self._on_event, *events.CHANGE_EVENTS, events.TransactionsReloaded)
+        self.destroyed.connect(lambda _obj=None: self._unsubscribe())
+
+    def _on_event(self, event: events.Event):
+        with self._lock:
+            self._pending.append(event)
+            if self._queued:
+                return
+            self._queued = True
+        self._wake.emit()
+
+    def discard_pending(self):
+        """丢弃尚未投递的事件：调用方已在服务锁内（service.locked()）重新读取了全部交易。"""
+        with self._lock:
+            self._pending = []
+
+    def _deliver(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._queued = False
+        reloads = [i for i, event in enumerate(pending) if isinstance(event, events.TransactionsReloaded)]
+        if reloads:
+            # 整体替换之前的变更已包含在重新读取的数据中
+            self.reloaded.emit()
+            pending = pending[reloads[-1] + 1:]
+        if pending:
+            self.changed.emit(pending)
+
+    def close(self):
+        self._unsubscribe()
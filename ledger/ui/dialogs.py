@@ -167,23 +167,33 @@ class AddTransactionDialog(MessageBoxBase):
 
         # 构建数据
         transaction_type = 'INCOME' if self.type_combo.currentText() == '收入' else 'EXPENSE'
-        date = datetime.combine(self.date_edit.date().toPyDate(), datetime.min.time())
+        date = self.date_edit.date().toPyDate()
         tags = [tag.strip() for tag in self.tag_edit.text().split(',') if tag.strip()]
 
         if self.transaction:
-            # 编辑模式
-            self.transaction.transaction_type = transaction_type
-            self.transaction.amount = self.amount_spinbox.value()
-            self.transaction.date = date
-            self.widget.setMinimumWidth(640)
-            self.transaction.tags = tags
+            # 编辑模式：生成修改后的副本（同一 ID），原对象保持不变，
+            # 由服务层比较新旧值后更新，未改动时不会重写文件
+            original = self.transaction
+            # 日期控件不含时间，日期未改时保留原来的时间，改了日期则归零
+            same_day = date == original.date.date()
+            self.transaction = Transaction(
+                transaction_id=original.transaction_id,
+                amount=self.amount_spinbox.value(),
+                transaction_type=transaction_type,
+                description=self.description_edit.toPlainText(),
+                date=datetime.combine(date, original.date.time() if same_day else datetime.min.time()),
+                is_recurring=original.is_recurring,
+                # 用户手动改过标签，后台回填不再覆盖
+                auto_labeled=original.auto_labeled and tags == original.tags,
+                tags=tags
+            )
         else:
             # 新建模式
             self.transaction = Transaction(
                 amount=self.amount_spinbox.value(),
                 transaction_type=transaction_type,
                 description=self.description_edit.toPlainText(),
-                date=date,
+                date=datetime.combine(date, datetime.min.time()),
                 tags=tags
             )
 
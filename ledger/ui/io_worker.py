@@ -0,0 +1,116 @@
+"""
+后台数据读写 - 把交易文件的加载与保存移出界面线程
+
+PersistenceWorker 注册为 TransactionService 的保存处理器：修改操作只标记“有未保存修改”
+并投递一次保存任务，写盘在专用的单线程 QThreadPool 中完成；写入期间到来的保存请求
+合并为下一次写入。内存中的数据始终为准，结果与错误通过信号回到界面线程。
+"""
+
+import logging
+import threading
+from typing import Callable
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from ledger.services.transaction_service import TransactionService
+
+logger = logging.getLogger(__name__)
+
+
+class _Task(QRunnable):
+    def __init__(self, fn: Callable[[], None]):
+        super().__init__()
+        self.fn = fn
+
+    def run(self):
+        self.fn()
+
+
+class PersistenceWorker(QObject):
+    """交易数据的后台加载/保存。"""
+
+    chunk_loaded = pyqtSignal(list)  # 渐进加载时的一块交易（按日期从新到旧）
+    loaded = pyqtSignal(list)        # 读取到的交易列表（惰性模式下为快照行）
+    load_failed = pyqtSignal(str)
+    saved = pyqtSignal(int)          # 写入条数
+    save_failed = pyqtSignal(str)
+
+    def __init__(self, service: TransactionService, parent=None):
+        super().__init__(parent)
+        self.service = service
+        # 单线程池保证读写按提交顺序执行
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._lock = threading.Lock()
+        self._save_queued = False
+        self.saves = 0  # 实际写盘次数（合并后的）
+        self.loaded_key = None  # 读取前 service.disk_key() 的值，交给服务判断之后的外部修改
+
+    def attach(self) -> "PersistenceWorker":
+        """接管服务的保存操作。"""
+        self.service.set_save_handler(self.request_save)
+        return self
+
+    def load(self, chunk_size: int = 0):
+        """在后台读取交易文件，完成后发出 loaded 信号。
+
+        chunk_size > 0 时按日期从新到旧分块读取，每块先发出 chunk_loaded，界面可边加载边显示。
+        惰性模式（LAZY_ROWS）只读取快照行，不构建交易对象，也不分块。
+        """
+        self.pool.start(_Task(lambda: self._do_load(chunk_size)))
+
+    def _do_load(self, chunk_size: int):
+        path = self.service.data_file
+        self.loaded_key = self.service.disk_key()
+        try:
+            if self.service.lazy:
+                self.loaded.emit(TransactionService.read_rows(path))
+                return
+            if chunk_size <= 0:
+                self.loaded.emit(TransactionService.read_transactions(path))
+                return
+            steps = TransactionService.iter_read_transactions(path, chunk_size)
+            while True:
+                try:
+                    self.chunk_loaded.emit(next(steps))
+                except StopIteration as done:
+                    self.loaded.emit(done.value)
+                    return
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("后台加载交易数据失败: %s", e)
+            self.load_failed.emit(str(e))
+
+    def request_save(self, urgent: bool = False):
+        """请求保存（可在任意线程调用）；已有待执行的保存时直接合并。
+
+        保存本来就在后台立即执行，urgent（批量提交）无需区别处理。
+        """
+        with self._lock:
+            if self._save_queued:
+                return
+            self._save_queued = True
+        self.pool.start(_Task(self._do_save))
+
+    def _do_save(self):
+        with self._lock:
+            # 清除标记后再写：写入期间的新修改会排入下一次保存
+            self._save_queued = False
+        try:
+            count = self.service.flush()
+        except Exception as e:  # pylint: disable=broad-except
+            self.save_failed.emit(str(e))
+            return
+        if count >= 0:
+            self.saves += 1
+            self.saved.emit(count)
+
+    def wait(self, msecs: int = -1) -> bool:
+        """等待已提交的读写完成。"""
+        return self.pool.waitForDone(msecs)
+
+    def shutdown(self):
+        """退出前调用：等待后台任务结束，恢复同步保存并写入剩余修改。"""
+        self.service.set_save_handler(None)
+        self.wait()
+        if self.service.dirty:
+            self.service.flush()
@@ -0,0 +1,36 @@
+"""
+延迟创建的页面容器
+
+导航需要在启动时就拿到页面控件，但重型页面（如统计分析）不必在首帧之前构建。
+LazyPage 先以空容器占位，第一次显示时才调用工厂函数创建真正的页面并放入布局。
+"""
+
+from typing import Callable, Optional
+
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtWidgets import QVBoxLayout, QWidget
+
+
+class LazyPage(QWidget):
+    """第一次显示时才构建内容的页面占位控件。"""
+
+    created = pyqtSignal(QWidget)
+
+    def __init__(self, factory: Callable[[], QWidget], parent=None):
+        super().__init__(parent)
+        self._factory = factory
+        self.page: Optional[QWidget] = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+    def ensure_page(self) -> QWidget:
+        """创建（若尚未创建）并返回真正的页面。"""
+        if self.page is None:
+            self.page = self._factory()
+            self.layout().addWidget(self.page)
+            self.created.emit(self.page)
+        return self.page
+
+    def showEvent(self, event):  # noqa: N802
+        self.ensure_page()
+        super().showEvent(event)
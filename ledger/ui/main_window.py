@@ -4,21 +4,31 @@
 使用qfluentwidgets组件库实现Material Design风格界面
 """
 
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidgetItem, QHeaderView, QFrame
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame
+from PyQt5.QtCore import Qt, QDate, QTimer
 from PyQt5.QtGui import QColor
 from qfluentwidgets import (
     FluentWindow, NavigationItemPosition,
-    PushButton, PrimaryPushButton, ToolButton,
-    SearchLineEdit, ComboBox, DateEdit, TableWidget, CardWidget,
+    PrimaryPushButton, ToolButton,
+    SearchLineEdit, ComboBox, DateEdit, CardWidget,
     InfoBar, InfoBarPosition, MessageBox, FluentIcon
 )
+from ledger.config.settings import Config
+from ledger.services import events
+from ledger.services.backup import BackupScheduler
+from ledger.services.file_watcher import ExternalChangeWatcher
+from ledger.services.lazy_rows import TransactionView
 from ledger.services.transaction_service import TransactionService
+from ledger.services.tagging_service import TaggingService
+from ledger.services.tag_backfill import TagBackfillWorker
+from ledger.services.search import IncrementalFilter, TransactionQuery
 from ledger.models.transaction import Transaction
 from ledger.ui.dialogs import AddTransactionDialog
-from ledger.ui.ai_dialog import AICommandDialog
 from ledger.ui.theme import Theme
-from ledger.ui.analytics_view import AnalyticsInterface
+from ledger.ui.transaction_table import TransactionTableView
+from ledger.ui.lazy_page import LazyPage
+from ledger.ui.io_worker import PersistenceWorker
+from ledger.ui.change_relay import ChangeRelay
 
 
 class StatCard(CardWidget):
@@ -50,60 +60,50 @@ class StatCard(CardWidget):
     
     def update_value(self, value: str, color: QColor = None):
         """更新数值"""
-        self.value_label.setText(value)
         if color:
-            self.value_label.setStyleSheet(f"color: {Theme.color_to_str(color)};")
-
+            self.value_color = color
+        self.value_label.setMinimumWidth(0)
+        self.value_label.setText(value)
+        self.value_label.setStyleSheet(f"color: {Theme.color_to_str(self.value_color)};")
 
-class TransactionTableWidget(TableWidget):
-    """交易记录表格组件"""
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setup_table()
-    
-    def setup_table(self):
-        """设置表格"""
-        # 列设置
-        self.setColumnCount(6)
-        self.setHorizontalHeaderLabels(['日期', '类型', '金额', '描述', '标签', '操作'])
-        
-        # 表头样式
-        header = self.horizontalHeader()
-        header.setFont(Theme.font(Theme.FONT_SUBTITLE, True))
-        header.setDefaultAlignment(Qt.AlignmentFlag.AlignCenter)
-        header.setMinimumHeight(60)
-        
-        # 列宽设置
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(4, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(5, QHeaderView.ResizeMode.Fixed)
-        # 操作列需要足够的宽度容纳“编辑/删除”两个中文按钮与图标
-        self.setColumnWidth(5, 240)
-        
-        # 垂直表头
-        v_header = self.verticalHeader()
-        v_header.setDefaultSectionSize(80)
-        v_header.setMinimumWidth(44)
-        
-        # 表格样式
-        self.setAlternatingRowColors(True)
-        self.setSelectionBehavior(TableWidget.SelectionBehavior.SelectRows)
-        self.setSelectionMode(TableWidget.SelectionMode.SingleSelection)
-        # 现代风格：去除密集网格线
-        self.setShowGrid(False)
+    def show_skeleton(self):
+        """数据加载前显示灰色占位条"""
+        self.value_label.setText("")
+        self.value_label.setMinimumWidth(180)
+        self.value_label.setStyleSheet(
+            f"background-color: {Theme.color_to_str(Theme.DIVIDER)}; border-radius: {Theme.RADIUS_SMALL}px;"
+        )
 
 
 class DashboardInterface(QWidget):
     """仪表盘界面 - 主视图"""
+
+    SEARCH_DEBOUNCE_MS = 150
+    SEARCH_CHUNK = 10000
     
     def __init__(self, service: TransactionService, parent=None):
         super().__init__(parent)
         self.service = service
+        self.tagger = TaggingService()
+        # 由主窗口在数据加载完成后启动（补充的标签经变更事件反映到界面）
+        self.backfill = TagBackfillWorker(service, tagger=self.tagger)
+        # 任何来源（界面、AI、后台任务）的修改都经事件增量更新统计与表格，无需重新读取全部交易
+        self.relay = ChangeRelay(service, self)
+        self.relay.changed.connect(self.apply_changes)
         self.transactions = []
+        self._income = self._expense = 0.0
+        # 渐进加载：期间按块显示已到达的数据，编辑操作暂不可用
+        self.loading = False
+        self.editing_enabled = True
+        self._loaded_chunks = []
+        self._loaded_income = self._loaded_expense = 0.0  # 已加载部分的合计
+        # 边输入边搜索：防抖 + 复用上次结果 + 可放弃的分片查询
+        self.search = IncrementalFilter()
+        self._search_generation = 0
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._start_search)
         self.init_ui()
         
     def init_ui(self):
@@ -119,20 +119,20 @@ class DashboardInterface(QWidget):
         title.setFont(Theme.font(Theme.FONT_LARGE, True))
         title.setStyleSheet(f"color: {Theme.color_to_str(Theme.TEXT_PRIMARY)};")
 
-        add_btn = PrimaryPushButton(FluentIcon.ADD, "添加交易")
-        add_btn.setFont(Theme.font(Theme.FONT_BODY, True))
-        add_btn.setFixedSize(140, 46)
-        add_btn.clicked.connect(self.add_transaction)
+        self.add_btn = PrimaryPushButton(FluentIcon.ADD, "添加交易")
+        self.add_btn.setFont(Theme.font(Theme.FONT_BODY, True))
+        self.add_btn.setFixedSize(140, 46)
+        self.add_btn.clicked.connect(self.add_transaction)
 
-        ai_btn = PrimaryPushButton(FluentIcon.SEND, "AI记账")
-        ai_btn.setFont(Theme.font(Theme.FONT_BODY, True))
-        ai_btn.setFixedSize(160, 46)
-        ai_btn.clicked.connect(self.open_ai_dialog)
+        self.ai_btn = PrimaryPushButton(FluentIcon.SEND, "AI记账")
+        self.ai_btn.setFont(Theme.font(Theme.FONT_BODY, True))
+        self.ai_btn.setFixedSize(160, 46)
+        self.ai_btn.clicked.connect(self.open_ai_dialog)
 
         title_layout.addWidget(title)
         title_layout.addStretch()
-        title_layout.addWidget(add_btn)
-        title_layout.addWidget(ai_btn)
+        title_layout.addWidget(self.add_btn)
+        title_layout.addWidget(self.ai_btn)
         layout.addLayout(title_layout)
         
         # 统计卡片区域
@@ -160,7 +160,9 @@ class DashboardInterface(QWidget):
         layout.addWidget(divider)
         
         # 表格
-        self.table = TransactionTableWidget()
+        self.table = TransactionTableView()
+        self.table.edit_requested.connect(self.edit_transaction)
+        self.table.delete_requested.connect(self.delete_transaction)
         layout.addWidget(self.table)
         
     def create_search_layout(self) -> QHBoxLayout:
@@ -213,10 +215,10 @@ class DashboardInterface(QWidget):
         self.end_date.dateChanged.connect(self.filter_transactions)
         
         # 刷新按钮
-        refresh_btn = ToolButton(FluentIcon.SYNC)
-        refresh_btn.setFixedSize(42, 42)
-        refresh_btn.clicked.connect(self.load_transactions)
-        refresh_btn.setToolTip("刷新数据")
+        self.refresh_btn = ToolButton(FluentIcon.SYNC)
+        self.refresh_btn.setFixedSize(42, 42)
+        self.refresh_btn.clicked.connect(self.load_transactions)
+        self.refresh_btn.setToolTip("刷新数据")
         
         layout.addWidget(self.search_input, 3)
         layout.addWidget(type_label)
@@ -225,161 +227,191 @@ class DashboardInterface(QWidget):
         layout.addWidget(self.start_date)
         layout.addWidget(end_label)
         layout.addWidget(self.end_date)
-        layout.addWidget(refresh_btn)
+        layout.addWidget(self.refresh_btn)
         
         return layout
     
     def load_transactions(self):
-        """加载交易数据"""
-        self.transactions = self.service.get_all_transactions()
+        """重新读取全部交易（此前尚未处理的变更事件已包含在内，丢弃）"""
+        with self.service.locked():
+            self.transactions = self.service.get_all_transactions()
+            self.relay.discard_pending()
+        self.search.set_source(self.transactions)
         self.update_stats()
-        self.filter_transactions()
-    
+        self.apply_filters()
+
+    def apply_changes(self, changes: list):
+        """按变更事件增量更新统计、筛选结果与表格"""
+        if self.loading:
+            return  # 加载完成时会整体读取
+        updated = []
+        for change in changes:
+            self.search.apply(change)
+            if isinstance(change, events.TransactionAdded):
+                self._count(change.transaction, 1)
+            elif isinstance(change, events.TransactionDeleted):
+                self._count(change.transaction, -1)
+            else:
+                self._count(change.old, -1)
+                self._count(change.new, 1)
+                updated.append(change.new.transaction_id)
+        self.show_stats(self._income, self._expense)
+        self.apply_filters()
+        if updated:
+            self.table.refresh_transactions(updated)
+
+    def _count(self, t: Transaction, sign: int):
+        if t.transaction_type == 'INCOME':
+            self._income += sign * t.amount
+        elif t.transaction_type == 'EXPENSE':
+            self._expense += sign * t.amount
+
+    def begin_loading(self):
+        """进入渐进加载：统计卡片显示占位条，禁用编辑"""
+        self.loading = True
+        self._loaded_chunks = []
+        self._loaded_income = self._loaded_expense = 0.0
+        for card in (self.income_card, self.expense_card, self.balance_card):
+            card.show_skeleton()
+        self.set_editing_enabled(False)
+        self.table.set_transactions([])
+
+    def append_loaded_chunk(self, chunk: list):
+        """收到一块按日期从新到旧的交易：累加统计，并把符合筛选条件的行插到表格顶部"""
+        if not self.loading:
+            return
+        ascending = chunk[::-1]
+        self._loaded_chunks.append(ascending)
+        for t in ascending:
+            if t.transaction_type == 'INCOME':
+                self._loaded_income += t.amount
+            elif t.transaction_type == 'EXPENSE':
+                self._loaded_expense += t.amount
+        self.show_stats(self._loaded_income, self._loaded_expense)
+        self.table.prepend_transactions(IncrementalFilter(ascending).run(self.current_query()))
+
+    def finish_loading(self, editable: bool = True):
+        """加载结束：显示完整数据；加载失败时（editable=False）保持禁用编辑，避免修改无法保存"""
+        self.loading = False
+        self._loaded_chunks = []
+        self.load_transactions()
+        self.set_editing_enabled(editable)
+
+    def set_editing_enabled(self, enabled: bool):
+        self.editing_enabled = enabled
+        for button in (self.add_btn, self.ai_btn, self.refresh_btn):
+            button.setEnabled(enabled)
+
+    def _editing_blocked(self) -> bool:
+        if self.editing_enabled:
+            return False
+        InfoBar.warning(
+            title="请稍候",
+            content="数据加载完成后才能编辑",
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=2000,
+            parent=self
+        )
+        return True
+
+    def _sync_loading_source(self):
+        # 加载期间筛选条件变化：在已到达的数据上查询（块按时间倒序到达，逆序拼接）
+        if self.loading:
+            self.search.set_source(t for chunk in reversed(self._loaded_chunks) for t in chunk)
+
     def update_stats(self):
-        """更新统计数据"""
-        total_income = sum(t.amount for t in self.transactions if t.transaction_type == 'INCOME')
-        total_expense = sum(t.amount for t in self.transactions if t.transaction_type == 'EXPENSE')
+        """更新统计数据（惰性视图直接汇总快照行，不构建交易对象）"""
+        rows = self.transactions.rows if isinstance(self.transactions, TransactionView) else None
+        if rows is not None:
+            amounts = [(row[1], row[2]) for row in rows]
+        else:
+            amounts = [(t.amount, t.transaction_type) for t in self.transactions]
+        self._income = sum(amount for amount, ttype in amounts if ttype == 'INCOME')
+        self._expense = sum(amount for amount, ttype in amounts if ttype == 'EXPENSE')
+        self.show_stats(self._income, self._expense)
+
+    def show_stats(self, total_income: float, total_expense: float):
+        """更新统计卡片"""
         balance = total_income - total_expense
-        
-        # 更新卡片
         self.income_card.update_value(f"¥{total_income:,.2f}")
         self.expense_card.update_value(f"¥{total_expense:,.2f}")
-        
+
         # 余额颜色
         balance_color = Theme.SUCCESS if balance >= 0 else Theme.ERROR
         self.balance_card.update_value(f"¥{balance:,.2f}", balance_color)
-    
-    def filter_transactions(self):
-        """筛选交易记录"""
-        keyword = self.search_input.text().lower()
+
+    def current_query(self) -> TransactionQuery:
+        """由筛选控件生成查询条件"""
         trans_type = self.type_filter.currentText()
-        start = self.start_date.date().toPyDate()
-        end = self.end_date.date().toPyDate()
-        
-        filtered = []
-        for t in self.transactions:
-            # 类型筛选
-            if trans_type == '收入' and t.transaction_type != 'INCOME':
-                continue
-            if trans_type == '支出' and t.transaction_type != 'EXPENSE':
-                continue
-            
-            # 日期筛选
-            t_date = t.date.date()
-            if t_date < start or t_date > end:
-                continue
-            
-            # 关键字筛选
-            if keyword:
-                if (keyword not in t.description.lower() and 
-                    not any(keyword in tag.lower() for tag in t.tags)):
-                    continue
-            
-            filtered.append(t)
-        
-        self.display_transactions(filtered)
+        return TransactionQuery(
+            keyword=self.search_input.text().lower(),
+            transaction_type={'收入': 'INCOME', '支出': 'EXPENSE'}.get(trans_type),
+            start=self.start_date.date().toPyDate(),
+            end=self.end_date.date().toPyDate(),
+        )
+
+    def filter_transactions(self):
+        """筛选条件变化：防抖后再执行，连续输入只查询一次"""
+        self._search_timer.start()
+
+    def apply_filters(self):
+        """立即执行筛选（放弃尚未完成的查询）"""
+        self._search_timer.stop()
+        self._search_generation += 1
+        self._sync_loading_source()
+        self.display_transactions(self.search.run(self.current_query()))
+
+    def _start_search(self):
+        # 新查询使进行中的旧查询作废；大数据量时分片执行，分片之间让出事件循环
+        self._search_generation += 1
+        generation = self._search_generation
+        self._sync_loading_source()
+        steps = self.search.iter_run(self.current_query(), chunk_size=self.SEARCH_CHUNK)
+        self._search_step(generation, steps)
+
+    def _search_step(self, generation: int, steps):
+        if generation != self._search_generation:
+            steps.close()
+            return
+        try:
+            next(steps)
+        except StopIteration as done:
+            self.display_transactions(done.value)
+            return
+        QTimer.singleShot(0, lambda: self._search_step(generation, steps))
     
     def display_transactions(self, transactions: list):
-        """显示交易记录"""
-        self.table.setRowCount(0)
-        self.table.setRowCount(len(transactions))
-        
-        for row, trans in enumerate(transactions):
-            # 日期
-            date_item = QTableWidgetItem(trans.date.strftime('%Y-%m-%d'))
-            date_item.setFont(Theme.font(Theme.FONT_BODY))
-            date_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.table.setItem(row, 0, date_item)
-            
-            # 类型
-            type_text = '收入' if trans.transaction_type == 'INCOME' else '支出'
-            type_item = QTableWidgetItem(type_text)
-            type_item.setFont(Theme.font(Theme.FONT_BODY, True))
-            type_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            
-            if trans.transaction_type == 'INCOME':
-                type_item.setForeground(Theme.SUCCESS)
-            else:
-                type_item.setForeground(Theme.ERROR)
-            
-            self.table.setItem(row, 1, type_item)
-            
-            # 金额
-            amount_item = QTableWidgetItem(f"¥{trans.amount:,.2f}")
-            amount_item.setFont(Theme.font(Theme.FONT_SUBTITLE, True))
-            amount_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            
-            if trans.transaction_type == 'INCOME':
-                amount_item.setForeground(Theme.SUCCESS)
-            else:
-                amount_item.setForeground(Theme.ERROR)
-            
-            self.table.setItem(row, 2, amount_item)
-            
-            # 描述
-            desc_item = QTableWidgetItem(trans.description)
-            desc_item.setFont(Theme.font(Theme.FONT_BODY))
-            self.table.setItem(row, 3, desc_item)
-            
-            # 标签
-            tags_item = QTableWidgetItem(', '.join(trans.tags) if trans.tags else '-')
-            tags_item.setFont(Theme.font(Theme.FONT_CAPTION))
-            tags_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            tags_item.setForeground(Theme.TEXT_SECONDARY)
-            self.table.setItem(row, 4, tags_item)
-            
-            # 操作按钮
-            self.add_action_buttons(row, trans)
-    
-    def add_action_buttons(self, row: int, transaction: Transaction):
-        """添加操作按钮"""
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(Theme.SPACING_SMALL, Theme.SPACING_XSMALL, 
-                                 Theme.SPACING_SMALL, Theme.SPACING_XSMALL)
-        layout.setSpacing(Theme.SPACING_XSMALL)
-        
-        # 编辑按钮
-        edit_btn = PushButton(FluentIcon.EDIT, "编辑")
-        edit_btn.setFont(Theme.font(Theme.FONT_BODY))
-        # 增加按钮宽度与高度，避免中文文本与图标被裁剪
-        edit_btn.setFixedSize(96, 40)
-        edit_btn.clicked.connect(lambda: self.edit_transaction(transaction))
-        
-        # 删除按钮
-        delete_btn = PushButton(FluentIcon.DELETE, "删除")
-        delete_btn.setFont(Theme.font(Theme.FONT_BODY))
-        delete_btn.setFixedSize(96, 40)
-        delete_btn.clicked.connect(lambda: self.delete_transaction(transaction))
-        
-        layout.addWidget(edit_btn)
-        layout.addWidget(delete_btn)
-        layout.addStretch()
-        
-        self.table.setCellWidget(row, 5, widget)
+        """显示交易记录（表格按需读取可见行，只通知增删的行）"""
+        self.table.update_transactions(transactions)
     
     def add_transaction(self):
         """添加交易"""
+        if self._editing_blocked():
+            return
         dialog = AddTransactionDialog(self)
         dialog.transaction_saved.connect(self.on_transaction_saved)
         dialog.exec()
 
     def open_ai_dialog(self):
         """打开 AI 自然语言录入对话框"""
-        dialog = AICommandDialog(self.service, self)
+        if self._editing_blocked():
+            return
+        from ledger.ui.ai_dialog import AICommandDialog  # AI 服务较重，首次使用时才导入
+
+        dialog = AICommandDialog(self.service, self, backfill=self.backfill)
         dialog.executed.connect(self.on_ai_executed)
         dialog.exec()
 
     def on_ai_executed(self, result: dict):
-        """AI 执行完成后刷新视图并给予反馈。"""
+        """AI 执行完成后放宽筛选并给予反馈（数据已经变更事件更新）。"""
         # 放宽过滤范围，避免新数据因过滤而不可见
         self.search_input.setText("")
         self.type_filter.setCurrentText('全部')
         self.start_date.setDate(QDate.currentDate().addMonths(-12))
         self.end_date.setDate(QDate.currentDate())
 
-        self.load_transactions()
-
         added = len(result.get('added', []))
         updated = len(result.get('updated', []))
         deleted = len(result.get('deleted', []))
@@ -395,12 +427,16 @@ class DashboardInterface(QWidget):
     
     def edit_transaction(self, transaction: Transaction):
         """编辑交易"""
+        if self._editing_blocked():
+            return
         dialog = AddTransactionDialog(self, transaction)
         dialog.transaction_saved.connect(self.on_transaction_saved)
         dialog.exec()
     
     def delete_transaction(self, transaction: Transaction):
         """删除交易"""
+        if self._editing_blocked():
+            return
         result = MessageBox(
             "确认删除",
             f"确定要删除这笔交易吗?\n\n{transaction.description} - ¥{transaction.amount:,.2f}",
@@ -419,7 +455,6 @@ class DashboardInterface(QWidget):
                 duration=2000,
                 parent=self
             )
-            self.load_transactions()
     
     def on_transaction_saved(self, transaction: Transaction):
         """交易保存回调"""
@@ -441,6 +476,9 @@ class DashboardInterface(QWidget):
         else:
             self.service.add_transaction(transaction)
             msg = "添加成功"
+        # 用户手工填写的标签用于增量训练本地标签模型（写盘在后台合并进行）
+        if transaction.tags:
+            self.tagger.learn([transaction], deferred=True)
         
         InfoBar.success(
             title=msg,
@@ -451,18 +489,71 @@ class DashboardInterface(QWidget):
             duration=2000,
             parent=self
         )
-        self.load_transactions()
 
 
 class MainWindow(FluentWindow):
     """主窗口 - Fluent Design风格"""
     
+    LOAD_CHUNK = 5000  # 渐进加载时每块的交易条数
+
     def __init__(self):
         super().__init__()
-        self.service = TransactionService()
+        # 数据文件在后台线程读取与保存，界面线程只操作内存数据
+        self.service = TransactionService(load=False)
+        self.io = PersistenceWorker(self.service, self).attach()
+        # 定期备份在数据加载完成后启动，不与启动时的读取争用磁盘
+        self.backups = BackupScheduler() if Config.BACKUP_ENABLED else None
+        # 其他进程（main.py、脚本）写入同一账本时合并其修改，界面经变更事件局部刷新
+        self.watcher = ExternalChangeWatcher(self.service)
         self.init_window()
         self.init_navigation()
-        
+        # 窗口先显示占位内容，数据按日期从新到旧分块到达后逐步填充
+        self.io.chunk_loaded.connect(self.dashboard.append_loaded_chunk)
+        self.io.loaded.connect(self.on_data_loaded)
+        self.io.load_failed.connect(self.on_load_failed)
+        self.io.save_failed.connect(lambda msg: self.show_io_error("保存失败", msg))
+        self.dashboard.begin_loading()
+        self.io.load(self.LOAD_CHUNK)
+        
+    def closeEvent(self, event):
+        """退出前停止后台任务并写入尚未保存的修改与标签模型（标签回填的待办已持久化，下次启动继续）。"""
+        self.dashboard.backfill.stop()
+        self.dashboard.tagger.flush_model()
+        self.watcher.stop()
+        self.io.shutdown()
+        if self.backups is not None:
+            self.backups.stop()
+        super().closeEvent(event)
+
+    def on_data_loaded(self, transactions: list):
+        """后台加载完成：接收数据（惰性模式下为快照行）并刷新各页面"""
+        if self.service.lazy:
+            self.service.set_loaded_rows(transactions, self.io.loaded_key)
+        else:
+            self.service.set_loaded_transactions(transactions, self.io.loaded_key)
+        # 统计页（已打开时）经 TransactionsReloaded 事件自行刷新
+        self.dashboard.finish_loading()
+        if self.dashboard.tagger.llm_enabled:
+            self.dashboard.backfill.start()
+        if self.backups is not None:
+            self.backups.start()
+        self.watcher.start()
+
+    def on_load_failed(self, message: str):
+        self.dashboard.finish_loading(editable=False)
+        self.show_io_error("加载失败", message)
+
+    def show_io_error(self, title: str, message: str):
+        InfoBar.error(
+            title=title,
+            content=message,
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=5000,
+            parent=self
+        )
+
     def init_window(self):
         """初始化窗口"""
         self.setWindowTitle("个人记账本")
@@ -486,19 +577,26 @@ class MainWindow(FluentWindow):
             "仪表盘",
             NavigationItemPosition.TOP
         )
-        # 统计分析
-        self.analytics = AnalyticsInterface(self.service)
-        self.analytics.setObjectName("analytics")
+        # 统计分析：图表较重，首次切换到该页时才构建（并导入 QtChart）
+        self.analytics_page = LazyPage(self.create_analytics)
+        self.analytics_page.setObjectName("analytics")
         # 使用安全的导航图标（CALENDAR 通常可用）
         self.addSubInterface(
-            self.analytics,
+            self.analytics_page,
             FluentIcon.CALENDAR,
             "统计分析",
             NavigationItemPosition.TOP
         )
         
-        # 加载数据
-        self.dashboard.load_transactions()
-        
         # 设置默认界面
         self.stackedWidget.setCurrentWidget(self.dashboard)
+
+    def create_analytics(self):
+        """构建统计分析页（由 LazyPage 在首次显示时调用）"""
+        from ledger.ui.analytics_view import AnalyticsInterface
+        return AnalyticsInterface(self.service)
+
+    @property
+    def analytics(self):
+        """统计分析页，访问时若尚未构建则立即构建"""
+        return self.analytics_page.ensure_page()
@@ -0,0 +1,93 @@
+"""
+刷新调度 - 合并连续的刷新请求，在后台线程计算，只应用最新结果
+
+request() 可被频繁调用（例如日期微调按钮连续触发）：请求先经过防抖合并，
+到期时在界面线程读取参数、交给单线程池计算；计算期间的新请求会使旧结果作废，
+排队中尚未开始的过时计算直接跳过。只有与最新请求对应的结果才会通过 ready 信号发出。
+"""
+
+import logging
+import threading
+from typing import Any, Callable
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+class _Job(QRunnable):
+    def __init__(self, fn: Callable[[], None]):
+        super().__init__()
+        self.fn = fn
+
+    def run(self):
+        self.fn()
+
+
+class RefreshScheduler(QObject):
+    """防抖 + 后台计算 + 丢弃过时结果。"""
+
+    ready = pyqtSignal(object)   # 最新一次计算的结果
+    failed = pyqtSignal(str)
+    _finished = pyqtSignal(int, object, str)  # (代次, 结果, 错误信息)
+
+    def __init__(self, params: Callable[[], Any], compute: Callable[[Any], Any],
+                 delay_ms: int = 120, parent=None):
+        """params 在界面线程读取控件状态；compute(params) 在后台线程执行。"""
+        super().__init__(parent)
+        self.params = params
+        self.compute = compute
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._submit)
+        self._finished.connect(self._on_finished)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.computed = 0  # 实际执行的计算次数
+
+    def request(self):
+        """请求刷新；短时间内的多次请求合并为一次。"""
+        self._timer.start()
+
+    def request_now(self):
+        """跳过防抖立即提交。"""
+        self._timer.stop()
+        self._submit()
+
+    def _submit(self):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        params = self.params()
+        self.pool.start(_Job(lambda: self._run(generation, params)))
+
+    def _is_current(self, generation: int) -> bool:
+        with self._lock:
+            return generation == self._generation
+
+    def _run(self, generation: int, params: Any):
+        if not self._is_current(generation):
+            return  # 排队期间已有更新的请求
+        try:
+            result = self.compute(params)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("后台刷新计算失败: %s", e)
+            self._finished.emit(generation, None, str(e))
+            return
+        self.computed += 1
+        self._finished.emit(generation, result, "")
+
+    def _on_finished(self, generation: int, result: Any, error: str):
+        # 在界面线程执行：结果返回时若已有更新的请求，则丢弃
+        if not self._is_current(generation):
+            return
+        if error:
+            self.failed.emit(error)
+        else:
+            self.ready.emit(result)
+
+    def wait(self, msecs: int = -1) -> bool:
+        return self.pool.waitForDone(msecs)
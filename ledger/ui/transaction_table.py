@@ -0,0 +1,329 @@
+"""
+交易记录表格 - 基于模型/视图的虚拟化实现
+
+TransactionTableModel 只保存交易引用，单元格文本、字体与颜色在视图绘制可见行时按需生成；
+字体与画刷按样式缓存复用。操作列的“编辑/删除”由委托直接绘制并处理点击，不为每行创建控件，
+因此加载耗时与内存基本不随行数增长。惰性视图（LAZY_ROWS）直接按快照行显示，只有编辑/删除的行才构建交易对象。
+"""
+
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from PyQt5.QtCore import QAbstractTableModel, QEvent, QModelIndex, QRect, Qt, pyqtSignal
+from PyQt5.QtGui import QBrush, QPainter, QPen
+from PyQt5.QtWidgets import QHeaderView, QStyleOptionViewItem
+from qfluentwidgets import FluentIcon, TableItemDelegate, TableView
+
+from ledger.models.transaction import Transaction
+from ledger.services.lazy_rows import TransactionView
+from ledger.ui.theme import Theme
+
+
+class TransactionTableModel(QAbstractTableModel):
+    """交易列表的表格模型。"""
+
+    HEADERS = ['日期', '类型', '金额', '描述', '标签', '操作']
+    ACTION_COLUMN = 5
+    MAX_DIFF_RANGES = 64  # 增量更新时允许的最多增删区间数
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # 交易对象，或惰性视图的快照行（此时 _hydrate 把行构建为交易对象）
+        self._rows: List = []
+        self._hydrate: Optional[Callable[[tuple], Transaction]] = None
+        # 字体与画刷只创建一次，data() 每次返回同一对象
+        self._fonts = {
+            0: Theme.font(Theme.FONT_BODY),
+            1: Theme.font(Theme.FONT_BODY, True),
+            2: Theme.font(Theme.FONT_SUBTITLE, True),
+            3: Theme.font(Theme.FONT_BODY),
+            4: Theme.font(Theme.FONT_CAPTION),
+        }
+        self._income_brush = QBrush(Theme.SUCCESS)
+        self._expense_brush = QBrush(Theme.ERROR)
+        self._secondary_brush = QBrush(Theme.TEXT_SECONDARY)
+        self._center = int(Qt.AlignmentFlag.AlignCenter)
+        self._right = int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        self._left = int(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+
+    @staticmethod
+    def _unpack(transactions: Sequence[Transaction]) -> Tuple[List, Optional[Callable[[tuple], Transaction]]]:
+        """惰性视图取其快照行（不构建对象），其余取交易对象。"""
+        rows = transactions.rows if isinstance(transactions, TransactionView) else None
+        if rows is not None:
+            return list(rows), transactions.hydrator
+        return list(transactions), None
+
+    def set_transactions(self, transactions: Sequence[Transaction]):
+        """替换全部数据（只重置模型，不逐行构建单元格）。"""
+        rows, hydrate = self._unpack(transactions)
+        self.beginResetModel()
+        self._rows, self._hydrate = rows, hydrate
+        self.endResetModel()
+
+    def update_transactions(self, transactions: Sequence[Transaction]):
+        """以最小变更更新数据：新列表是旧列表的子序列（或反之）时只删除（插入）差异行。
+
+        差异过于分散时直接重置，逐段通知反而更慢。
+        """
+        new, hydrate = self._unpack(transactions)
+        if (hydrate is None) != (self._hydrate is None):
+            self.set_transactions(transactions)
+            return
+        # 行不可变，按同一性比较即可；构建对象使用最新视图的函数
+        self._hydrate = hydrate
+        old = self._rows
+        if len(new) <= len(old):
+            ranges = self._missing_ranges(old, new)
+            if ranges is not None:
+                for first, last in reversed(ranges):
+                    self.beginRemoveRows(QModelIndex(), first, last)
+                    del self._rows[first:last + 1]
+                    self.endRemoveRows()
+                return
+        else:
+            ranges = self._missing_ranges(new, old)
+            if ranges is not None:
+                for first, last in ranges:
+                    self.beginInsertRows(QModelIndex(), first, last)
+                    self._rows[first:first] = new[first:last + 1]
+                    self.endInsertRows()
+                return
+        self.beginResetModel()
+        self._rows = new
+        self.endResetModel()
+
+    def refresh_transactions(self, transaction_ids: Iterable[str]):
+        """通知这些交易所在的行重绘（交易对象被就地修改时，列表差异无法发现变化）。"""
+        ids = set(transaction_ids)
+        if self._hydrate is not None:
+            rows = [i for i, row in enumerate(self._rows) if row[0] in ids]
+        else:
+            rows = [i for i, t in enumerate(self._rows) if t.transaction_id in ids]
+        if rows:
+            self.dataChanged.emit(self.index(rows[0], 0), self.index(rows[-1], self.columnCount() - 1))
+
+    def prepend_transactions(self, transactions: List[Transaction]):
+        """在表头插入一批行（渐进加载时更早的记录陆续到达）。"""
+        if not transactions:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(transactions) - 1)
+        self._rows[0:0] = transactions
+        self.endInsertRows()
+
+    @classmethod
+    def _missing_ranges(cls, longer: List, shorter: List) -> Optional[List[tuple]]:
+        """shorter 是 longer 的子序列时，返回 longer 中多出的连续区间 [(first, last)]，否则 None。"""
+        ranges = []
+        j = 0
+        run_start = -1
+        for i, t in enumerate(longer):
+            if j < len(shorter) and shorter[j] is t:
+                j += 1
+                if run_start >= 0:
+                    ranges.append((run_start, i - 1))
+                    run_start = -1
+                    if len(ranges) > cls.MAX_DIFF_RANGES:
+                        return None
+            elif run_start < 0:
+                run_start = i
+        if j != len(shorter):
+            return None
+        if run_start >= 0:
+            ranges.append((run_start, len(longer) - 1))
+        return ranges if len(ranges) <= cls.MAX_DIFF_RANGES else None
+
+    def transaction_at(self, row: int) -> Optional[Transaction]:
+        if 0 <= row < len(self._rows):
+            item = self._rows[row]
+            return item if self._hydrate is None else self._hydrate(item)
+        return None
+
+    def rowCount(self, parent=QModelIndex()):  # noqa: N802
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):  # noqa: N802
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):  # noqa: N802
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return self.HEADERS[section]
+            return str(section + 1)
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self._rows[index.row()]
+        if self._hydrate is None:
+            amount, ttype, date, description, tags = (
+                item.amount, item.transaction_type, item.date, item.description, item.tags)
+        else:
+            _, amount, ttype, date, description, _, _, tags = item
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == 0:
+                return date.strftime('%Y-%m-%d')
+            if col == 1:
+                return '收入' if ttype == 'INCOME' else '支出'
+            if col == 2:
+                return f"¥{amount:,.2f}"
+            if col == 3:
+                return description
+            if col == 4:
+                return ', '.join(tags) if tags else '-'
+            return None
+        if role == Qt.ItemDataRole.FontRole:
+            return self._fonts.get(col)
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if col in (1, 2):
+                return self._income_brush if ttype == 'INCOME' else self._expense_brush
+            if col == 4:
+                return self._secondary_brush
+            return None
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if col == 2:
+                return self._right
+            if col == 3:
+                return self._left
+            return self._center
+        if role == Qt.ItemDataRole.ToolTipRole and col == 3:
+            return description
+        return None
+
+
+class TransactionItemDelegate(TableItemDelegate):
+    """在操作列绘制“编辑/删除”按钮并处理点击的委托。"""
+
+    edit_clicked = pyqtSignal(int)
+    delete_clicked = pyqtSignal(int)
+
+    BUTTON_WIDTH = 96
+    BUTTON_HEIGHT = 40
+    ACTIONS = (("编辑", FluentIcon.EDIT), ("删除", FluentIcon.DELETE))
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self._button_font = Theme.font(Theme.FONT_BODY)
+        self._border_pen = QPen(Theme.BORDER)
+        self._text_pen = QPen(Theme.TEXT_PRIMARY)
+        self._button_brush = QBrush(Theme.SURFACE)
+        self._hover_brush = QBrush(Theme.DIVIDER)
+        self._hover = (-1, -1)  # (行, 按钮序号)
+
+    def _button_rects(self, rect: QRect) -> List[QRect]:
+        x = rect.x() + Theme.SPACING_SMALL
+        y = rect.y() + (rect.height() - self.BUTTON_HEIGHT) // 2
+        rects = []
+        for _ in self.ACTIONS:
+            rects.append(QRect(x, y, self.BUTTON_WIDTH, self.BUTTON_HEIGHT))
+            x += self.BUTTON_WIDTH + Theme.SPACING_XSMALL
+        return rects
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex):
+        super().paint(painter, option, index)
+        if index.column() != TransactionTableModel.ACTION_COLUMN:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setFont(self._button_font)
+        for i, (rect, (text, icon)) in enumerate(zip(self._button_rects(option.rect), self.ACTIONS)):
+            painter.setPen(self._border_pen)
+            painter.setBrush(self._hover_brush if self._hover == (index.row(), i) else self._button_brush)
+            painter.drawRoundedRect(rect, Theme.RADIUS_SMALL, Theme.RADIUS_SMALL)
+            icon_rect = QRect(rect.x() + 16, rect.center().y() - 8, 16, 16)
+            icon.render(painter, icon_rect)
+            painter.setPen(self._text_pen)
+            painter.drawText(rect.adjusted(40, 0, -8, 0), int(Qt.AlignmentFlag.AlignVCenter), text)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):  # noqa: N802
+        if index.column() != TransactionTableModel.ACTION_COLUMN:
+            if self._hover[0] != -1:
+                self._hover = (-1, -1)
+                self.parent().viewport().update()
+            return super().editorEvent(event, model, option, index)
+        if event.type() in (QEvent.Type.MouseMove, QEvent.Type.MouseButtonRelease):
+            hit = next((i for i, r in enumerate(self._button_rects(option.rect)) if r.contains(event.pos())), -1)
+            hover = (index.row(), hit) if hit >= 0 else (-1, -1)
+            if hover != self._hover:
+                self._hover = hover
+                self.parent().viewport().update()
+            if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+                if hit == 0:
+                    self.edit_clicked.emit(index.row())
+                    return True
+                if hit == 1:
+                    self.delete_clicked.emit(index.row())
+                    return True
+        return super().editorEvent(event, model, option, index)
+
+
+class TransactionTableView(TableView):
+    """交易记录表格视图"""
+
+    edit_requested = pyqtSignal(object)    # Transaction
+    delete_requested = pyqtSignal(object)  # Transaction
+
+    COLUMN_WIDTHS = {0: 150, 1: 90, 2: 170, 4: 200, 5: 240}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.table_model = TransactionTableModel(self)
+        self.setModel(self.table_model)
+        self.action_delegate = TransactionItemDelegate(self)
+        self.setItemDelegate(self.action_delegate)
+        self.action_delegate.edit_clicked.connect(self._emit_edit)
+        self.action_delegate.delete_clicked.connect(self._emit_delete)
+        self.setMouseTracking(True)
+        self.setup_table()
+
+    def setup_table(self):
+        """设置表格"""
+        # 表头样式
+        header = self.horizontalHeader()
+        header.setFont(Theme.font(Theme.FONT_SUBTITLE, True))
+        header.setDefaultAlignment(Qt.AlignmentFlag.AlignCenter)
+        header.setMinimumHeight(60)
+
+        # 固定列宽：按内容计算列宽需要遍历数据，行数多时代价高
+        for col, width in self.COLUMN_WIDTHS.items():
+            header.setSectionResizeMode(col, QHeaderView.ResizeMode.Fixed)
+            self.setColumnWidth(col, width)
+        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+
+        # 统一行高，视图无需逐行测量
+        v_header = self.verticalHeader()
+        v_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        v_header.setDefaultSectionSize(80)
+        v_header.setMinimumWidth(44)
+
+        # 表格样式
+        self.setAlternatingRowColors(True)
+        self.setSelectionBehavior(TableView.SelectionBehavior.SelectRows)
+        self.setSelectionMode(TableView.SelectionMode.SingleSelection)
+        self.setEditTriggers(TableView.EditTrigger.NoEditTriggers)
+        # 现代风格：去除密集网格线
+        self.setShowGrid(False)
+
+    def set_transactions(self, transactions: Sequence[Transaction]):
+        self.table_model.set_transactions(transactions)
+
+    def update_transactions(self, transactions: Sequence[Transaction]):
+        self.table_model.update_transactions(transactions)
+
+    def refresh_transactions(self, transaction_ids: Iterable[str]):
+        self.table_model.refresh_transactions(transaction_ids)
+
+    def prepend_transactions(self, transactions: List[Transaction]):
+        self.table_model.prepend_transactions(transactions)
+
+    def _emit_edit(self, row: int):
+        t = self.table_model.transaction_at(row)
+        if t is not None:
+            self.edit_requested.emit(t)
+
+    def _emit_delete(self, row: int):
+        t = self.table_model.transaction_at(row)
+        if t is not None:
+            self.delete_requested.emit(t)
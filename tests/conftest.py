@@ -0,0 +1,20 @@
+import os
+import pytest
+
+# 测试及其启动的子进程都不在包目录下写 LLM 指标文件
+os.environ["METRICS_FILE"] = ""
+# 界面测试在无显示器的环境下运行
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from ledger.config.settings import Config  # noqa: E402
+
+Config.METRICS_FILE = ""
+
+# QApplication 在整个测试会话中保持存活，提前销毁会连带销毁 qfluentwidgets 的全局配置对象；
+# 未安装 PyQt5 / qfluentwidgets 时跳过用到它的测试
+@pytest.fixture(scope="session")
+def qapp():
+    pytest.importorskip("PyQt5")
+    pytest.importorskip("qfluentwidgets")
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,122 @@
+import io
+import os
+import pytest
+from datetime import datetime, timedelta
+from ledger.config.settings import Config
+from ledger.models.transaction import Transaction
+from ledger.services import backup, durable
+from ledger.services.backup import BackupScheduler, BackupStore
+from ledger.services.transaction_service import TransactionService
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SNAPSHOT_CACHE", False)
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "data" / "backup_ledger.json")
+    yield Config.DATABASE_PATH
+    Config.DATABASE_PATH = original_db_path
+
+@pytest.fixture
+def store(db_path, tmp_path):
+    return BackupStore(root=str(tmp_path / "backups"), source=db_path)
+
+def _seed(n=3000):
+    service = TransactionService()
+    base = datetime(2023, 1, 1, 8)
+    with service.batch():
+        for i in range(n):
+            service.add_transaction(Transaction(amount=i % 97 + 0.5, transaction_type="EXPENSE",
+                                                description=f"午饭{i}", date=base + timedelta(hours=i), tags=["餐饮"]))
+    return service
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_chunks_are_content_defined(db_path):
+    _seed()
+    data = _read(db_path)
+    chunks = list(backup.iter_chunks(io.BytesIO(data)))
+    assert b"".join(chunks) == data and len(chunks) > 4
+    assert all(len(c) <= backup.CHUNK_MAX for c in chunks)
+
+    edited = data.replace("午饭1500".encode(), "晚饭1500".encode())
+    changed = set(backup.iter_chunks(io.BytesIO(edited))) - set(chunks)
+    assert len(changed) == 1
+
+def test_incremental_backup_stores_only_changed_chunks(db_path, store):
+    service = _seed()
+    first = store.backup()
+    assert first.new_chunks == first.total_chunks and first.written_bytes < first.scanned_bytes / 3
+
+    unchanged = store.backup()
+    assert unchanged.reused_files == unchanged.snapshot.files and unchanged.new_chunks == 0
+
+    service.update_transaction(service.get_all_transactions()[1500].transaction_id, description="改过")
+    service.add_transaction(Transaction(amount=1, transaction_type="INCOME", description="新增"))
+    third = store.backup()
+    # 中间修改一条、末尾新增一条：各影响一个数据块
+    assert third.new_chunks <= 2 < third.total_chunks
+    assert len(store.snapshots()) == 3
+
+def test_point_in_time_restore(db_path, store, tmp_path):
+    service = _seed(500)
+    original = _read(db_path)
+    first = store.backup().snapshot
+    service.delete_transaction(service.get_all_transactions()[0].transaction_id)
+    store.backup()
+
+    store.restore(at=first.created, target_dir=str(tmp_path / "restored"))
+    assert _read(tmp_path / "restored" / "backup_ledger.json") == original
+
+    store.restore(snapshot_id=first.id)  # 原位恢复
+    assert len(TransactionService().get_all_transactions()) == 500
+    assert not os.path.exists(db_path + durable.CORRUPT_SUFFIX)
+    with pytest.raises(ValueError):
+        store.restore(at=first.created - timedelta(days=1))
+
+def test_prune_keeps_recent_snapshots_and_drops_orphan_chunks(db_path, store, tmp_path):
+    service = _seed(500)
+    for i in range(4):
+        service.add_transaction(Transaction(amount=i, transaction_type="EXPENSE", description=f"第{i}次"))
+        store.backup()
+    chunk_count = lambda: sum(len(files) for _, _, files in os.walk(store.chunk_dir))
+    before = chunk_count()
+    assert store.prune(keep=2)[0] == 2
+    assert len(store.snapshots()) == 2 and chunk_count() < before
+    latest = store.restore(target_dir=str(tmp_path / "restored"))
+    assert latest.id == store.snapshots()[-1].id
+    assert _read(tmp_path / "restored" / "backup_ledger.json") == _read(db_path)
+
+def test_scheduler_backs_up_only_when_due(db_path, store):
+    scheduler = BackupScheduler(store, interval_days=7, keep=3)
+    assert scheduler.run_once() is None  # 账本还不存在
+    _seed(10)
+    assert scheduler.run_once() is not None
+    assert scheduler.run_once() is None
+    assert store.next_due(7) > datetime.now() + timedelta(days=6)
+
+def test_backup_waits_for_save_in_progress(db_path, store, monkeypatch):
+    import threading
+    from ledger.services import file_lock
+    monkeypatch.setattr(Config, "FILE_LOCKING", True)
+    _seed(200)
+    saving, release = threading.Event(), threading.Event()
+
+    def hold_save():
+        with file_lock.locked(db_path, exclusive=True):
+            saving.set()
+            release.wait(5)
+
+    saver = threading.Thread(target=hold_save)
+    saver.start()
+    saving.wait(5)
+    done = []
+    worker = threading.Thread(target=lambda: done.append(store.backup()))
+    worker.start()
+    worker.join(0.3)
+    assert not done  # 保存未完成时不读取账本文件
+    release.set()
+    worker.join(10)
+    saver.join(5)
+    assert len(done) == 1 and done[0].snapshot.files == 1
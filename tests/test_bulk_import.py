@@ -0,0 +1,134 @@
+import json
+import threading
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from ledger.services.transaction_service import TransactionService
+from ledger.services.ai_service import AICommandService, AIOperation
+from ledger.services.bulk_import import parse_line_locally, split_segments
+from ledger.config.settings import Config
+
+@pytest.fixture
+def ai_service(tmp_path):
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "bulk_ledger.json")
+    yield AICommandService(TransactionService())
+    Config.DATABASE_PATH = original_db_path
+
+def test_parse_line_locally():
+    today = datetime(2024, 5, 10)
+    # 1. 月日 + 描述 + 金额
+    op = parse_line_locally("3月2日 午饭 28元", today)
+    assert op.op_type == "ADD"
+    assert op.date == "2024-03-02"
+    assert op.description == "午饭"
+    assert op.amount == 28.0
+    assert op.transaction_type == "EXPENSE"
+    # 2. 收入关键词
+    assert parse_line_locally("2024-05-01 工资 8000", today).transaction_type == "INCOME"
+    # 3. 未写年份且落在未来，视为去年
+    assert parse_line_locally("12月30日 年货 300元", today).date == "2023-12-30"
+    # 4. 修改/删除指令与无金额行交给 LLM
+    assert parse_line_locally("把昨天的星巴克改为45元", today) is None
+    assert parse_line_locally("昨天吃了顿好的", today) is None
+
+def test_split_segments_keeps_source_order():
+    text = "3月1日 早餐 10元\n上周和朋友聚餐AA了\n帮我记一下打车\n3月2日 午饭 28元\n"
+    segs = split_segments(text, chunk_size=1)
+    assert [s.local for s in segs] == [True, False, False, True]
+    assert [s.line_numbers for s in segs] == [[1], [2], [3], [4]]
+
+def test_bulk_import_local_lines_single_commit(ai_service):
+    text = "\n".join(f"3月{d}日 午饭 {d}元" for d in range(1, 11))
+    with patch("ledger.services.transaction_service.json.dump", wraps=json.dump) as dump:
+        result = ai_service.bulk_import(text)
+    assert result.total_lines == 10
+    assert result.local_lines == 10
+    assert result.llm_calls == 0
+    assert len(result.added) == 10
+    # 批量模式下只落盘一次
+    assert dump.call_count == 1
+    amounts = [t.amount for t in ai_service.ts.get_all_transactions()]
+    assert amounts == [float(d) for d in range(1, 11)]
+
+def test_bulk_import_llm_concurrent_ordered(ai_service):
+    lines = [f"第{i}笔说不清的开销" for i in range(6)]
+    text = "3月1日 早餐 1元\n" + "\n".join(lines) + "\n3月2日 晚饭 2元"
+    seen_threads = set()
+
+    def fake_parse(chunk):
+        seen_threads.add(threading.get_ident())
+        return [AIOperation(op_type="ADD", amount=100.0 + i, description=line)
+                for i, line in enumerate(chunk.split("\n"))]
+
+    with patch.object(ai_service, "parse", side_effect=fake_parse):
+        result = ai_service.bulk_import(text, chunk_size=2, concurrency=3, rate_limit=0)
+    assert result.llm_calls == 3
+    assert result.llm_lines == 6
+    assert threading.get_ident() not in seen_threads
+    descs = [t.description for t in ai_service.ts.get_all_transactions()]
+    assert descs == ["早餐"] + lines + ["晚饭"]
+
+def test_bulk_import_checkpoint_resume(ai_service, tmp_path):
+    ckpt = str(tmp_path / "import.ckpt")
+    text = "3月1日 早餐 1元\n说不清的开销A\n说不清的开销B"
+    def flaky_parse(chunk):
+        if "B" in chunk:
+            raise RuntimeError("boom")
+        return [AIOperation(op_type="ADD", amount=5.0, description=chunk)]
+
+    with patch.object(ai_service, "parse", side_effect=flaky_parse):
+        first = ai_service.bulk_import(text, chunk_size=1, rate_limit=0, checkpoint_path=ckpt)
+    assert first.failed_lines == [3]
+    assert len(ai_service.ts.get_all_transactions()) == 2
+
+    # 重跑：已应用的行被跳过，只重试失败的块
+    with patch.object(ai_service, "parse",
+                      side_effect=lambda chunk: [AIOperation(op_type="ADD", amount=6.0, description=chunk)]):
+        second = ai_service.bulk_import(text, chunk_size=1, rate_limit=0, checkpoint_path=ckpt)
+    assert second.skipped_lines == 2
+    assert second.llm_calls == 1
+    assert len(ai_service.ts.get_all_transactions()) == 3
+
+    third = ai_service.bulk_import(text, chunk_size=1, rate_limit=0, checkpoint_path=ckpt)
+    assert third.already_applied
+    assert len(ai_service.ts.get_all_transactions()) == 3
+
+def test_resume_after_failed_apply_does_not_duplicate(ai_service, tmp_path):
+    ckpt = str(tmp_path / "import.ckpt")
+    text = "3月1日 早餐 1元\n3月1日 午饭 2元\n3月1日 晚饭 3元"
+    add = ai_service.ts.add_transaction
+    calls = []
+    def failing_add(t):
+        calls.append(t)
+        if len(calls) == 3:
+            raise OSError("disk full")
+        return add(t)
+
+    with patch.object(ai_service.ts, "add_transaction", side_effect=failing_add):
+        with pytest.raises(OSError):
+            ai_service.bulk_import(text, chunk_size=1, rate_limit=0, checkpoint_path=ckpt)
+    # 前两行已随批量提交写入账本，但尚未记为已应用
+    assert len(TransactionService().get_all_transactions()) == 2
+
+    resumed = ai_service.bulk_import(text, chunk_size=1, rate_limit=0, checkpoint_path=ckpt)
+    assert len(resumed.added) == 1
+    descs = sorted(t.description for t in TransactionService().get_all_transactions())
+    assert descs == ["午饭", "早餐", "晚饭"]
+
+def test_bulk_import_suggests_tags_before_taking_the_lock(ai_service, monkeypatch):
+    monkeypatch.setattr(Config, "AI_AUTO_TAG", True)
+    text = "3月1日 早餐 1元\n3月1日 说不清的开销 2元\n3月2日 早餐 3元"
+    held = []
+
+    def slow_suggest(description, transaction_type=None):
+        held.append(ai_service.ts._batch_depth)
+        return ["餐饮"] if "早餐" in description else []
+
+    with patch.object(ai_service.tagger, "suggest_tags", side_effect=slow_suggest):
+        ai_service.bulk_import(text, rate_limit=0)
+    # 每个描述只算一次，且都在批量提交之外
+    assert sorted(held) == [0, 0]
+    by_desc = {t.description: t for t in ai_service.ts.get_all_transactions()}
+    assert by_desc["早餐"].tags == ["餐饮"] and by_desc["早餐"].auto_labeled
+    assert by_desc["说不清的开销"].tags == [] and not by_desc["说不清的开销"].auto_labeled
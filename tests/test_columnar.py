@@ -0,0 +1,122 @@
+import json
+import os
+import pytest
+from datetime import datetime, timedelta
+from ledger.cli import main as cli_main
+from ledger.config.settings import Config
+from ledger.models.transaction import Transaction
+from ledger.services import columnar, file_lock, snapshot
+from ledger.services.transaction_service import TransactionService
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "columnar_ledger.json")
+    monkeypatch.setattr(Config, "DATA_FORMAT", "columnar")
+    yield Config.DATABASE_PATH
+    Config.DATABASE_PATH = original_db_path
+
+def _transactions(n, start=0):
+    base = datetime(2024, 1, 1, 8, 30, 15, 250)
+    return [Transaction(amount=i + 0.25, transaction_type="INCOME" if i % 3 == 0 else "EXPENSE",
+                        description=f"午饭{i}" if i % 7 else "", date=base + timedelta(hours=i),
+                        tags=[["餐饮"], [], ["交通", "通勤"]][i % 3], is_recurring=i % 5 == 0, auto_labeled=bool(i % 2))
+            for i in range(start, start + n)]
+
+def test_roundtrip_preserves_every_field(tmp_path):
+    path = str(tmp_path / "roundtrip.ledger")
+    expected = _transactions(50)
+    expected[3].description = "含\0空字符"
+    columnar.write(path, snapshot.to_rows(expected))
+    assert [t.to_dict() for t in columnar.read(path)] == [t.to_dict() for t in expected]
+
+    with columnar.ColumnarFile(path) as f:
+        assert len(f) == 50
+        amounts = f.segments[0].view("amount")
+        assert amounts[10] == 10.25
+        amounts.release()
+
+def test_append_writes_new_segment_and_ignores_torn_tail(tmp_path):
+    path = str(tmp_path / "append.ledger")
+    expected = _transactions(16)
+    columnar.write(path, snapshot.to_rows(expected[:10]))
+    before = open(path, "rb").read()
+    columnar.append(path, snapshot.to_rows(expected[10:15]))
+    after = open(path, "rb").read()
+    assert after.startswith(before)
+    assert columnar.segment_count(path) == 2
+
+    # 模拟追加到一半时中断：读取忽略不完整的段，下次追加先截掉它
+    with open(path, "ab") as f:
+        f.write(after[len(before):len(before) + 40])
+    assert len(columnar.read_rows(path)) == 15
+    columnar.append(path, snapshot.to_rows(expected[15:]))
+    assert [t.to_dict() for t in columnar.read(path)] == [t.to_dict() for t in expected]
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_totals_scan_columns(tmp_path, monkeypatch, use_numpy):
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(columnar, "_numpy", lambda: None)
+    path = str(tmp_path / "totals.ledger")
+    rows = _transactions(30)
+    columnar.write(path, snapshot.to_rows(rows[:20]))
+    columnar.append(path, snapshot.to_rows(rows[20:]))
+    start, end = rows[5].date, rows[24].date
+    picked = [t for t in rows if start <= t.date <= end]
+    with columnar.ColumnarFile(path) as f:
+        totals = f.totals(start, end)
+    income = sum(t.amount for t in picked if t.transaction_type == "INCOME")
+    expense = sum(t.amount for t in picked if t.transaction_type == "EXPENSE")
+    assert totals == pytest.approx({"income": income, "expense": expense, "net": income - expense, "count": 20})
+
+def test_service_migrates_json_and_appends_on_add(db_path):
+    seeded = [t.to_dict() for t in _transactions(8)]
+    with open(db_path, "w", encoding="utf-8") as f:
+        json.dump(seeded, f, ensure_ascii=False)
+
+    service = TransactionService()
+    assert [t.to_dict() for t in service.get_all_transactions()] == seeded
+    assert os.path.exists(db_path + ".migrated")
+    target = columnar.data_path(db_path)
+
+    service.add_transaction(_transactions(1, start=8)[0])
+    assert columnar.segment_count(target) == 2
+    service.update_transaction(service.get_all_transactions()[0].transaction_id, amount=1)
+    assert columnar.segment_count(target) == 1
+
+    reloaded = TransactionService().get_all_transactions()
+    assert len(reloaded) == 9 and reloaded[0].amount == 1
+
+def test_migration_holds_exclusive_file_lock(db_path, monkeypatch):
+    with open(db_path, "w", encoding="utf-8") as f:
+        json.dump([t.to_dict() for t in _transactions(3)], f, ensure_ascii=False)
+    held = []
+    write = columnar.write
+
+    def spy(path, rows):
+        state = file_lock._path_lock(db_path)
+        held.append((state.depth, state.exclusive))
+        write(path, rows)
+
+    monkeypatch.setattr(columnar, "write", spy)
+    assert len(TransactionService.read_rows(db_path)) == 3
+    assert held == [(1, True)]
+    assert os.path.exists(db_path + ".migrated")
+    assert len(TransactionService.read_transactions(db_path)) == 3 and len(held) == 1
+
+def test_cli_export_and_import(db_path, tmp_path):
+    service = TransactionService()
+    with service.batch():
+        for t in _transactions(4):
+            service.add_transaction(t)
+    exported = str(tmp_path / "export.json")
+    assert cli_main(["columnar", "export", exported]) == 0
+    with open(exported, encoding="utf-8") as f:
+        data = json.load(f)
+    assert data == [t.to_dict() for t in service.get_all_transactions()]
+
+    os.remove(columnar.data_path(db_path))
+    assert cli_main(["columnar", "import", exported]) == 0
+    assert [t.to_dict() for t in TransactionService().get_all_transactions()] == data
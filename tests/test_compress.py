@@ -0,0 +1,85 @@
+import gzip
+import json
+import os
+import pytest
+from ledger.config.settings import Config
+from ledger.models.transaction import Transaction
+from ledger.services import compress, durable, parallel_load
+from ledger.services.backup import BackupStore
+from ledger.services.transaction_service import TransactionService
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SNAPSHOT_CACHE", False)
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "compressed_ledger.json")
+    yield Config.DATABASE_PATH
+    Config.DATABASE_PATH = original_db_path
+
+def _add(service, n):
+    with service.batch():
+        for i in range(n):
+            service.add_transaction(Transaction(amount=i + 1, transaction_type="EXPENSE",
+                                                description=f"午餐{i}", tags=["餐饮"]))
+
+def test_gzip_ledger_round_trip_and_auto_detect(db_path, monkeypatch):
+    monkeypatch.setattr(Config, "DATA_FORMAT", "gzip")
+    _add(TransactionService(), 50)
+    assert compress.detect(db_path) == compress.GZIP
+    with gzip.open(db_path, 'rt', encoding='utf-8') as f:
+        assert len(json.load(f)) == 50
+    assert durable.recover(db_path) is False
+
+    # 改回 json 后照常加载压缩文件，下次保存改为明文
+    monkeypatch.setattr(Config, "DATA_FORMAT", "json")
+    service = TransactionService()
+    transactions = service.get_all_transactions()
+    assert len(transactions) == 50 and transactions[0].description == "午餐0"
+    service.delete_transaction(transactions[0].transaction_id)
+    assert compress.detect(db_path) is None
+    assert len(TransactionService().get_all_transactions()) == 49
+
+def test_truncated_gzip_ledger_keeps_readable_records(db_path, monkeypatch):
+    monkeypatch.setattr(Config, "DATA_FORMAT", "gzip")
+    _add(TransactionService(), 2000)
+    os.remove(durable.manifest_path(db_path))  # 没有清单时无法从上一代恢复，只能尽量读取
+    with open(db_path, 'r+b') as f:
+        f.truncate(os.path.getsize(db_path) // 2)
+
+    rows, bad = parallel_load.load_rows(db_path)
+    assert 0 < len(rows) < 2000 and bad
+    assert len(TransactionService().get_all_transactions()) == len(rows)
+
+def test_zstd_falls_back_to_gzip_without_zstandard(db_path, monkeypatch):
+    monkeypatch.setattr(Config, "DATA_FORMAT", "zstd")
+    monkeypatch.setattr(compress, "_zstd", lambda: None)
+    assert compress.configured() == compress.GZIP
+    _add(TransactionService(), 3)
+    assert compress.detect(db_path) == compress.GZIP
+
+def test_zstd_round_trip(db_path, monkeypatch):
+    pytest.importorskip("zstandard")
+    monkeypatch.setattr(Config, "DATA_FORMAT", "zstd")
+    _add(TransactionService(), 20)
+    assert compress.detect(db_path) == compress.ZSTD
+    assert len(TransactionService().get_all_transactions()) == 20
+
+def test_compressed_partitions(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "DATA_FORMAT", "gzip")
+    monkeypatch.setattr(Config, "PARTITION_BY", "month")
+    service = TransactionService()
+    _add(service, 10)
+    partitions = [p for p in (tmp_path / "compressed_ledger.partitions").iterdir() if p.name != "manifest.json"]
+    assert partitions and all(compress.detect(str(p)) == compress.GZIP for p in partitions)
+    assert len(TransactionService().get_all_transactions()) == 10
+
+def test_backup_restores_compressed_ledger(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "DATA_FORMAT", "gzip")
+    _add(TransactionService(), 5)
+    store = BackupStore(str(tmp_path / "backups"), db_path)
+    store.backup()
+    with open(db_path, 'wb') as f:
+        f.write(b"broken")
+    store.restore()
+    assert compress.detect(db_path) == compress.GZIP
+    assert len(TransactionService().get_all_transactions()) == 5
@@ -0,0 +1,37 @@
+from datetime import datetime
+from ledger.models.transaction import Transaction
+
+def test_edit_dialog_emits_a_copy_with_all_fields(qapp):
+    from PyQt5.QtWidgets import QWidget
+    from ledger.ui.dialogs import AddTransactionDialog
+    parent = QWidget()
+    parent.resize(900, 700)
+    original = Transaction(amount=12.5, transaction_type="EXPENSE", description="午饭",
+                           date=datetime(2024, 3, 1, 12, 30), tags=["餐饮"], auto_labeled=True)
+    dialog = AddTransactionDialog(parent, original)
+    saved = []
+    dialog.transaction_saved.connect(saved.append)
+    dialog.description_edit.setPlainText("晚饭")
+    dialog.save_transaction()
+
+    edited = saved[0]
+    assert edited is not original and original.description == "午饭"
+    assert edited.transaction_id == original.transaction_id
+    assert edited.description == "晚饭"
+    assert edited.date == original.date  # 日期未改时保留时间
+    assert edited.auto_labeled and edited.tags == ["餐饮"]
+
+def test_edit_dialog_drops_the_time_when_the_date_changes(qapp):
+    from PyQt5.QtCore import QDate
+    from PyQt5.QtWidgets import QWidget
+    from ledger.ui.dialogs import AddTransactionDialog
+    parent = QWidget()
+    parent.resize(900, 700)
+    original = Transaction(amount=12.5, transaction_type="EXPENSE", description="午饭",
+                           date=datetime(2024, 3, 1, 12, 30), tags=["餐饮"])
+    dialog = AddTransactionDialog(parent, original)
+    saved = []
+    dialog.transaction_saved.connect(saved.append)
+    dialog.date_edit.setDate(QDate(2024, 3, 2))
+    dialog.save_transaction()
+    assert saved[0].date == datetime(2024, 3, 2)
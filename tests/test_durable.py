@@ -0,0 +1,103 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+import pytest
+from ledger.config.settings import Config
+from ledger.models.transaction import Transaction
+from ledger.services import durable
+from ledger.services.transaction_service import TransactionService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SNAPSHOT_CACHE", False)
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "durable_ledger.json")
+    yield Config.DATABASE_PATH
+    Config.DATABASE_PATH = original_db_path
+
+def _add(service, n, description="交易"):
+    with service.batch():
+        for i in range(n):
+            service.add_transaction(Transaction(amount=i + 1, transaction_type="EXPENSE", description=f"{description}{i}"))
+
+def test_save_records_generations_in_manifest(db_path):
+    service = TransactionService()
+    _add(service, 3)
+    _add(service, 2)
+    manifest = durable.read_manifest(db_path)
+    assert manifest["generation"] == 2
+    assert manifest["current"]["sha1"] == durable._digest(db_path)
+    assert manifest["previous"]["sha1"] == durable._digest(db_path + durable.PREVIOUS_SUFFIX)
+    with open(db_path + durable.PREVIOUS_SUFFIX, encoding='utf-8') as f:
+        assert len(json.load(f)) == 3
+    assert not os.path.exists(db_path + ".tmp")
+    assert not durable.recover(db_path)
+
+def test_every_rename_is_followed_by_a_directory_fsync(db_path, monkeypatch):
+    calls = []
+    rename = os.replace
+    monkeypatch.setattr(durable.os, "replace", lambda src, dst: (calls.append(("replace", dst)), rename(src, dst)))
+    monkeypatch.setattr(durable, "fsync_dir", lambda directory: calls.append(("fsync_dir", directory)))
+    _add(TransactionService(), 1)
+    directory = os.path.dirname(db_path)
+    assert calls == [("replace", durable.manifest_path(db_path)), ("fsync_dir", directory),
+                     ("replace", db_path), ("fsync_dir", directory)]
+
+def test_corrupt_ledger_restores_previous_generation(db_path):
+    service = TransactionService()
+    _add(service, 3)
+    _add(service, 2)
+    with open(db_path, 'r+b') as f:  # 模拟旧式写入中断：文件被截断
+        f.truncate(os.path.getsize(db_path) // 2)
+
+    assert len(TransactionService().get_all_transactions()) == 3
+    assert os.path.exists(db_path + durable.CORRUPT_SUFFIX)
+    assert durable.read_manifest(db_path)["current"]["sha1"] == durable._digest(db_path)
+
+def test_save_interrupted_before_rename_is_rolled_forward(db_path):
+    service = TransactionService()
+    _add(service, 3)
+    _add(service, 2)
+    # 清单已指向新一代、临时文件已写好，但还没有改名
+    shutil.copy2(db_path, db_path + ".tmp")
+    shutil.copy2(db_path + durable.PREVIOUS_SUFFIX, db_path)
+    assert durable.recover(db_path)
+    assert len(TransactionService().get_all_transactions()) == 5
+    assert not os.path.exists(db_path + ".tmp")
+
+_WRITER = """
+from ledger.models.transaction import Transaction
+from ledger.services.transaction_service import TransactionService
+service = TransactionService()
+print(len(service.get_all_transactions()), flush=True)
+while True:
+    with service.batch():
+        for i in range(50):
+            service.add_transaction(Transaction(amount=i, transaction_type="EXPENSE", description="交易" * 20))
+"""
+
+def test_killed_during_saves_always_leaves_a_complete_generation(db_path):
+    env = dict(os.environ, DATABASE_PATH=db_path, SNAPSHOT_CACHE="false", WRITE_BEHIND_MS="0")
+    rng = random.Random(46)
+    last = 0
+    for _ in range(6):
+        writer = subprocess.Popen([sys.executable, "-c", _WRITER], cwd=ROOT, env=env,
+                                  stdout=subprocess.PIPE, text=True)
+        assert int(writer.stdout.readline()) == last  # 子进程读到的是上次留下的完整一代
+        time.sleep(rng.uniform(0.05, 0.4))
+        writer.kill()
+        writer.wait()
+        writer.stdout.close()
+
+        count = len(TransactionService().get_all_transactions())
+        assert count % 50 == 0 and count >= last
+        last = count
+    assert last > 0
+    assert not os.path.exists(db_path + durable.CORRUPT_SUFFIX)
+    assert not os.path.exists(db_path + ".quarantine.jsonl")
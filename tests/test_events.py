@@ -0,0 +1,161 @@
+import random
+import threading
+import pytest
+from datetime import datetime, time, timedelta
+from ledger.config.settings import Config
+from ledger.models.transaction import Transaction
+from ledger.services import events
+from ledger.services.analytics_service import AnalyticsService
+from ledger.services.transaction_service import TransactionService
+
+@pytest.fixture
+def db_path(tmp_path):
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "events_ledger.json")
+    yield Config.DATABASE_PATH
+    Config.DATABASE_PATH = original_db_path
+
+def _tx(i, day=0):
+    return Transaction(amount=i + 1, transaction_type="INCOME" if i % 3 == 0 else "EXPENSE", description=f"交易{i}",
+                       date=datetime(2024, 1, 1) + timedelta(days=day), tags=[["餐饮"], ["出行"], []][i % 3])
+
+def test_mutations_publish_typed_events(db_path):
+    service = TransactionService()
+    received = []
+    unsubscribe = service.events.subscribe(received.append)
+    t = _tx(1)
+    service.add_transaction(t)
+    service.update_transaction(t.transaction_id, amount=99.0, description="交易1")  # description 未变
+    service.update_transaction(t.transaction_id, amount=99.0)  # 无变化：不发布
+    service.delete_transaction(t.transaction_id)
+
+    added, updated, deleted = received
+    assert added == events.TransactionAdded(t)
+    assert (updated.old.amount, updated.new.amount, updated.changes) == (2, 99.0, ("amount",))
+    assert updated.new is t and deleted.transaction is t
+    unsubscribe()
+    service.add_transaction(_tx(2))
+    assert len(received) == 3
+
+def test_batch_commit_summarizes_events_and_bad_handlers_are_isolated(db_path):
+    service = TransactionService()
+    committed, changes = [], []
+    service.events.subscribe(lambda e: 1 / 0)
+    service.events.subscribe(committed.append, events.BatchCommitted)
+    service.events.subscribe(changes.append, *events.CHANGE_EVENTS)
+    with service.batch():
+        for i in range(3):
+            service.add_transaction(_tx(i))
+        assert not committed
+    assert len(service.get_all_transactions()) == 3
+    assert [len(c.events) for c in committed] == [3]
+    assert list(events.expand(committed[0])) == changes
+
+def test_analytics_aggregates_follow_changes(db_path):
+    rng = random.Random(7)
+    service = TransactionService()
+    with service.batch():
+        for i in range(60):
+            service.add_transaction(_tx(i, rng.randrange(90)))
+    analytics = AnalyticsService(service)
+    start, end = datetime(2024, 1, 10), datetime.combine(datetime(2024, 2, 20), time.max)
+    analytics.build_report(start, end, None)
+
+    def mutate():
+        for step in range(200):
+            ids = [t.transaction_id for t in service.get_all_transactions()]
+            op = rng.random()
+            if op < 0.4:
+                service.add_transaction(_tx(rng.randrange(100), rng.randrange(90)))
+            elif op < 0.7:
+                service.update_transaction(rng.choice(ids), amount=float(rng.randrange(1, 50)),
+                                           date=datetime(2024, 1, 1) + timedelta(days=rng.randrange(90)),
+                                           tags=rng.choice([["餐饮"], ["购物", "出行"], []]))
+            else:
+                service.delete_transaction(rng.choice(ids))
+    worker = threading.Thread(target=mutate)
+    worker.start()
+    worker.join()
+
+    for ttype in (None, "INCOME", "EXPENSE"):
+        report = analytics.build_report(start, end, ttype)
+        items = [t for t in service.get_all_transactions()
+                 if start <= t.date <= end and (not ttype or t.transaction_type == ttype)]
+        assert report.totals == pytest.approx(analytics.compute_totals(items))
+        assert report.monthly == pytest.approx(analytics.compute_monthly_summary(items))
+        expected = analytics.compute_tag_summary(items)
+        assert {(s.label, s.count) for s in report.tags} == {(s.label, s.count) for s in expected}
+        assert sorted(s.amount for s in report.tags) == pytest.approx(sorted(s.amount for s in expected))
+
+    service.set_loaded_transactions([_tx(0, 20)])  # 整体替换：汇总丢弃，下次重建
+    assert analytics._daily is None
+    assert analytics.build_report(start, end, None).totals["count"] == len(
+        [t for t in service.get_all_transactions() if start <= t.date <= end])
+
+def test_dashboard_applies_changes_from_any_thread(qapp, db_path):
+    from PyQt5.QtCore import QDate
+    from ledger.ui.main_window import DashboardInterface
+
+    service = TransactionService()
+    dashboard = DashboardInterface(service)
+    dashboard.start_date.setDate(QDate(2024, 1, 1))
+    dashboard.end_date.setDate(QDate(2024, 12, 31))
+    dashboard.load_transactions()
+    model = dashboard.table.table_model
+
+    rows = [_tx(i, i) for i in range(6)]
+    worker = threading.Thread(target=lambda: [service.add_transaction(t) for t in rows])
+    worker.start()
+    worker.join()
+    assert model.rowCount() == 0  # 事件排队到界面线程处理
+    qapp.processEvents()
+    assert model.rowCount() == 6
+    income = sum(t.amount for t in rows if t.transaction_type == "INCOME")
+    assert dashboard.income_card.value_label.text() == f"¥{income:,.2f}"
+
+    repainted = []
+    model.dataChanged.connect(lambda first, last: repainted.append((first.row(), last.row())))
+    service.update_transaction(rows[1].transaction_id, amount=500.0)
+    service.delete_transaction(rows[0].transaction_id)
+    qapp.processEvents()
+    assert [model.transaction_at(i).transaction_id for i in range(5)] == [t.transaction_id for t in rows[1:]]
+    assert repainted == [(0, 0)]
+    expense = sum(t.amount for t in rows[1:] if t.transaction_type == "EXPENSE")
+    assert dashboard.expense_card.value_label.text() == f"¥{expense:,.2f}"
+    assert dashboard.search.source == list(service.get_all_transactions())
+
+def test_lazy_dashboard_shows_rows_without_hydrating_them(qapp, db_path, monkeypatch):
+    from unittest.mock import patch
+    from PyQt5.QtCore import QDate
+    from ledger.services import snapshot
+    from ledger.ui.main_window import DashboardInterface
+
+    monkeypatch.setattr(Config, "LAZY_ROWS", True)
+    rows = [_tx(i, i) for i in range(30)]
+    seed = TransactionService()
+    with seed.batch():
+        for t in rows:
+            seed.add_transaction(t)
+
+    service = TransactionService()
+    dashboard = DashboardInterface(service)
+    dashboard.start_date.setDate(QDate(2024, 1, 1))
+    dashboard.end_date.setDate(QDate(2024, 12, 31))
+    model = dashboard.table.table_model
+    with patch("ledger.services.snapshot.row_to_transaction", wraps=snapshot.row_to_transaction) as build:
+        dashboard.load_transactions()
+        assert model.rowCount() == 30
+        assert model.data(model.index(2, 3)) == "交易2"
+        assert build.call_count == 0
+        assert model.transaction_at(2).transaction_id == rows[2].transaction_id
+        assert build.call_count == 1  # 只为编辑/删除的行构建对象
+    income = sum(t.amount for t in rows if t.transaction_type == "INCOME")
+    assert dashboard.income_card.value_label.text() == f"¥{income:,.2f}"
+
+    service.update_transaction(rows[2].transaction_id, description="晚饭")
+    service.delete_transaction(rows[0].transaction_id)
+    qapp.processEvents()
+    assert model.rowCount() == 29
+    assert model.data(model.index(1, 3)) == "晚饭"
+    expense = sum(t.amount for t in rows[1:] if t.transaction_type == "EXPENSE")
+    assert dashboard.expense_card.value_label.text() == f"¥{expense:,.2f}"
@@ -0,0 +1,71 @@
+import pytest
+from unittest.mock import patch
+from ledger.devtools.fake_openai import FakeOpenAIServer, count_tokens
+from ledger.services.ai_service import AICommandService
+from ledger.services.tagging_service import TaggingService
+from ledger.services.transaction_service import TransactionService
+from ledger.services.metrics import registry
+from ledger.config.settings import Config
+
+@pytest.fixture
+def fake_ai(tmp_path):
+    server = FakeOpenAIServer(seed=1).start()
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "fake_ai_ledger.json")
+    registry.reset()
+    with patch.multiple(Config, AI_ENABLED=True, OPENAI_BASE_URL=server.base_url,
+                        OPENAI_API_KEY="test", OPENAI_MODEL="fake"):
+        yield server
+    Config.DATABASE_PATH = original_db_path
+    registry.reset()
+    server.stop()
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("午饭") == 2
+    assert count_tokens("abcd") == 1
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_parse_through_fake_server(fake_ai, stream):
+    with patch.object(Config, "AI_STREAM", stream):
+        ai = AICommandService(TransactionService())
+        ops = ai.parse("3月2日 午饭 28元\n和朋友看电影 80")
+    assert [op.op_type for op in ops] == ["ADD", "ADD"]
+    assert ops[0].amount == 28.0
+    assert ops[1].amount == 80.0
+    assert fake_ai.stats["requests"] == 1
+    assert fake_ai.stats["streams"] == (1 if stream else 0)
+    # usage 从服务端 token 计数回传到埋点
+    assert registry.histogram("llm.command.prompt_tokens").summary()["max"] == fake_ai.stats["prompt_tokens"]
+    if stream:
+        assert registry.histogram("llm.command.first_token_ms").count == 1
+        assert registry.histogram("llm.command.connect_ms").count == 1
+    else:
+        assert registry.histogram("llm.command.connect_ms") is None
+
+def test_tagging_with_llm_through_fake_server(fake_ai):
+    with patch.object(Config, "AI_AUTO_TAG_WITH_LLM", True):
+        tags = TaggingService().suggest_tags("周末去健身房")
+    assert "健康" in tags
+    assert fake_ai.stats["requests"] == 1
+
+def test_error_injection_is_retried(fake_ai):
+    fake_ai.error_rate = 1.0
+    with patch("ledger.services.llm_client.time.sleep"):
+        ai = AICommandService(TransactionService())
+        with pytest.raises(Exception):
+            ai.parse("随便记一笔 10")
+    assert fake_ai.stats["requests"] == Config.AI_MAX_RETRIES + 1
+    assert registry.counter("llm.command.retries") == Config.AI_MAX_RETRIES
+
+def test_stream_falls_back_when_stream_options_rejected(fake_ai):
+    fake_ai.reject_stream_options = True
+    with patch.object(Config, "AI_STREAM", True), \
+            patch("ledger.services.llm_client._stream_options_supported", True):
+        ai = AICommandService(TransactionService())
+        assert [op.op_type for op in ai.parse("午饭 28元")] == ["ADD"]
+        assert [op.op_type for op in ai.parse("晚饭 30元")] == ["ADD"]
+    # 第一次被拒绝后去掉 stream_options 重发，之后不再发送
+    assert fake_ai.stats["requests"] == 3
+    assert fake_ai.stats["streams"] == 2
+    assert registry.counter("llm.command.errors") == 0
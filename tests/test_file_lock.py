@@ -0,0 +1,155 @@
+import os
+import subprocess
+import sys
+import time
+import pytest
+from datetime import datetime
+from ledger.config.settings import Config
+from ledger.models.transaction import Transaction
+from ledger.services import events, file_lock
+from ledger.services.file_watcher import ExternalChangeWatcher
+from ledger.services.transaction_service import TransactionService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "FILE_LOCKING", True)
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "shared_ledger.json")
+    yield Config.DATABASE_PATH
+    Config.DATABASE_PATH = original_db_path
+
+def _tx(i, description="交易"):
+    return Transaction(amount=i + 1, transaction_type="EXPENSE", description=f"{description}{i}")
+
+def _stored(db_path):
+    return {t.transaction_id: t for t in TransactionService.read_transactions(db_path)}
+
+def test_two_services_on_one_file_keep_each_others_writes(db_path):
+    a, b = TransactionService(), TransactionService()
+    first, second = _tx(0, "甲"), _tx(0, "乙")
+    a.add_transaction(first)
+    b.add_transaction(second)  # 保存前合并 a 已写入的交易
+    a.update_transaction(first.transaction_id, amount=50.0)
+    b.delete_transaction(second.transaction_id)
+    a.add_transaction(_tx(1, "甲"))
+
+    stored = _stored(db_path)
+    assert len(stored) == 2 and second.transaction_id not in stored
+    assert stored[first.transaction_id].amount == 50.0
+    assert os.path.exists(file_lock.lock_path(db_path))
+
+@pytest.mark.parametrize("layout", ["columnar", "partitioned"])
+def test_two_services_keep_each_others_writes_in_other_layouts(db_path, monkeypatch, layout):
+    if layout == "columnar":
+        monkeypatch.setattr(Config, "DATA_FORMAT", "columnar")
+    else:
+        monkeypatch.setattr(Config, "PARTITION_BY", "month")
+
+    def tx(name, month):
+        return Transaction(amount=1, transaction_type="EXPENSE", description=name, date=datetime(2024, month, 3))
+
+    a = TransactionService()
+    a1 = tx("a1", 2)
+    a.add_transaction(a1)
+    b = TransactionService()
+    assert len(b.get_all_transactions()) == 1
+    b.add_transaction(tx("b1", 2))
+    b.add_transaction(tx("b2", 4))  # 分区布局下由 b 新建的分区
+    a.add_transaction(tx("a2", 4))
+    a.update_transaction(a1.transaction_id, description="a1'")
+
+    assert sorted(t.description for t in TransactionService().get_all_transactions()) == ["a1'", "a2", "b1", "b2"]
+    assert b.sync_external() == 2  # a2 新增、a1 修改
+    assert sorted(t.description for t in b.get_all_transactions()) == ["a1'", "a2", "b1", "b2"]
+    assert b.sync_external() == 0
+
+def test_sync_external_applies_only_changed_records(db_path):
+    local, other = TransactionService(), TransactionService()
+    with other.batch():
+        for i in range(5):
+            other.add_transaction(_tx(i))
+    assert local.sync_external() == 5
+    kept = local.get_transaction(other.transactions[0].transaction_id)
+
+    received = []
+    local.events.subscribe(received.append)
+    other.update_transaction(other.transactions[1].transaction_id, description="改过", tags=["出行"])
+    other.delete_transaction(other.transactions[2].transaction_id)
+    other.add_transaction(_tx(9))
+    assert local.sync_external() == 3
+    assert local.sync_external() == 0  # 文件未再变化：只做一次 stat
+
+    updated, added, deleted = [e for e in received if not isinstance(e, events.BatchCommitted)]
+    assert isinstance(added, events.TransactionAdded) and added.transaction.description == "交易9"
+    assert updated.changes == ("description", "tags") and updated.old.description == "交易1"
+    assert updated.new is local.get_transaction(updated.new.transaction_id)  # 就地更新
+    assert isinstance(deleted, events.TransactionDeleted)
+    assert isinstance(received[-1], events.BatchCommitted) and len(received[-1].events) == 3
+    assert local.get_transaction(kept.transaction_id) is kept
+    assert [t.transaction_id for t in local.transactions] == [t.transaction_id for t in other.transactions]
+
+def test_unsaved_local_changes_win_over_external(db_path):
+    shared = _tx(0)
+    local = TransactionService()
+    local.add_transaction(shared)
+    other = TransactionService()
+    local.set_save_handler(lambda urgent=False: None)  # 修改只留在内存中
+    local.update_transaction(shared.transaction_id, amount=7.0)
+    pending = _tx(1, "本地")
+    local.add_transaction(pending)
+    other.update_transaction(shared.transaction_id, amount=99.0, description="外部")
+    other.add_transaction(_tx(2, "外部"))
+
+    assert local.sync_external() == 1  # 只合并外部新增；shared 有本地修改
+    assert local.get_transaction(shared.transaction_id).amount == 7.0
+    local.set_save_handler(None)
+    assert local.flush() == 3
+    stored = _stored(db_path)
+    assert stored[shared.transaction_id].amount == 7.0 and pending.transaction_id in stored
+
+def test_lock_is_reentrant_and_refuses_upgrade(db_path):
+    with file_lock.locked(db_path, exclusive=True):
+        with file_lock.locked(db_path):
+            pass
+    with file_lock.locked(db_path):
+        with pytest.raises(RuntimeError):
+            with file_lock.locked(db_path, exclusive=True):
+                pass
+
+_WRITER = """
+import sys
+from ledger.models.transaction import Transaction
+from ledger.services.transaction_service import TransactionService
+service = TransactionService()
+for n in range(20):
+    with service.batch():
+        for i in range(5):
+            service.add_transaction(Transaction(amount=i, transaction_type="EXPENSE", description=sys.argv[1]))
+"""
+
+def test_concurrent_processes_do_not_lose_writes(db_path):
+    env = dict(os.environ, DATABASE_PATH=db_path, SNAPSHOT_CACHE="false", WRITE_BEHIND_MS="0", FILE_LOCKING="true")
+    writers = [subprocess.Popen([sys.executable, "-c", _WRITER, name], cwd=ROOT, env=env) for name in "甲乙丙"]
+    watcher = ExternalChangeWatcher(TransactionService(), interval_ms=20).start()
+    for writer in writers:
+        assert writer.wait(timeout=120) == 0
+    watcher.stop()
+    assert watcher.poll() >= 0
+
+    stored = TransactionService.read_transactions(db_path)
+    assert len(stored) == 300
+    assert {t.description for t in stored} == set("甲乙丙")
+    assert len(watcher.service.get_all_transactions()) == 300
+
+def test_exclusive_lock_blocks_other_process(db_path):
+    code = ("import sys\nfrom ledger.services import file_lock\n"
+            "with file_lock.locked(sys.argv[1]):\n    print('ok', flush=True)\n")
+    env = dict(os.environ, FILE_LOCKING="true")
+    with file_lock.locked(db_path, exclusive=True):
+        reader = subprocess.Popen([sys.executable, "-c", code, db_path], cwd=ROOT, env=env,
+                                  stdout=subprocess.PIPE, text=True)
+        time.sleep(0.5)
+        assert reader.poll() is None  # 仍在等待独占锁
+    assert reader.communicate(timeout=30)[0].strip() == "ok"
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _run(code, tmp_path):
+    data_dir = tmp_path / "data"
+    env = dict(os.environ, PYTHONPATH=ROOT,
+               DATABASE_PATH=str(data_dir / "transactions.json"),
+               BACKUP_PATH=str(tmp_path / "backups"),
+               LOG_FILE=str(tmp_path / "logs" / "ledger.log"),
+               AI_MODEL_PATH=str(tmp_path / "models"))
+    subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=tmp_path, env=env,
+                   check=True, capture_output=True)
+
+def test_headless_service_import_is_light(tmp_path):
+    code = ("import sys\n"
+            "from ledger.services import TransactionService\n"
+            "TransactionService()\n"
+            "heavy = [m for m in ('openai', 'PyQt5', 'ledger.services.ai_service',\n"
+            "                     'ledger.services.tagging_service') if m in sys.modules]\n"
+            "assert not heavy, heavy\n")
+    _run(code, tmp_path)
+    # 导入与读取均不创建目录
+    assert sorted(p.name for p in tmp_path.iterdir()) == []
+
+def test_lazy_exports_resolve(tmp_path):
+    code = ("import ledger.services as s\n"
+            "from ledger.services.ai_service import AICommandService\n"
+            "assert s.AICommandService is AICommandService\n"
+            "assert 'TaggingService' in dir(s)\n"
+            "try:\n"
+            "    s.Missing\n"
+            "except AttributeError:\n"
+            "    pass\n"
+            "else:\n"
+            "    raise SystemExit('expected AttributeError')\n")
+    _run(code, tmp_path)
+
+def test_first_save_creates_data_directory(tmp_path, monkeypatch):
+    from ledger.config.settings import Config
+    from ledger.models.transaction import Transaction
+    from ledger.services.transaction_service import TransactionService
+    path = tmp_path / "nested" / "transactions.json"
+    monkeypatch.setattr(Config, "DATABASE_PATH", str(path))
+    ts = TransactionService()
+    ts.add_transaction(Transaction(amount=1, transaction_type="EXPENSE", description="咖啡"))
+    assert path.exists()
+
+def test_module_entry_dispatches_only_subcommands():
+    import argparse
+    from ledger.cli import COMMANDS, build_parser, is_cli_invocation
+    sub = next(a for a in build_parser()._actions if isinstance(a, argparse._SubParsersAction))
+    assert set(COMMANDS) == set(sub.choices)
+    assert is_cli_invocation(["import-text", "notes.txt"])
+    assert is_cli_invocation(["--help"])
+    # Qt 参数与空参数启动图形界面
+    assert not is_cli_invocation(["-style", "fusion"])
+    assert not is_cli_invocation([])
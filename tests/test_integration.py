@@ -58,3 +58,19 @@ def test_analytics_integration(temp_db):
     # 餐饮和购物各 1 笔支出，工资是收入不计入金额但计入笔数
     assert any(s.label == "餐饮" and s.amount == 200.0 for s in tag_summary)
     assert any(s.label == "购物" and s.amount == 300.0 for s in tag_summary)
+
+def test_analytics_build_report_matches_filters(temp_db):
+    service = TransactionService()
+    analytics = AnalyticsService(service)
+    service.add_transaction(Transaction(amount=1000.0, tags=["工资"], description="月薪", transaction_type="INCOME", date=datetime(2023, 1, 1)))
+    service.add_transaction(Transaction(amount=200.0, tags=["餐饮"], description="晚餐", transaction_type="EXPENSE", date=datetime(2023, 1, 2)))
+    service.add_transaction(Transaction(amount=300.0, tags=["购物"], description="买衣服", transaction_type="EXPENSE", date=datetime(2023, 2, 3)))
+
+    report = analytics.build_report(datetime(2023, 1, 1), datetime(2023, 1, 31, 23, 59), None)
+    assert report.totals == {"income": 1000.0, "expense": 200.0, "net": 800.0, "count": 2}
+    assert [m.month for m in report.monthly] == ["2023-01"]
+
+    expense = analytics.build_report(None, None, "EXPENSE")
+    items = analytics.filter_transactions(None, None, "EXPENSE")
+    assert expense.tags == analytics.compute_tag_summary(items)
+    assert expense.monthly == analytics.compute_monthly_summary(items)
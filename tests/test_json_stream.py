@@ -0,0 +1,46 @@
+import io
+import json
+import tracemalloc
+import pytest
+from datetime import datetime, timedelta
+from ledger.config.settings import Config
+from ledger.services.json_stream import iter_array
+from ledger.services.transaction_service import TransactionService
+
+CASES = [
+    "[]",
+    "  [ ]  ",
+    '[1, 22, 333, -4.5e3, true, false, null]',
+    '[{"a": "x]y,z", "b": [1, {"c": "\\"}"}]}, "尾巴", 12345678901234567890]',
+    json.dumps([{"id": i, "desc": "午饭" * (i % 7), "tags": ["餐饮"] * (i % 3)} for i in range(200)], indent=2),
+]
+
+@pytest.mark.parametrize("text", CASES)
+@pytest.mark.parametrize("buffer_size", [1, 3, 64, 1 << 16])
+def test_matches_json_loads(text, buffer_size):
+    assert list(iter_array(io.StringIO(text), buffer_size=buffer_size)) == json.loads(text)
+
+@pytest.mark.parametrize("text", ["", "{}", "[1 2]", "[1,", '[{"a": 1}] x', "[1,]"])
+def test_malformed_input_raises(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_array(io.StringIO(text), buffer_size=4))
+
+def test_peak_memory_stays_near_loaded_size(tmp_path, monkeypatch):
+    path = tmp_path / "big_ledger.json"
+    base = datetime(2020, 1, 1)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"transaction_id": f"{i:032x}", "amount": i + 0.5, "transaction_type": "EXPENSE",
+                    "date": (base + timedelta(minutes=i)).isoformat(), "description": f"午饭{i}",
+                    "is_recurring": False, "auto_labeled": False, "tags": ["餐饮"]} for i in range(20000)],
+                  f, indent=2, ensure_ascii=False)
+    monkeypatch.setattr(Config, "SNAPSHOT_CACHE", False)
+
+    tracemalloc.start()
+    try:
+        transactions = TransactionService.read_transactions(str(path))
+        steady, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(transactions) == 20000
+    # json.load 会同时持有全部字典与交易对象，峰值约为稳态的两倍以上
+    assert peak < steady * 1.2
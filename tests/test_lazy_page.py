@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+def test_page_is_built_on_first_show(qapp):
+    from PyQt5.QtWidgets import QLabel, QStackedWidget
+    from ledger.ui.lazy_page import LazyPage
+    built, created = [], []
+    def factory():
+        built.append(1)
+        return QLabel("统计")
+    stack = QStackedWidget()
+    stack.addWidget(QLabel("首页"))
+    lazy = LazyPage(factory)
+    lazy.created.connect(created.append)
+    stack.addWidget(lazy)
+    stack.show()
+    qapp.processEvents()
+    assert built == [] and lazy.page is None
+    stack.setCurrentWidget(lazy)
+    qapp.processEvents()
+    stack.setCurrentIndex(0)
+    stack.setCurrentWidget(lazy)
+    qapp.processEvents()
+    assert built == [1]
+    assert created == [lazy.page] and lazy.page.text() == "统计"
+
+def test_analytics_module_defers_qtchart_import(qapp):
+    code = ("import sys, ledger.ui.analytics_view as v; "
+            "assert 'PyQt5.QtChart' not in sys.modules; "
+            "assert v.HAS_QT_CHARTS is None")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    subprocess.run([sys.executable, "-c", code], cwd=root, env=env, check=True)
@@ -0,0 +1,75 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+from ledger.config.settings import Config
+from ledger.models.transaction import Transaction
+from ledger.services.lazy_rows import TransactionView
+from ledger.services.transaction_service import TransactionService
+
+@pytest.fixture
+def db_path(tmp_path):
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "lazy_ledger.json")
+    yield Config.DATABASE_PATH
+    Config.DATABASE_PATH = original_db_path
+
+@pytest.fixture
+def lazy(monkeypatch):
+    monkeypatch.setattr(Config, "LAZY_ROWS", True)
+    monkeypatch.setattr(Config, "LAZY_CACHE_SIZE", 5)
+
+def _seed(n):
+    service = TransactionService()
+    base = datetime(2024, 3, 1, 9)
+    with service.batch():
+        for i in range(n):
+            service.add_transaction(Transaction(amount=i + 1, transaction_type="INCOME" if i % 4 == 0 else "EXPENSE",
+                                                description=f"午饭{i}", date=base + timedelta(days=i), tags=["餐饮"]))
+    return service
+
+def test_view_is_read_only_and_unaffected_by_later_changes(db_path):
+    service = _seed(3)
+    view = service.get_all_transactions()
+    assert isinstance(view, TransactionView) and len(view) == 3
+    with pytest.raises(TypeError):
+        view[0] = None
+    service.delete_transaction(view[0].transaction_id)
+    service.add_transaction(Transaction(amount=9, transaction_type="EXPENSE", description="新增"))
+    assert [t.description for t in view] == ["午饭0", "午饭1", "午饭2"]
+    assert [t.description for t in service.get_all_transactions()] == ["午饭1", "午饭2", "新增"]
+
+def test_lazy_mode_hydrates_on_access_within_bounded_cache(db_path, lazy):
+    _seed(50)
+    service = TransactionService()
+    cache = service.transactions.cache
+    assert len(cache) == 0
+
+    assert len(service.search_transactions(description="午饭4")) == 11  # 午饭4、午饭40-49
+    assert len(cache) == 5
+    first = service.get_transaction(service.get_all_transactions()[7].transaction_id)
+    assert service.get_transaction(first.transaction_id) is first
+
+    summary = service.get_transaction_summary()
+    assert summary["total_income"] == sum(i + 1 for i in range(50) if i % 4 == 0)
+    assert summary["total_transactions"] == 50
+    assert len(cache) <= 5
+
+def test_lazy_updates_survive_eviction_and_save_like_eager_mode(db_path, lazy, monkeypatch):
+    _seed(20)
+    service = TransactionService()
+    tid = service.get_all_transactions()[3].transaction_id
+    old_view = service.get_all_transactions()
+    service.update_transaction(tid, description="改过", tags=["交通"])
+    for _ in service.get_all_transactions():  # 访问全部行，把刚修改的对象挤出 LRU
+        pass
+    assert tid not in service.transactions.cache._items
+    # 修改前取得的视图仍是修改前的内容，且不会把旧对象放进 LRU
+    assert old_view[3].description == "午饭3"
+    assert service.get_transaction(tid).description == "改过"
+    with open(db_path, encoding="utf-8") as f:
+        saved = json.load(f)
+
+    monkeypatch.setattr(Config, "LAZY_ROWS", False)
+    eager = TransactionService()
+    assert [t.to_dict() for t in eager.get_all_transactions()] == saved
+    assert eager.get_transaction(tid).tags == ["交通"]
@@ -0,0 +1,78 @@
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+from ledger.services import llm_client
+from ledger.services.llm_client import chat_completion, timed_parse
+from ledger.services.metrics import Histogram, MetricsRegistry, registry, format_snapshot
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+def _fake_client(content="ok", prompt_tokens=12, completion_tokens=3):
+    client = MagicMock()
+    resp = MagicMock()
+    resp.choices = [MagicMock(message=MagicMock(content=content))]
+    resp.usage = MagicMock(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    client.chat.completions.create.return_value = resp
+    return client
+
+def test_histogram_percentiles():
+    h = Histogram()
+    for v in range(1, 101):
+        h.observe(v)
+    s = h.summary()
+    assert s["count"] == 100
+    assert s["p50"] == 50
+    assert s["p90"] == 90
+    assert s["p99"] == 99
+    assert s["max"] == 100
+
+def test_chat_completion_records_latency_and_tokens():
+    resp = chat_completion(_fake_client(), "test", [{"role": "user", "content": "hi"}], stream=False)
+    assert resp.content == "ok"
+    assert registry.counter("llm.test.calls") == 1
+    assert registry.histogram("llm.test.total_ms").count == 1
+    assert registry.histogram("llm.test.connect_ms") is None  # 非流式：响应已全部收到，不单独计连接耗时
+    assert registry.histogram("llm.test.prompt_tokens").summary()["max"] == 12
+    assert registry.histogram("llm.test.completion_tokens").summary()["max"] == 3
+
+def test_chat_completion_counts_retries():
+    client = _fake_client()
+    ok = client.chat.completions.create.return_value
+    client.chat.completions.create.side_effect = [ConnectionError("down"), ok]
+    with patch.object(llm_client, "_is_retryable", return_value=True), \
+         patch.object(llm_client.time, "sleep"):
+        resp = chat_completion(client, "test", [], max_retries=2, stream=False)
+    assert resp.retries == 1
+    assert registry.counter("llm.test.retries") == 1
+    assert registry.counter("llm.test.errors") == 1
+    assert registry.counter("llm.test.error.ConnectionError") == 1
+
+def test_chat_completion_gives_up_on_non_retryable():
+    client = MagicMock()
+    client.chat.completions.create.side_effect = ValueError("bad request")
+    with pytest.raises(ValueError):
+        chat_completion(client, "test", [], stream=False)
+    assert registry.counter("llm.test.errors") == 1
+    assert registry.counter("llm.test.retries") == 0
+
+def test_timed_parse_counts_failures():
+    with pytest.raises(json.JSONDecodeError):
+        with timed_parse("test"):
+            json.loads("not json")
+    assert registry.counter("llm.test.parse_failures") == 1
+    assert registry.histogram("llm.test.parse_ms").count == 1
+
+def test_dump_and_format(tmp_path):
+    reg = MetricsRegistry()
+    reg.incr("llm.x.calls")
+    reg.observe("llm.x.total_ms", 120.0)
+    path = tmp_path / "metrics.json"
+    reg.dump(str(path))
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["counters"]["llm.x.calls"] == 1
+    assert data["histograms"]["llm.x.total_ms"]["p50"] == 120.0
+    assert "llm.x.total_ms" in format_snapshot(data)
@@ -0,0 +1,85 @@
+import json
+import os
+import pytest
+from ledger.config.settings import Config
+from ledger.services import parallel_load, snapshot
+from ledger.services.transaction_service import TransactionService
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "parallel_ledger.json")
+    monkeypatch.setattr(Config, "SNAPSHOT_CACHE", False)
+    yield Config.DATABASE_PATH
+    Config.DATABASE_PATH = original_db_path
+
+def _record(i):
+    return {"transaction_id": f"{i:032x}", "amount": i + 0.5, "transaction_type": "EXPENSE",
+            "date": f"2024-01-{i % 28 + 1:02d}T12:00:00", "description": f"午饭{i}, {{备注}}",
+            "is_recurring": False, "auto_labeled": bool(i % 2), "tags": ["餐饮"]}
+
+def _write(path, records, indent=None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=indent)
+
+def _quarantined(path):
+    with open(parallel_load.quarantine_path(path), encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_parse_text_matches_json_load(db_file, indent):
+    records = [_record(i) for i in range(30)]
+    _write(db_file, records, indent)
+    with open(db_file, encoding="utf-8") as f:
+        rows, bad = parallel_load.parse_text(f.read())
+    assert bad == []
+    assert [t.to_dict() for t in snapshot.from_rows(rows)] == records
+
+def test_bad_records_are_quarantined_and_rest_loads(db_file):
+    records = [_record(i) for i in range(5)]
+    text = json.dumps(records, ensure_ascii=False, indent=2)
+    # 第 2 条截断成非法 JSON，第 4 条金额类型错误
+    broken = json.dumps(records[1], ensure_ascii=False, indent=2)
+    text = text.replace(broken.replace("\n", "\n  "), '{"transaction_id": "x", "amount": ')
+    text = text.replace('"amount": 3.5', '"amount": "3.5"')
+    with open(db_file, "w", encoding="utf-8") as f:
+        f.write(text)
+
+    loaded = TransactionService.read_transactions(db_file)
+
+    assert [t.to_dict() for t in loaded] == [records[0], records[2], records[4]]
+    entries = _quarantined(db_file)
+    assert len(entries) == 2
+    assert entries[0]["error"].startswith("JSON 格式错误")
+    assert entries[1]["error"].startswith("字段无效")
+    assert json.loads(entries[1]["raw"])["amount"] == "3.5"
+
+    # 再次加载不会重复隔离同一条记录
+    TransactionService.read_transactions(db_file)
+    assert len(_quarantined(db_file)) == 2
+
+def test_non_array_file_still_loads_empty(db_file):
+    with open(db_file, "w", encoding="utf-8") as f:
+        f.write('{"transaction_id": "x"}')
+    assert TransactionService.read_transactions(db_file) == []
+    assert not os.path.exists(parallel_load.quarantine_path(db_file))
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_parallel_ranges_merge_in_file_order(db_file, monkeypatch, indent):
+    records = [_record(i) for i in range(400)]
+    records[123]["date"] = "不是日期"
+    _write(db_file, records, indent)
+    monkeypatch.setattr(parallel_load, "PARALLEL_MIN_BYTES", 0)
+
+    ranges = parallel_load.split_ranges(db_file, 4)
+    assert len(ranges) == 4
+    assert ranges[0][0] == 0 and ranges[-1][1] == os.path.getsize(db_file)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+    sequential_rows, sequential_bad = parallel_load.load_rows(db_file, workers=1)
+    rows, bad = parallel_load.load_rows(db_file, workers=2)
+    assert rows == sequential_rows and len(rows) == 399
+    assert [(b.offset, b.raw) for b in bad] == [(b.offset, b.raw) for b in sequential_bad]
+    with open(db_file, "rb") as f:
+        f.seek(bad[0].offset)
+        assert f.read(1) == b"{"
@@ -0,0 +1,136 @@
+import json
+import os
+import pytest
+from datetime import datetime
+from ledger.config.settings import Config
+from ledger.models.transaction import Transaction
+from ledger.services import partition_store
+from ledger.services.transaction_service import TransactionService
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "partitioned_ledger.json")
+    monkeypatch.setattr(Config, "PARTITION_BY", "month")
+    yield Config.DATABASE_PATH
+    Config.DATABASE_PATH = original_db_path
+
+def _transactions():
+    return [Transaction(amount=m * 10 + d, transaction_type="EXPENSE", description=f"{m}月{d}日",
+                        date=datetime(2023, m, d, 12), tags=["餐饮"])
+            for m in (1, 2, 3) for d in (1, 15)]
+
+def _partition_files(db_path):
+    directory = partition_store.partition_dir(db_path)
+    names = [name for name in os.listdir(directory) if name.endswith(".json") and name != "manifest.json"]
+    return {name: os.stat(os.path.join(directory, name)).st_mtime_ns for name in names}
+
+def _manifest(db_path):
+    with open(os.path.join(partition_store.partition_dir(db_path), "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def test_legacy_file_is_migrated_to_monthly_partitions(db_path):
+    expected = [t.to_dict() for t in _transactions()]
+    with open(db_path, "w", encoding="utf-8") as f:
+        json.dump(expected, f, ensure_ascii=False)
+
+    service = TransactionService()
+    assert [t.to_dict() for t in service.get_all_transactions()] == expected
+    assert not os.path.exists(db_path)
+    assert os.path.exists(db_path + partition_store.MIGRATED_SUFFIX)
+    manifest = _manifest(db_path)
+    assert manifest["granularity"] == "month"
+    assert {k: v["count"] for k, v in manifest["partitions"].items()} == {"2023-01": 2, "2023-02": 2, "2023-03": 2}
+    assert TransactionService.read_transactions(db_path)[0].to_dict() == expected[0]
+
+def test_save_rewrites_only_the_dirty_partition(db_path):
+    service = TransactionService()
+    with service.batch():
+        for t in _transactions():
+            service.add_transaction(t)
+    before = _partition_files(db_path)
+    assert sorted(before) == ["2023-01.json", "2023-02.json", "2023-03.json"]
+
+    fresh = TransactionService()
+    target = fresh.search_transactions(start_date=datetime(2023, 2, 1), end_date=datetime(2023, 2, 28))[0]
+    fresh.update_transaction(target.transaction_id, description="改过")
+    after = _partition_files(db_path)
+    assert after["2023-02.json"] != before["2023-02.json"]
+    assert after["2023-01.json"] == before["2023-01.json"]
+    assert after["2023-03.json"] == before["2023-03.json"]
+    assert "改过" in [t.description for t in TransactionService.read_transactions(db_path)]
+
+def test_date_range_query_loads_only_needed_partitions(db_path):
+    seed = TransactionService()
+    with seed.batch():
+        for t in _transactions():
+            seed.add_transaction(t)
+
+    service = TransactionService()
+    march = service.search_transactions(start_date=datetime(2023, 3, 1))
+    assert [t.description for t in march] == ["3月1日", "3月15日"]
+    assert service._store.loaded_keys == {"2023-03"}
+
+    # 新增交易只需要加载其所在月份
+    service.add_transaction(Transaction(amount=1, transaction_type="INCOME", description="新月份",
+                                        date=datetime(2023, 5, 2)))
+    assert service._store.loaded_keys == {"2023-03", "2023-05"}
+    assert len(service.get_all_transactions()) == 7
+
+def test_deleting_last_transaction_removes_partition(db_path):
+    service = TransactionService()
+    tid = service.add_transaction(Transaction(amount=1, transaction_type="INCOME", description="唯一",
+                                              date=datetime(2022, 7, 1)))
+    assert "2022-07" in _manifest(db_path)["partitions"]
+    service.delete_transaction(tid)
+    assert "2022-07" not in _manifest(db_path)["partitions"]
+    assert _partition_files(db_path) == {}
+
+def test_progressive_load_reads_newest_partition_first(db_path):
+    seed = TransactionService()
+    with seed.batch():
+        for t in _transactions():
+            seed.add_transaction(t)
+    steps = TransactionService.iter_read_transactions(db_path, chunk_size=1)
+    chunks = []
+    while True:
+        try:
+            chunks.append(next(steps))
+        except StopIteration as done:
+            result = done.value
+            break
+    assert [c[0].description for c in chunks] == ["3月15日", "3月1日", "2月15日", "2月1日", "1月15日", "1月1日"]
+    assert [t.to_dict() for t in result] == [t.to_dict() for t in seed.get_all_transactions()]
+
+def test_background_load_then_edit_rewrites_one_partition(db_path):
+    seed = TransactionService()
+    with seed.batch():
+        for t in _transactions():
+            seed.add_transaction(t)
+    before = _partition_files(db_path)
+
+    service = TransactionService(load=False)
+    service.set_loaded_transactions(TransactionService.read_transactions(db_path))
+    first = service.get_all_transactions()[0]
+    service.update_transaction(first.transaction_id, amount=999)
+    after = _partition_files(db_path)
+    assert [name for name in after if after[name] != before[name]] == ["2023-01.json"]
+
+def test_second_writer_keeps_partitions_added_by_the_first(db_path):
+    seed = TransactionService()
+    with seed.batch():
+        for t in _transactions()[2:]:
+            seed.add_transaction(t)
+    a, b = TransactionService(), TransactionService()
+    assert len(a.get_all_transactions()) == len(b.get_all_transactions()) == 4
+
+    b.add_transaction(Transaction(amount=4, transaction_type="EXPENSE", description="apr", date=datetime(2023, 4, 2)))
+    a.add_transaction(Transaction(amount=5, transaction_type="EXPENSE", description="may", date=datetime(2023, 5, 2)))
+    assert sorted(_manifest(db_path)["partitions"]) == ["2023-02", "2023-03", "2023-04", "2023-05"]
+    assert {"apr", "may"} <= {t.description for t in TransactionService().get_all_transactions()}
+
+    # 只删除本写入者清空、且仍在磁盘清单中的分区
+    b.delete_transaction(next(t for t in b.get_all_transactions() if t.description == "apr").transaction_id)
+    a.update_transaction(a.get_all_transactions()[0].transaction_id, description="改过")
+    assert sorted(_manifest(db_path)["partitions"]) == ["2023-02", "2023-03", "2023-05"]
+    assert sorted(_partition_files(db_path)) == ["2023-02.json", "2023-03.json", "2023-05.json"]
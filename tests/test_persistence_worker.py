@@ -0,0 +1,101 @@
+import json
+import pytest
+from unittest.mock import patch
+from ledger.models.transaction import Transaction
+from ledger.services.transaction_service import TransactionService
+from ledger.config.settings import Config
+
+@pytest.fixture
+def db_path(tmp_path):
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "io_ledger.json")
+    yield Config.DATABASE_PATH
+    Config.DATABASE_PATH = original_db_path
+
+def _tx(i):
+    return Transaction(amount=i + 1, transaction_type="EXPENSE", description=f"交易{i}")
+
+def test_saves_are_coalesced_off_thread(qapp, db_path):
+    from ledger.ui.io_worker import PersistenceWorker
+    service = TransactionService()
+    worker = PersistenceWorker(service).attach()
+    saved = []
+    worker.saved.connect(saved.append)
+    with patch.object(service, "flush", wraps=service.flush) as flush:
+        for i in range(20):
+            service.add_transaction(_tx(i))
+        assert service.dirty  # 调用方线程上没有写盘
+        worker.wait()
+    qapp.processEvents()
+    assert 1 <= worker.saves < 20
+    assert flush.call_count < 20
+    assert saved[-1] == 20
+    assert not service.dirty
+    with open(db_path, encoding='utf-8') as f:
+        assert len(json.load(f)) == 20
+
+def test_background_load_keeps_edits_made_before_it_finishes(qapp, db_path):
+    from ledger.ui.io_worker import PersistenceWorker
+    seed = TransactionService()
+    with seed.batch():
+        for i in range(5):
+            seed.add_transaction(_tx(i))
+
+    service = TransactionService(load=False)
+    worker = PersistenceWorker(service).attach()
+    loaded = []
+    worker.loaded.connect(loaded.append)
+    # 加载完成前的修改只留在内存中，不能覆盖原文件
+    service.add_transaction(_tx(99))
+    worker.load()
+    worker.wait()
+    qapp.processEvents()
+    assert len(loaded) == 1 and len(loaded[0]) == 5
+    with open(db_path, encoding='utf-8') as f:
+        assert len(json.load(f)) == 5
+
+    service.set_loaded_transactions(loaded[0])
+    worker.shutdown()
+    descriptions = [t.description for t in TransactionService().get_all_transactions()]
+    assert len(descriptions) == 6 and descriptions[-1] == "交易99"
+
+def test_lazy_load_hands_rows_to_the_service(qapp, db_path, monkeypatch):
+    from ledger.ui.io_worker import PersistenceWorker
+    monkeypatch.setattr(Config, "LAZY_ROWS", True)
+    seed = TransactionService()
+    with seed.batch():
+        for i in range(5):
+            seed.add_transaction(_tx(i))
+
+    service = TransactionService(load=False)
+    worker = PersistenceWorker(service).attach()
+    chunks, loaded = [], []
+    worker.chunk_loaded.connect(chunks.append)
+    worker.loaded.connect(loaded.append)
+    service.add_transaction(_tx(99))
+    with patch("ledger.services.snapshot.row_to_transaction") as build:
+        worker.load(chunk_size=2)
+        worker.wait()
+        qapp.processEvents()
+        assert chunks == [] and len(loaded) == 1
+        assert [row[4] for row in loaded[0]] == [f"交易{i}" for i in range(5)]
+        service.set_loaded_rows(loaded[0], worker.loaded_key)
+        assert build.call_count == 0  # 加载过程不构建交易对象
+    worker.shutdown()
+    descriptions = [t.description for t in TransactionService().get_all_transactions()]
+    assert len(descriptions) == 6 and descriptions[-1] == "交易99"
+
+def test_save_errors_are_signalled(qapp, db_path):
+    from ledger.ui.io_worker import PersistenceWorker
+    service = TransactionService()
+    worker = PersistenceWorker(service).attach()
+    errors = []
+    worker.save_failed.connect(errors.append)
+    with patch("ledger.services.transaction_service.json.dump", side_effect=OSError("disk full")):
+        service.add_transaction(_tx(0))
+        worker.wait()
+    qapp.processEvents()
+    assert errors == ["disk full"]
+    assert service.dirty  # 内存数据仍在，下次保存重试
+    worker.shutdown()
+    assert len(TransactionService().get_all_transactions()) == 1
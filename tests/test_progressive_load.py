@@ -0,0 +1,76 @@
+import os
+import pytest
+from datetime import datetime, timedelta
+from ledger.config.settings import Config
+from ledger.models.transaction import Transaction
+from ledger.services import snapshot
+from ledger.services.transaction_service import TransactionService
+
+@pytest.fixture
+def db_path(tmp_path):
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "progressive_ledger.json")
+    yield Config.DATABASE_PATH
+    Config.DATABASE_PATH = original_db_path
+
+def _seed(n, shuffle=False):
+    now = datetime.now().replace(microsecond=0)
+    offsets = [(i * 7) % n for i in range(n)] if shuffle else range(n)
+    seed = TransactionService()
+    with seed.batch():
+        for i, k in enumerate(offsets):
+            seed.add_transaction(Transaction(amount=i + 1, transaction_type="INCOME" if i % 5 == 0 else "EXPENSE",
+                                             description=f"交易{i}", date=now - timedelta(hours=n - k)))
+    return seed.get_all_transactions()
+
+def _drain(steps):
+    chunks = []
+    while True:
+        try:
+            chunks.append(next(steps))
+        except StopIteration as done:
+            return chunks, done.value
+
+@pytest.mark.parametrize("use_snapshot", [False, True])
+def test_chunks_arrive_newest_first_and_result_keeps_file_order(db_path, use_snapshot):
+    seeded = _seed(23, shuffle=True)
+    os.remove(snapshot.snapshot_path(db_path))
+    if use_snapshot:
+        TransactionService.read_transactions(db_path)
+        assert snapshot.wait_rebuild(5)
+    chunks, result = _drain(TransactionService.iter_read_transactions(db_path, chunk_size=5))
+    assert [len(c) for c in chunks] == [5, 5, 5, 5, 3]
+    dates = [t.date for c in chunks for t in c]
+    assert dates == sorted(dates, reverse=True)
+    assert [t.to_dict() for t in result] == [t.to_dict() for t in seeded]
+    # 结果中的对象就是各块中的对象
+    assert {id(t) for t in result} == {id(t) for c in chunks for t in c}
+
+def test_dashboard_fills_incrementally_and_gates_editing(qapp, db_path):
+    from ledger.ui.io_worker import PersistenceWorker
+    from ledger.ui.main_window import DashboardInterface
+
+    seeded = _seed(12)
+    service = TransactionService(load=False)
+    worker = PersistenceWorker(service).attach()
+    dashboard = DashboardInterface(service)
+    dashboard.begin_loading()
+    assert not dashboard.add_btn.isEnabled() and dashboard.income_card.value_label.text() == ""
+
+    seen = []
+    def on_chunk(chunk):
+        dashboard.append_loaded_chunk(chunk)
+        seen.append(dashboard.table.table_model.rowCount())
+    worker.chunk_loaded.connect(on_chunk)
+    worker.loaded.connect(lambda rows: (service.set_loaded_transactions(rows), dashboard.finish_loading()))
+    worker.load(chunk_size=5)
+    worker.wait()
+    qapp.processEvents()
+
+    assert seen == [5, 10, 12]
+    assert dashboard.add_btn.isEnabled() and not dashboard.loading
+    model = dashboard.table.table_model
+    assert [model.transaction_at(i).transaction_id for i in range(12)] == [t.transaction_id for t in seeded]
+    income = sum(t.amount for t in seeded if t.transaction_type == "INCOME")
+    assert dashboard.income_card.value_label.text() == f"¥{income:,.2f}"
+    worker.shutdown()
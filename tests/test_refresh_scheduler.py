@@ -0,0 +1,66 @@
+import threading
+import time
+
+def _pump(qapp, scheduler, seconds=0.5):
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    scheduler.wait()
+    qapp.processEvents()
+
+def test_burst_of_requests_runs_one_computation(qapp):
+    from ledger.ui.refresh_scheduler import RefreshScheduler
+    state = {"value": 0}
+    seen_threads = []
+
+    def compute(params):
+        seen_threads.append(threading.current_thread())
+        return params * 2
+
+    scheduler = RefreshScheduler(lambda: state["value"], compute, delay_ms=50)
+    results = []
+    scheduler.ready.connect(results.append)
+    for i in range(30):
+        state["value"] = i
+        scheduler.request()
+    _pump(qapp, scheduler)
+    assert scheduler.computed == 1
+    assert results == [58]  # 使用最后一次请求时的参数
+    assert seen_threads[0] is not threading.main_thread()
+
+def test_stale_results_are_dropped(qapp):
+    from ledger.ui.refresh_scheduler import RefreshScheduler
+    started, release = threading.Event(), threading.Event()
+
+    def compute(params):
+        if params == "slow":
+            started.set()
+            release.wait(2)
+        return params
+
+    params = iter(["slow", "queued", "latest"])
+    scheduler = RefreshScheduler(lambda: next(params), compute)
+    results = []
+    scheduler.ready.connect(results.append)
+    scheduler.request_now()  # 开始慢计算
+    assert started.wait(2)
+    scheduler.request_now()  # 排队，随后被更新的请求取代
+    scheduler.request_now()
+    release.set()
+    _pump(qapp, scheduler, 0.2)
+    assert results == ["latest"]
+    assert scheduler.computed == 2  # 排队中的过时计算被跳过
+
+def test_errors_are_reported(qapp):
+    from ledger.ui.refresh_scheduler import RefreshScheduler
+
+    def compute(_params):
+        raise ValueError("boom")
+
+    scheduler = RefreshScheduler(lambda: None, compute)
+    errors = []
+    scheduler.failed.connect(errors.append)
+    scheduler.request_now()
+    _pump(qapp, scheduler, 0.1)
+    assert errors == ["boom"]
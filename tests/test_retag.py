@@ -0,0 +1,58 @@
+import pytest
+from unittest.mock import patch
+from ledger.models.transaction import Transaction
+from ledger.services.retag import format_diff, retag_ledger
+from ledger.services.tagging_service import TaggingService
+from ledger.services.transaction_service import TransactionService
+from ledger.config.settings import Config
+
+@pytest.fixture
+def service(tmp_path):
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "retag_ledger.json")
+    svc = TransactionService()
+    with svc.batch():
+        for i in range(30):
+            svc.add_transaction(Transaction(amount=10 + i, transaction_type="EXPENSE",
+                                            description=f"地铁通勤{i}", tags=["旧标签"], auto_labeled=True))
+        svc.add_transaction(Transaction(amount=30, transaction_type="EXPENSE", description="外卖",
+                                        tags=["手动"]))
+        svc.add_transaction(Transaction(amount=5, transaction_type="EXPENSE", description="奶茶"))
+    with patch.object(Config, "AI_LOCAL_MODEL", False):
+        yield svc
+    Config.DATABASE_PATH = original_db_path
+
+def test_dry_run_reports_diff_without_writing(service):
+    tagger = TaggingService()
+    result = retag_ledger(service, workers=1, dry_run=True, tagger=tagger)
+    assert result.total == 31
+    assert result.skipped == 1  # 手动标签默认不动
+    assert len(result.changes) == 31
+    assert not result.applied
+    assert "- 旧标签\n+ 出行" in format_diff(result.changes)
+    assert all(t.tags != ["出行"] for t in TransactionService().get_all_transactions())
+
+def test_apply_in_single_commit(service):
+    with patch("ledger.services.transaction_service.json.dump",
+               wraps=__import__("json").dump) as dump:
+        result = retag_ledger(service, workers=1, tagger=TaggingService())
+    assert result.applied
+    assert dump.call_count == 1
+    reloaded = {t.description: t for t in TransactionService().get_all_transactions()}
+    assert reloaded["地铁通勤0"].tags == ["出行"]
+    assert reloaded["奶茶"].tags == ["餐饮"] and reloaded["奶茶"].auto_labeled
+    assert reloaded["外卖"].tags == ["手动"]
+
+def test_include_manual_retags_everything(service):
+    result = retag_ledger(service, workers=1, include_manual=True, dry_run=True,
+                          tagger=TaggingService())
+    assert result.skipped == 0
+    assert any(c.description == "外卖" and c.new_tags == ["餐饮"] for c in result.changes)
+
+def test_process_pool_matches_single_process(service):
+    tagger = TaggingService()
+    single = retag_ledger(service, workers=1, dry_run=True, tagger=tagger)
+    pooled = retag_ledger(service, workers=2, chunk_size=8, dry_run=True, tagger=tagger)
+    assert pooled.workers == 2
+    assert [(c.transaction_id, c.new_tags) for c in pooled.changes] == \
+        [(c.transaction_id, c.new_tags) for c in single.changes]
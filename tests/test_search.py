@@ -0,0 +1,119 @@
+import copy
+import random
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+from ledger.models.transaction import Transaction
+from ledger.services import events, snapshot
+from ledger.services.lazy_rows import LazyTransactions, TransactionView
+from ledger.services.search import IncrementalFilter, TransactionQuery
+
+def _rows(n):
+    base = datetime(2025, 1, 1)
+    return [Transaction(amount=i + 1, transaction_type="INCOME" if i % 4 == 0 else "EXPENSE",
+                        description=f"{'午饭' if i % 2 else '地铁'}{i}", date=base + timedelta(days=i % 300),
+                        tags=["餐饮"] if i % 2 else ["出行"]) for i in range(n)]
+
+def _brute(rows, q):
+    out = []
+    for t in rows:
+        if q.transaction_type and t.transaction_type != q.transaction_type:
+            continue
+        if (q.start and t.date.date() < q.start) or (q.end and t.date.date() > q.end):
+            continue
+        if q.keyword and q.keyword not in t.description.lower() and not any(q.keyword in g.lower() for g in t.tags):
+            continue
+        out.append(t)
+    return out
+
+def test_narrowing_rules():
+    wide = TransactionQuery(keyword="午", start=date(2025, 1, 1), end=date(2025, 12, 31))
+    assert TransactionQuery(keyword="午饭", start=date(2025, 2, 1), end=date(2025, 12, 31)).narrows(wide)
+    assert TransactionQuery(keyword="午", transaction_type="EXPENSE", start=date(2025, 1, 1),
+                            end=date(2025, 12, 31)).narrows(wide)
+    assert not TransactionQuery(keyword="饭", start=date(2025, 1, 1), end=date(2025, 12, 31)).narrows(wide)
+    assert not TransactionQuery(keyword="午", start=date(2024, 1, 1), end=date(2025, 12, 31)).narrows(wide)
+    expense = TransactionQuery(transaction_type="EXPENSE")
+    assert not TransactionQuery(transaction_type="INCOME").narrows(expense)
+    assert not TransactionQuery().narrows(expense)
+
+def test_typing_reuses_previous_results():
+    rows = _rows(2000)
+    flt = IncrementalFilter(rows)
+    start, end = date(2025, 1, 1), date(2025, 12, 31)
+    previous = None
+    for keyword in ["", "午", "午饭", "午饭1", "午饭19"]:
+        q = TransactionQuery(keyword=keyword, start=start, end=end)
+        result = flt.run(q)
+        assert result == _brute(rows, q)
+        if previous is not None:
+            # 收窄时只检查上次的结果集
+            assert flt.last_scanned == len(previous)
+        previous = result
+    # 放宽查询回到全量扫描
+    q = TransactionQuery(keyword="地铁", start=start, end=end)
+    assert flt.run(q) == _brute(rows, q)
+    assert flt.last_scanned == len(rows)
+
+def test_abandoned_chunked_query_is_not_reused():
+    rows = _rows(1000)
+    flt = IncrementalFilter(rows)
+    steps = flt.iter_run(TransactionQuery(keyword="午饭"), chunk_size=100)
+    assert next(steps) == 100
+    steps.close()  # 被新输入取代
+    q = TransactionQuery(keyword="午饭1")
+    assert flt.run(q) == _brute(rows, q)
+    assert flt.last_scanned == len(rows)
+
+def test_keyword_matches_tags_but_not_across_fields():
+    rows = [Transaction(amount=1, transaction_type="EXPENSE", description="买菜", tags=["生活", "日用"])]
+    flt = IncrementalFilter(rows)
+    assert flt.run(TransactionQuery(keyword="日用")) == rows
+    assert flt.run(TransactionQuery(keyword="菜生")) == []
+
+def test_change_events_keep_source_and_reusable_result_in_sync():
+    rng = random.Random(3)
+    rows = _rows(500)
+    flt = IncrementalFilter(rows)
+    q = TransactionQuery(keyword="午饭", start=date(2025, 2, 1), end=date(2025, 8, 31))
+    flt.run(q)
+    for i in range(300):
+        op = rng.random()
+        if op < 0.4:
+            t = _rows(i + 1)[-1]
+            rows.append(t)
+            flt.apply(events.TransactionAdded(t))
+        elif op < 0.7:
+            t = rng.choice(rows)
+            old = copy.copy(t)
+            t.description = rng.choice(["午饭加餐", "地铁", "晚饭"])
+            flt.apply(events.TransactionUpdated(old, t, ("description",)))
+        else:
+            t = rows.pop(rng.randrange(len(rows)))
+            flt.apply(events.TransactionDeleted(t))
+        assert flt.run(q) == _brute(rows, q)
+    assert flt.source == rows
+    assert flt.last_scanned < len(rows)  # 结果仍可复用
+
+def test_lazy_view_is_filtered_by_rows_without_hydrating():
+    rows = _rows(500)
+    flt = IncrementalFilter(LazyTransactions(snapshot.to_rows(rows), cache_size=0).view())
+    q = TransactionQuery(keyword="午饭1", transaction_type="EXPENSE")
+    with patch("ledger.services.snapshot.row_to_transaction", wraps=snapshot.row_to_transaction) as build:
+        result = flt.run(q)
+        assert len(flt.run(TransactionQuery(keyword="午饭12", transaction_type="EXPENSE"))) > 0
+        assert build.call_count == 0
+    assert isinstance(result, TransactionView)
+    assert [t.transaction_id for t in result] == [t.transaction_id for t in _brute(rows, q)]
+
+    # 事件携带交易对象，数据源与可复用结果中保存的是行
+    edited = copy.copy(rows[1])
+    edited.description = "地铁"
+    flt.apply(events.TransactionUpdated(rows[1], edited, ("description",)))
+    added = _rows(512)[-1]
+    flt.apply(events.TransactionAdded(added))
+    flt.apply(events.TransactionDeleted(rows[3]))
+    current = [edited if t is rows[1] else t for t in rows if t is not rows[3]] + [added]
+    assert flt.source == snapshot.to_rows(current)
+    narrowed = TransactionQuery(keyword="午饭121", transaction_type="EXPENSE")
+    assert [t.transaction_id for t in flt.run(narrowed)] == [t.transaction_id for t in _brute(current, narrowed)]
+    assert flt.last_scanned < len(current)
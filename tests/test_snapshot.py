@@ -0,0 +1,57 @@
+import json
+import os
+import pytest
+from datetime import datetime
+from ledger.config.settings import Config
+from ledger.models.transaction import Transaction
+from ledger.services import snapshot
+from ledger.services.transaction_service import TransactionService
+
+@pytest.fixture
+def db_file(tmp_path):
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "snapshot_ledger.json")
+    yield Config.DATABASE_PATH
+    Config.DATABASE_PATH = original_db_path
+
+def _write_json(path, n):
+    rows = [Transaction(amount=i + 0.25, transaction_type="EXPENSE", description=f"午饭{i}",
+                        date=datetime(2024, 1, 1, 12, i % 60), tags=["餐饮"], auto_labeled=bool(i % 2)).to_dict()
+            for i in range(n)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2)
+    return rows
+
+def test_cold_load_builds_snapshot_and_warm_load_uses_it(db_file, monkeypatch):
+    expected = _write_json(db_file, 50)
+    cold = TransactionService.read_transactions(db_file)
+    assert snapshot.wait_rebuild(5)
+    assert os.path.exists(snapshot.snapshot_path(db_file))
+
+    def no_parse(_data):
+        raise AssertionError("快照有效时不应解析 JSON")
+    monkeypatch.setattr(Transaction, "from_dict", no_parse)
+    warm = TransactionService.read_transactions(db_file)
+    assert [t.to_dict() for t in warm] == [t.to_dict() for t in cold] == expected
+
+def test_stale_or_corrupt_snapshot_falls_back_to_json(db_file):
+    _write_json(db_file, 10)
+    TransactionService.read_transactions(db_file)
+    assert snapshot.wait_rebuild(5)
+    # 同样大小的内容修改：只有摘要能发现
+    with open(db_file, "r+", encoding="utf-8") as f:
+        text = f.read().replace("午饭3", "晚饭3")
+        f.seek(0)
+        f.write(text)
+    assert TransactionService.read_transactions(db_file)[3].description == "晚饭3"
+    assert snapshot.wait_rebuild(5)
+
+    with open(snapshot.snapshot_path(db_file), "wb") as f:
+        f.write(b"not a pickle")
+    assert len(TransactionService.read_transactions(db_file)) == 10
+
+def test_save_refreshes_snapshot(db_file):
+    ts = TransactionService()
+    ts.add_transaction(Transaction(amount=9.5, transaction_type="INCOME", description="红包", tags=["其他"]))
+    loaded = snapshot.load(db_file, snapshot.source_key(db_file))
+    assert loaded is not None and loaded[0].description == "红包" and loaded[0].tags == ["其他"]
@@ -0,0 +1,106 @@
+import json
+import pytest
+from unittest.mock import patch
+from ledger.devtools.fake_openai import FakeOpenAIServer
+from ledger.services.ai_service import AICommandService, AIOperation
+from ledger.services.tag_backfill import TagBackfillWorker
+from ledger.services.tagging_service import TaggingService
+from ledger.services.transaction_service import TransactionService
+from ledger.services.metrics import registry
+from ledger.config.settings import Config
+
+@pytest.fixture
+def fake_ai(tmp_path):
+    server = FakeOpenAIServer(seed=1).start()
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "backfill_ledger.json")
+    registry.reset()
+    with patch.multiple(Config, AI_ENABLED=True, AI_AUTO_TAG_WITH_LLM=True, AI_LOCAL_MODEL=False,
+                        OPENAI_BASE_URL=server.base_url, OPENAI_API_KEY="test", OPENAI_MODEL="fake"):
+        yield server
+    Config.DATABASE_PATH = original_db_path
+    registry.reset()
+    server.stop()
+
+def _add_ops():
+    return [
+        AIOperation(op_type="ADD", amount=80, transaction_type="EXPENSE", description="和同事聚会"),
+        AIOperation(op_type="ADD", amount=36, transaction_type="EXPENSE", description="看电影"),
+        AIOperation(op_type="ADD", amount=20, transaction_type="EXPENSE", description="外卖午餐", tags=["工作餐"]),
+    ]
+
+def test_execute_does_not_wait_for_llm(fake_ai):
+    fake_ai.script = [json.dumps({"1": ["聚会"], "2": ["娱乐", "电影"]}, ensure_ascii=False)]
+    ts = TransactionService()
+    worker = TagBackfillWorker(ts, tagger=TaggingService(), max_wait=0)
+    ai = AICommandService(ts, backfill=worker)
+    result = ai.execute_operations(_add_ops())
+
+    # 第一阶段：不访问 LLM，只写入规则标签并标记为自动标签
+    assert fake_ai.stats["requests"] == 0
+    first, second, explicit = (ts.get_transaction(tid) for tid in result["added"])
+    assert first.auto_labeled and second.auto_labeled
+    assert not explicit.auto_labeled
+    assert worker.stats()["depth"] == 2
+
+    # 第二阶段：两条待办合并为一次批量调用，一次写回
+    applied = []
+    worker.on_applied = applied.extend
+    worker.start()
+    assert worker.drain(timeout=10)
+    worker.stop()
+    assert fake_ai.stats["requests"] == 1
+    assert sorted(applied) == sorted(result["added"][:2])
+    reloaded = TransactionService()
+    assert reloaded.get_transaction(first.transaction_id).tags == ["聚会"]
+    assert reloaded.get_transaction(second.transaction_id).tags == ["娱乐", "电影"]
+    assert registry.histogram("tag_backfill.lag_ms").count == 2
+
+def test_queue_survives_restart_and_respects_manual_edits(fake_ai):
+    ts = TransactionService()
+    worker = TagBackfillWorker(ts, tagger=TaggingService())
+    ai = AICommandService(ts, backfill=worker)
+    ids = ai.execute_operations(_add_ops()[:2])["added"]
+    # 用户在回填前手动修改了第二条的标签
+    ts.update_transaction(ids[1], tags=["手动"], auto_labeled=False)
+
+    restarted = TagBackfillWorker(TransactionService(), tagger=TaggingService())
+    assert restarted.stats()["depth"] == 2
+    applied = restarted.process_batch(list(ids))
+    assert applied == [ids[0]]
+    assert restarted.stats()["depth"] == 0
+    final = TransactionService()
+    assert final.get_transaction(ids[0]).tags == ["其他"]
+    assert final.get_transaction(ids[1]).tags == ["手动"]
+
+def test_failed_batches_retry_then_drop(fake_ai):
+    fake_ai.error_rate = 1.0
+    ts = TransactionService()
+    worker = TagBackfillWorker(ts, tagger=TaggingService(), max_attempts=2)
+    ai = AICommandService(ts, backfill=worker)
+    ids = ai.execute_operations(_add_ops()[:1])["added"]
+    with patch("ledger.services.llm_client.time.sleep"), patch("ledger.services.tag_backfill.time.sleep"):
+        assert worker.process_batch(ids) == []
+        assert worker.stats()["depth"] == 1
+        worker.process_batch(ids)
+    stats = worker.stats()
+    assert stats["depth"] == 0
+    assert stats["failed"] == 1
+    assert registry.counter("tag_backfill.failed") == 1
+
+def test_edits_during_llm_call_are_not_overwritten(fake_ai):
+    ts = TransactionService()
+    tagger = TaggingService()
+    worker = TagBackfillWorker(ts, tagger=tagger)
+    ids = AICommandService(ts, backfill=worker).execute_operations(_add_ops()[:2])["added"]
+
+    def slow_llm(items):
+        # LLM 返回前：用户手动改了第一条的标签，第二条被删除
+        ts.update_transaction(ids[0], tags=["手动"], auto_labeled=False)
+        ts.delete_transaction(ids[1])
+        return [["聚会"], ["娱乐"]]
+
+    with patch.object(tagger, "suggest_tags_llm_batch", side_effect=slow_llm):
+        assert worker.process_batch(list(ids)) == []
+    assert TransactionService().get_transaction(ids[0]).tags == ["手动"]
+    assert worker.stats()["depth"] == 0
@@ -0,0 +1,140 @@
+import os
+import random
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from ledger.models.transaction import Transaction
+from ledger.services.tag_classifier import ModelStore, TagClassifier, evaluate
+from ledger.services.tagging_service import TaggingService
+
+SAMPLES = {
+    "宠物": ["猫粮", "狗粮", "宠物医院驱虫", "猫砂", "宠物洗澡"],
+    "学习": ["网课会员", "买专业书", "考试报名费", "英语课", "打印资料"],
+    "娱乐": ["电影票", "KTV唱歌", "游戏充值", "演唱会门票", "剧本杀"],
+}
+
+def _history(n=300, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        tag = rng.choice(list(SAMPLES))
+        desc = rng.choice(SAMPLES[tag]) + rng.choice(["", "一次", "（周末）", "-补"])
+        rows.append(Transaction(amount=10.0, transaction_type="EXPENSE", description=desc, tags=[tag]))
+    return rows
+
+@pytest.fixture
+def classifier():
+    model = TagClassifier()
+    model.fit(_history())
+    return model
+
+def test_predict_learned_tags(classifier):
+    assert classifier.predict("买了一袋猫粮", "EXPENSE") == ["宠物"]
+    assert classifier.predict("周末看电影票", "EXPENSE")[0] == "娱乐"
+    # 没有任何已知特征时不给出预测
+    assert classifier.predict("zzz", "EXPENSE") == []
+
+def test_partial_fit_dedupes_by_id(classifier):
+    rows = _history(10, seed=1)
+    assert classifier.partial_fit(rows) == 10
+    assert classifier.partial_fit(rows) == 0
+
+def _counts(model):
+    return model.docs, model.tag_docs, model.tag_totals, model.features
+
+def test_edited_transaction_is_relearned():
+    rows = _history()
+    model, fresh = TagClassifier(), TagClassifier()
+    model.fit(rows)
+    fresh.fit(rows)
+    t = Transaction(amount=10.0, transaction_type="EXPENSE", description="猫粮会员", tags=["宠物"])
+    assert model.partial_fit([t]) == 1
+    t.tags = ["学习"]  # 用户更正了标签
+    assert model.partial_fit([t]) == 1
+    assert model.partial_fit([t]) == 0
+    fresh.partial_fit([t])
+    assert _counts(model) == _counts(fresh)  # 与直接学习更正后的样本等价
+    t.tags = []
+    assert model.partial_fit([t]) == 1
+    assert t.transaction_id not in model.seen_ids
+    baseline = TagClassifier()
+    baseline.fit(rows)
+    assert _counts(model) == _counts(baseline)  # 完全撤销
+
+def test_legacy_model_keeps_seen_ids():
+    rows = _history()
+    model = TagClassifier()
+    model.fit(rows)
+    data = model.to_dict()
+    data["seen_ids"] = sorted(data.pop("learned"))
+    legacy = TagClassifier.from_dict(data)
+    assert legacy.seen_ids == model.seen_ids
+    assert legacy.partial_fit(rows) == 0  # 旧版只记录了 ID：不重复学习
+
+def test_save_and_load(tmp_path, classifier):
+    path = str(tmp_path / "model.json")
+    classifier.save(path)
+    loaded = TagClassifier.load(path)
+    assert loaded.predict("狗粮", "EXPENSE") == classifier.predict("狗粮", "EXPENSE")
+    assert loaded.seen_ids == classifier.seen_ids
+    assert TagClassifier.load(str(tmp_path / "missing.json")) is None
+
+def test_evaluate_report():
+    report = evaluate(_history(500), holdout=0.2)
+    assert report["test_rows"] == 100
+    assert report["accuracy"] > 0.9
+    assert report["coverage"] > 0.8
+    assert report["latency_us_p50"] < 1000
+
+@patch('ledger.config.Config.AI_ENABLED', True)
+@patch('ledger.config.Config.AI_AUTO_TAG_WITH_LLM', True)
+@patch('openai.OpenAI')
+def test_local_model_consulted_before_llm(mock_openai, classifier):
+    tagger = TaggingService(classifier=classifier)
+    assert tagger.suggest_tags("猫粮", "EXPENSE") == ["宠物"]
+    mock_openai.assert_not_called()
+
+def test_learn_persists_model(tmp_path):
+    path = str(tmp_path / "model.json")
+    tagger = TaggingService(model_path=path)
+    assert tagger.learn(_history(50)) == 50
+    assert TaggingService(model_path=path).suggest_tags("考试报名费", "EXPENSE") == ["学习"]
+
+def test_taggers_share_one_model_per_path(tmp_path):
+    path = str(tmp_path / "model.json")
+    first, second = TaggingService(model_path=path), TaggingService(model_path=path)
+    rows = _history(60)
+    assert first.learn(rows[:30]) == 30
+    assert second.learn(rows[30:]) == 30  # 不会覆盖 first 学到的样本
+    assert first.classifier is second.classifier
+    assert TagClassifier.load(path).seen_ids == {t.transaction_id for t in rows}
+
+def test_save_merges_model_written_by_other_process(tmp_path):
+    path = str(tmp_path / "model.json")
+    ours, theirs = ModelStore(path), ModelStore(path)  # 模拟两个进程各自的内存模型
+    ours.get()
+    rows = _history(40)
+    theirs.learn(rows[:20])
+    assert theirs.save()
+    ours.learn(rows[20:])
+    assert ours.save()
+    assert TagClassifier.load(path).seen_ids == {t.transaction_id for t in rows}
+    assert ours.get().seen_ids == {t.transaction_id for t in rows}
+    assert not ours.save()  # 没有未保存的样本
+
+def test_deferred_learning_saves_in_background(tmp_path):
+    path = str(tmp_path / "model.json")
+    tagger = TaggingService(model_path=path)
+    with patch("ledger.services.tag_classifier.SAVE_DELAY", 60):
+        assert tagger.learn(_history(10), deferred=True) == 10
+        assert tagger.learn(_history(5, seed=1), deferred=True) == 5
+    assert not os.path.exists(path)  # 尚未写盘
+    tagger.flush_model()
+    assert len(TagClassifier.load(path).seen_ids) == 15
+
+    with patch("ledger.services.tag_classifier.SAVE_DELAY", 0.01):
+        tagger.learn(_history(5, seed=2), deferred=True)
+    deadline = time.time() + 5
+    while len(TagClassifier.load(path).seen_ids) < 20 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(TagClassifier.load(path).seen_ids) == 20 and not tagger.model_store.dirty
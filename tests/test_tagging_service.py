@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import MagicMock, patch
 from ledger.services.tagging_service import TaggingService
 from ledger.config import Config
+from ledger.models.transaction import Transaction
 
 @pytest.fixture
 def tagging_service():
@@ -63,3 +64,10 @@ def test_suggest_tags_empty_description(tagging_service):
     # 15. 空描述处理
     assert tagging_service.suggest_tags(None) == []
     assert tagging_service.suggest_tags("") == []
+
+def test_load_model_false_ignores_model_file(tmp_path):
+    path = str(tmp_path / "model.json")
+    TaggingService(model_path=path).learn(
+        [Transaction(amount=5.0, transaction_type="EXPENSE", description="猫粮", tags=["宠物"])])
+    assert TaggingService(model_path=path).classifier is not None
+    assert TaggingService(model_path=path, load_model=False).classifier is None
@@ -0,0 +1,61 @@
+from ledger.models.transaction import Transaction
+
+def _rows(n):
+    return [Transaction(amount=i + 0.5, transaction_type="INCOME" if i % 2 else "EXPENSE",
+                        description=f"交易{i}", tags=["餐饮"] if i % 3 else []) for i in range(n)]
+
+def test_model_serves_cells_on_demand(qapp):
+    from PyQt5.QtCore import Qt
+    from ledger.ui.transaction_table import TransactionTableModel
+    model = TransactionTableModel()
+    model.set_transactions(_rows(20000))
+    assert model.rowCount() == 20000
+    assert model.index(1, 1).data() == "收入"
+    assert model.index(1, 2).data() == "¥1.50"
+    assert model.index(0, 4).data() == "-"
+    assert model.index(1, 4).data() == "餐饮"
+    # 字体与画刷复用同一对象，而不是每个单元格新建
+    font_role, brush_role = Qt.ItemDataRole.FontRole, Qt.ItemDataRole.ForegroundRole
+    assert model.data(model.index(0, 0), font_role) is model.data(model.index(999, 0), font_role)
+    assert model.data(model.index(1, 2), brush_role) is model.data(model.index(3, 1), brush_role)
+
+def test_action_clicks_resolve_to_transactions(qapp):
+    from ledger.ui.transaction_table import TransactionTableView
+    rows = _rows(50)
+    view = TransactionTableView()
+    view.set_transactions(rows)
+    edited, deleted = [], []
+    view.edit_requested.connect(edited.append)
+    view.delete_requested.connect(deleted.append)
+    view.action_delegate.edit_clicked.emit(7)
+    view.action_delegate.delete_clicked.emit(8)
+    view.action_delegate.delete_clicked.emit(500)  # 越界行被忽略
+    assert edited == [rows[7]]
+    assert deleted == [rows[8]]
+    # 操作列不为每行创建控件
+    assert view.indexWidget(view.table_model.index(0, 5)) is None
+
+def test_update_transactions_emits_minimal_diffs(qapp):
+    from ledger.ui.transaction_table import TransactionTableModel
+    rows = _rows(1000)
+    model = TransactionTableModel()
+    model.set_transactions(rows)
+    events = []
+    model.modelReset.connect(lambda: events.append("reset"))
+    model.rowsRemoved.connect(lambda _p, first, last: events.append(("removed", first, last)))
+    model.rowsInserted.connect(lambda _p, first, last: events.append(("inserted", first, last)))
+
+    narrowed = rows[:10] + rows[20:990]
+    model.update_transactions(narrowed)
+    assert events == [("removed", 990, 999), ("removed", 10, 19)]
+    assert model.transaction_at(10) is rows[20]
+
+    events.clear()
+    model.update_transactions(rows)
+    assert events == [("inserted", 10, 19), ("inserted", 990, 999)]
+    assert [model.transaction_at(i) for i in range(1000)] == rows
+
+    events.clear()
+    model.update_transactions(rows[::2])  # 过于分散，直接重置
+    assert events == ["reset"]
+    assert model.rowCount() == 500
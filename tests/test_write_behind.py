@@ -0,0 +1,99 @@
+import json
+import time
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from ledger.config.settings import Config
+from ledger.models.transaction import Transaction
+from ledger.services.transaction_service import TransactionService
+
+@pytest.fixture
+def db_path(tmp_path):
+    original_db_path = Config.DATABASE_PATH
+    Config.DATABASE_PATH = str(tmp_path / "wb_ledger.json")
+    yield Config.DATABASE_PATH
+    Config.DATABASE_PATH = original_db_path
+
+def _tx(i):
+    return Transaction(amount=i + 1, transaction_type="EXPENSE", description=f"交易{i}",
+                       date=datetime(2024, 5, 1, 12, 30), tags=["餐饮"])
+
+def _saved(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+def _scheduler(monkeypatch, delay_ms, max_dirty=100):
+    monkeypatch.setattr(Config, "WRITE_BEHIND_MS", delay_ms)
+    monkeypatch.setattr(Config, "WRITE_BEHIND_MAX_DIRTY", max_dirty)
+    service = TransactionService()
+    return service, service.save_handler.__self__
+
+def test_update_with_unchanged_values_does_not_save(db_path):
+    service = TransactionService()
+    t = _tx(0)
+    service.add_transaction(t)
+    # 编辑对话框原样提交全部字段
+    fields = {k: v for k, v in vars(_tx(0)).items() if k != "transaction_id"}
+    with patch("ledger.services.transaction_service.json.dump", wraps=json.dump) as dump:
+        assert service.update_transaction(t.transaction_id, **fields)
+        assert dump.call_count == 0
+        assert service.skipped_updates == 1 and not service.dirty
+        assert service.update_transaction(t.transaction_id, **{**fields, "description": "晚饭"})
+        assert dump.call_count == 1
+    assert _saved(db_path)[0]["description"] == "晚饭"
+
+def test_write_behind_coalesces_rapid_edits(db_path, monkeypatch):
+    service, scheduler = _scheduler(monkeypatch, 200)
+    for i in range(10):
+        service.add_transaction(_tx(i))
+    assert service.dirty and service.dirty_count == 10
+    assert _saved(db_path) is None  # 合并窗口内不写盘
+    _wait_for(lambda: scheduler.flushes == 1)
+    assert len(_saved(db_path)) == 10
+    assert (scheduler.requests, scheduler.flushes, scheduler.saved_writes) == (10, 1, 9)
+    assert service.dirty_count == 0
+    scheduler.close()
+
+def test_write_behind_flushes_early_at_max_dirty(db_path, monkeypatch):
+    service, scheduler = _scheduler(monkeypatch, 60000, max_dirty=3)
+    for i in range(3):
+        service.add_transaction(_tx(i))
+    _wait_for(lambda: _saved(db_path) is not None)
+    assert len(_saved(db_path)) == 3
+    scheduler.close()
+
+def test_batch_commit_and_close_flush_synchronously(db_path, monkeypatch):
+    service, scheduler = _scheduler(monkeypatch, 60000)
+    with service.batch():
+        for i in range(5):
+            service.add_transaction(_tx(i))
+    assert len(_saved(db_path)) == 5 and not service.dirty
+
+    service.delete_transaction(service.get_all_transactions()[0].transaction_id)
+    assert len(_saved(db_path)) == 5
+    scheduler.close()
+    assert len(_saved(db_path)) == 4
+    assert service.save_handler is None  # 关闭后恢复同步保存
+
+def test_replacing_save_handler_stops_write_behind(db_path, monkeypatch):
+    service, scheduler = _scheduler(monkeypatch, 60000)
+    service.add_transaction(_tx(0))
+    thread = scheduler._thread
+    assert thread.is_alive() and _saved(db_path) is None
+    # 界面用 PersistenceWorker 接管保存
+    requests = []
+    service.set_save_handler(requests.append)
+    assert not thread.is_alive()
+    assert len(_saved(db_path)) == 1  # 调度器名下的修改已写入
+    assert service.save_handler == requests.append
+    service.add_transaction(_tx(1))
+    assert requests == [False] and scheduler.requests == 1